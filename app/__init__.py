@@ -49,6 +49,20 @@ def create_app(config_name=None):
     from app.utils.monitoring import error_handler
     error_handler.init_app(app)
     
+    # Record logged-in activity in memory and write it in batches
+    if app.config.get('ACTIVITY_TRACKING_ENABLED', True):
+        from app.utils.activity import init_activity_tracking
+        init_activity_tracking(app)
+    
+    # Drop cached league roles and cached pages when their rows change, and
+    # bump the content versions behind page ETags
+    from app.utils.memberships import register_membership_events
+    from app.utils.cache import register_cache_events
+    from app.utils.http_cache import register_content_version_events
+    register_membership_events()
+    register_cache_events()
+    register_content_version_events()
+    
     # Register blueprints
     from app.routes.main import main as main_blueprint
     app.register_blueprint(main_blueprint)
@@ -68,6 +82,9 @@ def create_app(config_name=None):
     from app.routes.health import health as health_blueprint
     app.register_blueprint(health_blueprint)
     
+    from app.routes.jobs import jobs as jobs_blueprint
+    app.register_blueprint(jobs_blueprint, url_prefix='/jobs')
+    
     from app.routes.moderation import moderation_bp
     app.register_blueprint(moderation_bp)
     
@@ -1,13 +1,34 @@
 """Database models for the Over-Under Contests application."""
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import secrets
 import json
+from flask import current_app
+from sqlalchemy import and_, case, func, inspect
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.utils.answer_masks import can_pack, pack_answers, score_masks, unpack_answers
+from app.utils.audit_writer import get_active_writer
+from app.utils.ranking import assign_ranks, fetch_page, fetch_user_row, ranked_subquery
+from app.utils.scoring_engine import score_contest_rows
 
 
 
+def _load_users(user_ids) -> dict:
+    """Load users by ID in a single query.
+    
+    Args:
+        user_ids: Iterable of user IDs
+        
+    Returns:
+        dict: user_id -> User
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {user.user_id: user for user in User.query.filter(User.user_id.in_(user_ids)).all()}
+
+
 class User(db.Model):
     """User model for storing user account information."""
     
@@ -178,6 +199,21 @@ class Contest(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     is_ai_generated = db.Column(db.Boolean, default=False, nullable=False)
     
+    # Packed answer key (bit i = i-th question in question order), None until packed
+    answer_key_set_mask = db.Column(db.BigInteger, nullable=True)  # Questions with an answer set
+    answer_key_yes_mask = db.Column(db.BigInteger, nullable=True)  # Questions whose answer is Yes
+    
+    # Finalization (see app.utils.finalization)
+    finalization_status = db.Column(db.String(20), nullable=True)  # None, 'running', 'rerun', 'complete', 'failed'
+    finalization_stage = db.Column(db.String(20), nullable=True)  # Last completed stage
+    finalization_started_at = db.Column(db.DateTime, nullable=True)  # Lease, refreshed after each stage
+    finalized_at = db.Column(db.DateTime, nullable=True)  # When the last finalization completed
+    results_notified_at = db.Column(db.DateTime, nullable=True)  # When results emails were sent
+    
+    # Bumped whenever the contest's pages change (see app.utils.http_cache)
+    content_version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    content_updated_at = db.Column(db.DateTime, nullable=True)
+    
     # Moderation fields
     moderation_status = db.Column(db.String(20), default='approved', nullable=False)  # 'approved', 'flagged', 'blocked', 'pending'
     moderation_notes = db.Column(db.Text, nullable=True)  # Notes from moderation review
@@ -185,6 +221,10 @@ class Contest(db.Model):
     reviewed_at = db.Column(db.DateTime, nullable=True)  # When content was reviewed
     reviewed_by_user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)  # Who reviewed it
     
+    __table_args__ = (
+        db.Index('idx_contests_creator_created', 'created_by_user', 'created_at'),
+    )
+    
     # Relationships
     questions = db.relationship('Question', backref='contest', lazy='dynamic', cascade='all, delete-orphan')
     entries = db.relationship('ContestEntry', backref='contest', lazy='dynamic', cascade='all, delete-orphan')
@@ -232,12 +272,22 @@ class Contest(db.Model):
         Returns:
             List[dict]: Leaderboard data with user info and scores
         """
+        questions = self.get_questions_ordered()
+        
+        min_entries = current_app.config.get('MATRIX_SCORING_MIN_ENTRIES', 1000)
+        if self.entries.count() >= min_entries:
+            return self.get_matrix_leaderboard(questions)
+        
+        answer_key_masks = self.get_answer_key_masks(questions)
+        
         leaderboard = []
         for entry in self.entries.all():
-            score_data = entry.calculate_score()
+            score_data = entry.calculate_score(questions, answer_key_masks)
             leaderboard.append({
                 'user': entry.user,
+                'user_id': entry.user_id,
                 'entry': entry,
+                'created_at': entry.created_at,
                 'score': score_data['correct_answers'],
                 'correct_answers': score_data['correct_answers'],
                 'total_questions': score_data['total_questions'],
@@ -247,8 +297,265 @@ class Contest(db.Model):
         
         # Sort by correct answers (desc), then by percentage (desc)
         leaderboard.sort(key=lambda x: (x['correct_answers'], x['percentage']), reverse=True)
+        return assign_ranks(leaderboard, key=lambda x: (x['correct_answers'], x['percentage']))
+    
+    def _ranked_entries(self, method: str = 'rank', tie_breakers: tuple = ()):
+        """Build the ranked entries subquery for this contest.
+        
+        Args:
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties, e.g. ('updated_at',)
+                for earliest final save first; '-' prefix for descending
+            
+        Returns:
+            Subquery: One row per entry with correct_answers, rank and position
+        """
+        correct = func.coalesce(func.sum(case(
+            (and_(Question.correct_answer.isnot(None), EntryAnswer.user_answer == Question.correct_answer), 1),
+            else_=0
+        )), 0)
+        
+        scores = db.session.query(
+            ContestEntry.entry_id,
+            ContestEntry.user_id,
+            ContestEntry.created_at,
+            ContestEntry.updated_at,
+            correct.label('correct_answers')
+        ).outerjoin(
+            EntryAnswer, EntryAnswer.entry_id == ContestEntry.entry_id
+        ).outerjoin(
+            Question, Question.question_id == EntryAnswer.question_id
+        ).filter(
+            ContestEntry.contest_id == self.contest_id
+        ).group_by(
+            ContestEntry.entry_id, ContestEntry.user_id, ContestEntry.created_at, ContestEntry.updated_at
+        ).subquery('contest_scores')
+        
+        return ranked_subquery(scores, ['correct_answers'], tie_breakers, ['entry_id'], method=method)
+    
+    def _ranked_rows_to_dicts(self, rows: list) -> List[dict]:
+        """Convert ranked entry rows into leaderboard dictionaries.
+        
+        Args:
+            rows (list): Rows from the ranked entries subquery
+            
+        Returns:
+            List[dict]: Leaderboard rows with user info and scores
+        """
+        questions = self.get_questions_ordered()
+        answered_questions = len([q for q in questions if q.has_answer()])
+        users = _load_users(row.user_id for row in rows)
+        
+        leaderboard = []
+        for row in rows:
+            percentage = (row.correct_answers / answered_questions * 100) if answered_questions > 0 else 0
+            leaderboard.append({
+                'user': users.get(row.user_id),
+                'user_id': row.user_id,
+                'entry_id': row.entry_id,
+                'score': row.correct_answers,
+                'correct_answers': row.correct_answers,
+                'total_questions': len(questions),
+                'answered_questions': answered_questions,
+                'percentage': round(percentage, 1),
+                'created_at': row.created_at,
+                'rank': row.rank,
+                'position': row.position
+            })
         return leaderboard
     
+    def get_ranked_leaderboard(self, page: int = 1, per_page: int = 25,
+                               method: str = 'rank', tie_breakers: tuple = ()) -> List[dict]:
+        """Get one page of the leaderboard, ranked in the database.
+        
+        Args:
+            page (int): 1-based page number
+            per_page (int): Rows per page
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties (see _ranked_entries)
+            
+        Returns:
+            List[dict]: Leaderboard rows for the page, including rank and position
+        """
+        ranked = self._ranked_entries(method, tie_breakers)
+        return self._ranked_rows_to_dicts(fetch_page(ranked, page, per_page))
+    
+    def get_user_rank(self, user_id: int, method: str = 'rank', tie_breakers: tuple = ()) -> Optional[dict]:
+        """Get a single user's leaderboard row, ranked against the whole field.
+        
+        Args:
+            user_id (int): User ID
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties (see _ranked_entries)
+            
+        Returns:
+            Optional[dict]: The user's leaderboard row, or None if they have no entry
+        """
+        row = fetch_user_row(self._ranked_entries(method, tie_breakers), user_id)
+        if row is None:
+            return None
+        return self._ranked_rows_to_dicts([row])[0]
+    
+    def get_answer_rows(self) -> List[tuple]:
+        """Load every answer for this contest in a single query.
+        
+        Returns:
+            List[tuple]: (entry_id, question_id, user_answer) rows; entries with no
+            saved answers appear once with question_id and user_answer set to None
+        """
+        return db.session.query(
+            ContestEntry.entry_id, EntryAnswer.question_id, EntryAnswer.user_answer
+        ).outerjoin(
+            EntryAnswer, EntryAnswer.entry_id == ContestEntry.entry_id
+        ).filter(
+            ContestEntry.contest_id == self.contest_id
+        ).all()
+    
+    def score_entries_matrix(self, questions: Optional[List['Question']] = None,
+                             use_numpy: Optional[bool] = None) -> List[dict]:
+        """Score all entries at once with the answer matrix engine.
+        
+        Args:
+            questions (List[Question], optional): Ordered questions, loaded if not given
+            use_numpy (bool, optional): Force NumPy on/off, defaults to whether it is installed
+            
+        Returns:
+            List[dict]: entry_id, correct_answers, total_questions, answered_questions,
+            percentage and rank for each entry, ordered by rank
+        """
+        if questions is None:
+            questions = self.get_questions_ordered()
+        
+        return score_contest_rows(
+            self.get_answer_rows(),
+            [q.question_id for q in questions],
+            {q.question_id: q.correct_answer for q in questions},
+            use_numpy=use_numpy
+        )
+    
+    def get_matrix_leaderboard(self, questions: Optional[List['Question']] = None) -> List[dict]:
+        """Get leaderboard for this contest using the answer matrix engine.
+        
+        Returns the same rows as get_leaderboard, plus each entry's rank.
+        
+        Args:
+            questions (List[Question], optional): Ordered questions, loaded if not given
+            
+        Returns:
+            List[dict]: Leaderboard data with user info and scores
+        """
+        scores = self.score_entries_matrix(questions)
+        entries = {
+            entry.entry_id: entry
+            for entry in self.entries.options(db.joinedload(ContestEntry.user)).all()
+        }
+        
+        leaderboard = []
+        for score_data in scores:
+            entry = entries[score_data['entry_id']]
+            leaderboard.append({
+                'user': entry.user,
+                'user_id': entry.user_id,
+                'entry': entry,
+                'created_at': entry.created_at,
+                'score': score_data['correct_answers'],
+                'correct_answers': score_data['correct_answers'],
+                'total_questions': score_data['total_questions'],
+                'answered_questions': score_data['answered_questions'],
+                'percentage': score_data['percentage'],
+                'rank': score_data['rank']
+            })
+        
+        return leaderboard
+    
+    def get_answer_key_masks(self, questions: Optional[List['Question']] = None) -> Optional[Tuple[int, int]]:
+        """Get the packed answer key for this contest.
+        
+        Uses the stored masks when present, otherwise packs the current answers.
+        
+        Args:
+            questions (List[Question], optional): Ordered questions, loaded if not given
+            
+        Returns:
+            Optional[Tuple[int, int]]: (key_set_mask, key_yes_mask) or None if the
+            contest has too many questions to pack
+        """
+        if self.answer_key_set_mask is not None and self.answer_key_yes_mask is not None:
+            return self.answer_key_set_mask, self.answer_key_yes_mask
+        
+        if questions is None:
+            questions = self.get_questions_ordered()
+        if not can_pack(len(questions)):
+            return None
+        
+        return pack_answers([q.question_id for q in questions],
+                            {q.question_id: q.correct_answer for q in questions})
+    
+    def refresh_answer_key_masks(self, questions: Optional[List['Question']] = None) -> None:
+        """Recompute the stored answer key masks from the questions.
+        
+        Must be called whenever a question's correct answer changes.
+        
+        Args:
+            questions (List[Question], optional): Ordered questions, loaded if not given
+        """
+        if questions is None:
+            questions = self.get_questions_ordered()
+        
+        if not can_pack(len(questions)):
+            self.answer_key_set_mask = None
+            self.answer_key_yes_mask = None
+            return
+        
+        self.answer_key_set_mask, self.answer_key_yes_mask = pack_answers(
+            [q.question_id for q in questions],
+            {q.question_id: q.correct_answer for q in questions}
+        )
+    
+    def invalidate_answer_masks(self) -> None:
+        """Clear packed answers for the contest and its entries.
+        
+        Used when questions are recreated, since bit positions no longer line up.
+        Scoring falls back to the entry_answers rows until masks are repacked.
+        """
+        self.answer_key_set_mask = None
+        self.answer_key_yes_mask = None
+        ContestEntry.query.filter_by(contest_id=self.contest_id).update(
+            {'answered_mask': None, 'yes_mask': None},
+            synchronize_session=False
+        )
+    
+    def get_pick_distribution(self) -> dict:
+        """Get Yes/No/blank pick counts for every question.
+        
+        Reads the precomputed tallies, one row per question.
+        
+        Returns:
+            dict: question_id -> dict with yes, no, blank counts and yes_pct, no_pct
+        """
+        entry_count = self.entries.count()
+        rows = db.session.query(
+            Question.question_id, QuestionPickTally.yes_count, QuestionPickTally.no_count
+        ).outerjoin(
+            QuestionPickTally, QuestionPickTally.question_id == Question.question_id
+        ).filter(
+            Question.contest_id == self.contest_id
+        ).all()
+        
+        distribution = {}
+        for question_id, yes_count, no_count in rows:
+            yes_count = yes_count or 0
+            no_count = no_count or 0
+            picked = yes_count + no_count
+            distribution[question_id] = {
+                'yes': yes_count,
+                'no': no_count,
+                'blank': max(entry_count - picked, 0),
+                'yes_pct': round(yes_count / picked * 100, 1) if picked else 0,
+                'no_pct': round(no_count / picked * 100, 1) if picked else 0
+            }
+        return distribution
+    
     def has_all_answers(self) -> bool:
         """Check if all questions have answers set.
         
@@ -272,7 +579,7 @@ class Contest(db.Model):
         Returns:
             int: Total invitation count
         """
-        return len(self.invitations)
+        return self.invitations.count()
     
     def can_send_more_invitations(self, count: int = 1) -> bool:
         """Check if more invitations can be sent (max 100 per contest).
@@ -316,6 +623,7 @@ class Question(db.Model):
     
     # Relationships
     answers = db.relationship('EntryAnswer', backref='question', lazy='dynamic', cascade='all, delete-orphan')
+    pick_tally = db.relationship('QuestionPickTally', backref='question', uselist=False, cascade='all, delete-orphan')
     
     def __repr__(self) -> str:
         """String representation of Question."""
@@ -350,6 +658,15 @@ class ContestEntry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Packed copy of the entry_answers rows (bit i = i-th question in question order), None until packed
+    answered_mask = db.Column(db.BigInteger, nullable=True)  # Questions the user answered
+    yes_mask = db.Column(db.BigInteger, nullable=True)  # Questions the user answered Yes
+    
+    # Final results, written when the contest is finalized
+    final_score = db.Column(db.Integer, nullable=True)  # Correct answers
+    final_rank = db.Column(db.Integer, nullable=True)  # Competition rank (ties share a rank)
+    final_accuracy = db.Column(db.Float, nullable=True)  # Correct answers as a percentage of answered questions
+    
     # Relationships
     answers = db.relationship('EntryAnswer', backref='entry', lazy='dynamic', cascade='all, delete-orphan')
     
@@ -368,22 +685,37 @@ class ContestEntry(db.Model):
         """
         return not self.contest.is_locked()
     
-    def calculate_score(self) -> dict:
+    def calculate_score(self, questions: Optional[List['Question']] = None,
+                        answer_key_masks: Optional[Tuple[int, int]] = None) -> dict:
         """Calculate score for this entry.
         
+        Scores with a popcount over the packed masks when both the entry and the
+        answer key are packed, otherwise compares against the entry_answers rows.
+        
+        Args:
+            questions (List[Question], optional): Ordered contest questions, loaded if not given
+            answer_key_masks (Tuple[int, int], optional): Packed answer key, loaded if not given
+            
         Returns:
             dict: Score information including correct answers, total questions, answered questions, and percentage
         """
-        questions = self.contest.get_questions_ordered()
+        if questions is None:
+            questions = self.contest.get_questions_ordered()
         total_questions = len(questions)
         answered_questions = len([q for q in questions if q.has_answer()])
-        correct_answers = 0
         
-        for question in questions:
-            # Only count questions that have answers set
-            if question.has_answer():
-                answer = self.answers.filter_by(question_id=question.question_id).first()
-                if answer and answer.user_answer == question.correct_answer:
+        if answer_key_masks is None:
+            answer_key_masks = self.contest.get_answer_key_masks(questions)
+        
+        if answer_key_masks is not None and self.has_answer_masks():
+            key_set_mask, key_yes_mask = answer_key_masks
+            correct_answers = score_masks(self.answered_mask, self.yes_mask, key_set_mask, key_yes_mask)
+        else:
+            answers = self.get_answers_dict()
+            correct_answers = 0
+            for question in questions:
+                # Only count questions that have answers set
+                if question.has_answer() and answers.get(question.question_id) == question.correct_answer:
                     correct_answers += 1
         
         percentage = (correct_answers / answered_questions * 100) if answered_questions > 0 else 0
@@ -395,6 +727,80 @@ class ContestEntry(db.Model):
             'percentage': round(percentage, 1)
         }
     
+    def has_answer_masks(self) -> bool:
+        """Check if this entry's answers have been packed into masks.
+        
+        Returns:
+            bool: True if packed masks are available
+        """
+        return self.answered_mask is not None and self.yes_mask is not None
+    
+    def refresh_answer_masks(self, questions: Optional[List['Question']] = None,
+                             answers: Optional[dict] = None) -> None:
+        """Repack this entry's answers into masks.
+        
+        EntryAnswer rows stay the source of truth; call this after writing them.
+        
+        Args:
+            questions (List[Question], optional): Ordered contest questions, loaded if not given
+            answers (dict, optional): question_id -> user_answer, loaded from entry_answers if not given
+        """
+        if questions is None:
+            questions = self.contest.get_questions_ordered()
+        
+        if not can_pack(len(questions)):
+            self.answered_mask = None
+            self.yes_mask = None
+            return
+        
+        if answers is None:
+            answers = self.get_answers_dict()
+        
+        self.answered_mask, self.yes_mask = pack_answers([q.question_id for q in questions], answers)
+    
+    def get_consensus_stats(self, distribution: Optional[dict] = None,
+                            questions: Optional[List['Question']] = None) -> dict:
+        """Compare this entry's picks against the rest of the field.
+        
+        A pick is consensus when it matches the majority of the other entries'
+        picks for the question and contrarian when it matches the minority;
+        even splits, including questions nobody else picked, count as neither.
+        Uses the pick tallies and the packed answers when available.
+        
+        Args:
+            distribution (dict, optional): Result of Contest.get_pick_distribution()
+            questions (List[Question], optional): Ordered contest questions
+            
+        Returns:
+            dict: consensus, contrarian and split counts, plus consensus_pct
+        """
+        if distribution is None:
+            distribution = self.contest.get_pick_distribution()
+        
+        if self.has_answer_masks():
+            if questions is None:
+                questions = self.contest.get_questions_ordered()
+            answers = unpack_answers([q.question_id for q in questions], self.answered_mask, self.yes_mask)
+        else:
+            answers = self.get_answers_dict()
+        
+        stats = {'consensus': 0, 'contrarian': 0, 'split': 0}
+        for question_id, user_answer in answers.items():
+            counts = distribution.get(question_id) or {'yes': 0, 'no': 0}
+            # The tallies include this entry's own pick; compare against everyone else's
+            yes_count = counts['yes'] - (user_answer is True)
+            no_count = counts['no'] - (user_answer is False)
+            if yes_count == no_count:
+                stats['split'] += 1
+            elif (yes_count > no_count) == user_answer:
+                stats['consensus'] += 1
+            else:
+                stats['contrarian'] += 1
+        
+        decided = stats['consensus'] + stats['contrarian']
+        stats['consensus_pct'] = round(stats['consensus'] / decided * 100, 1) if decided else 0
+        return stats
+    
     def get_answers_dict(self) -> dict:
         """Get answers as a dictionary keyed by question_id.
         
@@ -422,6 +828,143 @@ class EntryAnswer(db.Model):
         return f'<EntryAnswer {self.answer_id}: Entry {self.entry_id}, Question {self.question_id}>'
 
 
+class QuestionPickTally(db.Model):
+    """Running Yes/No pick counts for a question.
+    
+    Maintained incrementally by the entry write paths via apply_changes(), so
+    pick distributions never require counting entry_answers. Blank counts are
+    derived from the contest's entry count.
+    """
+    
+    __tablename__ = 'question_pick_tallies'
+    
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.question_id'), primary_key=True)
+    contest_id = db.Column(db.Integer, db.ForeignKey('contests.contest_id'), nullable=False, index=True)
+    yes_count = db.Column(db.Integer, default=0, nullable=False)
+    no_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        """String representation of QuestionPickTally."""
+        return f'<QuestionPickTally Question {self.question_id}: {self.yes_count} yes, {self.no_count} no>'
+    
+    @classmethod
+    def _insert(cls):
+        """Start an INSERT with the session database's ON CONFLICT support."""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(cls.__table__)
+    
+    @classmethod
+    def apply_changes(cls, contest_id: int, changes: List[Tuple[int, Optional[bool], Optional[bool]]]) -> None:
+        """Apply answer changes to the tallies.
+        
+        Call after the EntryAnswer rows have been written. Each change is
+        (question_id, old_answer, new_answer) with None meaning unanswered.
+        Questions without a tally row yet get one counted from entry_answers,
+        which already includes the change. That insert is an upsert, so when
+        the first pickers of a question race, the loser adds its change to
+        the winner's row instead of failing on the primary key.
+        
+        Args:
+            contest_id (int): Contest ID
+            changes (List[Tuple[int, Optional[bool], Optional[bool]]]): Answer changes
+        """
+        deltas = {}
+        for question_id, old_answer, new_answer in changes:
+            if old_answer == new_answer:
+                continue
+            yes_delta, no_delta = deltas.get(question_id, (0, 0))
+            if old_answer is True:
+                yes_delta -= 1
+            elif old_answer is False:
+                no_delta -= 1
+            if new_answer is True:
+                yes_delta += 1
+            elif new_answer is False:
+                no_delta += 1
+            deltas[question_id] = (yes_delta, no_delta)
+        
+        deltas = {question_id: delta for question_id, delta in deltas.items() if delta != (0, 0)}
+        if not deltas:
+            return
+        
+        db.session.flush()
+        for question_id, (yes_delta, no_delta) in deltas.items():
+            updated = cls.query.filter_by(question_id=question_id).update({
+                'yes_count': cls.yes_count + yes_delta,
+                'no_count': cls.no_count + no_delta,
+                'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            if updated:
+                continue
+            
+            # One aggregate row even when nothing is answered; the WHERE
+            # clause also keeps SQLite from misparsing ON CONFLICT
+            recount = db.select(
+                db.literal(question_id),
+                db.literal(contest_id),
+                func.coalesce(func.sum(case((EntryAnswer.user_answer.is_(True), 1), else_=0)), 0),
+                func.coalesce(func.sum(case((EntryAnswer.user_answer.is_(False), 1), else_=0)), 0),
+                db.literal(datetime.utcnow())
+            ).where(EntryAnswer.question_id == question_id)
+            table = cls.__table__
+            db.session.execute(
+                cls._insert().from_select(
+                    ['question_id', 'contest_id', 'yes_count', 'no_count', 'updated_at'], recount
+                ).on_conflict_do_update(index_elements=['question_id'], set_={
+                    'yes_count': table.c.yes_count + yes_delta,
+                    'no_count': table.c.no_count + no_delta,
+                    'updated_at': datetime.utcnow()
+                })
+            )
+    
+    @classmethod
+    def rebuild(cls, contest_id: int, question_ids: Optional[List[int]] = None) -> int:
+        """Recount tallies from entry_answers.
+        
+        Args:
+            contest_id (int): Contest ID
+            question_ids (List[int], optional): Limit to these questions, defaults to all
+            
+        Returns:
+            int: Number of tally rows written
+        """
+        question_query = db.session.query(Question.question_id).filter(Question.contest_id == contest_id)
+        if question_ids is not None:
+            question_query = question_query.filter(Question.question_id.in_(question_ids))
+        all_question_ids = [question_id for (question_id,) in question_query.all()]
+        if not all_question_ids:
+            return 0
+        
+        counts = dict.fromkeys(all_question_ids, (0, 0))
+        rows = db.session.query(
+            EntryAnswer.question_id,
+            func.sum(case((EntryAnswer.user_answer.is_(True), 1), else_=0)),
+            func.sum(case((EntryAnswer.user_answer.is_(False), 1), else_=0))
+        ).filter(
+            EntryAnswer.question_id.in_(all_question_ids)
+        ).group_by(EntryAnswer.question_id).all()
+        for question_id, yes_count, no_count in rows:
+            counts[question_id] = (yes_count or 0, no_count or 0)
+        
+        now = datetime.utcnow()
+        statement = cls._insert().values([
+            {'question_id': question_id, 'contest_id': contest_id, 'yes_count': yes_count,
+             'no_count': no_count, 'updated_at': now}
+            for question_id, (yes_count, no_count) in counts.items()
+        ])
+        db.session.execute(statement.on_conflict_do_update(index_elements=['question_id'], set_={
+            'yes_count': statement.excluded.yes_count,
+            'no_count': statement.excluded.no_count,
+            'updated_at': statement.excluded.updated_at
+        }))
+        
+        return len(counts)
+
+
 class ContestInvitation(db.Model):
     """Model for contest invitations."""
     
@@ -485,19 +1028,31 @@ class EmailLog(db.Model):
             response_body (str, optional): Response body
             user_id (int, optional): Associated user ID
             contest_id (int, optional): Associated contest ID
-        """
-        log_entry = cls(
-            recipient_email=recipient_email,
-            subject=subject,
-            email_type=email_type,
-            delivery_method=delivery_method,
-            status=status,
-            error_message=error_message,
-            response_code=response_code,
-            response_body=response_body,
-            user_id=user_id,
-            contest_id=contest_id
-        )
+        
+        Returns:
+            EmailLog: The log entry; inside an active AuditWriter it is
+            buffered for a bulk insert rather than added to the session
+        """
+        values = {
+            'recipient_email': recipient_email,
+            'subject': subject,
+            'email_type': email_type,
+            'delivery_method': delivery_method,
+            'status': status,
+            'error_message': error_message,
+            'response_code': response_code,
+            'response_body': response_body,
+            'user_id': user_id,
+            'contest_id': contest_id
+        }
+        
+        writer = get_active_writer()
+        if writer is not None:
+            values['sent_at'] = datetime.utcnow()
+            writer.add_email_log(values)
+            return cls(**values)
+        
+        log_entry = cls(**values)
         db.session.add(log_entry)
         db.session.commit()
         return log_entry
@@ -508,10 +1063,131 @@ class EmailLog(db.Model):
         return f'<ContestInvitation {self.invitation_id}: {self.invitation_type} to {recipient}>'
 
 
+class Job(db.Model):
+    """Background job stored in the database.
+    
+    Jobs are claimed by `flask worker` processes with a conditional UPDATE,
+    so no external broker is needed. See app.utils.jobs.
+    """
+    
+    __tablename__ = 'jobs'
+    
+    job_id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)  # Registered handler name
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON handler arguments
+    status = db.Column(db.String(20), default='queued', nullable=False)  # 'queued', 'running', 'succeeded', 'failed'
+    batch_id = db.Column(db.String(32), index=True)  # Groups jobs enqueued together
+    created_by_user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    
+    # Retry state
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Not claimed before this time
+    last_error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON handler result
+    
+    # Claim state
+    locked_by = db.Column(db.String(100))  # Worker that claimed the job
+    locked_at = db.Column(db.DateTime)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (db.Index('idx_jobs_status_run_at', 'status', 'run_at'),)
+    
+    def __repr__(self) -> str:
+        """String representation of Job."""
+        return f'<Job {self.job_id}: {self.job_type} - {self.status}>'
+    
+    def get_payload(self) -> dict:
+        """Get the decoded job payload.
+        
+        Returns:
+            dict: Handler arguments
+        """
+        return json.loads(self.payload) if self.payload else {}
+    
+    def to_dict(self) -> dict:
+        """Get job status for JSON responses.
+        
+        Returns:
+            dict: Job status information
+        """
+        return {
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'batch_id': self.batch_id,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class OutboxEmail(db.Model):
+    """Email waiting in the transactional outbox.
+    
+    Rows are written in the same transaction as the change that triggers the
+    email and delivered in batches by the outbox relay (app.utils.outbox).
+    """
+    
+    __tablename__ = 'email_outbox'
+    
+    outbox_id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(500), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text)
+    email_type = db.Column(db.String(50), nullable=False, default='generic')  # Same values as EmailLog.email_type
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    contest_id = db.Column(db.Integer, db.ForeignKey('contests.contest_id'))
+    
+    # Delivery state
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(32))  # Relay batch that holds the row while sending
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (db.Index('idx_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+    
+    def __repr__(self) -> str:
+        """String representation of OutboxEmail."""
+        return f'<OutboxEmail {self.outbox_id}: {self.email_type} to {self.to_email} - {self.status}>'
+    
+    def to_message(self) -> dict:
+        """Get send_email keyword arguments for this row.
+        
+        Returns:
+            dict: Message fields
+        """
+        return {
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'body': self.body,
+            'html_body': self.html_body,
+            'email_type': self.email_type,
+            'user_id': self.user_id,
+            'contest_id': self.contest_id
+        }
+
+
 class NFLSchedule(db.Model):
     """NFL schedule model for storing game schedules."""
     
     __tablename__ = 'nfl_schedules'
+    __table_args__ = (
+        db.Index('idx_nfl_schedules_season_week', 'season_year', 'week_number'),
+        db.Index('idx_nfl_schedules_teams', 'home_team', 'away_team'),
+    )
     
     schedule_id = db.Column(db.Integer, primary_key=True)
     season_year = db.Column(db.Integer, nullable=False)
@@ -566,6 +1242,42 @@ class NFLSchedule(db.Model):
         return self.get_matchup_string(self.home_team, self.away_team)
 
 
+class QuestionBankEntry(db.Model):
+    """Pre-generated NFL question for one matchup.
+    
+    The bank is filled ahead of each week by `flask generate-question-bank`
+    (app.utils.question_bank); generate_nfl_contest samples from it before
+    calling the model.
+    """
+    
+    __tablename__ = 'question_bank'
+    
+    entry_id = db.Column(db.Integer, primary_key=True)
+    season_year = db.Column(db.Integer, nullable=False)
+    week_number = db.Column(db.Integer, nullable=False)
+    home_team = db.Column(db.String(50), nullable=False)
+    away_team = db.Column(db.String(50), nullable=False)
+    game = db.Column(db.String(120), nullable=False)  # Matchup as written in the question, e.g. "Ravens vs Chiefs"
+    line_type = db.Column(db.String(20), nullable=False)  # 'spread' or 'over_under'
+    question_text = db.Column(db.String(500), nullable=False)
+    question_data = db.Column(db.Text, nullable=False)  # Generated question as JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (db.Index('idx_question_bank_week', 'season_year', 'week_number'),)
+    
+    def __repr__(self) -> str:
+        """String representation of QuestionBankEntry."""
+        return f'<QuestionBankEntry {self.season_year} Week {self.week_number}: {self.game}>'
+    
+    def get_question(self) -> dict:
+        """Get the generated question.
+        
+        Returns:
+            dict: Question in the format generate_nfl_contest returns
+        """
+        return json.loads(self.question_data)
+
+
 class League(db.Model):
     """League model for storing league information."""
     
@@ -581,6 +1293,16 @@ class League(db.Model):
     is_public = db.Column(db.Boolean, default=False, nullable=False)
     win_bonus_points = db.Column(db.Integer, default=5, nullable=False)
     
+    # Denormalized counters, kept in step by add_member/remove_member and the
+    # add/remove contest methods; `flask reconcile-league-counters` repairs drift
+    member_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    contest_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    draft_contest_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    # Bumped whenever the league's pages change (see app.utils.http_cache)
+    content_version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    content_updated_at = db.Column(db.DateTime, nullable=True)
+    
     # Moderation fields
     moderation_status = db.Column(db.String(20), default='approved', nullable=False)  # 'approved', 'flagged', 'blocked', 'pending'
     moderation_notes = db.Column(db.Text, nullable=True)  # Notes from moderation review
@@ -588,6 +1310,10 @@ class League(db.Model):
     reviewed_at = db.Column(db.DateTime, nullable=True)  # When content was reviewed
     reviewed_by_user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)  # Who reviewed it
     
+    __table_args__ = (
+        db.Index('idx_leagues_featured', 'is_active', 'is_public', 'member_count'),
+    )
+    
     # Relationships
     creator = db.relationship('User', backref='created_leagues', foreign_keys=[created_by_user])
     memberships = db.relationship('LeagueMembership', backref='league', lazy='dynamic', cascade='all, delete-orphan')
@@ -611,7 +1337,58 @@ class League(db.Model):
         Returns:
             int: Number of members in the league
         """
-        return self.memberships.count()
+        return self.member_count or 0
+    
+    def _bump_counter(self, column: str, delta: int):
+        """Adjust a counter in the database, safe against concurrent updates.
+        
+        Args:
+            column (str): Counter column name
+            delta (int): Amount to add
+        """
+        if not inspect(self).persistent:
+            setattr(self, column, (getattr(self, column) or 0) + delta)
+            return
+        
+        # Incremented in SQL so concurrent requests don't lose updates
+        db.session.execute(
+            db.update(League).where(League.league_id == self.league_id).values(
+                {column: getattr(League, column) + delta}
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.expire(self, [column])
+    
+    def add_member(self, user: 'User', is_admin: bool = False) -> 'LeagueMembership':
+        """Add a user to this league.
+        
+        Does not commit.
+        
+        Args:
+            user (User): User joining the league
+            is_admin (bool): Whether the user administers the league
+            
+        Returns:
+            LeagueMembership: The created membership
+        """
+        membership = LeagueMembership(
+            league_id=self.league_id,
+            user_id=user.user_id,
+            is_admin=is_admin
+        )
+        db.session.add(membership)
+        self._bump_counter('member_count', 1)
+        return membership
+    
+    def remove_member(self, membership: 'LeagueMembership'):
+        """Remove a membership from this league.
+        
+        Does not commit.
+        
+        Args:
+            membership (LeagueMembership): Membership to remove
+        """
+        db.session.delete(membership)
+        self._bump_counter('member_count', -1)
     
     def is_member(self, user: 'User') -> bool:
         """Check if user is a member of this league.
@@ -622,7 +1399,8 @@ class League(db.Model):
         Returns:
             bool: True if user is a member, False otherwise
         """
-        return self.memberships.filter_by(user_id=user.user_id).first() is not None
+        from app.utils.memberships import get_role
+        return get_role(self.league_id, user.user_id) is not None
     
     def is_admin(self, user: 'User') -> bool:
         """Check if user is an admin of this league.
@@ -633,8 +1411,8 @@ class League(db.Model):
         Returns:
             bool: True if user is an admin, False otherwise
         """
-        membership = self.memberships.filter_by(user_id=user.user_id).first()
-        return membership and membership.is_admin
+        from app.utils.memberships import get_role
+        return get_role(self.league_id, user.user_id) == 'admin'
     
     def get_contests(self) -> List['Contest']:
         """Get all contests in this league ordered by contest_order.
@@ -651,7 +1429,9 @@ class League(db.Model):
         Returns:
             List[DraftContest]: List of draft contests in the league
         """
-        league_draft_contests = self.league_draft_contests.order_by(LeagueDraftContest.contest_order).all()
+        league_draft_contests = LeagueDraftContest.query.filter_by(
+            league_id=self.league_id
+        ).order_by(LeagueDraftContest.contest_order).all()
         return [ldc.draft_contest for ldc in league_draft_contests]
     
     def get_all_contests(self) -> dict:
@@ -671,7 +1451,7 @@ class League(db.Model):
         Returns:
             int: Number of contests in the league
         """
-        return self.league_contests.count()
+        return self.contest_count or 0
     
     def get_draft_contest_count(self) -> int:
         """Get count of draft contests in this league.
@@ -679,7 +1459,7 @@ class League(db.Model):
         Returns:
             int: Number of draft contests in the league
         """
-        return self.league_draft_contests.count()
+        return self.draft_contest_count or 0
     
     def get_total_contest_count(self) -> int:
         """Get total count of all contests (regular + draft) in this league.
@@ -717,14 +1497,15 @@ class League(db.Model):
                 # Track who participated in this contest
                 participants = {entry['user'].user_id for entry in contest_leaderboard}
                 
-                for i, entry in enumerate(contest_leaderboard, 1):
+                for entry in contest_leaderboard:
                     user_id = entry['user'].user_id
                     if user_id in leaderboard:
                         # Add points from this contest
                         points = entry['correct_answers']
                         
-                        # Add win bonus if they won this contest
-                        if i == 1:
+                        # Add win bonus if they won (or tied for first in) this contest
+                        is_winner = entry['rank'] == 1
+                        if is_winner:
                             points += self.win_bonus_points
                             leaderboard[user_id]['contest_wins'] += 1
                         
@@ -732,9 +1513,9 @@ class League(db.Model):
                         leaderboard[user_id]['contests_completed'] += 1
                         leaderboard[user_id]['contest_details'].append({
                             'contest': contest,
-                            'position': i,
+                            'position': entry['rank'],
                             'score': entry['correct_answers'],
-                            'bonus_points': self.win_bonus_points if i == 1 else 0,
+                            'bonus_points': self.win_bonus_points if is_winner else 0,
                             'total_points': points
                         })
                 
@@ -747,7 +1528,240 @@ class League(db.Model):
         leaderboard_list = list(leaderboard.values())
         leaderboard_list.sort(key=lambda x: (x['total_points'], x['contest_wins']), reverse=True)
         
-        return leaderboard_list
+        return assign_ranks(leaderboard_list, key=lambda x: (x['total_points'], x['contest_wins']))
+    
+    def _ranked_members(self, method: str = 'rank', tie_breakers: tuple = ()):
+        """Build the ranked standings subquery for this league.
+        
+        Mirrors get_leaderboard: only locked contests with every answer set count,
+        each entry earns its correct answers, and everyone tied for first in a
+        contest earns the win bonus.
+        
+        Args:
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Standings columns that split ties, e.g. ('joined_at',);
+                '-' prefix for descending
+            
+        Returns:
+            Subquery: One row per member with total_points, contest_wins,
+            contests_completed, rank and position
+        """
+        unset_question = db.aliased(Question)
+        unanswered = db.session.query(unset_question.question_id).filter(
+            unset_question.contest_id == Contest.contest_id,
+            unset_question.correct_answer.is_(None)
+        ).exists()
+        
+        correct = func.coalesce(func.sum(case(
+            (and_(Question.correct_answer.isnot(None), EntryAnswer.user_answer == Question.correct_answer), 1),
+            else_=0
+        )), 0)
+        
+        entry_scores = db.session.query(
+            ContestEntry.contest_id,
+            ContestEntry.user_id,
+            correct.label('correct_answers')
+        ).join(
+            Contest, Contest.contest_id == ContestEntry.contest_id
+        ).join(
+            LeagueContest, LeagueContest.contest_id == Contest.contest_id
+        ).outerjoin(
+            EntryAnswer, EntryAnswer.entry_id == ContestEntry.entry_id
+        ).outerjoin(
+            Question, Question.question_id == EntryAnswer.question_id
+        ).filter(
+            LeagueContest.league_id == self.league_id,
+            Contest.lock_timestamp < datetime.utcnow(),
+            ~unanswered
+        ).group_by(
+            ContestEntry.entry_id, ContestEntry.contest_id, ContestEntry.user_id
+        ).subquery('entry_scores')
+        
+        contest_ranks = db.session.query(
+            entry_scores,
+            func.rank().over(
+                partition_by=entry_scores.c.contest_id,
+                order_by=entry_scores.c.correct_answers.desc()
+            ).label('contest_rank')
+        ).subquery('contest_ranks')
+        
+        is_win = case((contest_ranks.c.contest_rank == 1, 1), else_=0)
+        member_totals = db.session.query(
+            contest_ranks.c.user_id,
+            func.sum(contest_ranks.c.correct_answers + is_win * self.win_bonus_points).label('total_points'),
+            func.sum(is_win).label('contest_wins'),
+            func.count().label('contests_completed')
+        ).group_by(contest_ranks.c.user_id).subquery('member_totals')
+        
+        standings = db.session.query(
+            LeagueMembership.user_id,
+            LeagueMembership.joined_at,
+            func.coalesce(member_totals.c.total_points, 0).label('total_points'),
+            func.coalesce(member_totals.c.contest_wins, 0).label('contest_wins'),
+            func.coalesce(member_totals.c.contests_completed, 0).label('contests_completed')
+        ).outerjoin(
+            member_totals, member_totals.c.user_id == LeagueMembership.user_id
+        ).filter(
+            LeagueMembership.league_id == self.league_id
+        ).subquery('league_standings')
+        
+        return ranked_subquery(standings, ['total_points', 'contest_wins'], tie_breakers,
+                               ['joined_at', 'user_id'], method=method)
+    
+    def _ranked_rows_to_dicts(self, rows: list) -> List[dict]:
+        """Convert ranked standings rows into leaderboard dictionaries.
+        
+        Args:
+            rows (list): Rows from the ranked standings subquery
+            
+        Returns:
+            List[dict]: Leaderboard rows with user info and totals
+        """
+        users = _load_users(row.user_id for row in rows)
+        return [{
+            'user': users.get(row.user_id),
+            'user_id': row.user_id,
+            'total_points': row.total_points,
+            'contest_wins': row.contest_wins,
+            'contests_participated': row.contests_completed,
+            'contests_completed': row.contests_completed,
+            'rank': row.rank,
+            'position': row.position
+        } for row in rows]
+    
+    def refresh_standings(self) -> int:
+        """Store current standings on the league's memberships.
+        
+        Recomputed from scratch, so it is safe to run repeatedly.
+        
+        Returns:
+            int: Number of memberships updated
+        """
+        ranked = self._ranked_members()
+        rows = db.session.execute(db.select(ranked)).all()
+        memberships = {membership.user_id: membership for membership in self.memberships.all()}
+        
+        for row in rows:
+            membership = memberships.get(row.user_id)
+            if membership is None:
+                continue
+            membership.total_points = row.total_points
+            membership.contest_wins = row.contest_wins
+            membership.contests_completed = row.contests_completed
+            membership.standing_rank = row.rank
+        
+        return len(rows)
+    
+    def get_ranked_leaderboard(self, page: int = 1, per_page: int = 25,
+                               method: str = 'rank', tie_breakers: tuple = ()) -> List[dict]:
+        """Get one page of league standings, ranked in the database.
+        
+        Unlike get_leaderboard, rows do not include per-contest details.
+        
+        Args:
+            page (int): 1-based page number
+            per_page (int): Rows per page
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Standings columns that split ties (see _ranked_members)
+            
+        Returns:
+            List[dict]: Standings rows for the page, including rank and position
+        """
+        ranked = self._ranked_members(method, tie_breakers)
+        return self._ranked_rows_to_dicts(fetch_page(ranked, page, per_page))
+    
+    def get_user_rank(self, user_id: int, method: str = 'rank', tie_breakers: tuple = ()) -> Optional[dict]:
+        """Get a single member's standings row, ranked against the whole league.
+        
+        Args:
+            user_id (int): User ID
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Standings columns that split ties (see _ranked_members)
+            
+        Returns:
+            Optional[dict]: The member's standings row, or None if not a member
+        """
+        row = fetch_user_row(self._ranked_members(method, tie_breakers), user_id)
+        if row is None:
+            return None
+        return self._ranked_rows_to_dicts([row])[0]
+    
+    def _available_contests_query(self):
+        """Build the query for active contests by members that are not in this league yet.
+        
+        Returns:
+            Query: Rows of (contest_id, contest_name, created_at, username)
+        """
+        by_member = db.session.query(LeagueMembership.membership_id).filter(
+            LeagueMembership.league_id == self.league_id,
+            LeagueMembership.user_id == Contest.created_by_user
+        ).exists()
+        already_added = db.session.query(LeagueContest.league_contest_id).filter(
+            LeagueContest.league_id == self.league_id,
+            LeagueContest.contest_id == Contest.contest_id
+        ).exists()
+        
+        return db.session.query(
+            Contest.contest_id,
+            Contest.contest_name,
+            Contest.created_at,
+            User.username
+        ).join(
+            User, User.user_id == Contest.created_by_user
+        ).filter(
+            Contest.is_active == True,
+            by_member,
+            ~already_added
+        )
+    
+    def search_available_contests(self, search: Optional[str] = None, page: int = 1,
+                                  per_page: int = 20) -> dict:
+        """Get a page of contests that can be added to this league.
+        
+        Contests are eligible if they are active, were created by a league
+        member and are not in the league yet. Newest come first.
+        
+        Args:
+            search (str, optional): Text to match in the contest name or
+                creator's username
+            page (int): Page number, starting at 1
+            per_page (int): Contests per page
+            
+        Returns:
+            dict: 'contests' (dicts with contest_id, contest_name and creator),
+            'page' and 'has_more'
+        """
+        page = max(page, 1)
+        query = self._available_contests_query()
+        if search:
+            pattern = f'%{search}%'
+            query = query.filter(db.or_(Contest.contest_name.ilike(pattern), User.username.ilike(pattern)))
+        
+        # One extra row tells whether there is another page
+        rows = query.order_by(
+            Contest.created_at.desc(), Contest.contest_id.desc()
+        ).offset((page - 1) * per_page).limit(per_page + 1).all()
+        
+        return {
+            'contests': [{
+                'contest_id': row.contest_id,
+                'contest_name': row.contest_name,
+                'creator': row.username
+            } for row in rows[:per_page]],
+            'page': page,
+            'has_more': len(rows) > per_page
+        }
+    
+    def can_add_contest(self, contest_id: int) -> bool:
+        """Check if a contest can be added to this league.
+        
+        Args:
+            contest_id (int): Contest ID
+            
+        Returns:
+            bool: True if the contest is eligible and not in the league yet
+        """
+        return self._available_contests_query().filter(Contest.contest_id == contest_id).first() is not None
     
     def add_contest(self, contest: 'Contest') -> 'LeagueContest':
         """Add a contest to this league.
@@ -768,6 +1782,7 @@ class League(db.Model):
             contest_order=max_order + 1
         )
         db.session.add(league_contest)
+        self._bump_counter('contest_count', 1)
         return league_contest
     
     def remove_contest(self, contest: 'Contest') -> bool:
@@ -782,6 +1797,7 @@ class League(db.Model):
         league_contest = self.league_contests.filter_by(contest_id=contest.contest_id).first()
         if league_contest:
             db.session.delete(league_contest)
+            self._bump_counter('contest_count', -1)
             return True
         return False
     
@@ -804,6 +1820,7 @@ class League(db.Model):
             contest_order=max_order + 1
         )
         db.session.add(league_draft_contest)
+        self._bump_counter('draft_contest_count', 1)
         return league_draft_contest
     
     def remove_draft_contest(self, draft_contest: 'DraftContest') -> bool:
@@ -815,11 +1832,41 @@ class League(db.Model):
         Returns:
             bool: True if draft contest was removed, False if not found
         """
-        league_draft_contest = self.league_draft_contests.filter_by(draft_contest_id=draft_contest.draft_contest_id).first()
+        league_draft_contest = LeagueDraftContest.query.filter_by(
+            league_id=self.league_id,
+            draft_contest_id=draft_contest.draft_contest_id
+        ).first()
         if league_draft_contest:
             db.session.delete(league_draft_contest)
+            self._bump_counter('draft_contest_count', -1)
             return True
         return False
+    
+    @classmethod
+    def reconcile_counters(cls) -> int:
+        """Recount every league's members and contests, repairing drift.
+        
+        Returns:
+            int: Number of leagues whose counters were wrong
+        """
+        counts = {
+            'member_count': db.session.query(func.count(LeagueMembership.membership_id)).filter(
+                LeagueMembership.league_id == cls.league_id
+            ).scalar_subquery(),
+            'contest_count': db.session.query(func.count(LeagueContest.league_contest_id)).filter(
+                LeagueContest.league_id == cls.league_id
+            ).scalar_subquery(),
+            'draft_contest_count': db.session.query(func.count(LeagueDraftContest.league_draft_contest_id)).filter(
+                LeagueDraftContest.league_id == cls.league_id
+            ).scalar_subquery()
+        }
+        drifted = db.or_(*(getattr(cls, column) != count for column, count in counts.items()))
+        
+        repaired = db.session.execute(
+            db.update(cls).where(drifted).values(**counts).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return repaired
 
 
 class LeagueMembership(db.Model):
@@ -833,6 +1880,12 @@ class LeagueMembership(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     
+    # Standings, refreshed by League.refresh_standings() when a league contest is finalized
+    total_points = db.Column(db.Integer, default=0, nullable=False)
+    contest_wins = db.Column(db.Integer, default=0, nullable=False)
+    contests_completed = db.Column(db.Integer, default=0, nullable=False)
+    standing_rank = db.Column(db.Integer, nullable=True)
+    
     # Relationships
     user = db.relationship('User', backref='league_memberships')
     
@@ -905,12 +1958,13 @@ class LoginToken(db.Model):
         db.session.commit()
     
     @classmethod
-    def create_token(cls, email: str, expiration_minutes: int = 30) -> 'LoginToken':
+    def create_token(cls, email: str, expiration_minutes: int = 30, commit: bool = True) -> 'LoginToken':
         """Create a new login token for the given email.
         
         Args:
             email (str): Email address
             expiration_minutes (int): Token expiration time in minutes
+            commit (bool): Commit the token; pass False to commit it with the login email
             
         Returns:
             LoginToken: New login token instance
@@ -921,7 +1975,8 @@ class LoginToken(db.Model):
             expires_at=datetime.utcnow() + timedelta(minutes=expiration_minutes)
         )
         db.session.add(token)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return token
     
     @classmethod
@@ -1076,7 +2131,7 @@ class UserVerification(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     verification_type = db.Column(db.String(50), nullable=False)  # 'identity', 'email', 'phone', 'document'
     verification_level = db.Column(db.String(20), nullable=False)  # 'basic', 'enhanced', 'premium'
-    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'approved', 'rejected', 'expired'
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'approved', 'rejected', 'revoked', 'expired'
     
     # Verification data
     submitted_data = db.Column(db.JSON, nullable=True)  # Data submitted for verification
@@ -1133,6 +2188,7 @@ class UserVerification(db.Model):
             self.expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
         
         db.session.commit()
+        self._invalidate_cached_level()
     
     def reject(self, reviewer_id: int, notes: str = None):
         """Reject the verification request.
@@ -1146,6 +2202,26 @@ class UserVerification(db.Model):
         self.review_notes = notes
         self.reviewed_at = datetime.utcnow()
         db.session.commit()
+        self._invalidate_cached_level()
+    
+    def revoke(self, reviewer_id: int, notes: str = None):
+        """Revoke an approved verification.
+        
+        Args:
+            reviewer_id (int): ID of the revoking admin
+            notes (str, optional): Reason for the revocation
+        """
+        self.status = 'revoked'
+        self.reviewed_by_user_id = reviewer_id
+        self.review_notes = notes
+        self.reviewed_at = datetime.utcnow()
+        db.session.commit()
+        self._invalidate_cached_level()
+    
+    def _invalidate_cached_level(self):
+        """Drop the user's cached verification level after a status change."""
+        from app.utils.verification_cache import get_verification_cache
+        get_verification_cache().invalidate(self.user_id)
     
     @classmethod
     def get_user_verifications(cls, user_id: int, active_only: bool = True) -> List['UserVerification']:
@@ -1309,6 +2385,26 @@ class UserReputation(db.Model):
             self.verification_level = None
             self.verified_at = None
     
+    def refresh_performance_metrics(self):
+        """Refresh contest performance metrics from finalized entries.
+        
+        Does not commit.
+        """
+        wins, top_3, points, accuracy = db.session.query(
+            func.coalesce(func.sum(case((ContestEntry.final_rank == 1, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((ContestEntry.final_rank <= 3, 1), else_=0)), 0),
+            func.coalesce(func.sum(ContestEntry.final_score), 0),
+            func.avg(ContestEntry.final_accuracy)
+        ).filter(
+            ContestEntry.user_id == self.user_id,
+            ContestEntry.final_rank.isnot(None)
+        ).one()
+        
+        self.contest_wins = wins
+        self.top_3_finishes = top_3
+        self.total_contest_points = points
+        self.average_accuracy = round(accuracy or 0.0, 1)
+    
     def refresh_metrics(self):
         """Refresh all reputation metrics from current data."""
         # Update activity metrics
@@ -1317,6 +2413,9 @@ class UserReputation(db.Model):
         self.leagues_created = League.query.filter_by(created_by_user=self.user_id).count()
         self.leagues_joined = LeagueMembership.query.filter_by(user_id=self.user_id).count()
         
+        # Update performance metrics
+        self.refresh_performance_metrics()
+        
         # Update moderation metrics
         self.warnings_received = UserWarning.query.filter_by(user_id=self.user_id, is_active=True).count()
         
@@ -1356,14 +2455,16 @@ class UserReputation(db.Model):
     
     @classmethod
     def update_user_activity(cls, user_id: int):
-        """Update user's last activity timestamp.
+        """Record user activity.
+        
+        The timestamp is kept in memory and written to last_activity_at in
+        the activity tracker's next batch.
         
         Args:
             user_id (int): User ID
         """
-        reputation = cls.get_or_create(user_id)
-        reputation.last_activity_at = datetime.utcnow()
-        db.session.commit()
+        from app.utils.activity import get_activity_tracker
+        get_activity_tracker().record(user_id)
 
 
 class ReputationHistory(db.Model):
@@ -1379,6 +2480,8 @@ class ReputationHistory(db.Model):
     change_details = db.Column(db.JSON, nullable=True)  # Additional details about the change
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
+    __table_args__ = (db.Index('idx_reputation_history_created', 'created_at'),)
+    
     # Relationships
     user = db.relationship('User', backref='reputation_history')
     
@@ -1722,7 +2825,84 @@ class DraftContest(db.Model):
         
         # Sort by total score (desc)
         leaderboard.sort(key=lambda x: x['total_score'], reverse=True)
-        return leaderboard
+        return assign_ranks(leaderboard, key=lambda x: (x['total_score'],))
+    
+    def _ranked_entries(self, method: str = 'rank', tie_breakers: tuple = ()):
+        """Build the ranked entries subquery for this draft contest.
+        
+        Ranks on the cached DraftEntry.total_score, so scores must be kept
+        current with DraftEntry.update_total_score().
+        
+        Args:
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties, e.g. ('joined_at',);
+                '-' prefix for descending
+            
+        Returns:
+            Subquery: One row per entry with total_score, rank and position
+        """
+        scores = db.session.query(
+            DraftEntry.draft_entry_id,
+            DraftEntry.user_id,
+            DraftEntry.joined_at,
+            DraftEntry.draft_position,
+            DraftEntry.total_score
+        ).filter(
+            DraftEntry.draft_contest_id == self.draft_contest_id
+        ).subquery('draft_scores')
+        
+        return ranked_subquery(scores, ['total_score'], tie_breakers, ['draft_entry_id'], method=method)
+    
+    def _ranked_rows_to_dicts(self, rows: list) -> List[dict]:
+        """Convert ranked entry rows into leaderboard dictionaries.
+        
+        Args:
+            rows (list): Rows from the ranked entries subquery
+            
+        Returns:
+            List[dict]: Leaderboard rows with user info and scores
+        """
+        users = _load_users(row.user_id for row in rows)
+        return [{
+            'user': users.get(row.user_id),
+            'user_id': row.user_id,
+            'draft_entry_id': row.draft_entry_id,
+            'total_score': row.total_score,
+            'rank': row.rank,
+            'position': row.position
+        } for row in rows]
+    
+    def get_ranked_leaderboard(self, page: int = 1, per_page: int = 25,
+                               method: str = 'rank', tie_breakers: tuple = ()) -> List[dict]:
+        """Get one page of the leaderboard, ranked in the database.
+        
+        Args:
+            page (int): 1-based page number
+            per_page (int): Rows per page
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties (see _ranked_entries)
+            
+        Returns:
+            List[dict]: Leaderboard rows for the page, including rank and position
+        """
+        ranked = self._ranked_entries(method, tie_breakers)
+        return self._ranked_rows_to_dicts(fetch_page(ranked, page, per_page))
+    
+    def get_user_rank(self, user_id: int, method: str = 'rank', tie_breakers: tuple = ()) -> Optional[dict]:
+        """Get a single user's leaderboard row, ranked against the whole field.
+        
+        Args:
+            user_id (int): User ID
+            method (str): 'rank' or 'dense_rank'
+            tie_breakers (tuple): Entry columns that split ties (see _ranked_entries)
+            
+        Returns:
+            Optional[dict]: The user's leaderboard row, or None if they have no entry
+        """
+        row = fetch_user_row(self._ranked_entries(method, tie_breakers), user_id)
+        if row is None:
+            return None
+        return self._ranked_rows_to_dicts([row])[0]
 
 
 class DraftEntry(db.Model):
@@ -1870,3 +3050,31 @@ class LeagueDraftContest(db.Model):
     def __repr__(self) -> str:
         """String representation of LeagueDraftContest."""
         return f'<LeagueDraftContest {self.league_draft_contest_id}: Draft {self.draft_contest_id} in League {self.league_id}>'
+
+
+class ReputationRollup(db.Model):
+    """Daily or weekly summary of a user's reputation score.
+    
+    ReputationHistory rows older than the retention period are folded into
+    these by `flask rollup-reputation-history` (app.utils.reputation_rollups)
+    and deleted.
+    """
+    
+    __tablename__ = 'reputation_rollups'
+    
+    rollup_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)  # 'day' or 'week'
+    period_start = db.Column(db.DateTime, nullable=False)  # Midnight UTC; Monday for weeks
+    min_score = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Integer, nullable=False)
+    close_score = db.Column(db.Integer, nullable=False)  # Score after the period's last change
+    change_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'period_start', name='uq_reputation_rollup_period'),
+    )
+    
+    def __repr__(self) -> str:
+        """String representation of ReputationRollup."""
+        return f'<ReputationRollup {self.user_id} {self.period} {self.period_start:%Y-%m-%d}: {self.close_score}>'
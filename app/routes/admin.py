@@ -9,8 +9,9 @@ from wtforms.validators import DataRequired, Email, Length, EqualTo
 from werkzeug.utils import secure_filename
 import io
 from app import db
-from app.models import User, Contest, ContestEntry, EntryAnswer, LoginToken, Question
+from app.models import User, Contest, ContestEntry, EntryAnswer, LoginToken, Question, QuestionPickTally
 from app.utils.decorators import admin_required, get_current_user
+from app.utils.finalization import on_answers_changed
 
 admin = Blueprint('admin', __name__)
 
@@ -476,7 +477,9 @@ def edit_contest(contest_id):
             
             # Update questions (admin can always modify)
             # Delete existing questions
+            QuestionPickTally.query.filter_by(contest_id=contest_id).delete()
             Question.query.filter_by(contest_id=contest_id).delete()
+            contest.invalidate_answer_masks()
             
             # Add new questions
             for i, question_form in enumerate(form.questions.data):
@@ -493,6 +496,8 @@ def edit_contest(contest_id):
                     
                     db.session.add(question)
             
+            db.session.flush()
+            contest.refresh_answer_key_masks()
             db.session.commit()
             
             flash('Contest updated successfully!', 'success')
@@ -560,12 +565,11 @@ def set_contest_answers(contest_id):
                 correct_answer = request.form.get(answer_key) == 'True'
                 question.set_answer(correct_answer)
         
+        contest.refresh_answer_key_masks(questions)
         db.session.commit()
         
-        # Recalculate scores for all entries
-        for entry in contest.entries.all():
-            score_data = entry.calculate_score()
-            # Note: The entry model doesn't have a score field, scores are calculated on-demand
+        # Score, rank and notify once the answer key is complete
+        on_answers_changed(contest)
         
         flash('Answers set successfully! Scores have been recalculated.', 'success')
         return redirect(url_for('admin.view_contest_entries', contest_id=contest_id))
@@ -941,6 +945,7 @@ def process_bulk_entries(data):
         entries_created = 0
         entries_skipped = 0
         answers_created = 0
+        tally_changes = []
         
         for entry_data in data['entries']:
             user = User.query.filter_by(email=entry_data['user_email']).first()
@@ -964,6 +969,7 @@ def process_bulk_entries(data):
             db.session.flush()  # Get the entry ID
             
             # Create answers
+            entry_answers = {}
             for answer_data in entry_data['answers']:
                 question_order = answer_data['question_order']
                 if question_order in question_order_map:
@@ -973,10 +979,14 @@ def process_bulk_entries(data):
                         user_answer=answer_data['answer']
                     )
                     db.session.add(answer)
+                    entry_answers[answer.question_id] = answer.user_answer
                     answers_created += 1
             
+            entry.refresh_answer_masks(questions, entry_answers)
+            tally_changes.extend((question_id, None, user_answer) for question_id, user_answer in entry_answers.items())
             entries_created += 1
         
+        QuestionPickTally.apply_changes(contest.contest_id, tally_changes)
         db.session.commit()
         
         stats = {
@@ -1016,7 +1026,9 @@ def process_bulk_answers(data):
                 question.set_answer(answer_data['correct_answer'])
                 answers_set += 1
         
+        contest.refresh_answer_key_masks(questions)
         db.session.commit()
+        on_answers_changed(contest)
         
         stats = {'answers_set': answers_set}
         message = f"Set correct answers for {answers_set} questions in contest '{contest.contest_name}'."
@@ -59,10 +59,10 @@ def login():
         # Clean up expired tokens
         LoginToken.cleanup_expired_tokens()
         
-        # Create new login token
-        token = LoginToken.create_token(email)
+        # Create new login token; it is committed with the login email
+        token = LoginToken.create_token(email, commit=False)
         
-        # Send login email
+        # Queue login email
         if send_login_email(email, token.token):
             flash('Login link sent to your email address. Please check your inbox.', 'success')
             return redirect(url_for('main.index'))
@@ -1,19 +1,29 @@
 """Contest routes for the Over-Under Contests application."""
-from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import json
+import logging
+import traceback
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, Response, stream_with_context, make_response
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, DateTimeLocalField, FieldList, FormField, BooleanField, SubmitField, SelectField, IntegerField
 from wtforms.validators import DataRequired, Length, Optional, NumberRange
 from app import db
-from app.models import Contest, Question, ContestEntry, EntryAnswer, User
+from app.models import Contest, Question, ContestEntry, EntryAnswer, QuestionPickTally, User
 from app.utils.decorators import login_required, contest_owner_required, get_current_user
 from app.utils.timezone import get_timezone_choices, convert_to_utc, convert_from_utc, get_user_timezone
 from app.utils.invitations import send_bulk_invitations
-from app.utils.ai_generation import generate_nfl_contest, generate_contest_name_and_description, get_suggested_lock_time, ContestGenerationError
+from app.utils.ai_generation import (generate_nfl_contest, generate_contest_name_and_description, get_suggested_lock_time,
+                                     prepare_nfl_generation, prepare_custom_generation, sample_banked_questions,
+                                     ContestGenerationError)
+from app.utils.generation_service import get_generation_service, GenerationTimeout
 from app.utils.verification_checks import VerificationChecker, VerificationDecorator
+from app.utils.finalization import on_answers_changed
+from app.utils.http_cache import contest_validators
 
 contests = Blueprint('contests', __name__)
 
+logger = logging.getLogger(__name__)
+
 
 class QuestionForm(FlaskForm):
     """Form for individual contest questions."""
@@ -111,6 +121,12 @@ def view_contest(contest_id):
     """
     contest = Contest.query.get_or_404(contest_id)
     current_user = get_current_user()
+    finished = contest.is_locked() and contest.has_all_answers()
+    
+    # Finished contests only change with their content version
+    validators = contest_validators(contest, 'detail') if finished else None
+    if validators and validators.is_not_modified():
+        return validators.not_modified()
     
     # Check if user has an entry
     user_entry = None
@@ -122,17 +138,18 @@ def view_contest(contest_id):
     
     # Get leaderboard if contest is locked and all answers have been set
     leaderboard = None
-    if contest.is_locked() and contest.has_all_answers():
+    if finished:
         leaderboard = contest.get_leaderboard()
     
     questions = contest.get_questions_ordered()
     
-    return render_template('contests/detail.html',
-                         contest=contest,
-                         questions=questions,
-                         user_entry=user_entry,
-                         leaderboard=leaderboard,
-                         current_user=current_user)
+    response = make_response(render_template('contests/detail.html',
+                                             contest=contest,
+                                             questions=questions,
+                                             user_entry=user_entry,
+                                             leaderboard=leaderboard,
+                                             current_user=current_user))
+    return validators.apply(response) if validators else response
 
 
 @contests.route('/create', methods=['GET', 'POST'])
@@ -308,7 +325,9 @@ def edit_contest(contest_id):
         # Update questions if allowed
         if contest.can_modify_questions() or get_current_user().is_admin:
             # Delete existing questions
+            QuestionPickTally.query.filter_by(contest_id=contest_id).delete()
             Question.query.filter_by(contest_id=contest_id).delete()
+            contest.invalidate_answer_masks()
             
             # Add new questions
             for i, question_form in enumerate(form.questions.data):
@@ -421,9 +440,13 @@ def enter_contest(contest_id):
     
     if request.method == 'POST':
         # Process form submission
+        submitted_answers = {}
+        tally_changes = []
         for question in questions:
             answer_key = f'question_{question.question_id}'
             user_answer = request.form.get(answer_key) == 'True'
+            submitted_answers[question.question_id] = user_answer
+            tally_changes.append((question.question_id, existing_answers.get(question.question_id), user_answer))
             
             # Get or create answer
             answer = EntryAnswer.query.filter_by(
@@ -441,6 +464,9 @@ def enter_contest(contest_id):
                 )
                 db.session.add(answer)
         
+        # Keep the packed copy and pick tallies in step with the entry_answers rows
+        entry.refresh_answer_masks(questions, submitted_answers)
+        QuestionPickTally.apply_changes(contest.contest_id, tally_changes)
         entry.updated_at = datetime.utcnow()
         db.session.commit()
         
@@ -470,17 +496,45 @@ def leaderboard(contest_id):
         flash('Leaderboard will be available after the contest is locked.', 'info')
         return redirect(url_for('contests.view_contest', contest_id=contest_id))
     
-    # Only show leaderboard if all answers have been set
-    leaderboard = None
-    if contest.has_all_answers():
-        leaderboard = contest.get_leaderboard()
+    page = request.args.get('page', 1, type=int)
+    per_page = current_app.config.get('LEADERBOARD_PER_PAGE', 25)
+    finished = contest.has_all_answers()
+    
+    # Finished contests only change with their content version
+    validators = contest_validators(contest, 'leaderboard', page, per_page) if finished else None
+    if validators and validators.is_not_modified():
+        return validators.not_modified()
     
+    # Only show leaderboard if all answers have been set
     questions = contest.get_questions_ordered()
+    pick_distribution = contest.get_pick_distribution()
     
-    return render_template('contests/leaderboard.html',
-                         contest=contest,
-                         leaderboard=leaderboard,
-                         questions=questions)
+    leaderboard = None
+    user_rank = None
+    consensus_stats = None
+    if finished:
+        leaderboard = contest.get_ranked_leaderboard(page=page, per_page=per_page)
+        
+        current_user = get_current_user()
+        if current_user:
+            user_rank = contest.get_user_rank(current_user.user_id)
+        if user_rank:
+            user_entry = ContestEntry.query.get(user_rank['entry_id'])
+            consensus_stats = user_entry.get_consensus_stats(pick_distribution, questions)
+    
+    total_entries = contest.entries.count()
+    
+    response = make_response(render_template('contests/leaderboard.html',
+                                             contest=contest,
+                                             leaderboard=leaderboard,
+                                             user_rank=user_rank,
+                                             pick_distribution=pick_distribution,
+                                             consensus_stats=consensus_stats,
+                                             page=page,
+                                             per_page=per_page,
+                                             total_entries=total_entries,
+                                             questions=questions))
+    return validators.apply(response) if validators else response
 
 
 @contests.route('/my-contests')
@@ -525,14 +579,12 @@ def my_contests():
                 stats['total_score'] += score_data['correct_answers']
                 stats['total_possible_score'] += score_data['answered_questions']
                 
-                # Get leaderboard to determine position
-                leaderboard = entry.contest.get_leaderboard()
-                user_position = None
-                
-                for i, leader in enumerate(leaderboard, 1):
-                    if leader['user'].user_id == current_user.user_id:
-                        user_position = i
-                        break
+                # Use the finalized rank, or rank against the whole field without loading the leaderboard
+                if entry.final_rank is not None:
+                    user_position = entry.final_rank
+                else:
+                    user_rank = entry.contest.get_user_rank(current_user.user_id)
+                    user_position = user_rank['rank'] if user_rank else None
                 
                 if user_position:
                     stats['positions'].append(user_position)
@@ -594,14 +646,11 @@ def set_answers(contest_id):
                 correct_answer = request.form.get(answer_key) == 'True'
                 question.set_answer(correct_answer)
         
+        contest.refresh_answer_key_masks(questions)
         db.session.commit()
         
-        # Recalculate scores for all entries
-        for entry in contest.entries.all():
-            score_data = entry.calculate_score()
-            entry.score = score_data['correct_answers']
-        
-        db.session.commit()
+        # Score, rank and notify once the answer key is complete
+        on_answers_changed(contest)
         
         flash('Answers set successfully! Scores have been calculated.', 'success')
         return redirect(url_for('contests.leaderboard', contest_id=contest_id))
@@ -641,14 +690,12 @@ def update_answer(contest_id, question_id):
             return jsonify({'error': 'Missing correct_answer field'}), 400
         
         question.set_answer(bool(correct_answer))
+        questions = contest.get_questions_ordered()
+        contest.refresh_answer_key_masks(questions)
         db.session.commit()
         
-        # Recalculate scores for all entries
-        for entry in contest.entries.all():
-            score_data = entry.calculate_score()
-            entry.score = score_data['correct_answers']
-        
-        db.session.commit()
+        # Score, rank and notify once the answer key is complete
+        on_answers_changed(contest)
         
         return jsonify({
             'success': True,
@@ -702,10 +749,14 @@ def autosave_entry(contest_id):
         
         # Save answers
         questions = contest.get_questions_ordered()
+        saved_answers = entry.get_answers_dict()
+        tally_changes = []
         for question in questions:
             answer_key = f'question_{question.question_id}'
             if answer_key in data:
                 user_answer = data[answer_key] == 'True'
+                tally_changes.append((question.question_id, saved_answers.get(question.question_id), user_answer))
+                saved_answers[question.question_id] = user_answer
                 
                 # Get or create answer
                 answer = EntryAnswer.query.filter_by(
@@ -723,6 +774,8 @@ def autosave_entry(contest_id):
                     )
                     db.session.add(answer)
         
+        entry.refresh_answer_masks(questions, saved_answers)
+        QuestionPickTally.apply_changes(contest.contest_id, tally_changes)
         entry.updated_at = datetime.utcnow()
         db.session.commit()
         
@@ -781,8 +834,8 @@ def invite_to_contest(contest_id):
         if results['total_sent'] > 0:
             flash(f"Successfully sent {results['total_sent']} invitations!", 'success')
             
-            if results['email_sent'] > 0:
-                flash(f"Email invitations sent: {results['email_sent']}", 'info')
+            if results['email_queued'] > 0:
+                flash(f"Email invitations queued for delivery: {results['email_queued']}", 'info')
             
             if results['sms_sent'] > 0:
                 flash(f"SMS invitations sent: {results['sms_sent']}", 'info')
@@ -911,7 +964,7 @@ def auto_generate():
                         season_year=season_year
                     )
                     
-                    suggested_lock_time = get_suggested_lock_time(sport, week_number)
+                    suggested_lock_time = get_suggested_lock_time(sport, week_number, season_year)
                     
                     # Generate questions based on sport
                     if sport.upper() == 'NFL':
@@ -966,6 +1019,90 @@ def auto_generate():
     return render_template('contests/auto_generate.html', form=form)
 
 
+def _prepare_preview(data):
+    """Validate a preview request and build its contest details and generation request.
+    
+    Args:
+        data: Request JSON or query arguments
+        
+    Returns:
+        Tuple[dict, GenerationRequest]: Contest details and what to generate
+        
+    Raises:
+        ValueError: If the request is invalid
+    """
+    generation_type = data.get('generation_type', 'nfl')
+    question_count = int(data.get('question_count', 5))
+    
+    # Validate question count
+    if question_count < 1 or question_count > 10:
+        raise ValueError('Question count must be between 1 and 10')
+    
+    if generation_type == 'custom':
+        custom_prompt = (data.get('custom_prompt') or '').strip()
+        if not custom_prompt:
+            raise ValueError('Please provide a custom prompt')
+        
+        generation = prepare_custom_generation(custom_prompt, question_count)
+        
+        # Create contest name and description based on prompt
+        contest_name = f"Custom Contest - {datetime.now().strftime('%B %d, %Y')}"
+        description = f"Custom prediction contest: {custom_prompt[:200]}{'...' if len(custom_prompt) > 200 else ''}"
+        
+        # Get suggested lock time (default to 3 days from now)
+        suggested_lock_time = datetime.now() + timedelta(days=3)
+        suggested_lock_time = suggested_lock_time.replace(hour=20, minute=0, second=0, microsecond=0)
+        
+    else:
+        sport = data.get('sport', 'NFL')
+        if sport.upper() != 'NFL':
+            raise ValueError('Only NFL contests are currently supported')
+        
+        # Empty strings mean "current week/season"
+        week_number = int(data['week_number']) if data.get('week_number') not in (None, '') else None
+        season_year = int(data['season_year']) if data.get('season_year') not in (None, '') else None
+        
+        generation = prepare_nfl_generation(week_number, season_year, question_count)
+        contest_info = generate_contest_name_and_description(
+            sport=sport,
+            week_number=week_number,
+            season_year=season_year
+        )
+        suggested_lock_time = get_suggested_lock_time(sport, week_number, season_year)
+        
+        contest_name = contest_info['name']
+        description = contest_info['description']
+    
+    details = {
+        'contest_name': contest_name,
+        'description': description,
+        'suggested_lock_time': suggested_lock_time.isoformat()
+    }
+    return details, generation
+
+
+def _wants_fresh(data) -> bool:
+    """Check whether a preview request asked to skip cached questions."""
+    return str(data.get('fresh', '')).lower() in ['true', 'on', '1']
+
+
+def _preview_questions(generation, fresh: bool):
+    """Get the questions for a preview, from the question bank when it has the week.
+    
+    Args:
+        generation (GenerationRequest): What to generate
+        fresh (bool): Skip cached model results
+        
+    Returns:
+        Iterator[dict]: Questions, streamed from the model when not banked
+    """
+    if generation.sport == 'NFL':
+        banked = sample_banked_questions(generation.week_number, generation.season_year, generation.question_count)
+        if banked:
+            return iter(banked)
+    return get_generation_service().stream(generation, fresh=fresh)
+
+
 @contests.route('/preview-generation', methods=['POST'])
 @login_required
 def preview_generation():
@@ -974,104 +1111,74 @@ def preview_generation():
     Returns:
         JSON response with generated questions
     """
+    data = request.get_json() or {}
     try:
-        data = request.get_json()
-        generation_type = data.get('generation_type', 'nfl')
-        question_count = data.get('question_count', 5)
-        
-        # Convert to integer if provided
-        if question_count is not None:
-            question_count = int(question_count)
-        
-        # Validate question count
-        if question_count < 1 or question_count > 10:
-            return jsonify({'error': 'Question count must be between 1 and 10'}), 400
-        
-        if generation_type == 'custom':
-            # Handle custom prompt generation
-            custom_prompt = data.get('custom_prompt', '').strip()
-            
-            if not custom_prompt:
-                return jsonify({'error': 'Please provide a custom prompt'}), 400
-            
-            # Generate custom contest
-            from app.utils.ai_generation import generate_custom_contest
-            questions_data = generate_custom_contest(custom_prompt, question_count)
-            
-            # Create contest name and description based on prompt
-            contest_name = f"Custom Contest - {datetime.now().strftime('%B %d, %Y')}"
-            description = f"Custom prediction contest: {custom_prompt[:200]}{'...' if len(custom_prompt) > 200 else ''}"
-            
-            # Get suggested lock time (default to 3 days from now)
-            from datetime import timedelta
-            suggested_lock_time = datetime.now() + timedelta(days=3)
-            suggested_lock_time = suggested_lock_time.replace(hour=20, minute=0, second=0, microsecond=0)
-            
-        else:
-            # Handle NFL generation
-            sport = data.get('sport', 'NFL')
-            week_number = data.get('week_number')
-            season_year = data.get('season_year')
-            
-            # Convert empty strings to None
-            if week_number == '':
-                week_number = None
-            if season_year == '':
-                season_year = None
-            
-            # Convert to integers if provided
-            if week_number is not None:
-                week_number = int(week_number)
-            if season_year is not None:
-                season_year = int(season_year)
-            
-            # Generate contest metadata
-            contest_info = generate_contest_name_and_description(
-                sport=sport,
-                week_number=week_number,
-                season_year=season_year
-            )
-            
-            # Generate questions based on sport
-            if sport.upper() == 'NFL':
-                questions_data = generate_nfl_contest(week_number, season_year, question_count)
-            else:
-                return jsonify({'error': 'Only NFL contests are currently supported'}), 400
-            
-            # Get suggested lock time
-            suggested_lock_time = get_suggested_lock_time(sport, week_number)
-            
-            contest_name = contest_info['name']
-            description = contest_info['description']
-        
-        return jsonify({
-            'success': True,
-            'contest_name': contest_name,
-            'description': description,
-            'suggested_lock_time': suggested_lock_time.isoformat(),
-            'questions': questions_data
-        })
+        details, generation = _prepare_preview(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        questions_data = list(_preview_questions(generation, _wants_fresh(data)))
+        return jsonify(dict(details, success=True, questions=questions_data))
         
+    except GenerationTimeout as e:
+        logger.error(f"Contest generation timed out: {str(e)}")
+        return jsonify({'error': str(e)}), 504
+    
     except ContestGenerationError as e:
-        # Log detailed error information for debugging
-        import traceback
-        import logging
-        
-        logger = logging.getLogger(__name__)
         logger.error(f"Contest generation error: {str(e)}")
         logger.error(f"Request data: {data}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        
         return jsonify({'error': str(e)}), 400
     
     except Exception as e:
-        # Log detailed error information for debugging
-        import traceback
-        import logging
-        
-        logger = logging.getLogger(__name__)
         logger.error(f"Unexpected error in preview_generation: {str(e)}")
         logger.error(f"Request data: {data}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        
         return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
+
+
+def _sse(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@contests.route('/preview-generation/stream')
+@login_required
+def preview_generation_stream():
+    """Stream auto-generated contest questions to the preview modal.
+    
+    Sends server-sent events: 'details' with the contest name, description
+    and lock time, a 'question' as soon as each question is complete, then
+    'done' with the whole preview or 'failure' with an error message.
+    
+    Returns:
+        Event stream response
+    """
+    try:
+        details, generation = _prepare_preview(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    fresh = _wants_fresh(request.args)
+    
+    def events():
+        yield _sse('details', details)
+        questions = []
+        try:
+            for question in _preview_questions(generation, fresh):
+                questions.append(question)
+                yield _sse('question', {'index': len(questions) - 1, 'question': question})
+        except ContestGenerationError as e:
+            logger.error(f"Contest generation error: {str(e)}")
+            yield _sse('failure', {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Unexpected error in preview_generation_stream: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            yield _sse('failure', {'error': f'Unexpected error: {str(e)}'})
+            return
+        yield _sse('done', dict(details, success=True, questions=questions))
+    
+    # X-Accel-Buffering stops nginx from holding events back until the stream ends
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
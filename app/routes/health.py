@@ -1,6 +1,7 @@
 """Health check and monitoring endpoints."""
 from flask import Blueprint, jsonify, current_app
 from app.utils.monitoring import HealthChecker, safe_execute
+from app.utils.circuit_breaker import get_all_metrics
 import time
 
 health = Blueprint('health', __name__)
@@ -110,6 +111,34 @@ def liveness_check():
     }), 200
 
 
+@health.route('/health/providers')
+def provider_health():
+    """Circuit breaker state and latency metrics for external providers in this worker."""
+    providers = get_all_metrics()
+    degraded = [name for name, metrics in providers.items() if metrics['state'] != 'closed']
+    
+    return jsonify({
+        'status': 'degraded' if degraded else 'healthy',
+        'degraded': degraded,
+        'providers': providers,
+        'timestamp': time.time()
+    }), 200
+
+
+@health.route('/health/cache')
+def cache_health():
+    """Application cache hit rates and errors in this worker."""
+    from app.utils.cache import get_cache
+    
+    stats = get_cache().stats()
+    
+    return jsonify({
+        'status': 'degraded' if stats['errors'] else 'healthy',
+        'cache': stats,
+        'timestamp': time.time()
+    }), 200
+
+
 @health.route('/metrics')
 def metrics():
     """Basic application metrics endpoint."""
@@ -0,0 +1,58 @@
+"""Background job status endpoints."""
+from flask import Blueprint, jsonify, abort
+from app import db
+from app.models import Job
+from app.utils.decorators import login_required, get_current_user
+from app.utils.jobs import get_batch_status
+
+jobs = Blueprint('jobs', __name__)
+
+
+def _can_view(user, created_by_user_id) -> bool:
+    """Check if a user may see a job's status."""
+    return user is not None and (user.is_admin or user.user_id == created_by_user_id)
+
+
+@jobs.route('/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Get the status of a single job.
+
+    Args:
+        job_id (int): Job ID
+
+    Returns:
+        JSON response with job status
+    """
+    job = db.session.get(Job, job_id)
+    if job is None:
+        abort(404)
+
+    if not _can_view(get_current_user(), job.created_by_user_id):
+        abort(403)
+
+    return jsonify(job.to_dict())
+
+
+@jobs.route('/batches/<batch_id>')
+@login_required
+def batch_status(batch_id):
+    """Get job counts for a batch, such as one round of invitations.
+
+    Args:
+        batch_id (str): Batch ID
+
+    Returns:
+        JSON response with job counts per status
+    """
+    first_job = Job.query.filter_by(batch_id=batch_id).first()
+    if first_job is None:
+        abort(404)
+
+    if not _can_view(get_current_user(), first_job.created_by_user_id):
+        abort(403)
+
+    status = get_batch_status(batch_id)
+    status['batch_id'] = batch_id
+    status['complete'] = status['queued'] == 0 and status['running'] == 0
+    return jsonify(status)
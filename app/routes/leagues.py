@@ -1,16 +1,21 @@
 """League routes for the Over-Under Contests application."""
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, BooleanField, SubmitField, IntegerField, SelectField
 from wtforms.validators import DataRequired, Length, Optional, NumberRange
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models import League, LeagueMembership, LeagueContest, Contest, User
-from app.utils.decorators import login_required, get_current_user
+from app.utils.decorators import login_required, get_current_user, get_current_league_roles
+from app.utils.http_cache import league_validators
 from app.utils.verification_checks import VerificationChecker, VerificationDecorator
 
 leagues = Blueprint('leagues', __name__)
 
+# Contests shown per page when picking one to add to a league
+AVAILABLE_CONTESTS_PER_PAGE = 20
+
 
 def league_admin_required(f):
     """Decorator to require league admin access."""
@@ -29,7 +34,7 @@ def league_admin_required(f):
         
         # Check if user is league creator or admin
         if (league.created_by_user != current_user.user_id and 
-            not league.is_admin(current_user) and 
+            get_current_league_roles().get(league.league_id) != 'admin' and 
             not current_user.is_admin):
             flash('You do not have permission to manage this league.', 'error')
             return redirect(url_for('leagues.view_league', league_id=league_id))
@@ -62,7 +67,8 @@ class JoinLeagueForm(FlaskForm):
 class AddContestForm(FlaskForm):
     """Form for adding contests to a league."""
     
-    contest_id = SelectField('Contest', coerce=int, validators=[DataRequired()])
+    # Choices hold the first page; others come from the available-contests search
+    contest_id = SelectField('Contest', coerce=int, validators=[DataRequired()], validate_choice=False)
     submit = SubmitField('Add Contest')
 
 
@@ -90,7 +96,7 @@ def list_leagues():
     # Get public leagues and user's leagues
     if current_user:
         # Show public leagues and leagues the user is a member of
-        user_league_ids = [m.league_id for m in current_user.league_memberships]
+        user_league_ids = list(get_current_league_roles())
         leagues_query = League.query.filter(
             db.or_(
                 League.is_public == True,
@@ -128,6 +134,10 @@ def view_league(league_id):
         flash('You do not have permission to view this league.', 'error')
         return redirect(url_for('leagues.list_leagues'))
     
+    validators = league_validators(league, 'detail')
+    if validators.is_not_modified():
+        return validators.not_modified()
+    
     # Get league leaderboard
     leaderboard = league.get_leaderboard()
     
@@ -138,13 +148,14 @@ def view_league(league_id):
     is_member = current_user and league.is_member(current_user) if current_user else False
     is_admin = current_user and league.is_admin(current_user) if current_user else False
     
-    return render_template('leagues/detail.html',
-                         league=league,
-                         leaderboard=leaderboard,
-                         contests=contests,
-                         is_member=is_member,
-                         is_admin=is_admin,
-                         current_user=current_user)
+    response = make_response(render_template('leagues/detail.html',
+                                             league=league,
+                                             leaderboard=leaderboard,
+                                             contests=contests,
+                                             is_member=is_member,
+                                             is_admin=is_admin,
+                                             current_user=current_user))
+    return validators.apply(response)
 
 
 @leagues.route('/create', methods=['GET', 'POST'])
@@ -178,12 +189,7 @@ def create_league():
         db.session.flush()  # Get league ID
         
         # Add creator as admin member
-        membership = LeagueMembership(
-            league_id=league.league_id,
-            user_id=current_user.user_id,
-            is_admin=True
-        )
-        db.session.add(membership)
+        league.add_member(current_user, is_admin=True)
         
         db.session.commit()
         
@@ -263,13 +269,14 @@ def join_league(league_id):
         return redirect(url_for('leagues.view_league', league_id=league_id))
     
     # Add user as member
-    membership = LeagueMembership(
-        league_id=league_id,
-        user_id=current_user.user_id,
-        is_admin=False
-    )
-    db.session.add(membership)
-    db.session.commit()
+    league.add_member(current_user)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A second submit of the join form won the race
+        db.session.rollback()
+        flash('You are already a member of this league.', 'info')
+        return redirect(url_for('leagues.view_league', league_id=league_id))
     
     flash('Successfully joined the league!', 'success')
     return redirect(url_for('leagues.view_league', league_id=league_id))
@@ -303,7 +310,7 @@ def leave_league(league_id):
             return redirect(url_for('leagues.view_league', league_id=league_id))
     
     # Remove membership
-    db.session.delete(membership)
+    league.remove_member(membership)
     db.session.commit()
     
     flash('You have left the league.', 'info')
@@ -328,28 +335,23 @@ def manage_league(league_id):
     # Get league members
     members = league.get_members()
     
-    # Get available contests (created by league members)
-    member_ids = [m.user_id for m in members]
-    available_contests = Contest.query.filter(
-        Contest.created_by_user.in_(member_ids),
-        Contest.is_active == True
-    ).order_by(Contest.created_at.desc()).all()
-    
-    # Filter out contests already in the league
-    league_contest_ids = [lc.contest_id for lc in league.league_contests.all()]
-    available_contests = [c for c in available_contests if c.contest_id not in league_contest_ids]
+    # First page of contests that can be added; the rest are searched on demand
+    available = league.search_available_contests(per_page=AVAILABLE_CONTESTS_PER_PAGE)
     
     # Forms
     add_contest_form = AddContestForm()
-    add_contest_form.contest_id.choices = [(c.contest_id, f"{c.contest_name} (by {c.creator.username})") 
-                                          for c in available_contests]
+    add_contest_form.contest_id.choices = [(c['contest_id'], f"{c['contest_name']} (by {c['creator']})")
+                                          for c in available['contests']]
     
     invite_form = InviteMemberForm()
     
     if request.method == 'POST':
         if 'add_contest' in request.form and add_contest_form.validate():
-            contest = Contest.query.get(add_contest_form.contest_id.data)
-            if contest:
+            contest_id = add_contest_form.contest_id.data
+            contest = Contest.query.get(contest_id) if league.can_add_contest(contest_id) else None
+            if not contest:
+                flash('That contest cannot be added to this league.', 'error')
+            else:
                 league.add_contest(contest)
                 db.session.commit()
                 flash(f'Contest "{contest.contest_name}" added to league!', 'success')
@@ -378,10 +380,31 @@ def manage_league(league_id):
                          league=league,
                          members=members,
                          add_contest_form=add_contest_form,
+                         has_more_contests=available['has_more'],
                          invite_form=invite_form,
                          current_user=current_user)
 
 
+@leagues.route('/<int:league_id>/available-contests')
+@login_required
+@league_admin_required
+def available_contests(league_id):
+    """Search the contests that can be added to a league.
+    
+    Args:
+        league_id (int): League ID
+        
+    Returns:
+        JSON response with a page of contests
+    """
+    league = League.query.get_or_404(league_id)
+    search = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = max(1, min(request.args.get('per_page', AVAILABLE_CONTESTS_PER_PAGE, type=int), 50))
+    
+    return jsonify(league.search_available_contests(search=search or None, page=page, per_page=per_page))
+
+
 @leagues.route('/<int:league_id>/remove-contest/<int:contest_id>', methods=['POST'])
 @login_required
 @league_admin_required
@@ -436,7 +459,7 @@ def remove_member(league_id, user_id):
     
     membership = league.memberships.filter_by(user_id=user_id).first()
     if membership:
-        db.session.delete(membership)
+        league.remove_member(membership)
         db.session.commit()
         flash(f'{user.username} has been removed from the league.', 'success')
     else:
@@ -502,17 +525,22 @@ def league_leaderboard(league_id):
         flash('You do not have permission to view this league.', 'error')
         return redirect(url_for('leagues.list_leagues'))
     
+    validators = league_validators(league, 'leaderboard')
+    if validators.is_not_modified():
+        return validators.not_modified()
+    
     # Get league leaderboard
     leaderboard = league.get_leaderboard()
     
     # Get league contests for reference
     contests = league.get_contests()
     
-    return render_template('leagues/leaderboard.html',
-                         league=league,
-                         leaderboard=leaderboard,
-                         contests=contests,
-                         current_user=current_user)
+    response = make_response(render_template('leagues/leaderboard.html',
+                                             league=league,
+                                             leaderboard=leaderboard,
+                                             contests=contests,
+                                             current_user=current_user))
+    return validators.apply(response)
 
 
 @leagues.route('/my-leagues')
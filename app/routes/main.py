@@ -1,12 +1,14 @@
 """Main routes for the Over-Under Contests application."""
-from flask import Blueprint, render_template, request, redirect, url_for, send_from_directory, current_app, flash
+from flask import Blueprint, render_template, request, redirect, url_for, send_from_directory, current_app, flash, jsonify
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField
 from wtforms.validators import Length, Optional
 from app import db
-from app.models import Contest, User, League
-from app.utils.decorators import get_current_user, login_required
+from app.models import ContestEntry
+from app.utils import home
+from app.utils.decorators import get_current_user, get_current_league_roles, login_required
 import os
+from datetime import datetime, timedelta
 
 main = Blueprint('main', __name__)
 
@@ -28,41 +30,28 @@ def index():
         Rendered template for home page
     """
     try:
-        # Get active contests, ordered by creation date (newest first)
-        page = request.args.get('page', 1, type=int)
-        per_page = 6  # Reduced to make room for other sections
-        
-        contests = Contest.query.filter_by(is_active=True)\
-                              .order_by(Contest.created_at.desc())\
-                              .paginate(page=page, per_page=per_page, error_out=False)
+        # Shared sections come from the home page cache (see app.utils.home)
+        contests = home.get_contests_page(request.args.get('page', 1, type=int))
+        active_leagues = home.get_leagues_page(request.args.get('leagues_page', 1, type=int))
+        featured_leagues = home.get_featured_leagues()
+        ai_contests = home.get_recent_ai_contests()
+        total_ai_contests = home.get_total_ai_contests()
         
         current_user = get_current_user()
         
-        # Get featured public leagues (top 3 by member count)
-        featured_leagues = League.query.filter_by(is_active=True, is_public=True)\
-                                     .join(League.memberships)\
-                                     .group_by(League.league_id)\
-                                     .order_by(db.func.count(League.memberships).desc())\
-                                     .limit(3).all()
-        
-        # Get active leagues for main display (similar pagination as contests)
-        leagues_page = request.args.get('leagues_page', 1, type=int)
-        active_leagues = League.query.filter_by(is_active=True)\
-                                   .order_by(League.created_at.desc())\
-                                   .paginate(page=leagues_page, per_page=6, error_out=False)
-        
-        # Get recent AI-generated contests (last 5)
-        ai_contests = Contest.query.filter_by(is_active=True, is_ai_generated=True)\
-                                 .order_by(Contest.created_at.desc())\
-                                 .limit(5).all()
-        
-        # Calculate AI contest statistics
-        total_ai_contests = Contest.query.filter_by(is_ai_generated=True).count()
-        
-        # Get user's remaining AI contests if logged in
+        # Per-user bits: AI quota, league roles and entries in the listed contests
         remaining_ai_contests = 0
+        league_roles = {}
+        entered_contest_ids = set()
         if current_user:
             remaining_ai_contests = current_user.get_remaining_ai_contests_today()
+            league_roles = get_current_league_roles()
+            open_contest_ids = [c.contest_id for c in contests.items if not c.is_locked()]
+            if open_contest_ids:
+                entered_contest_ids = {contest_id for (contest_id,) in db.session.query(ContestEntry.contest_id).filter(
+                    ContestEntry.user_id == current_user.user_id,
+                    ContestEntry.contest_id.in_(open_contest_ids)
+                )}
         
         return render_template('index.html', 
                              contests=contests, 
@@ -71,7 +60,9 @@ def index():
                              active_leagues=active_leagues,
                              ai_contests=ai_contests,
                              total_ai_contests=total_ai_contests,
-                             remaining_ai_contests=remaining_ai_contests)
+                             remaining_ai_contests=remaining_ai_contests,
+                             league_roles=league_roles,
+                             entered_contest_ids=entered_contest_ids)
     except Exception as e:
         # Log the error and return a safe response
         current_app.logger.error(f"Error in index route: {str(e)}")
@@ -104,7 +95,9 @@ def index():
                              active_leagues=active_leagues,
                              ai_contests=[],
                              total_ai_contests=0,
-                             remaining_ai_contests=0)
+                             remaining_ai_contests=0,
+                             league_roles={},
+                             entered_contest_ids=set())
 
 
 @main.route('/about')
@@ -140,6 +133,31 @@ def profile():
                          contest_entries=contest_entries)
 
 
+@main.route('/profile/reputation-history')
+@login_required
+def reputation_history():
+    """Reputation score series for the profile chart.
+    
+    Query parameters: period ('day' or 'week', default 'day') and days
+    (how far back to go, default all).
+    
+    Returns:
+        JSON list of points with min, max and closing score per period
+    """
+    from app.utils.reputation_rollups import get_score_series
+    
+    period = request.args.get('period', 'day')
+    days = request.args.get('days', type=int)
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    
+    try:
+        series = get_score_series(get_current_user().user_id, period=period, since=since)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(series)
+
+
 @main.route('/profile/edit', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
@@ -0,0 +1,191 @@
+"""Coalesced last-activity tracking.
+
+Bumping UserReputation.last_activity_at on every request made each page view
+a write transaction. ActivityTracker keeps the latest activity per user in
+memory instead:
+
+    dedupe   hits within `dedupe_window` seconds of the user's last recorded
+             hit are ignored, so a busy user costs one dict write per window
+    flush    every `flush_interval` seconds the pending timestamps are
+             written with one batched UPDATE (and one INSERT for users who
+             have no reputation record yet) on a connection of its own, so
+             the request's session is never committed early
+    exit     whatever is pending is flushed when the process exits
+
+An update never moves last_activity_at backwards, so workers flushing out of
+order are harmless.
+"""
+import atexit
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app, session
+from sqlalchemy import bindparam
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Trackers flushed at exit; apps that were discarded drop out on their own
+_trackers = weakref.WeakSet()
+_exit_flush_registered = False
+
+
+class ActivityTracker:
+    """In-memory last-activity timestamps flushed to user_reputations in batches."""
+
+    def __init__(self, app, flush_interval: float = 60, dedupe_window: float = 60):
+        """Initialize the tracker.
+
+        Args:
+            app: Flask application the flushes run in
+            flush_interval (float): Seconds between batched writes
+            dedupe_window (float): Seconds during which repeat hits by a user
+                are ignored
+        """
+        self.app = app
+        self.flush_interval = flush_interval
+        self.dedupe_window = timedelta(seconds=dedupe_window)
+
+        self._pending = {}  # user_id -> latest activity not yet written
+        self._last_seen = {}  # user_id -> latest recorded activity
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of users waiting to be written."""
+        return len(self._pending)
+
+    def record(self, user_id: int, at: Optional[datetime] = None) -> None:
+        """Record activity by a user, flushing if the interval has passed.
+
+        Args:
+            user_id (int): User ID
+            at (datetime, optional): Time of the activity, defaults to now
+        """
+        at = at or datetime.utcnow()
+        with self._lock:
+            last = self._last_seen.get(user_id)
+            if last is None or at - last >= self.dedupe_window:
+                self._last_seen[user_id] = at
+                self._pending[user_id] = at
+            due = bool(self._pending) and time.monotonic() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending activity.
+
+        Returns:
+            int: Number of users written
+        """
+        from app.models import UserReputation
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            # Users idle for longer than the window can't be deduplicated anyway
+            cutoff = datetime.utcnow() - self.dedupe_window
+            self._last_seen = {user_id: at for user_id, at in self._last_seen.items() if at >= cutoff}
+
+        if not pending:
+            return 0
+
+        table = UserReputation.__table__
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                existing = set(connection.execute(
+                    db.select(table.c.user_id).where(table.c.user_id.in_(list(pending)))
+                ).scalars())
+
+                updates = [{'b_user_id': user_id, 'b_at': at} for user_id, at in pending.items() if user_id in existing]
+                if updates:
+                    connection.execute(table.update().where(
+                        table.c.user_id == bindparam('b_user_id'),
+                        table.c.last_activity_at < bindparam('b_at')
+                    ).values(last_activity_at=bindparam('b_at')), updates)
+
+                # New users get a default record; the reputation recompute fills in the metrics
+                inserts = [{
+                    'user_id': user_id,
+                    'last_activity_at': at,
+                    'created_at': at,
+                    'updated_at': at
+                } for user_id, at in pending.items() if user_id not in existing]
+                if inserts:
+                    connection.execute(table.insert(), inserts)
+        except Exception as e:
+            logger.error(f"Failed to write activity for {len(pending)} users: {str(e)}")
+            with self._lock:
+                for user_id, at in pending.items():
+                    if at > self._pending.get(user_id, datetime.min):
+                        self._pending[user_id] = at
+            return 0
+
+        return len(pending)
+
+
+def create_activity_tracker(app) -> ActivityTracker:
+    """Create an activity tracker for an app.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        ActivityTracker: Tracker configured from app settings
+    """
+    return ActivityTracker(
+        app,
+        flush_interval=app.config.get('ACTIVITY_FLUSH_INTERVAL', 60),
+        dedupe_window=app.config.get('ACTIVITY_DEDUPE_WINDOW', 60)
+    )
+
+
+def _flush_at_exit() -> None:
+    """Flush every live tracker's pending activity."""
+    for tracker in list(_trackers):
+        tracker.flush()
+
+
+def init_activity_tracking(app) -> ActivityTracker:
+    """Create the app's activity tracker and record each logged-in request.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        ActivityTracker: The app's tracker
+    """
+    global _exit_flush_registered
+    tracker = app.extensions['activity_tracker'] = create_activity_tracker(app)
+    _trackers.add(tracker)
+    if not _exit_flush_registered:
+        atexit.register(_flush_at_exit)
+        _exit_flush_registered = True
+
+    @app.after_request
+    def record_activity(response):
+        user_id = session.get('user_id')
+        if user_id is not None:
+            tracker.record(user_id)
+        return response
+
+    return tracker
+
+
+def get_activity_tracker() -> ActivityTracker:
+    """Get the current app's activity tracker, creating it on first use.
+
+    Returns:
+        ActivityTracker: The app's tracker
+    """
+    tracker = current_app.extensions.get('activity_tracker')
+    if tracker is None:
+        app = current_app._get_current_object()
+        tracker = app.extensions['activity_tracker'] = create_activity_tracker(app)
+    return tracker
@@ -1,14 +1,24 @@
 """AI-powered contest generation utilities."""
-import json
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-import openai
+from typing import List, Dict, Optional, Tuple
 from flask import current_app
 
 
 logger = logging.getLogger(__name__)
 
+# Valid NFL team names, for sanity-checking generated matchups
+NFL_TEAMS = {
+    'Bills', 'Dolphins', 'Patriots', 'Jets',  # AFC East
+    'Ravens', 'Bengals', 'Browns', 'Steelers',  # AFC North
+    'Titans', 'Colts', 'Texans', 'Jaguars',  # AFC South
+    'Chiefs', 'Chargers', 'Raiders', 'Broncos',  # AFC West
+    'Cowboys', 'Eagles', 'Giants', 'Commanders',  # NFC East
+    'Packers', 'Lions', 'Bears', 'Vikings',  # NFC North
+    'Saints', 'Falcons', 'Panthers', 'Buccaneers',  # NFC South
+    '49ers', 'Seahawks', 'Cardinals', 'Rams'  # NFC West
+}
+
 
 class ContestGenerationError(Exception):
     """Exception raised when contest generation fails."""
@@ -58,29 +68,24 @@ def get_schedule_data(season_year: int, week_number: int) -> Optional[str]:
         return None
 
 
-def generate_nfl_contest(week_number: Optional[int] = None, season_year: Optional[int] = None, 
-                        question_count: int = 5) -> List[Dict]:
-    """Generate NFL contest questions using OpenAI.
+def resolve_nfl_week(week_number: Optional[int] = None, season_year: Optional[int] = None) -> Tuple[int, int]:
+    """Fill in the current NFL season and week when they are not given.
     
     Args:
         week_number (int, optional): NFL week number (1-18)
         season_year (int, optional): NFL season year
-        question_count (int): Number of questions to generate (1-10, default 5)
-        
+    
     Returns:
-        List[Dict]: List of generated questions with metadata
-        
-    Raises:
-        ContestGenerationError: If generation fails
+        Tuple[int, int]: (season_year, week_number)
     """
-    if not current_app.config.get('OPENAI_API_KEY'):
-        raise ContestGenerationError("OpenAI API key not configured")
-    
-    # Set up OpenAI API key directly (avoiding client initialization issues)
-    openai.api_key = current_app.config['OPENAI_API_KEY']
-    logger.info("OpenAI API key configured")
+    if not week_number:
+        # Use the loaded schedule when it covers the current week
+        from app.utils.nfl_schedule import get_calendar
+        
+        current = get_calendar().current_week()
+        if current and (not season_year or current[0] == season_year):
+            return current
     
-    # Determine current NFL season context
     current_date = datetime.now()
     if not season_year:
         # NFL season typically runs from September to February
@@ -104,9 +109,23 @@ def generate_nfl_contest(week_number: Optional[int] = None, season_year: Optiona
         else:
             week_number = 1  # Default to week 1
     
+    return season_year, week_number
+
+
+def build_nfl_messages(week_number: int, season_year: int, question_count: int) -> List[Dict]:
+    """Build the chat messages for an NFL contest.
+    
+    Args:
+        week_number (int): NFL week number (1-18)
+        season_year (int): NFL season year
+        question_count (int): Number of questions to generate
+    
+    Returns:
+        List[Dict]: Chat completion messages
+    """
     # Try to get actual schedule data from database
     schedule_data = get_schedule_data(season_year, week_number)
-    
+
     # Build the prompt with schedule data if available
     if schedule_data:
         # Use actual schedule data
@@ -198,126 +217,150 @@ Requirements:
 - Questions must be clear and unambiguous
 - Return ONLY the JSON array, no additional text"""
 
-    try:
-        logger.info(f"Generating NFL contest for Week {week_number}, {season_year} season")
-        
-        # Use the legacy OpenAI API (version 0.28.1)
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates sports betting questions in JSON format."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        content = response.choices[0].message.content.strip()
+    return [
+        {"role": "system", "content": "You are a helpful assistant that generates sports betting questions in JSON format."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def validate_nfl_question(question: Dict, index: int) -> None:
+    """Check one generated NFL question.
+    
+    Args:
+        question (Dict): Generated question
+        index (int): Position of the question in the response
+    
+    Raises:
+        ValueError: If the question is malformed
+    """
+    if not isinstance(question, dict):
+        raise ValueError(f"Question {index} is not a dictionary")
+    
+    required_fields = ['game', 'question', 'line_type', 'line_value', 'direction']
+    for field in required_fields:
+        if field not in question:
+            raise ValueError(f"Question {index} missing required field: {field}")
+    
+    # Validate line_type
+    if question['line_type'] not in ['spread', 'over_under']:
+        raise ValueError(f"Question {index} has invalid line_type: {question['line_type']}")
+    
+    # Validate direction
+    valid_directions = ['over', 'under', 'cover']
+    if question['direction'] not in valid_directions:
+        raise ValueError(f"Question {index} has invalid direction: {question['direction']}")
+    
+    # For spread questions, team_favored should be present
+    if question['line_type'] == 'spread' and 'team_favored' not in question:
+        raise ValueError(f"Spread question {index} missing team_favored field")
+    
+    # Validate that teams in the game are real NFL teams
+    game = question['game']
+    if ' vs ' in game:
+        teams = [team.strip() for team in game.split(' vs ')]
+        for team in teams:
+            if team not in NFL_TEAMS:
+                logger.warning(f"Question {index} contains invalid team: {team}")
+                # Don't fail validation, but log the warning
+    
+    # Validate betting line ranges
+    line_value = question['line_value']
+    if question['line_type'] == 'spread':
+        if not (0.5 <= line_value <= 21):
+            logger.warning(f"Question {index} has unusual spread value: {line_value}")
+    elif question['line_type'] == 'over_under':
+        if not (30 <= line_value <= 65):
+            logger.warning(f"Question {index} has unusual over/under value: {line_value}")
+
+
+def prepare_nfl_generation(week_number: Optional[int] = None, season_year: Optional[int] = None,
+                           question_count: int = 5):
+    """Build the generation request for an NFL contest.
+    
+    Args:
+        week_number (int, optional): NFL week number (1-18)
+        season_year (int, optional): NFL season year
+        question_count (int): Number of questions to generate (1-10, default 5)
+    
+    Returns:
+        GenerationRequest: Request for the generation service
+    """
+    from app.utils.generation_service import GenerationRequest
+    
+    season_year, week_number = resolve_nfl_week(week_number, season_year)
+    return GenerationRequest(
+        messages=build_nfl_messages(week_number, season_year, question_count),
+        question_count=question_count,
+        validate=validate_nfl_question,
+        sport='NFL',
+        season_year=season_year,
+        week_number=week_number
+    )
+
+
+def sample_banked_questions(week_number: int, season_year: int, question_count: int) -> Optional[List[Dict]]:
+    """Draw NFL contest questions from the pre-generated question bank.
+    
+    Args:
+        week_number (int): NFL week number (1-18)
+        season_year (int): NFL season year
+        question_count (int): Number of questions
         
-        # Try to parse JSON from the response
-        try:
-            # Sometimes the response might have extra text, so try to find the JSON array
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError("No JSON array found in response")
-            
-            json_content = content[start_idx:end_idx]
-            questions = json.loads(json_content)
-            
-            # Validate the structure
-            if not isinstance(questions, list):
-                raise ValueError("Response is not a list")
-            
-            # Define valid NFL teams for validation
-            valid_nfl_teams = {
-                'Bills', 'Dolphins', 'Patriots', 'Jets',  # AFC East
-                'Ravens', 'Bengals', 'Browns', 'Steelers',  # AFC North
-                'Titans', 'Colts', 'Texans', 'Jaguars',  # AFC South
-                'Chiefs', 'Chargers', 'Raiders', 'Broncos',  # AFC West
-                'Cowboys', 'Eagles', 'Giants', 'Commanders',  # NFC East
-                'Packers', 'Lions', 'Bears', 'Vikings',  # NFC North
-                'Saints', 'Falcons', 'Panthers', 'Buccaneers',  # NFC South
-                '49ers', 'Seahawks', 'Cardinals', 'Rams'  # NFC West
-            }
-            
-            for i, question in enumerate(questions):
-                if not isinstance(question, dict):
-                    raise ValueError(f"Question {i} is not a dictionary")
-                
-                required_fields = ['game', 'question', 'line_type', 'line_value', 'direction']
-                for field in required_fields:
-                    if field not in question:
-                        raise ValueError(f"Question {i} missing required field: {field}")
-                
-                # Validate line_type
-                if question['line_type'] not in ['spread', 'over_under']:
-                    raise ValueError(f"Question {i} has invalid line_type: {question['line_type']}")
-                
-                # Validate direction
-                valid_directions = ['over', 'under', 'cover']
-                if question['direction'] not in valid_directions:
-                    raise ValueError(f"Question {i} has invalid direction: {question['direction']}")
-                
-                # For spread questions, team_favored should be present
-                if question['line_type'] == 'spread' and 'team_favored' not in question:
-                    raise ValueError(f"Spread question {i} missing team_favored field")
-                
-                # Validate that teams in the game are real NFL teams
-                game = question['game']
-                if ' vs ' in game:
-                    teams = [team.strip() for team in game.split(' vs ')]
-                    for team in teams:
-                        if team not in valid_nfl_teams:
-                            logger.warning(f"Question {i} contains invalid team: {team}")
-                            # Don't fail validation, but log the warning
-                
-                # Validate betting line ranges
-                line_value = question['line_value']
-                if question['line_type'] == 'spread':
-                    if not (0.5 <= line_value <= 21):
-                        logger.warning(f"Question {i} has unusual spread value: {line_value}")
-                elif question['line_type'] == 'over_under':
-                    if not (30 <= line_value <= 65):
-                        logger.warning(f"Question {i} has unusual over/under value: {line_value}")
-            
-            logger.info(f"Successfully generated {len(questions)} NFL contest questions")
-            return questions
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Failed to parse OpenAI response: {e}")
-            logger.error(f"Response content: {content}")
-            raise ContestGenerationError(f"Failed to parse AI response: {str(e)}")
-    
-    except openai.OpenAIError as e:
-        logger.error(f"OpenAI API error: {e}")
-        raise ContestGenerationError(f"AI service error: {str(e)}")
+    Returns:
+        Optional[List[Dict]]: Questions, or None if the bank is disabled or
+        doesn't hold enough questions for the week
+    """
+    if not current_app.config.get('QUESTION_BANK_ENABLED', True):
+        return None
     
-    except Exception as e:
-        logger.error(f"Unexpected error in contest generation: {e}")
-        raise ContestGenerationError(f"Unexpected error: {str(e)}")
+    from app.utils.question_bank import sample_questions
+    
+    questions = sample_questions(season_year, week_number, question_count)
+    if questions:
+        logger.info(f"Sampled {len(questions)} questions from the question bank for Week {week_number}, {season_year} season")
+    return questions
 
 
-def generate_custom_contest(prompt: str, question_count: int = 5) -> List[Dict]:
-    """Generate contest questions using a custom user prompt.
+def generate_nfl_contest(week_number: Optional[int] = None, season_year: Optional[int] = None,
+                        question_count: int = 5, fresh: bool = False) -> List[Dict]:
+    """Generate NFL contest questions, from the question bank when it has the week.
+    
+    Falls back to a live OpenAI completion when the week has no bank.
     
     Args:
-        prompt (str): User-provided prompt describing the contest they want
+        week_number (int, optional): NFL week number (1-18)
+        season_year (int, optional): NFL season year
         question_count (int): Number of questions to generate (1-10, default 5)
-        
+        fresh (bool): Generate new questions even if a cached result exists
+    
     Returns:
         List[Dict]: List of generated questions with metadata
-        
+    
     Raises:
-        ContestGenerationError: If generation fails
+        ContestGenerationError: If generation fails or times out
     """
-    if not current_app.config.get('OPENAI_API_KEY'):
-        raise ContestGenerationError("OpenAI API key not configured")
+    from app.utils.generation_service import get_generation_service
+    
+    season_year, week_number = resolve_nfl_week(week_number, season_year)
+    banked = sample_banked_questions(week_number, season_year, question_count)
+    if banked:
+        return banked
+    
+    generation = prepare_nfl_generation(week_number, season_year, question_count)
+    logger.info(f"Generating NFL contest for Week {week_number}, {season_year} season")
+    return get_generation_service().generate(generation, fresh=fresh)
+
+
+def build_custom_messages(prompt: str, question_count: int) -> List[Dict]:
+    """Build the chat messages for a custom prompt contest.
     
-    # Set up OpenAI API key
-    openai.api_key = current_app.config['OPENAI_API_KEY']
-    logger.info("OpenAI API key configured for custom contest generation")
+    Args:
+        prompt (str): User-provided prompt describing the contest they want
+        question_count (int): Number of questions to generate
     
+    Returns:
+        List[Dict]: Chat completion messages
+    """
     # Build the prompt for custom contest generation
     system_prompt = f"""You are a contest creation assistant that generates yes/no prediction questions based on user prompts.
 
@@ -371,68 +414,76 @@ Remember to create questions that are:
 - Interesting and engaging
 - Appropriate for all audiences"""
 
-    try:
-        logger.info(f"Generating custom contest with prompt: {prompt[:100]}...")
-        
-        # Use the legacy OpenAI API
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        content = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON from the response
-        try:
-            # Sometimes the response might have extra text, so try to find the JSON array
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError("No JSON array found in response")
-            
-            json_content = content[start_idx:end_idx]
-            questions = json.loads(json_content)
-            
-            # Validate the structure
-            if not isinstance(questions, list):
-                raise ValueError("Response is not a list")
-            
-            for i, question in enumerate(questions):
-                if not isinstance(question, dict):
-                    raise ValueError(f"Question {i} is not a dictionary")
-                
-                required_fields = ['question', 'category', 'description']
-                for field in required_fields:
-                    if field not in question:
-                        raise ValueError(f"Question {i} missing required field: {field}")
-                
-                # Validate question format
-                if not question['question'].startswith('Will '):
-                    logger.warning(f"Question {i} doesn't start with 'Will ': {question['question']}")
-                
-                if not question['question'].endswith('?'):
-                    logger.warning(f"Question {i} doesn't end with '?': {question['question']}")
-            
-            logger.info(f"Successfully generated {len(questions)} custom contest questions")
-            return questions
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Failed to parse OpenAI response: {e}")
-            logger.error(f"Response content: {content}")
-            raise ContestGenerationError(f"Failed to parse AI response: {str(e)}")
-    
-    except openai.OpenAIError as e:
-        logger.error(f"OpenAI API error: {e}")
-        raise ContestGenerationError(f"AI service error: {str(e)}")
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def validate_custom_question(question: Dict, index: int) -> None:
+    """Check one generated custom prompt question.
     
-    except Exception as e:
-        logger.error(f"Unexpected error in custom contest generation: {e}")
-        raise ContestGenerationError(f"Unexpected error: {str(e)}")
+    Args:
+        question (Dict): Generated question
+        index (int): Position of the question in the response
+    
+    Raises:
+        ValueError: If the question is malformed
+    """
+    if not isinstance(question, dict):
+        raise ValueError(f"Question {index} is not a dictionary")
+    
+    required_fields = ['question', 'category', 'description']
+    for field in required_fields:
+        if field not in question:
+            raise ValueError(f"Question {index} missing required field: {field}")
+    
+    # Validate question format
+    if not question['question'].startswith('Will '):
+        logger.warning(f"Question {index} doesn't start with 'Will ': {question['question']}")
+    
+    if not question['question'].endswith('?'):
+        logger.warning(f"Question {index} doesn't end with '?': {question['question']}")
+
+
+def prepare_custom_generation(prompt: str, question_count: int = 5):
+    """Build the generation request for a custom prompt contest.
+    
+    Args:
+        prompt (str): User-provided prompt describing the contest they want
+        question_count (int): Number of questions to generate (1-10, default 5)
+    
+    Returns:
+        GenerationRequest: Request for the generation service
+    """
+    from app.utils.generation_service import GenerationRequest
+    
+    return GenerationRequest(
+        messages=build_custom_messages(prompt, question_count),
+        question_count=question_count,
+        validate=validate_custom_question,
+        sport='custom'
+    )
+
+
+def generate_custom_contest(prompt: str, question_count: int = 5, fresh: bool = False) -> List[Dict]:
+    """Generate contest questions using a custom user prompt.
+    
+    Args:
+        prompt (str): User-provided prompt describing the contest they want
+        question_count (int): Number of questions to generate (1-10, default 5)
+        fresh (bool): Generate new questions even if a cached result exists
+    
+    Returns:
+        List[Dict]: List of generated questions with metadata
+    
+    Raises:
+        ContestGenerationError: If generation fails or times out
+    """
+    from app.utils.generation_service import get_generation_service
+    
+    logger.info(f"Generating custom contest with prompt: {prompt[:100]}...")
+    return get_generation_service().generate(prepare_custom_generation(prompt, question_count), fresh=fresh)
 
 
 def generate_contest_name_and_description(sport: str, week_number: Optional[int] = None, 
@@ -450,26 +501,7 @@ def generate_contest_name_and_description(sport: str, week_number: Optional[int]
     current_date = datetime.now()
     
     if sport.upper() == "NFL":
-        if not season_year:
-            if current_date.month >= 9:
-                season_year = current_date.year
-            else:
-                season_year = current_date.year - 1
-        
-        if not week_number:
-            # Estimate current week
-            if current_date.month == 9:
-                week_number = min(4, max(1, current_date.day // 7))
-            elif current_date.month == 10:
-                week_number = min(8, 4 + (current_date.day // 7))
-            elif current_date.month == 11:
-                week_number = min(12, 8 + (current_date.day // 7))
-            elif current_date.month == 12:
-                week_number = min(16, 12 + (current_date.day // 7))
-            elif current_date.month == 1:
-                week_number = min(18, 16 + (current_date.day // 7))
-            else:
-                week_number = 1
+        season_year, week_number = resolve_nfl_week(week_number, season_year)
         
         name = f"NFL Week {week_number} - {season_year} Season"
         description = f"Predict the outcomes of NFL games for Week {week_number} of the {season_year} season. Answer Yes or No to questions about point spreads and over/under totals."
@@ -484,12 +516,16 @@ def generate_contest_name_and_description(sport: str, week_number: Optional[int]
     }
 
 
-def get_suggested_lock_time(sport: str, week_number: Optional[int] = None) -> datetime:
+def get_suggested_lock_time(sport: str, week_number: Optional[int] = None,
+                            season_year: Optional[int] = None) -> datetime:
     """Get a suggested lock time for the contest.
     
+    NFL contests lock at the week's first kickoff when the schedule is loaded.
+    
     Args:
         sport (str): Sport name
         week_number (int, optional): Week number
+        season_year (int, optional): NFL season year
         
     Returns:
         datetime: Suggested lock time in UTC
@@ -497,6 +533,14 @@ def get_suggested_lock_time(sport: str, week_number: Optional[int] = None) -> da
     current_date = datetime.now()
     
     if sport.upper() == "NFL":
+        from app.utils.nfl_schedule import get_calendar
+        from app.utils.timezone import convert_to_utc
+        
+        calendar = get_calendar()
+        kickoff = calendar.first_kickoff(*resolve_nfl_week(week_number, season_year))
+        if kickoff and kickoff > calendar.local_now():
+            return convert_to_utc(kickoff, calendar.timezone)
+        
         # NFL games typically start on Thursday night, with most games on Sunday
         # Lock the contest on Thursday at 8 PM ET (1 AM UTC Friday)
         days_until_thursday = (3 - current_date.weekday()) % 7  # Thursday is weekday 3
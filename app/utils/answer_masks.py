@@ -0,0 +1,82 @@
+"""Bitmask packing utilities for contest answers and answer keys.
+
+Each question in a contest is assigned a bit position based on its place in
+the contest's ordered question list. An entry is stored as two masks
+(``answered`` and ``yes``) and an answer key as a matching pair
+(``key_set`` and ``key_yes``), so scoring an entry is a single popcount.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# Masks are stored in signed 64-bit BigInteger columns
+MAX_PACKED_QUESTIONS = 63
+
+
+def can_pack(question_count: int) -> bool:
+    """Check if a contest with this many questions fits in a mask.
+
+    Args:
+        question_count (int): Number of questions in the contest
+
+    Returns:
+        bool: True if answers can be packed into a mask
+    """
+    return question_count <= MAX_PACKED_QUESTIONS
+
+
+def pack_answers(question_ids: Iterable[int], answers: Dict[int, Optional[bool]]) -> Tuple[int, int]:
+    """Pack answers into (answered, yes) bitmasks.
+
+    Args:
+        question_ids (Iterable[int]): Question IDs in contest question order
+        answers (Dict[int, Optional[bool]]): Mapping of question_id -> answer,
+            where None (or a missing key) means unanswered
+
+    Returns:
+        Tuple[int, int]: (answered_mask, yes_mask)
+    """
+    answered_mask = 0
+    yes_mask = 0
+
+    for bit, question_id in enumerate(question_ids):
+        answer = answers.get(question_id)
+        if answer is None:
+            continue
+        answered_mask |= 1 << bit
+        if answer:
+            yes_mask |= 1 << bit
+
+    return answered_mask, yes_mask
+
+
+def unpack_answers(question_ids: Iterable[int], answered_mask: int, yes_mask: int) -> Dict[int, bool]:
+    """Unpack bitmasks back into a question_id -> answer dictionary.
+
+    Args:
+        question_ids (Iterable[int]): Question IDs in contest question order
+        answered_mask (int): Bitmask of answered questions
+        yes_mask (int): Bitmask of questions answered Yes
+
+    Returns:
+        Dict[int, bool]: Answers for every answered question
+    """
+    return {
+        question_id: bool(yes_mask >> bit & 1)
+        for bit, question_id in enumerate(question_ids)
+        if answered_mask >> bit & 1
+    }
+
+
+def score_masks(entry_answered: int, entry_yes: int, key_set: int, key_yes: int) -> int:
+    """Count correct answers for an entry against an answer key.
+
+    Args:
+        entry_answered (int): Entry's answered mask
+        entry_yes (int): Entry's yes mask
+        key_set (int): Answer key's set mask
+        key_yes (int): Answer key's yes mask
+
+    Returns:
+        int: Number of correct answers
+    """
+    return (~(entry_yes ^ key_yes) & entry_answered & key_set).bit_count()
@@ -0,0 +1,173 @@
+"""Buffered writes for email logs and invitation records.
+
+EmailLog.log_email and the invitation helpers normally commit one row per
+message. Inside an active AuditWriter those rows are collected instead and
+written with one bulk INSERT per table, either every `flush_every` rows or
+when the batch ends:
+
+    with buffered_audit_writes():
+        for email in emails:
+            send_email(...)          # EmailLog rows are buffered
+    # buffered rows are flushed here, even if the loop raised
+
+A writer is active per thread; worker pools share one writer by activating
+it in each pool thread.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from flask import current_app
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def get_active_writer() -> Optional['AuditWriter']:
+    """Get the writer active in this thread.
+
+    Returns:
+        Optional[AuditWriter]: Active writer, or None if rows should be
+        written immediately
+    """
+    return getattr(_local, 'writer', None)
+
+
+class AuditWriter:
+    """Collects EmailLog and ContestInvitation rows for bulk insertion."""
+
+    def __init__(self, flush_every: Optional[int] = None):
+        """Initialize the writer.
+
+        Args:
+            flush_every (int, optional): Flush once this many rows are
+                buffered, defaults to the AUDIT_FLUSH_EVERY setting
+        """
+        self.flush_every = flush_every or current_app.config.get('AUDIT_FLUSH_EVERY', 100)
+        self._email_logs = []
+        self._invitations = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of buffered rows."""
+        return len(self._email_logs) + len(self._invitations)
+
+    def add_email_log(self, values: dict) -> None:
+        """Buffer an EmailLog row.
+
+        Args:
+            values (dict): EmailLog column values
+        """
+        with self._lock:
+            self._email_logs.append(values)
+            full = len(self) >= self.flush_every
+        if full:
+            self.flush()
+
+    def add_invitation(self, values: dict) -> None:
+        """Buffer a ContestInvitation row.
+
+        Args:
+            values (dict): ContestInvitation column values
+        """
+        with self._lock:
+            self._invitations.append(values)
+            full = len(self) >= self.flush_every
+        if full:
+            self.flush()
+
+    def write(self) -> None:
+        """Insert buffered rows in the current transaction without committing.
+
+        The buffer is kept, so the rows can be written again if the caller
+        rolls the transaction back; call clear() once it commits.
+        """
+        from app.models import ContestInvitation, EmailLog
+
+        with self._lock:
+            email_logs = list(self._email_logs)
+            invitations = list(self._invitations)
+
+        if email_logs:
+            db.session.execute(EmailLog.__table__.insert(), email_logs)
+        if invitations:
+            db.session.execute(ContestInvitation.__table__.insert(), invitations)
+
+    def clear(self) -> None:
+        """Discard buffered rows after they have been committed."""
+        with self._lock:
+            self._email_logs = []
+            self._invitations = []
+
+    def flush(self) -> int:
+        """Insert and commit buffered rows.
+
+        Returns:
+            int: Number of rows written
+        """
+        from app.models import ContestInvitation, EmailLog
+
+        with self._lock:
+            email_logs, self._email_logs = self._email_logs, []
+            invitations, self._invitations = self._invitations, []
+
+        if not email_logs and not invitations:
+            return 0
+
+        try:
+            if email_logs:
+                db.session.execute(EmailLog.__table__.insert(), email_logs)
+            if invitations:
+                db.session.execute(ContestInvitation.__table__.insert(), invitations)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to flush {len(email_logs) + len(invitations)} audit rows: {str(e)}")
+            # Keep the rows for the next flush
+            with self._lock:
+                self._email_logs = email_logs + self._email_logs
+                self._invitations = invitations + self._invitations
+            raise
+
+        return len(email_logs) + len(invitations)
+
+    @contextmanager
+    def activate(self):
+        """Make this writer active in the current thread."""
+        previous = get_active_writer()
+        _local.writer = self
+        try:
+            yield self
+        finally:
+            _local.writer = previous
+
+
+@contextmanager
+def buffered_audit_writes(flush_every: Optional[int] = None):
+    """Buffer audit rows for the duration of a batch.
+
+    Buffered rows are flushed when the block exits, including when it raises.
+
+    Args:
+        flush_every (int, optional): Flush once this many rows are buffered
+
+    Yields:
+        AuditWriter: The active writer
+    """
+    writer = AuditWriter(flush_every)
+    try:
+        with writer.activate():
+            yield writer
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        try:
+            writer.flush()
+        except Exception:
+            # Already logged; don't mask the batch's own error
+            pass
@@ -0,0 +1,385 @@
+"""Application cache with tag invalidation.
+
+Cached values are tagged with the data they were built from, e.g. 'contests'
+for anything listing contests or 'league:12' for something showing league 12.
+When a transaction that touched those rows commits, the tags are invalidated
+and every value carrying them stops being served:
+
+    after_flush   each flushed object is mapped to tags by model_tags, and the
+                  tags are collected on the session
+    after_commit  the collected tags are invalidated in the app's cache
+    rollback      collected tags are discarded; nothing changed
+
+Values live in a pluggable backend (see app.utils.cache_backends), so with
+the disk or Redis backend every worker sees the same values and the same
+invalidations. A tag is a version stored next to the values; a value records
+the versions of its tags when it was built and is a miss once any of them
+changed or was evicted. Keys in the backend are namespaced:
+
+    v:<key>   value and the tag versions it was built with
+    t:<tag>   current version of a tag
+    l:<key>   lock held by the worker recomputing a value
+
+get_or_set only lets one caller per key compute a missing value: threads of
+a worker queue on a local lock and other workers wait up to CACHE_LOCK_WAIT
+seconds for the value before computing it themselves. Backend errors are
+logged and treated as misses, so a cache outage slows pages down rather than
+breaking them. Hits and misses per key namespace are counted in each worker
+(see /health/cache).
+
+Bulk statements that bypass the ORM (bulk_update_mappings, Core inserts) are
+not seen, so every value also has a TTL bounding how stale it can get. Models
+are mapped to tags in MODEL_TAGS; feature code caching data of other models
+adds them with register_model_tags.
+"""
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import (Contest, ContestEntry, League, LeagueContest, LeagueMembership, Question,
+                        QuestionPickTally, User)
+from app.utils.cache_backends import create_backend
+
+_MISSING = object()
+_events_registered = False
+
+
+class TaggedCache:
+    """Cache whose values expire by TTL or tag, over a storage backend."""
+
+    # Local locks keys are spread over when computing values
+    LOCK_STRIPES = 64
+
+    def __init__(self, backend, default_ttl: float = 60, tag_ttl: float = 86400,
+                 lock_timeout: float = 10, lock_wait: float = 2):
+        """Initialize the cache.
+
+        Args:
+            backend: Storage backend from app.utils.cache_backends
+            default_ttl (float): Seconds a value is kept unless set otherwise
+            tag_ttl (float): Seconds a tag version is kept; an expired tag
+                invalidates its values
+            lock_timeout (float): Seconds a recompute lock is held at most
+            lock_wait (float): Seconds to wait for another worker's recompute
+        """
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.tag_ttl = tag_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._counts = Counter()
+        self._namespaces = defaultdict(Counter)
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str, key: Optional[str] = None) -> None:
+        """Count an event, and a hit or miss for the key's namespace."""
+        with self._stats_lock:
+            self._counts[name] += 1
+            if key is not None:
+                self._namespaces[key.split(':', 1)[0]][name] += 1
+
+    def _call(self, method: str, *args, fallback: Any = None) -> Any:
+        """Call the backend, logging and counting errors instead of raising."""
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            self._count('errors')
+            if has_app_context():
+                current_app.logger.warning(f"Cache backend {method} failed: {e}")
+            return fallback
+
+    def _tag_versions(self, tags: Iterable[str]) -> Optional[Dict[str, str]]:
+        """Get the current versions of tags, starting any that are missing.
+
+        Returns:
+            Optional[Dict[str, str]]: tag -> version, or None if the backend
+            failed
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return {}
+        found = self._call('get_many', [f't:{tag}' for tag in tags])
+        if found is None:
+            return None
+
+        versions = {}
+        for tag in tags:
+            version = found.get(f't:{tag}')
+            if version is None:
+                # A fresh version never matches values built before an eviction
+                version = uuid.uuid4().hex
+                if not self._call('add', f't:{tag}', version, self.tag_ttl, fallback=False):
+                    version = self._call('get_many', [f't:{tag}'], fallback={}).get(f't:{tag}')
+                    if version is None:
+                        return None
+            versions[tag] = version
+        return versions
+
+    def _lookup(self, key: str) -> Any:
+        """Get a value if it and its tags are current, else _MISSING."""
+        entry = self._call('get_many', [f'v:{key}'], fallback={}).get(f'v:{key}')
+        if entry is None:
+            return _MISSING
+        value, versions = entry
+        if versions:
+            current = self._call('get_many', [f't:{tag}' for tag in versions])
+            if current is None or any(current.get(f't:{tag}') != version for tag, version in versions.items()):
+                return _MISSING
+        return value
+
+    def _store(self, key: str, value: Any, ttl: Optional[float], versions: Optional[Dict[str, str]]) -> None:
+        """Store a value with the tag versions it was built with."""
+        if versions is None:
+            return
+        self._call('set', f'v:{key}', (value, versions), self.default_ttl if ttl is None else ttl)
+        self._count('sets')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value.
+
+        Args:
+            key (str): Cache key
+            default (Any): Returned when the key is missing, expired or
+                invalidated
+
+        Returns:
+            Any: The cached value, or `default`
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            self._count('misses', key)
+            return default
+        self._count('hits', key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        """Cache a value.
+
+        Args:
+            key (str): Cache key
+            value (Any): Value to keep; it is shared between requests and
+                workers, so it must be plain data rather than ORM objects
+            ttl (float, optional): Seconds to keep it, defaults to default_ttl
+            tags (Iterable[str]): Tags that invalidate it
+        """
+        self._store(key, value, ttl, self._tag_versions(tags))
+
+    def get_or_set(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None,
+                   tags: Iterable[str] = (), value_tags: Optional[Callable[[Any], Iterable[str]]] = None) -> Any:
+        """Get a cached value, computing and caching it on a miss.
+
+        Tag versions are read before computing, so a commit landing while the
+        value is built invalidates it. Tags that depend on the value, e.g. the
+        IDs of the rows a list shows, come from `value_tags` and are read
+        after; the collection tags in `tags` cover rows added meanwhile.
+
+        Args:
+            key (str): Cache key
+            compute (Callable[[], Any]): Builds the value
+            ttl (float, optional): Seconds to keep it, defaults to default_ttl
+            tags (Iterable[str]): Tags that invalidate it
+            value_tags (Callable, optional): Gets more tags from the value
+
+        Returns:
+            Any: The cached or computed value
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            self._count('hits', key)
+            return value
+        self._count('misses', key)
+
+        with self._locks[zlib.crc32(key.encode()) % self.LOCK_STRIPES]:
+            # Another thread may have filled it while we queued
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self._count('lock_waits')
+                return value
+
+            # None when the backend failed: there is nobody to wait for
+            locked = self._call('add', f'l:{key}', uuid.uuid4().hex, self.lock_timeout)
+            if locked is False:
+                # Another worker is computing it; give it a moment
+                self._count('lock_waits')
+                deadline = time.monotonic() + self.lock_wait
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = self._lookup(key)
+                    if value is not _MISSING:
+                        return value
+
+            try:
+                versions = self._tag_versions(tags)
+                value = compute()
+                self._count('computes')
+                if value_tags is not None and versions is not None:
+                    extra = self._tag_versions(value_tags(value))
+                    versions = None if extra is None else {**extra, **versions}
+                self._store(key, value, ttl, versions)
+            finally:
+                if locked:
+                    self._call('delete', f'l:{key}')
+        return value
+
+    def delete(self, key: str) -> None:
+        """Forget a value.
+
+        Args:
+            key (str): Cache key
+        """
+        self._call('delete', f'v:{key}')
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Invalidate every value carrying any of the tags.
+
+        Args:
+            tags (Iterable[str]): Tags whose data changed
+
+        Returns:
+            int: Number of tags invalidated
+        """
+        tags = set(tags)
+        for tag in tags:
+            self._call('set', f't:{tag}', uuid.uuid4().hex, self.tag_ttl)
+        with self._stats_lock:
+            self._counts['invalidations'] += len(tags)
+        return len(tags)
+
+    def clear(self) -> None:
+        """Forget everything."""
+        self._call('clear')
+
+    def stats(self) -> Dict[str, Any]:
+        """Get this worker's cache counters.
+
+        Returns:
+            Dict[str, Any]: Backend name, event counts, hit rate and hits and
+            misses per key namespace
+        """
+        with self._stats_lock:
+            counts = dict(self._counts)
+            namespaces = {name: dict(counter) for name, counter in self._namespaces.items()}
+        lookups = counts.get('hits', 0) + counts.get('misses', 0)
+        return {
+            'backend': self.backend.name,
+            'hits': counts.get('hits', 0),
+            'misses': counts.get('misses', 0),
+            'hit_rate': round(counts.get('hits', 0) / lookups, 3) if lookups else None,
+            'sets': counts.get('sets', 0),
+            'computes': counts.get('computes', 0),
+            'lock_waits': counts.get('lock_waits', 0),
+            'invalidations': counts.get('invalidations', 0),
+            'errors': counts.get('errors', 0),
+            'namespaces': namespaces
+        }
+
+
+def create_cache(app) -> TaggedCache:
+    """Create the cache configured for an app.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        TaggedCache: Cache over the CACHE_BACKEND backend
+    """
+    return TaggedCache(
+        create_backend(app),
+        default_ttl=app.config.get('CACHE_DEFAULT_TTL', 60),
+        tag_ttl=app.config.get('CACHE_TAG_TTL', 86400),
+        lock_timeout=app.config.get('CACHE_LOCK_TIMEOUT', 10),
+        lock_wait=app.config.get('CACHE_LOCK_WAIT', 2)
+    )
+
+
+def get_cache() -> TaggedCache:
+    """Get the current app's cache, creating it on first use.
+
+    Returns:
+        TaggedCache: The app's cache
+    """
+    cache = current_app.extensions.get('cache')
+    if cache is None:
+        cache = current_app.extensions['cache'] = create_cache(current_app)
+    return cache
+
+
+# Model -> function giving the tags a change to one of its rows invalidates.
+# Contests and leagues invalidate their collection tag (lists, totals) and
+# their own tag; rows belonging to one invalidate the owner's tag.
+MODEL_TAGS = {
+    Contest: lambda contest: {'contests', f'contest:{contest.contest_id}'},
+    Question: lambda question: {f'contest:{question.contest_id}'},
+    ContestEntry: lambda entry: {f'contest:{entry.contest_id}', f'user:{entry.user_id}'},
+    QuestionPickTally: lambda tally: {f'contest:{tally.contest_id}'},
+    League: lambda league: {'leagues', f'league:{league.league_id}'},
+    LeagueMembership: lambda membership: {f'league:{membership.league_id}', f'user:{membership.user_id}'},
+    LeagueContest: lambda league_contest: {f'league:{league_contest.league_id}'},
+    User: lambda user: {f'user:{user.user_id}'},
+}
+
+
+def register_model_tags(model, tags: Callable[[Any], Set[str]]) -> None:
+    """Make changes to a model's rows invalidate cache tags.
+
+    Args:
+        model: Model class
+        tags (Callable): Gets the tags to invalidate from a changed row
+    """
+    MODEL_TAGS[model] = tags
+
+
+def model_tags(obj) -> Set[str]:
+    """Get the cache tags a change to a row invalidates.
+
+    Args:
+        obj: A flushed model instance
+
+    Returns:
+        Set[str]: Tags to invalidate
+    """
+    tags = set()
+    for model, get_tags in MODEL_TAGS.items():
+        if isinstance(obj, model):
+            tags |= get_tags(obj)
+    return tags
+
+
+def _collect_tags(session, flush_context) -> None:
+    """Remember the tags of everything a flush wrote."""
+    # new/dirty/deleted still hold the flushed objects, now with their IDs
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags |= model_tags(obj)
+
+
+def _invalidate_committed(session) -> None:
+    """Invalidate the tags of a committed transaction."""
+    tags = session.info.pop('cache_tags', None)
+    if tags and has_app_context():
+        get_cache().invalidate_tags(tags)
+
+
+def _discard_tags(session, previous_transaction) -> None:
+    """Forget collected tags when a transaction rolls back."""
+    session.info.pop('cache_tags', None)
+
+
+def register_cache_events() -> None:
+    """Invalidate cached values whenever the rows they came from change."""
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Session, 'after_flush', _collect_tags)
+    event.listen(Session, 'after_commit', _invalidate_committed)
+    event.listen(Session, 'after_soft_rollback', _discard_tags)
+    _events_registered = True
@@ -0,0 +1,376 @@
+"""Storage backends for the application cache (see app.utils.cache).
+
+CACHE_BACKEND picks one:
+
+    memory  MemoryBackend, an LRU dict in this process (the default)
+    disk    DiskBackend, a SQLite file shared by every worker on the machine,
+            for multi-worker gunicorn without Redis; its directory must be
+            private to the app's user (see ensure_private_dir)
+    redis   RedisBackend, shared by every machine; needs the redis package
+            and CACHE_REDIS_URL (defaults to REDIS_URL)
+    fake    RedisBackend over FakeRedis, an in-process stand-in for tests and
+            local runs without a Redis server
+
+Every backend offers the same operations, with TTLs in seconds (None for no
+expiry): get_many, set, add (set only if absent, used for recompute locks),
+delete and clear. Shared backends pickle values, so cached values must be
+plain data rather than ORM objects.
+"""
+import fnmatch
+import math
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, Optional
+
+
+def ensure_private_dir(path: str) -> str:
+    """Create a directory only this user can use, or check that one is.
+
+    Cached values are unpickled or trusted, so a file planted by another
+    local user must never be read. A directory we own is tightened to 0700;
+    one owned by someone else, or a symlink, is refused.
+
+    Args:
+        path (str): Directory path
+
+    Returns:
+        str: The path
+
+    Raises:
+        PermissionError: If the directory is not owned by this user
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+        raise PermissionError(f"Cache directory {path} is not a directory owned by this user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def default_cache_dir(name: str) -> str:
+    """Get a per-user directory under the temp dir.
+
+    Args:
+        name (str): Directory name prefix
+
+    Returns:
+        str: Path, not yet created
+    """
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f'{name}-{user}')
+
+
+class MemoryBackend:
+    """LRU dict in this process."""
+
+    name = 'memory'
+
+    def __init__(self, max_size: int = 5000):
+        """Initialize the backend.
+
+        Args:
+            max_size (int): Keys kept before the least recently used go
+        """
+        self.max_size = max_size
+
+        self._entries = OrderedDict()  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float):
+        """Get a key's entry if it has not expired (lock held)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and now >= entry[1]:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _store(self, key: str, value: Any, ttl: Optional[float], now: float) -> None:
+        """Store a value and evict the oldest keys if full (lock held)."""
+        self._entries[key] = (value, None if ttl is None else now + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the values of the keys that are present."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._live(key, now)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value."""
+        with self._lock:
+            self._store(key, value, ttl, time.monotonic())
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value unless the key is present; True if stored."""
+        now = time.monotonic()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._store(key, value, ttl, now)
+            return True
+
+    def delete(self, key: str) -> None:
+        """Remove a key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every key."""
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskBackend:
+    """SQLite file shared by every process on the machine."""
+
+    name = 'disk'
+
+    # Expired rows are purged after this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """Initialize the backend.
+
+        Args:
+            cache_dir (str, optional): Directory for the cache file, defaults
+                to a per-user directory under the temp dir
+
+        Raises:
+            PermissionError: If the directory belongs to another user
+        """
+        cache_dir = ensure_private_dir(cache_dir or default_cache_dir('overunders-cache'))
+        self.path = os.path.join(cache_dir, 'cache.sqlite3')
+
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the cache file."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _written(self, connection: sqlite3.Connection) -> None:
+        """Count a write and purge expired rows now and then."""
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the values of the keys that are present."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT key, value FROM cache WHERE key IN ({', '.join('?' * len(keys))}) "
+            f"AND (expires_at IS NULL OR expires_at > ?)",
+            keys + [time.time()]
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value."""
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), None if ttl is None else time.time() + ttl)
+        )
+        self._written(connection)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value unless the key is present; True if stored."""
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('DELETE FROM cache WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), None if ttl is None else now + ttl)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        """Remove a key."""
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self) -> None:
+        """Remove every key."""
+        self._connection().execute('DELETE FROM cache')
+
+
+class FakeRedis:
+    """In-process stand-in for the few redis.Redis methods RedisBackend uses."""
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        """Get a live value (lock held)."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and time.monotonic() >= entry[1]:
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def mget(self, keys):
+        """Get several values, None for missing keys."""
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, name: str, value: bytes, px: Optional[int] = None, nx: bool = False):
+        """Set a value, optionally only if absent; True if set, None if not."""
+        with self._lock:
+            if nx and self._get(name) is not None:
+                return None
+            self._data[name] = (value, None if px is None else time.monotonic() + px / 1000)
+            return True
+
+    def delete(self, *names: str) -> int:
+        """Delete keys."""
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match: str = '*', count: Optional[int] = None):
+        """Iterate over the keys matching a glob pattern."""
+        with self._lock:
+            keys = [key for key in self._data if fnmatch.fnmatchcase(key, match)]
+        return iter(keys)
+
+
+class RedisBackend:
+    """Redis server shared by every process, or FakeRedis."""
+
+    name = 'redis'
+
+    def __init__(self, client, prefix: str = 'overunders:', breaker=None):
+        """Initialize the backend.
+
+        Args:
+            client: redis.Redis or FakeRedis
+            prefix (str): Prepended to every key, so apps can share a server
+            breaker (CircuitBreaker, optional): Breaker guarding calls
+        """
+        self.client = client
+        self.prefix = prefix
+        self.breaker = breaker
+
+    def _guard(self):
+        """Run a call under the breaker, if any."""
+        return self.breaker.guard() if self.breaker is not None else nullcontext()
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        """Convert a TTL to the milliseconds Redis expects."""
+        return None if ttl is None else max(1, math.ceil(ttl * 1000))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the values of the keys that are present."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        with self._guard():
+            values = self.client.mget([self.prefix + key for key in keys])
+        return {key: pickle.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value."""
+        with self._guard():
+            self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), px=self._px(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value unless the key is present; True if stored."""
+        with self._guard():
+            return bool(self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                                        px=self._px(ttl), nx=True))
+
+    def delete(self, key: str) -> None:
+        """Remove a key."""
+        with self._guard():
+            self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        """Remove every key under the prefix."""
+        with self._guard():
+            batch = []
+            for key in self.client.scan_iter(match=self.prefix + '*', count=500):
+                batch.append(key)
+                if len(batch) == 500:
+                    self.client.delete(*batch)
+                    batch = []
+            if batch:
+                self.client.delete(*batch)
+
+
+def create_backend(app):
+    """Create the cache backend configured for an app.
+
+    Falls back to the memory backend, with a warning, if Redis is configured
+    but the redis package is not installed or no URL is set, or if the disk
+    cache's directory is not private to this user.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        MemoryBackend, DiskBackend or RedisBackend: The configured backend
+    """
+    from app.utils.circuit_breaker import get_breaker
+
+    kind = app.config.get('CACHE_BACKEND', 'memory')
+    prefix = app.config.get('CACHE_KEY_PREFIX', 'overunders:')
+
+    if kind == 'disk':
+        try:
+            return DiskBackend(app.config.get('CACHE_DIR'))
+        except OSError as e:
+            app.logger.warning(f"Disk cache unavailable ({str(e)}), using the in-process cache")
+    if kind == 'fake':
+        return RedisBackend(FakeRedis(), prefix=prefix)
+    if kind == 'redis':
+        url = app.config.get('CACHE_REDIS_URL')
+        try:
+            import redis
+        except ImportError:
+            app.logger.warning("redis package not installed, using the in-process cache")
+        else:
+            if url:
+                timeout = app.config.get('PROVIDER_LATENCY_BUDGETS', {}).get('redis_cache', 0.25)
+                client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+                return RedisBackend(client, prefix=prefix, breaker=get_breaker('redis_cache', app))
+            app.logger.warning("CACHE_REDIS_URL not set, using the in-process cache")
+    elif kind != 'memory':
+        app.logger.warning(f"Unknown CACHE_BACKEND {kind!r}, using the in-process cache")
+
+    return MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 5000))
@@ -0,0 +1,266 @@
+"""Circuit breakers and latency budgets for external providers.
+
+Each provider (OpenAI generation and moderation, SendGrid, SMTP, Google
+discovery, the Redis cache) gets one breaker per process:
+
+    closed     calls go through; `failure_threshold` consecutive failures,
+               or calls slower than the latency budget, open the circuit
+    open       calls are refused at once with CircuitOpenError, so callers
+               fail fast or use their fallback instead of waiting on a dead
+               provider
+    half-open  after `reset_timeout` seconds one trial call is let through;
+               success closes the circuit, failure opens it again
+
+The latency budget doubles as the timeout callers pass to the provider.
+Counters and latencies are kept per breaker for /health/providers.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the provider's circuit is open."""
+    pass
+
+
+class CircuitBreaker:
+    """Failure memory and latency budget for one provider."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 latency_budget: float = 10, half_open_max_calls: int = 1):
+        """Initialize the breaker.
+
+        Args:
+            name (str): Provider name
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a trial call
+            latency_budget (float): Seconds a call may take; slower calls count
+                as failures
+            half_open_max_calls (int): Trial calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_budget = latency_budget
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the circuit and clear the metrics."""
+        with self._lock:
+            self._state = CLOSED
+            self._opened_at = 0.0
+            self._consecutive_failures = 0
+            self._trial_calls = 0
+            self._metrics = {
+                'calls': 0,
+                'successes': 0,
+                'failures': 0,
+                'slow_calls': 0,
+                'rejected': 0,
+                'times_opened': 0,
+                'total_latency': 0.0,
+                'max_latency': 0.0,
+                'last_error': None,
+                'last_failure_at': None
+            }
+
+    def _current_state(self) -> str:
+        """Get the state, moving open to half-open once the reset timeout passes (lock held)."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        """Current circuit state."""
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Check whether a call may go to the provider.
+
+        A True result must be followed by record_success, record_failure or
+        release.
+
+        Returns:
+            bool: False if the call should be refused
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self._metrics['rejected'] += 1
+            return False
+
+    def _open(self) -> None:
+        """Open the circuit (lock held)."""
+        if self._state != OPEN:
+            self._metrics['times_opened'] += 1
+            logger.warning(f"Circuit for {self.name} opened after {self._consecutive_failures} failures")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    def _record_latency(self, elapsed: Optional[float]) -> None:
+        """Add a call's latency to the metrics (lock held)."""
+        self._metrics['calls'] += 1
+        if elapsed is not None:
+            self._metrics['total_latency'] += elapsed
+            self._metrics['max_latency'] = max(self._metrics['max_latency'], elapsed)
+
+    def record_success(self, elapsed: float) -> None:
+        """Record a completed call.
+
+        A call over the latency budget is recorded as a slow failure.
+
+        Args:
+            elapsed (float): Call duration in seconds
+        """
+        if elapsed > self.latency_budget:
+            with self._lock:
+                self._metrics['slow_calls'] += 1
+            self.record_failure(elapsed, f"Slow call: {elapsed:.1f}s over a {self.latency_budget:g}s budget")
+            return
+
+        with self._lock:
+            self._record_latency(elapsed)
+            self._metrics['successes'] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = CLOSED
+            self._trial_calls = 0
+
+    def record_failure(self, elapsed: Optional[float] = None, error: Optional[str] = None) -> None:
+        """Record a failed call.
+
+        Args:
+            elapsed (float, optional): Call duration in seconds
+            error (str, optional): What went wrong
+        """
+        with self._lock:
+            self._record_latency(elapsed)
+            self._metrics['failures'] += 1
+            self._metrics['last_error'] = error
+            self._metrics['last_failure_at'] = time.time()
+            self._consecutive_failures += 1
+
+            if self._current_state() == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self) -> None:
+        """Give back an allowed call that ended without an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trial_calls > 0:
+                self._trial_calls -= 1
+
+    @contextmanager
+    def guard(self, is_failure: Optional[Callable[[Exception], bool]] = None):
+        """Run a provider call under the breaker.
+
+        Args:
+            is_failure (Callable, optional): Decides whether an exception
+                means the provider is failing (e.g. a 503) rather than the
+                request being bad (e.g. a 400); by default every exception does
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+        start = time.monotonic()
+        try:
+            yield self
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            if is_failure is None or is_failure(e):
+                self.record_failure(elapsed, str(e))
+            else:
+                self.record_success(elapsed)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+
+    def get_metrics(self) -> dict:
+        """Get the breaker's state and counters.
+
+        Returns:
+            dict: State, call counts and latencies in milliseconds
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['state'] = self._current_state()
+            metrics['consecutive_failures'] = self._consecutive_failures
+
+        total_latency = metrics.pop('total_latency')
+        metrics['avg_latency_ms'] = round(total_latency / metrics['calls'] * 1000, 1) if metrics['calls'] else None
+        metrics['max_latency_ms'] = round(metrics.pop('max_latency') * 1000, 1)
+        metrics['latency_budget_ms'] = round(self.latency_budget * 1000)
+        return metrics
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, app=None) -> CircuitBreaker:
+    """Get the breaker for a provider, creating it on first use.
+
+    Args:
+        name (str): Provider name, a key of PROVIDER_LATENCY_BUDGETS
+        app (Flask, optional): Application to read settings from, defaults
+            to current_app
+
+    Returns:
+        CircuitBreaker: The provider's breaker for this process
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            config = (app or current_app).config
+            budgets = config.get('PROVIDER_LATENCY_BUDGETS', {})
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=config.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5),
+                reset_timeout=config.get('CIRCUIT_BREAKER_RESET_TIMEOUT', 30),
+                latency_budget=budgets.get(name, 10)
+            )
+        return breaker
+
+
+def get_all_metrics() -> Dict[str, dict]:
+    """Get the metrics of every breaker in this process.
+
+    Returns:
+        Dict[str, dict]: Metrics by provider name
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.get_metrics() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    """Forget every breaker, e.g. between tests or after changing settings."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -6,6 +6,7 @@ from datetime import datetime
 from flask import current_app
 import openai
 from app import db
+from app.utils.circuit_breaker import CircuitOpenError, get_breaker
 
 
 logger = logging.getLogger(__name__)
@@ -174,12 +175,14 @@ class ContentFilter:
         if not self.ai_moderation_enabled or not self.openai_api_key:
             return ContentModerationResult(is_safe=True, reason="AI moderation disabled")
         
+        breaker = get_breaker('openai_moderation')
         try:
             # Set up OpenAI API key
             openai.api_key = self.openai_api_key
             
-            # Use OpenAI's moderation endpoint
-            response = openai.Moderation.create(input=text)
+            # Use OpenAI's moderation endpoint, within its latency budget
+            with breaker.guard():
+                response = openai.Moderation.create(input=text, request_timeout=breaker.latency_budget)
             result = response['results'][0]
             
             is_safe = not result['flagged']
@@ -208,6 +211,10 @@ class ContentFilter:
                 reason=reason
             )
             
+        except CircuitOpenError:
+            # OpenAI is failing; moderate_content still applies the rule-based filter
+            return ContentModerationResult(is_safe=True, reason="AI moderation unavailable")
+        
         except Exception as e:
             logger.error(f"AI moderation error: {e}")
             # Fall back to safe result if AI fails
@@ -1,7 +1,16 @@
-"""Decorator functions for authentication and authorization."""
+"""Decorator functions for authentication and authorization.
+
+The logged-in user is loaded at most once per request and kept on `g`, along
+with their verification info and league roles when asked for, so decorators,
+routes and template context processors share one lookup.
+"""
 from functools import wraps
-from flask import session, redirect, url_for, flash, abort
+from typing import Dict, Optional
+from flask import session, redirect, url_for, flash, abort, g, has_request_context
+from app import db
 from app.models import User
+from app.utils.memberships import load_user_roles
+from app.utils.reputation import ReputationCalculator
 
 
 def login_required(f):
@@ -37,7 +46,7 @@ def admin_required(f):
             flash('Please log in to access this page.', 'warning')
             return redirect(url_for('auth.login'))
         
-        user = User.query.get(session['user_id'])
+        user = get_current_user()
         if not user or not user.is_admin:
             abort(403)  # Forbidden
         
@@ -62,7 +71,7 @@ def contest_owner_required(f):
             flash('Please log in to access this page.', 'warning')
             return redirect(url_for('auth.login'))
         
-        user = User.query.get(session['user_id'])
+        user = get_current_user()
         if not user:
             flash('User not found.', 'error')
             return redirect(url_for('auth.login'))
@@ -83,15 +92,74 @@ def contest_owner_required(f):
     return decorated_function
 
 
+def _identity() -> dict:
+    """Get this request's identity cache, resetting it if the session user changed."""
+    user_id = session.get('user_id')
+    identity = g.get('_identity')
+    if identity is None or identity['user_id'] != user_id:
+        identity = g._identity = {'user_id': user_id}
+    return identity
+
+
 def get_current_user():
     """Get the current logged-in user.
     
+    The user is loaded once per request.
+    
     Returns:
         User: Current user object or None if not logged in
     """
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    if not has_request_context():
+        return None
+    
+    identity = _identity()
+    if 'user' not in identity:
+        user_id = identity['user_id']
+        identity['user'] = db.session.get(User, user_id) if user_id is not None else None
+    return identity['user']
+
+
+def get_current_verification_info() -> Optional[dict]:
+    """Get the current user's verification info, loaded once per request.
+    
+    Returns:
+        Optional[dict]: ReputationCalculator.get_user_verification_info
+        result, or None if not logged in
+    """
+    user = get_current_user()
+    if user is None:
+        return None
+    
+    identity = _identity()
+    if 'verification_info' not in identity:
+        identity['verification_info'] = ReputationCalculator.get_user_verification_info(user.user_id)
+    return identity['verification_info']
+
+
+def get_current_league_roles() -> Dict[int, str]:
+    """Get the current user's league roles, loaded once per request.
+    
+    They are loaded once (see load_user_roles), so authorization checks in
+    a request all see the memberships as they were when it started, plus any
+    changes it commits.
+    
+    Returns:
+        Dict[int, str]: league_id -> 'admin' or 'member'; empty if not logged in
+    """
+    user = get_current_user()
+    if user is None:
+        return {}
+    
+    identity = _identity()
+    if 'league_roles' not in identity:
+        identity['league_roles'] = load_user_roles(user.user_id)
+    return identity['league_roles']
+
+
+def clear_identity_cache() -> None:
+    """Forget the cached identity, e.g. after changing the user's memberships."""
+    if has_request_context():
+        g.pop('_identity', None)
 
 
 def is_admin():
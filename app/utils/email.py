@@ -1,8 +1,11 @@
 """Email utility functions."""
-from typing import Optional
+import smtplib
+from typing import Callable, List, Optional, Tuple
 from flask import current_app, url_for
-from flask_mail import Message
-from app import mail
+from flask_mail import Connection, Message
+from app import db
+from app.utils.circuit_breaker import CircuitOpenError, get_breaker
+from app.utils.outbox import queue_email, queue_emails
 
 # SendGrid imports
 try:
@@ -17,12 +20,15 @@ except ImportError:
 def send_login_email(email: str, token: str) -> bool:
     """Send login email with one-time token.
     
+    The email is added to the outbox like every other email and delivered
+    by the outbox relay, so the request never waits on the email provider.
+    
     Args:
         email (str): Recipient email address
         token (str): One-time login token
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if the email was queued, False otherwise
     """
     try:
         login_url = url_for('auth.login_with_token', token=token, _external=True)
@@ -72,70 +78,134 @@ def send_login_email(email: str, token: str) -> bool:
         user = User.query.filter_by(email=email).first()
         user_id = user.user_id if user else None
         
-        return send_email(
+        # Committed together with the caller's login token
+        queue_email(
             to_email=email,
             subject=subject,
             body=body,
             html_body=html_body,
             email_type='login',
-            user_id=user_id
+            user_id=user_id,
+            commit=True
         )
+        return True
         
     except Exception as e:
-        current_app.logger.error(f"Failed to send login email to {email}: {str(e)}")
+        db.session.rollback()
+        current_app.logger.error(f"Failed to queue login email to {email}: {str(e)}")
         return False
 
 
+def build_contest_notification(contest_name: str, message_type: str,
+                               additional_info: Optional[str] = None) -> Tuple[str, str]:
+    """Build the subject and body of a contest notification.
+    
+    Args:
+        contest_name (str): Name of the contest
+        message_type (str): Type of notification ('created', 'locked', 'results')
+        additional_info (str, optional): Additional information to include
+        
+    Returns:
+        Tuple[str, str]: Email subject and body
+    """
+    subject_map = {
+        'created': f"New Contest Created: {contest_name}",
+        'locked': f"Contest Locked: {contest_name}",
+        'results': f"Contest Results Available: {contest_name}"
+    }
+    
+    body_map = {
+        'created': f"A new contest '{contest_name}' has been created and is now available for entries.",
+        'locked': f"The contest '{contest_name}' has been locked. No more entries or modifications are allowed.",
+        'results': f"Results are now available for the contest '{contest_name}'."
+    }
+    
+    subject = subject_map.get(message_type, f"Contest Update: {contest_name}")
+    body = body_map.get(message_type, f"Update regarding contest '{contest_name}'.")
+    
+    if additional_info:
+        body += f"\n\n{additional_info}"
+    
+    body += "\n\nVisit Over-Under Contests to view more details."
+    
+    return subject, body
+
+
 def send_contest_notification(email: str, contest_name: str, message_type: str, 
-                            additional_info: Optional[str] = None) -> bool:
-    """Send contest-related notification email.
+                            additional_info: Optional[str] = None, commit: bool = True) -> bool:
+    """Queue a contest-related notification email in the outbox.
     
     Args:
         email (str): Recipient email address
         contest_name (str): Name of the contest
         message_type (str): Type of notification ('created', 'locked', 'results')
         additional_info (str, optional): Additional information to include
+        commit (bool): Commit the email; pass False to queue it in the caller's transaction
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if the notification was queued, False otherwise
     """
     try:
-        subject_map = {
-            'created': f"New Contest Created: {contest_name}",
-            'locked': f"Contest Locked: {contest_name}",
-            'results': f"Contest Results Available: {contest_name}"
-        }
-        
-        body_map = {
-            'created': f"A new contest '{contest_name}' has been created and is now available for entries.",
-            'locked': f"The contest '{contest_name}' has been locked. No more entries or modifications are allowed.",
-            'results': f"Results are now available for the contest '{contest_name}'."
-        }
-        
-        subject = subject_map.get(message_type, f"Contest Update: {contest_name}")
-        body = body_map.get(message_type, f"Update regarding contest '{contest_name}'.")
-        
-        if additional_info:
-            body += f"\n\n{additional_info}"
-        
-        body += "\n\nVisit Over-Under Contests to view more details."
-        
-        msg = Message(
-            subject=subject,
-            recipients=[email],
-            body=body
-        )
-        
-        mail.send(msg)
+        subject, body = build_contest_notification(contest_name, message_type, additional_info)
+        queue_email(email, subject, body, email_type='notification', commit=commit)
         return True
         
     except Exception as e:
-        current_app.logger.error(f"Failed to send contest notification to {email}: {str(e)}")
+        current_app.logger.error(f"Failed to queue contest notification to {email}: {str(e)}")
         return False
 
 
+def send_contest_notifications(recipients: List[Tuple[str, Optional[str]]], contest_name: str,
+                               message_type: str, contest_id: int = None, commit: bool = True) -> int:
+    """Queue a contest notification for many recipients in the outbox.
+    
+    The outbox relay delivers them in batches through the email dispatcher.
+    
+    Args:
+        recipients (List[Tuple[str, Optional[str]]]): (email, additional_info) pairs
+        contest_name (str): Name of the contest
+        message_type (str): Type of notification ('created', 'locked', 'results')
+        contest_id (int, optional): Associated contest ID
+        commit (bool): Commit the emails; pass False to queue them in the caller's transaction
+        
+    Returns:
+        int: Number of emails queued
+    """
+    messages = []
+    for email, additional_info in recipients:
+        subject, body = build_contest_notification(contest_name, message_type, additional_info)
+        messages.append({
+            'to_email': email,
+            'subject': subject,
+            'body': body,
+            'email_type': 'notification',
+            'contest_id': contest_id
+        })
+    
+    return queue_emails(messages, commit=commit)
+
+
+def _is_sendgrid_outage(error: Exception) -> bool:
+    """Check whether a SendGrid error means the service is failing.
+    
+    Rejected requests (4xx other than 429) are the message's fault and don't
+    count against the circuit breaker.
+    
+    Args:
+        error (Exception): Error raised while sending
+        
+    Returns:
+        bool: True for timeouts, connection errors, 5xx and 429 responses
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code is None or status_code >= 500 or status_code == 429
+
+
 def send_email_via_sendgrid(to_email: str, subject: str, body: str, html_body: Optional[str] = None, 
-                           email_type: str = 'generic', user_id: int = None, contest_id: int = None) -> bool:
+                           email_type: str = 'generic', user_id: int = None, contest_id: int = None,
+                           http_session=None) -> bool:
     """Send email using SendGrid API.
     
     Args:
@@ -146,6 +216,8 @@ def send_email_via_sendgrid(to_email: str, subject: str, body: str, html_body: O
         email_type (str): Type of email for logging
         user_id (int, optional): Associated user ID
         contest_id (int, optional): Associated contest ID
+        http_session (requests.Session, optional): Pooled session to post with
+            instead of creating a new SendGrid client
         
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -193,12 +265,27 @@ def send_email_via_sendgrid(to_email: str, subject: str, body: str, html_body: O
                 HtmlContent(html_body)
             ]
         
-        # Send the email
-        sg = SendGridAPIClient(api_key=api_key)
-        response = sg.send(message)
+        # Send the email; an open circuit raises at once so send_email falls back to SMTP
+        breaker = get_breaker('sendgrid')
+        with breaker.guard(is_failure=_is_sendgrid_outage):
+            if http_session is not None:
+                response = http_session.post(
+                    current_app.config.get('SENDGRID_API_URL', 'https://api.sendgrid.com/v3/mail/send'),
+                    json=message.get(),
+                    headers={'Authorization': f'Bearer {api_key}'},
+                    timeout=breaker.latency_budget
+                )
+                if response.status_code >= 500 or response.status_code == 429:
+                    response.raise_for_status()
+                response_body = response.text
+            else:
+                sg = SendGridAPIClient(api_key=api_key)
+                sg.client.timeout = breaker.latency_budget
+                response = sg.send(message)
+                response_body = str(response.body)
         
         current_app.logger.info(f"SendGrid response status: {response.status_code}")
-        current_app.logger.info(f"SendGrid response body: {response.body}")
+        current_app.logger.info(f"SendGrid response body: {response_body}")
         current_app.logger.info(f"SendGrid response headers: {response.headers}")
         
         # SendGrid returns 202 for successful acceptance
@@ -206,17 +293,23 @@ def send_email_via_sendgrid(to_email: str, subject: str, body: str, html_body: O
             current_app.logger.info(f"Email sent successfully via SendGrid to {to_email}")
             EmailLog.log_email(to_email, subject, email_type, 'sendgrid_api', 'sent',
                              response_code=response.status_code, 
-                             response_body=str(response.body),
+                             response_body=response_body,
                              user_id=user_id, contest_id=contest_id)
             return True
         else:
             error_msg = f"SendGrid returned unexpected status code: {response.status_code}"
             current_app.logger.error(error_msg)
             EmailLog.log_email(to_email, subject, email_type, 'sendgrid_api', 'failed',
-                             error_msg, response.status_code, str(response.body),
+                             error_msg, response.status_code, response_body,
                              user_id=user_id, contest_id=contest_id)
             return False
             
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Skipping SendGrid for {to_email}: {str(e)}")
+        EmailLog.log_email(to_email, subject, email_type, 'sendgrid_api', 'failed',
+                         str(e), user_id=user_id, contest_id=contest_id)
+        return False
+        
     except Exception as e:
         error_msg = f"Failed to send email via SendGrid: {str(e)}"
         current_app.logger.error(f"Failed to send email via SendGrid to {to_email}: {str(e)}")
@@ -226,8 +319,43 @@ def send_email_via_sendgrid(to_email: str, subject: str, body: str, html_body: O
         return False
 
 
+class SMTPConnection(Connection):
+    """Flask-Mail connection whose socket gives up after `timeout` seconds."""
+    
+    def __init__(self, mail_state, timeout: float):
+        """Initialize the connection.
+        
+        Args:
+            mail_state: The app's Flask-Mail state (app.extensions['mail'])
+            timeout (float): Socket timeout in seconds, for connecting too
+        """
+        super().__init__(mail_state)
+        self.timeout = timeout
+    
+    def configure_host(self):
+        """Connect and log in, as Flask-Mail does, but with a timeout."""
+        smtp_class = smtplib.SMTP_SSL if self.mail.use_ssl else smtplib.SMTP
+        host = smtp_class(self.mail.server, self.mail.port, timeout=self.timeout)
+        host.set_debuglevel(int(self.mail.debug))
+        if self.mail.use_tls:
+            host.starttls()
+        if self.mail.username and self.mail.password:
+            host.login(self.mail.username, self.mail.password)
+        return host
+
+
+def smtp_connection() -> SMTPConnection:
+    """Create an SMTP connection bounded by the 'smtp' latency budget.
+    
+    Returns:
+        SMTPConnection: Connection to open with `with` (or __enter__)
+    """
+    return SMTPConnection(current_app.extensions['mail'], get_breaker('smtp').latency_budget)
+
+
 def send_email_via_smtp(to_email: str, subject: str, body: str, html_body: Optional[str] = None,
-                       email_type: str = 'generic', user_id: int = None, contest_id: int = None) -> bool:
+                       email_type: str = 'generic', user_id: int = None, contest_id: int = None,
+                       connect: Optional[Callable] = None) -> bool:
     """Send email using SMTP (Flask-Mail).
     
     Args:
@@ -238,6 +366,8 @@ def send_email_via_smtp(to_email: str, subject: str, body: str, html_body: Optio
         email_type (str): Type of email for logging
         user_id (int, optional): Associated user ID
         contest_id (int, optional): Associated contest ID
+        connect (Callable, optional): Returns an open flask_mail.Connection
+            to reuse instead of connecting for this message
         
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -257,12 +387,24 @@ def send_email_via_smtp(to_email: str, subject: str, body: str, html_body: Optio
             html=html_body
         )
         
-        mail.send(msg)
+        # Connecting happens under the breaker too, so a hung server opens it
+        with get_breaker('smtp').guard():
+            if connect is not None:
+                connect().send(msg)
+            else:
+                with smtp_connection() as connection:
+                    connection.send(msg)
         current_app.logger.info(f"Email sent successfully via SMTP to {to_email}")
         EmailLog.log_email(to_email, subject, email_type, 'smtp', 'sent',
                          user_id=user_id, contest_id=contest_id)
         return True
         
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Skipping SMTP for {to_email}: {str(e)}")
+        EmailLog.log_email(to_email, subject, email_type, 'smtp', 'failed',
+                         str(e), user_id=user_id, contest_id=contest_id)
+        return False
+        
     except Exception as e:
         error_msg = f"Failed to send email via SMTP: {str(e)}"
         current_app.logger.error(f"Failed to send email via SMTP to {to_email}: {str(e)}")
@@ -274,7 +416,8 @@ def send_email_via_smtp(to_email: str, subject: str, body: str, html_body: Optio
 
 
 def send_email(to_email: str, subject: str, body: str, html_body: Optional[str] = None,
-              email_type: str = 'generic', user_id: int = None, contest_id: int = None) -> bool:
+              email_type: str = 'generic', user_id: int = None, contest_id: int = None,
+              http_session=None, smtp_connect: Optional[Callable] = None) -> bool:
     """Send a generic email using the best available method.
     
     Args:
@@ -285,6 +428,9 @@ def send_email(to_email: str, subject: str, body: str, html_body: Optional[str]
         email_type (str): Type of email for logging
         user_id (int, optional): Associated user ID
         contest_id (int, optional): Associated contest ID
+        http_session (requests.Session, optional): Pooled session for SendGrid
+        smtp_connect (Callable, optional): Returns an open SMTP connection;
+            only called if the email goes out over SMTP
         
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -295,7 +441,8 @@ def send_email(to_email: str, subject: str, body: str, html_body: Optional[str]
         current_app.config.get('SENDGRID_API_KEY')):
         
         current_app.logger.info("Using SendGrid API for email delivery")
-        success = send_email_via_sendgrid(to_email, subject, body, html_body, email_type, user_id, contest_id)
+        success = send_email_via_sendgrid(to_email, subject, body, html_body, email_type, user_id, contest_id,
+                                          http_session=http_session)
         
         if success:
             return True
@@ -304,4 +451,5 @@ def send_email(to_email: str, subject: str, body: str, html_body: Optional[str]
     
     # Fall back to SMTP
     current_app.logger.info("Using SMTP for email delivery")
-    return send_email_via_smtp(to_email, subject, body, html_body, email_type, user_id, contest_id)
+    return send_email_via_smtp(to_email, subject, body, html_body, email_type, user_id, contest_id,
+                               connect=smtp_connect)
@@ -0,0 +1,180 @@
+"""Concurrent email dispatcher for bulk sends.
+
+send_email opens a new SendGrid client or SMTP connection for every message,
+which is fine for a login link but slow for a contest-wide notification. The
+dispatcher sends a batch over a bounded thread pool and reuses connections:
+
+    SendGrid  one pooled requests.Session per dispatcher, sized to the pool
+    SMTP      one connection per pool thread, opened the first time a message
+              goes out over SMTP and closed when the batch ends
+
+Sends are throttled by a shared rate limit, and each message still falls back
+from SendGrid to SMTP on its own. EmailLog rows from the pool are collected by
+one AuditWriter and bulk inserted.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+from app import db
+from app.utils.audit_writer import AuditWriter
+from app.utils.email import send_email, smtp_connection
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than `rate` happen per second."""
+
+    def __init__(self, rate: float):
+        """Initialize the limiter.
+
+        Args:
+            rate (float): Calls per second, 0 or less for no limit
+        """
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may proceed."""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EmailDispatcher:
+    """Sends batches of emails concurrently over reused connections."""
+
+    def __init__(self, app=None, max_workers: Optional[int] = None, rate_limit: Optional[float] = None):
+        """Initialize the dispatcher.
+
+        Args:
+            app (Flask, optional): Application, defaults to current_app
+            max_workers (int, optional): Pool size, defaults to EMAIL_DISPATCH_WORKERS
+            rate_limit (float, optional): Messages per second across the pool,
+                defaults to EMAIL_RATE_LIMIT
+        """
+        self.app = app or current_app._get_current_object()
+        self.max_workers = max_workers or self.app.config.get('EMAIL_DISPATCH_WORKERS', 8)
+        if rate_limit is None:
+            rate_limit = self.app.config.get('EMAIL_RATE_LIMIT', 50)
+        self.rate_limiter = RateLimiter(rate_limit)
+
+        self.http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.http_session.mount('https://', adapter)
+
+        self._smtp_connections = {}
+        self._smtp_lock = threading.Lock()
+
+    def _smtp_connection(self):
+        """Get this thread's open SMTP connection, connecting on first use."""
+        thread_id = threading.get_ident()
+        connection = self._smtp_connections.get(thread_id)
+        if connection is None:
+            connection = smtp_connection()
+            connection.__enter__()
+            with self._smtp_lock:
+                self._smtp_connections[thread_id] = connection
+        return connection
+
+    def _drop_smtp_connection(self) -> None:
+        """Close this thread's SMTP connection so the next send reconnects."""
+        with self._smtp_lock:
+            connection = self._smtp_connections.pop(threading.get_ident(), None)
+        self._close(connection)
+
+    @staticmethod
+    def _close(connection) -> None:
+        """Close an SMTP connection, ignoring errors from a dead socket."""
+        if connection is None:
+            return
+        try:
+            connection.__exit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"Error closing SMTP connection: {str(e)}")
+
+    def close_smtp_connections(self) -> None:
+        """Close every SMTP connection opened by the pool."""
+        with self._smtp_lock:
+            connections = list(self._smtp_connections.values())
+            self._smtp_connections.clear()
+        for connection in connections:
+            self._close(connection)
+
+    def _send_one(self, message: dict, writer: AuditWriter) -> bool:
+        """Send one message from a pool thread."""
+        with self.app.app_context(), writer.activate():
+            try:
+                self.rate_limiter.acquire()
+                # SMTP is only connected to if the message falls back to it
+                sent = send_email(http_session=self.http_session, smtp_connect=self._smtp_connection, **message)
+                if not sent:
+                    self._drop_smtp_connection()
+                return sent
+            except Exception as e:
+                logger.error(f"Error dispatching email to {message.get('to_email')}: {str(e)}")
+                return False
+            finally:
+                db.session.remove()
+
+    def send_batch(self, messages: List[dict]) -> List[bool]:
+        """Send a batch of emails concurrently.
+
+        Args:
+            messages (List[dict]): send_email keyword arguments, one dict per email
+
+        Returns:
+            List[bool]: Whether each message was sent, in input order
+        """
+        if not messages:
+            return []
+
+        start = time.perf_counter()
+        writer = AuditWriter()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(messages)),
+                                    thread_name_prefix='email-dispatch') as pool:
+                results = list(pool.map(lambda message: self._send_one(message, writer), messages))
+        finally:
+            self.close_smtp_connections()
+            writer.flush()
+
+        logger.info(f"Dispatched {sum(results)} of {len(messages)} emails in {time.perf_counter() - start:.2f}s")
+        return results
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self.close_smtp_connections()
+        self.http_session.close()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> EmailDispatcher:
+    """Get the dispatcher for this worker process, creating it on first use.
+
+    Returns:
+        EmailDispatcher: Shared dispatcher
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = EmailDispatcher()
+        return _dispatcher
@@ -0,0 +1,317 @@
+"""Contest finalization pipeline.
+
+Once a locked contest has every answer set, finalization runs these stages
+in order, recording the last completed stage on the contest:
+
+    score          -> ContestEntry.final_score / final_accuracy
+    rank           -> ContestEntry.final_rank
+    league_totals  -> LeagueMembership standings for leagues holding the contest
+    reputation     -> UserReputation performance metrics for participants
+    notify         -> results email jobs for participants (queued once per contest)
+
+Every stage recomputes its output from scratch, so a failed run can resume
+from the next stage and a corrected answer key can simply be finalized again.
+A key corrected while a run is in progress sets finalization_status to
+'rerun', and the run starts over instead of completing.
+
+Runs hold a lease: finalization_started_at is refreshed after every stage,
+and a 'running' or 'rerun' contest whose lease is older than
+FINALIZATION_LEASE_SECONDS belonged to a process that died mid-run, so it
+can be claimed again. Finalization started by an answer change runs as a
+'finalize_contest' job, which retries while another run holds the lease.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import and_, case, or_, select
+
+from app import db
+from app.models import Contest, ContestEntry, UserReputation, User
+from app.utils.email import send_contest_notifications
+from app.utils.jobs import JobError, enqueue, job_handler
+from app.utils.ranking import ranked_subquery
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('score', 'rank', 'league_totals', 'reputation', 'notify')
+
+
+def _score_stage(contest: Contest) -> None:
+    """Store each entry's final score and accuracy."""
+    scores = contest.score_entries_matrix()
+    db.session.bulk_update_mappings(ContestEntry, [
+        {
+            'entry_id': score['entry_id'],
+            'final_score': score['correct_answers'],
+            'final_accuracy': score['percentage']
+        }
+        for score in scores
+    ])
+
+
+def _rank_stage(contest: Contest) -> None:
+    """Store each entry's final rank from the stored final scores."""
+    scores = db.session.query(
+        ContestEntry.entry_id, ContestEntry.user_id, ContestEntry.final_score
+    ).filter(ContestEntry.contest_id == contest.contest_id).subquery('final_scores')
+    ranked = ranked_subquery(scores, ['final_score'], stable_columns=['entry_id'])
+
+    rows = db.session.execute(select(ranked.c.entry_id, ranked.c.rank)).all()
+    db.session.bulk_update_mappings(ContestEntry, [
+        {'entry_id': entry_id, 'final_rank': rank} for entry_id, rank in rows
+    ])
+
+
+def _league_totals_stage(contest: Contest) -> None:
+    """Refresh standings for every league that includes the contest."""
+    for league_contest in contest.league_contests:
+        league_contest.league.refresh_standings()
+
+
+def _reputation_stage(contest: Contest) -> None:
+    """Refresh performance metrics for every participant."""
+    user_ids = [user_id for (user_id,) in
+                db.session.query(ContestEntry.user_id).filter_by(contest_id=contest.contest_id).all()]
+    if not user_ids:
+        return
+
+    reputations = {
+        reputation.user_id: reputation
+        for reputation in UserReputation.query.filter(UserReputation.user_id.in_(user_ids)).all()
+    }
+    for user_id in user_ids:
+        reputation = reputations.get(user_id)
+        if reputation is None:
+            reputation = UserReputation(user_id=user_id)
+            db.session.add(reputation)
+        reputation.refresh_performance_metrics()
+        reputation.reputation_score = reputation.calculate_reputation_score()
+        reputation.update_trust_level()
+
+
+def _notify_stage(contest: Contest) -> None:
+    """Queue results emails for participants, once per contest."""
+    if contest.results_notified_at is not None:
+        return
+
+    rows = db.session.query(User.email, ContestEntry.final_rank, ContestEntry.final_score).join(
+        ContestEntry, ContestEntry.user_id == User.user_id
+    ).filter(ContestEntry.contest_id == contest.contest_id).all()
+
+    recipients = [
+        (email, f"You finished #{final_rank} with {final_score} correct answers.")
+        for email, final_rank, final_score in rows
+    ]
+    send_contest_notifications(recipients, contest.contest_name, 'results',
+                               contest_id=contest.contest_id, commit=False)
+
+    contest.results_notified_at = datetime.utcnow()
+
+
+STAGE_HANDLERS = {
+    'score': _score_stage,
+    'rank': _rank_stage,
+    'league_totals': _league_totals_stage,
+    'reputation': _reputation_stage,
+    'notify': _notify_stage
+}
+
+
+def is_ready(contest: Contest) -> bool:
+    """Check if a contest can be finalized.
+
+    Args:
+        contest (Contest): Contest to check
+
+    Returns:
+        bool: True if the contest is locked and every question has an answer
+    """
+    return contest.is_locked() and contest.has_all_answers()
+
+
+def _stale_lease(now: datetime):
+    """Filter for runs whose process stopped refreshing the lease."""
+    expired = now - timedelta(seconds=current_app.config.get('FINALIZATION_LEASE_SECONDS', 600))
+    return and_(
+        Contest.finalization_status.in_(('running', 'rerun')),
+        or_(Contest.finalization_started_at.is_(None), Contest.finalization_started_at < expired)
+    )
+
+
+def claimable(now: Optional[datetime] = None):
+    """Filter for contests that are not finalized and not being finalized.
+
+    Args:
+        now (datetime, optional): Current time, defaults to utcnow
+
+    Returns:
+        Filter expression matching unfinalized, failed and abandoned runs
+    """
+    return or_(
+        Contest.finalization_status.is_(None),
+        Contest.finalization_status == 'failed',
+        _stale_lease(now or datetime.utcnow())
+    )
+
+
+def claim_contest(contest_id: int) -> bool:
+    """Atomically mark a contest as being finalized.
+
+    An abandoned run is taken over where it stopped, or from the start if
+    its answers had changed.
+
+    Args:
+        contest_id (int): Contest ID
+
+    Returns:
+        bool: True if this caller claimed the contest, False if another run
+        is in progress or it is already finalized
+    """
+    now = datetime.utcnow()
+    claimed = Contest.query.filter(
+        Contest.contest_id == contest_id,
+        claimable(now)
+    ).update({
+        'finalization_stage': case(
+            (Contest.finalization_status == 'rerun', None), else_=Contest.finalization_stage
+        ),
+        'finalization_status': 'running',
+        'finalization_started_at': now
+    }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def request_rerun(contest_id: int) -> bool:
+    """Ask a finalization in progress to start over before it completes.
+
+    Args:
+        contest_id (int): Contest ID
+
+    Returns:
+        bool: True if a live run was in progress and will pick up the change
+    """
+    flagged = Contest.query.filter(
+        Contest.contest_id == contest_id,
+        Contest.finalization_status.in_(('running', 'rerun')),
+        ~_stale_lease(datetime.utcnow())
+    ).update({'finalization_status': 'rerun'}, synchronize_session=False)
+    db.session.commit()
+    return flagged == 1
+
+
+def _complete(contest_id: int) -> bool:
+    """Mark a run complete unless a rerun was requested during it."""
+    completed = Contest.query.filter(
+        Contest.contest_id == contest_id,
+        Contest.finalization_status == 'running'
+    ).update({'finalization_status': 'complete', 'finalized_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return completed == 1
+
+
+def finalize_contest(contest_id: int) -> bool:
+    """Run the remaining finalization stages for a contest.
+
+    If the answers change while the stages run (status 'rerun'), the
+    stages run again from the start before the contest is marked complete.
+
+    Args:
+        contest_id (int): Contest ID
+
+    Returns:
+        bool: True if the contest is now finalized
+    """
+    if not claim_contest(contest_id):
+        return False
+
+    contest = db.session.get(Contest, contest_id)
+    completed = STAGES.index(contest.finalization_stage) + 1 if contest.finalization_stage in STAGES else 0
+
+    while True:
+        for stage in STAGES[completed:]:
+            try:
+                STAGE_HANDLERS[stage](contest)
+                contest.finalization_stage = stage
+                contest.finalization_started_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Finalization of contest {contest_id} failed at stage '{stage}': {str(e)}")
+                contest.finalization_status = 'failed'
+                db.session.commit()
+                return False
+
+        if _complete(contest_id):
+            break
+
+        # The answers changed while the stages ran; start over with the new key
+        ready = is_ready(contest)
+        Contest.query.filter(Contest.contest_id == contest_id).update({
+            'finalization_status': 'running' if ready else None,
+            'finalization_stage': None,
+            'finalization_started_at': datetime.utcnow() if ready else None
+        }, synchronize_session=False)
+        db.session.commit()
+        if not ready:
+            logger.info(f"Contest {contest_id} answer key is no longer complete; finalization stopped")
+            return False
+        logger.info(f"Contest {contest_id} answers changed during finalization; running it again")
+        completed = 0
+
+    logger.info(f"Contest {contest_id} finalized")
+    return True
+
+
+@job_handler('finalize_contest')
+def finalize_contest_job(contest_id: int) -> dict:
+    """Job handler: finalize a contest, retrying while another run holds it.
+
+    Args:
+        contest_id (int): Contest ID
+
+    Returns:
+        dict: Whether this job finalized the contest
+    """
+    if finalize_contest(contest_id):
+        return {'finalized': True}
+
+    status = db.session.get(Contest, contest_id).finalization_status
+    if status in ('running', 'rerun', 'failed'):
+        raise JobError(f"Contest {contest_id} finalization is {status}")
+    return {'finalized': False}
+
+
+def on_answers_changed(contest: Contest) -> Optional[bool]:
+    """Start finalization after a contest's answer key changes.
+
+    Call after committing answer changes. Finalization runs once the answer
+    key is complete; if the contest was already finalized, its stages are
+    reset and run again with the corrected answers (results emails are not
+    resent). A run still in progress is flagged to start over instead.
+
+    Args:
+        contest (Contest): Contest whose answers changed
+
+    Returns:
+        Optional[bool]: None if the contest is not ready or finalization was
+        queued as a job, otherwise the synchronous result
+    """
+    if request_rerun(contest.contest_id):
+        return None
+
+    if not is_ready(contest):
+        return None
+
+    if contest.finalization_status in ('complete', 'failed'):
+        contest.finalization_status = None
+        contest.finalization_stage = None
+        db.session.commit()
+
+    if not current_app.config.get('FINALIZATION_ASYNC', True):
+        return finalize_contest(contest.contest_id)
+
+    enqueue('finalize_contest', {'contest_id': contest.contest_id})
+    return None
@@ -0,0 +1,527 @@
+"""Contest question generation off the request thread.
+
+A chat completion for a contest takes 10-30 seconds. The generation service
+runs completions on a dedicated thread pool, parses the streamed response as
+it arrives so callers can show each question as soon as it is complete, and
+caches finished results. Gunicorn runs threaded workers (gthread in the
+Procfile and Dockerfile), so a request waiting on or streaming a preview holds
+one thread rather than a whole web worker:
+
+    pool      AI_GENERATION_WORKERS threads per web worker
+    deadline  AI_GENERATION_TIMEOUT seconds from submission to the last
+              question, including time spent waiting for a pool thread;
+              below gunicorn's timeout, so the deadline fires first
+    cache     (sport, season, week, question_count, prompt hash) -> questions
+              for AI_GENERATION_CACHE_TTL seconds
+
+AI_GENERATION_BACKEND picks the model: 'openai' calls the OpenAI API, 'fake'
+streams canned questions for tests and load runs without an API key. Calls to
+the OpenAI backend go through the 'openai_generation' circuit breaker, so an
+outage fails previews at once instead of after the full deadline.
+"""
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+import openai
+from flask import current_app
+
+from app.utils.ai_generation import ContestGenerationError
+from app.utils.circuit_breaker import CircuitBreaker, get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a completion on the handoff queue
+_END = object()
+
+
+class GenerationTimeout(ContestGenerationError):
+    """Raised when a completion misses its deadline."""
+    pass
+
+
+class GenerationRequest:
+    """A completion to run and how to check the questions it returns."""
+
+    def __init__(self, messages: List[Dict], question_count: int, validate: Callable, sport: str,
+                 season_year: Optional[int] = None, week_number: Optional[int] = None,
+                 matchup: Optional[str] = None):
+        """Initialize the request.
+
+        Args:
+            messages (List[Dict]): Chat completion messages
+            question_count (int): Number of questions asked for
+            validate (Callable): Called with (question, index); raises
+                ValueError for a malformed question
+            sport (str): Sport name, or 'custom' for custom prompts
+            season_year (int, optional): Season the questions are for
+            week_number (int, optional): Week the questions are for
+            matchup (str, optional): Single game the questions are about,
+                e.g. "Ravens vs Chiefs"
+        """
+        self.messages = messages
+        self.question_count = question_count
+        self.validate = validate
+        self.sport = sport
+        self.season_year = season_year
+        self.week_number = week_number
+        self.matchup = matchup
+
+        prompt_hash = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        self.cache_key = (sport.upper(), season_year, week_number, question_count, prompt_hash)
+
+
+class QuestionStreamParser:
+    """Pulls complete question objects out of a streamed JSON array.
+
+    Text before the opening bracket (a model's preamble) is ignored, and each
+    object in the array is returned as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        """Initialize the parser."""
+        self.depth = 0
+        self.closed = False
+        self._in_string = False
+        self._escaped = False
+        self._current = []
+
+    def feed(self, text: str) -> List[dict]:
+        """Parse the next chunk of the response.
+
+        Args:
+            text (str): Response text
+
+        Returns:
+            List[dict]: Questions completed by this chunk
+
+        Raises:
+            ValueError: If a question is not valid JSON
+        """
+        questions = []
+        for char in text:
+            if self.closed:
+                break
+            if self.depth >= 2:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self.depth == 0:
+                if char == '[':
+                    self.depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self.depth += 1
+                if self.depth == 2:
+                    self._current = [char]
+            elif char in ']}':
+                self.depth -= 1
+                if self.depth == 1 and char == '}':
+                    questions.append(json.loads(''.join(self._current)))
+                    self._current = []
+                elif self.depth == 0:
+                    self.closed = True
+
+        return questions
+
+
+class OpenAIBackend:
+    """Streams chat completions from the OpenAI API."""
+
+    def __init__(self, api_key: Optional[str], model: str = 'gpt-3.5-turbo', timeout: float = 45):
+        """Initialize the backend.
+
+        Args:
+            api_key (str, optional): OpenAI API key
+            model (str): Chat model name
+            timeout (float): HTTP timeout in seconds
+        """
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def stream(self, request: GenerationRequest) -> Iterator[str]:
+        """Stream the response text for a request.
+
+        Args:
+            request (GenerationRequest): Request to complete
+
+        Yields:
+            str: Response text as it arrives
+        """
+        if not self.api_key:
+            raise ContestGenerationError("OpenAI API key not configured")
+
+        # Legacy OpenAI API (version 0.28.1); the key is passed per call so
+        # pool threads don't share module state
+        response = openai.ChatCompletion.create(
+            model=self.model,
+            messages=request.messages,
+            temperature=0.7,
+            max_tokens=2000,
+            stream=True,
+            api_key=self.api_key,
+            request_timeout=self.timeout
+        )
+        for chunk in response:
+            content = chunk['choices'][0]['delta'].get('content')
+            if content:
+                yield content
+
+
+class FakeBackend:
+    """Streams canned questions without calling a model.
+
+    Used by tests and load runs. Each question is split across two chunks so
+    the streaming parser is exercised, and `delay` seconds pass before each
+    question to stand in for model latency.
+    """
+
+    MATCHUPS = [
+        ('Chiefs', 'Raiders'), ('Bills', 'Dolphins'), ('Cowboys', 'Giants'), ('Packers', 'Bears'),
+        ('49ers', 'Rams'), ('Ravens', 'Steelers'), ('Eagles', 'Commanders'), ('Bengals', 'Browns'),
+        ('Lions', 'Vikings'), ('Chargers', 'Broncos')
+    ]
+
+    def __init__(self, delay: float = 0.0):
+        """Initialize the backend.
+
+        Args:
+            delay (float): Seconds to wait before each question
+        """
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def questions(self, request: GenerationRequest) -> List[dict]:
+        """Build the canned questions for a request.
+
+        Args:
+            request (GenerationRequest): Request to answer
+
+        Returns:
+            List[dict]: Questions in the format the real model is asked for
+        """
+        questions = []
+        for index in range(request.question_count):
+            if request.sport.upper() != 'NFL':
+                questions.append({
+                    'question': f"Will sample event {index + 1} happen this week?",
+                    'category': 'Sample',
+                    'description': 'Generated by the fake backend'
+                })
+                continue
+
+            if request.matchup:
+                game = request.matchup
+                underdog, favorite = game.split(' vs ')
+            else:
+                favorite, underdog = self.MATCHUPS[index % len(self.MATCHUPS)]
+                game = f"{favorite} vs {underdog}"
+            if index % 2 == 0:
+                spread = 1.5 + index
+                questions.append({
+                    'game': game,
+                    'question': f"Will the {favorite} win by more than {spread} points against the {underdog}?",
+                    'line_type': 'spread',
+                    'line_value': spread,
+                    'team_favored': favorite,
+                    'direction': 'cover'
+                })
+            else:
+                total = 40.5 + index
+                questions.append({
+                    'game': game,
+                    'question': f"Will the total points in the {game} game exceed {total}?",
+                    'line_type': 'over_under',
+                    'line_value': total,
+                    'direction': 'over'
+                })
+        return questions
+
+    def stream(self, request: GenerationRequest) -> Iterator[str]:
+        """Stream the canned response for a request.
+
+        Args:
+            request (GenerationRequest): Request to answer
+
+        Yields:
+            str: Response text in small chunks
+        """
+        with self._lock:
+            self.calls += 1
+
+        yield 'Here are your questions:\n['
+        for index, question in enumerate(self.questions(request)):
+            if self.delay:
+                time.sleep(self.delay)
+            text = (',' if index else '') + json.dumps(question)
+            yield text[:len(text) // 2]
+            yield text[len(text) // 2:]
+        yield ']'
+
+
+class GenerationService:
+    """Runs completions on a thread pool with a deadline and caches the results."""
+
+    def __init__(self, backend, max_workers: int = 4, timeout: float = 45,
+                 cache_ttl: float = 3600, cache_size: int = 256, breaker: Optional[CircuitBreaker] = None):
+        """Initialize the service.
+
+        Args:
+            backend: OpenAIBackend, FakeBackend or anything with a matching stream()
+            max_workers (int): Completions run at once
+            timeout (float): Seconds a caller waits for a complete result
+            cache_ttl (float): Seconds a result is reused, 0 to disable caching
+            cache_size (int): Most results kept
+            breaker (CircuitBreaker, optional): Breaker for the backend's provider
+        """
+        self.backend = backend
+        self.breaker = breaker
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()  # cache_key -> (questions, expires_at)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-generation')
+
+    def get_cached(self, cache_key: tuple) -> Optional[List[dict]]:
+        """Get an unexpired cached result.
+
+        Args:
+            cache_key (tuple): GenerationRequest.cache_key
+
+        Returns:
+            Optional[List[dict]]: Copy of the cached questions, or None
+        """
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is None:
+                return None
+            questions, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._cache[cache_key]
+                return None
+            self._cache.move_to_end(cache_key)
+
+        return [dict(question) for question in questions]
+
+    def _store(self, cache_key: tuple, questions: List[dict]) -> None:
+        """Cache a complete result, evicting the least recently used."""
+        if self.cache_ttl <= 0:
+            return
+
+        with self._lock:
+            self._cache[cache_key] = ([dict(question) for question in questions], time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._cache.clear()
+
+    def _produce(self, request: GenerationRequest, handoff: queue.Queue, cancelled: threading.Event,
+                 call: dict) -> None:
+        """Run a completion on a pool thread, handing its text to the caller.
+
+        The time the provider call starts goes in `call['started_at']`, so
+        time spent queued for a pool thread isn't charged to the provider.
+        """
+        stream = None
+        try:
+            if cancelled.is_set():
+                return
+            call['started_at'] = time.monotonic()
+            stream = self.backend.stream(request)
+            for chunk in stream:
+                if cancelled.is_set():
+                    break
+                handoff.put(chunk)
+        except Exception as e:
+            handoff.put(e)
+        finally:
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
+            handoff.put(_END)
+
+    def _record(self, outcome: Optional[str], call: dict) -> None:
+        """Report a completion's outcome to the breaker.
+
+        Only calls that reached the provider count, timed from when the pool
+        thread started them.
+        """
+        if self.breaker is None:
+            return
+        started_at = call.get('started_at')
+        elapsed = None if started_at is None else time.monotonic() - started_at
+        if elapsed is None:
+            # Still queued for a pool thread; the provider was never called
+            self.breaker.release()
+        elif outcome == 'success':
+            self.breaker.record_success(elapsed)
+        elif outcome == 'failure':
+            self.breaker.record_failure(elapsed, 'Generation failed')
+        elif outcome == 'timeout' and elapsed >= self.breaker.latency_budget:
+            self.breaker.record_failure(elapsed, 'Generation timed out')
+        else:
+            # Abandoned by the caller, a bad response, or a deadline mostly
+            # spent queueing; says nothing about the provider
+            self.breaker.release()
+
+    @staticmethod
+    def _failure(error: Exception) -> ContestGenerationError:
+        """Turn an error from the backend into a ContestGenerationError."""
+        if isinstance(error, ContestGenerationError):
+            return error
+        if isinstance(error, openai.OpenAIError):
+            return ContestGenerationError(f"AI service error: {str(error)}")
+        return ContestGenerationError(f"Unexpected error: {str(error)}")
+
+    def stream(self, request: GenerationRequest, fresh: bool = False) -> Iterator[dict]:
+        """Generate questions, yielding each one as soon as it is complete.
+
+        Args:
+            request (GenerationRequest): What to generate
+            fresh (bool): Skip the cache, e.g. for "Generate Different Questions"
+
+        Yields:
+            dict: Validated questions in order
+
+        Raises:
+            GenerationTimeout: If the deadline passes first
+            ContestGenerationError: If the completion or its response is bad
+        """
+        if not fresh:
+            cached = self.get_cached(request.cache_key)
+            if cached is not None:
+                logger.info(f"Serving cached questions for {request.cache_key[:4]}")
+                yield from cached
+                return
+
+        if self.breaker is not None and not self.breaker.allow():
+            logger.warning(f"Refusing generation for {request.cache_key[:4]}: {self.breaker.name} circuit is open")
+            raise ContestGenerationError("AI service is temporarily unavailable. Please try again in a minute.")
+
+        # The caller's deadline includes time queued for a pool thread
+        start = time.monotonic()
+        deadline = start + self.timeout
+        handoff = queue.Queue()
+        cancelled = threading.Event()
+        call = {}
+        self._pool.submit(self._produce, request, handoff, cancelled, call)
+
+        parser = QuestionStreamParser()
+        questions = []
+        outcome = None
+        try:
+            while True:
+                try:
+                    item = handoff.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    outcome = 'timeout'
+                    logger.error(f"Generation for {request.cache_key[:4]} timed out after {self.timeout:g}s")
+                    raise GenerationTimeout(f"AI service did not respond within {self.timeout:g} seconds")
+
+                if item is _END:
+                    outcome = 'success'
+                    break
+                if isinstance(item, Exception):
+                    outcome = 'failure'
+                    logger.error(f"Generation for {request.cache_key[:4]} failed: {str(item)}")
+                    raise self._failure(item)
+
+                try:
+                    completed = parser.feed(item)
+                    for question in completed:
+                        request.validate(question, len(questions))
+                        questions.append(question)
+                except ValueError as e:
+                    logger.error(f"Failed to parse AI response: {str(e)}")
+                    raise ContestGenerationError(f"Failed to parse AI response: {str(e)}")
+
+                for question in completed:
+                    yield question
+        finally:
+            cancelled.set()
+            self._record(outcome, call)
+
+        if not parser.closed:
+            reason = "Response ended before the question list was complete" if questions else "No JSON array found in response"
+            logger.error(f"Failed to parse AI response: {reason}")
+            raise ContestGenerationError(f"Failed to parse AI response: {reason}")
+
+        self._store(request.cache_key, questions)
+        logger.info(f"Generated {len(questions)} questions in {time.monotonic() - start:.1f}s")
+
+    def generate(self, request: GenerationRequest, fresh: bool = False) -> List[dict]:
+        """Generate questions and wait for the complete result.
+
+        Args:
+            request (GenerationRequest): What to generate
+            fresh (bool): Skip the cache
+
+        Returns:
+            List[dict]: Validated questions
+
+        Raises:
+            GenerationTimeout: If the deadline passes first
+            ContestGenerationError: If the completion or its response is bad
+        """
+        return list(self.stream(request, fresh=fresh))
+
+
+def create_generation_service(app) -> GenerationService:
+    """Create the generation service for an app.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        GenerationService: Service configured from app settings
+    """
+    timeout = app.config.get('AI_GENERATION_TIMEOUT', 45)
+    if app.config.get('AI_GENERATION_BACKEND', 'openai') == 'fake':
+        backend = FakeBackend(delay=app.config.get('AI_GENERATION_FAKE_DELAY', 0))
+    else:
+        backend = OpenAIBackend(
+            api_key=app.config.get('OPENAI_API_KEY'),
+            model=app.config.get('AI_GENERATION_MODEL', 'gpt-3.5-turbo'),
+            timeout=timeout
+        )
+
+    return GenerationService(
+        backend,
+        max_workers=app.config.get('AI_GENERATION_WORKERS', 4),
+        timeout=timeout,
+        cache_ttl=app.config.get('AI_GENERATION_CACHE_TTL', 3600),
+        cache_size=app.config.get('AI_GENERATION_CACHE_SIZE', 256),
+        breaker=get_breaker('openai_generation', app) if isinstance(backend, OpenAIBackend) else None
+    )
+
+
+def get_generation_service() -> GenerationService:
+    """Get the app's generation service, creating it on first use.
+
+    Returns:
+        GenerationService: Shared service
+    """
+    service = current_app.extensions.get('ai_generation')
+    if service is None:
+        service = current_app.extensions['ai_generation'] = create_generation_service(current_app)
+    return service
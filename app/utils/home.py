@@ -0,0 +1,230 @@
+"""Shared sections of the home page.
+
+The home page is the most visited page, and all of it except the hero buttons
+and join/enter links is the same for every visitor. The shared sections are
+built here as plain snapshots and kept in the app cache (see app.utils.cache),
+so with a shared backend one worker builds them for all:
+
+    featured leagues        HOME_CACHE_TTL seconds
+    recent AI contests      HOME_CACHE_TTL seconds
+    AI contest total        HOME_TOTALS_CACHE_TTL seconds
+    first page of contests  HOME_CACHE_TTL seconds
+    first page of leagues   HOME_CACHE_TTL seconds
+
+Sections are tagged with 'contests' or 'leagues' plus a tag per contest or
+league shown, so a new contest, a new entry in a listed contest or a member
+joining a listed league refreshes them on commit. Changes that only reorder
+leagues that are not listed (e.g. another league gaining members) wait for
+the TTL. Later pages are built the same way but not cached.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import Contest, ContestEntry, League, Question, User
+from app.utils.cache import get_cache
+
+CONTESTS_PER_PAGE = 6
+LEAGUES_PER_PAGE = 6
+
+
+class ContestCard(SimpleNamespace):
+    """Snapshot of a contest for the home page."""
+
+    def is_locked(self) -> bool:
+        """Check if the contest is locked (see Contest.is_locked)."""
+        return datetime.utcnow() > self.lock_timestamp
+
+
+class SectionPage(SimpleNamespace):
+    """Snapshot of a Flask-SQLAlchemy pagination."""
+
+    @classmethod
+    def from_pagination(cls, pagination, items: list) -> 'SectionPage':
+        """Copy a pagination with its items replaced by snapshots."""
+        return cls(
+            items=items,
+            page=pagination.page,
+            pages=pagination.pages,
+            per_page=pagination.per_page,
+            total=pagination.total,
+            has_prev=pagination.has_prev,
+            has_next=pagination.has_next,
+            prev_num=pagination.prev_num,
+            next_num=pagination.next_num,
+            page_numbers=list(pagination.iter_pages())
+        )
+
+    def iter_pages(self) -> list:
+        """Page numbers for the pager, None for gaps."""
+        return self.page_numbers
+
+
+def _section_ttl() -> float:
+    """Get the TTL of list sections."""
+    return current_app.config.get('HOME_CACHE_TTL', 30)
+
+
+def _contest_cards(query):
+    """Select the snapshot columns, creator name and counts for a contest query."""
+    question_count = db.select(func.count(Question.question_id)).where(
+        Question.contest_id == Contest.contest_id
+    ).scalar_subquery()
+    entry_count = db.select(func.count(ContestEntry.entry_id)).where(
+        ContestEntry.contest_id == Contest.contest_id
+    ).scalar_subquery()
+    return query.join(User, User.user_id == Contest.created_by_user).with_entities(
+        Contest.contest_id,
+        Contest.contest_name,
+        Contest.description,
+        Contest.lock_timestamp,
+        Contest.is_ai_generated,
+        User.username,
+        question_count,
+        entry_count
+    )
+
+
+def _to_contest_card(row) -> ContestCard:
+    """Turn a row from _contest_cards into a snapshot."""
+    contest_id, name, description, lock_timestamp, is_ai_generated, username, questions, entries = row
+    return ContestCard(
+        contest_id=contest_id,
+        contest_name=name,
+        description=description or '',
+        lock_timestamp=lock_timestamp,
+        is_ai_generated=is_ai_generated,
+        creator_name=username,
+        question_count=questions,
+        entry_count=entries
+    )
+
+
+def _league_cards(query):
+    """Select the snapshot columns and creator name for a league query."""
+    return query.join(User, User.user_id == League.created_by_user).with_entities(
+        League.league_id,
+        League.league_name,
+        League.description,
+        League.is_public,
+        League.created_at,
+        League.member_count,
+        League.contest_count,
+        User.username
+    )
+
+
+def _to_league_card(row) -> SimpleNamespace:
+    """Turn a row from _league_cards into a snapshot."""
+    league_id, name, description, is_public, created_at, members, contests, username = row
+    return SimpleNamespace(
+        league_id=league_id,
+        league_name=name,
+        description=description,
+        is_public=is_public,
+        created_at=created_at,
+        member_count=members or 0,
+        contest_count=contests or 0,
+        creator_name=username
+    )
+
+
+def _build_contests_page(page: int) -> SectionPage:
+    """Load a page of active contests, newest first."""
+    pagination = _contest_cards(
+        Contest.query.filter_by(is_active=True).order_by(Contest.created_at.desc())
+    ).paginate(page=page, per_page=CONTESTS_PER_PAGE, error_out=False)
+    return SectionPage.from_pagination(pagination, [_to_contest_card(row) for row in pagination.items])
+
+
+def _build_leagues_page(page: int) -> SectionPage:
+    """Load a page of active leagues, newest first."""
+    pagination = _league_cards(
+        League.query.filter_by(is_active=True).order_by(League.created_at.desc())
+    ).paginate(page=page, per_page=LEAGUES_PER_PAGE, error_out=False)
+    return SectionPage.from_pagination(pagination, [_to_league_card(row) for row in pagination.items])
+
+
+def _cache_section(key: str, build, collection_tag: str, item_tag: str, ttl: float):
+    """Get a section from the cache, tagging it with the items it shows."""
+    def item_tags(section):
+        items = section.items if isinstance(section, SectionPage) else section
+        return [f'{item_tag}:{getattr(item, f"{item_tag}_id")}' for item in items]
+
+    return get_cache().get_or_set(key, build, ttl=ttl, tags=[collection_tag], value_tags=item_tags)
+
+
+def get_contests_page(page: int = 1) -> SectionPage:
+    """Get a page of active contests; the first page is cached.
+
+    Args:
+        page (int): Page number
+
+    Returns:
+        SectionPage: Contest snapshots with pagination info
+    """
+    if page != 1:
+        return _build_contests_page(page)
+    return _cache_section('home:contests:1', lambda: _build_contests_page(1), 'contests', 'contest', _section_ttl())
+
+
+def get_leagues_page(page: int = 1) -> SectionPage:
+    """Get a page of active leagues; the first page is cached.
+
+    Args:
+        page (int): Page number
+
+    Returns:
+        SectionPage: League snapshots with pagination info
+    """
+    if page != 1:
+        return _build_leagues_page(page)
+    return _cache_section('home:leagues:1', lambda: _build_leagues_page(1), 'leagues', 'league', _section_ttl())
+
+
+def get_featured_leagues() -> List[SimpleNamespace]:
+    """Get the three public leagues with the most members.
+
+    Returns:
+        List[SimpleNamespace]: League snapshots
+    """
+    def build():
+        query = League.query.filter_by(is_active=True, is_public=True).filter(
+            League.member_count > 0
+        ).order_by(League.member_count.desc())
+        return [_to_league_card(row) for row in _league_cards(query).limit(3).all()]
+
+    return _cache_section('home:featured_leagues', build, 'leagues', 'league', _section_ttl())
+
+
+def get_recent_ai_contests() -> List[ContestCard]:
+    """Get the five newest active AI-generated contests.
+
+    Returns:
+        List[ContestCard]: Contest snapshots
+    """
+    def build():
+        query = Contest.query.filter_by(is_active=True, is_ai_generated=True).order_by(
+            Contest.created_at.desc()
+        )
+        return [_to_contest_card(row) for row in _contest_cards(query).limit(5).all()]
+
+    return _cache_section('home:ai_contests', build, 'contests', 'contest', _section_ttl())
+
+
+def get_total_ai_contests() -> int:
+    """Get the number of AI-generated contests ever created.
+
+    Returns:
+        int: AI contest count
+    """
+    return get_cache().get_or_set(
+        'home:total_ai_contests',
+        lambda: Contest.query.filter_by(is_ai_generated=True).count(),
+        ttl=current_app.config.get('HOME_TOTALS_CACHE_TTL', 60),
+        tags=['contests']
+    )
@@ -0,0 +1,219 @@
+"""Conditional HTTP caching for contest and league pages.
+
+Finished contests and league standings rarely change, but were re-rendered
+for every viewer. Contests and leagues now carry a content_version that is
+bumped in the same transaction as any change to what their pages show:
+
+    contest  the contest itself or its questions (answers included), and
+             entries or picks once the contest has locked
+    league   the league, its memberships and contests, and any contest of
+             the league whose version was bumped
+
+Pages build an ETag from the version and the viewer, and routes answer a
+matching If-None-Match (or If-Modified-Since) with 304 before loading any
+leaderboard. Anonymous, cookie-less views of public pages are sent with
+`Cache-Control: public, max-age=HTTP_CACHE_PUBLIC_MAX_AGE` so a CDN or
+reverse proxy can serve them; other views are private and revalidated on
+every request. Logged-in ETags also change every
+HTTP_CACHE_PRIVATE_WINDOW seconds so the CSRF tokens in cached pages never
+get too old to submit.
+
+Renames of users shown on a page don't bump versions; they show up with the
+next content change or, for logged-in viewers, the next window.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app, request, session
+from sqlalchemy import and_, event, or_, select
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from werkzeug.wrappers import Response
+
+from app.models import Contest, ContestEntry, EntryAnswer, League, LeagueContest, LeagueMembership, Question
+from app.utils.decorators import get_current_user
+
+_events_registered = False
+
+
+def _bump_content_versions(session, flush_context) -> None:
+    """Bump the versions of contests and leagues a flush changed."""
+    contest_ids, entry_contest_ids, entry_ids, league_ids = set(), set(), set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Contest):
+            contest_ids.add(obj.contest_id)
+        elif isinstance(obj, Question):
+            contest_ids.add(obj.contest_id)
+        elif isinstance(obj, ContestEntry):
+            entry_contest_ids.add(obj.contest_id)
+        elif isinstance(obj, EntryAnswer):
+            entry_ids.add(obj.entry_id)
+        elif isinstance(obj, (League, LeagueMembership, LeagueContest)):
+            league_ids.add(obj.league_id)
+
+    if not (contest_ids or entry_contest_ids or entry_ids or league_ids):
+        return
+
+    now = datetime.utcnow()
+    connection = session.connection()
+    contests = Contest.__table__
+    leagues = League.__table__
+
+    if entry_ids:
+        entry_contest_ids |= set(connection.execute(
+            select(ContestEntry.contest_id).where(ContestEntry.entry_id.in_(entry_ids))
+        ).scalars())
+
+    # Open contests don't serve cached pages, so entries only count after the lock
+    changed = []
+    if contest_ids:
+        changed.append(contests.c.contest_id.in_(contest_ids))
+    if entry_contest_ids:
+        changed.append(and_(contests.c.contest_id.in_(entry_contest_ids), contests.c.lock_timestamp <= now))
+
+    if changed:
+        connection.execute(contests.update().where(or_(*changed)).values(
+            content_version=contests.c.content_version + 1,
+            content_updated_at=now
+        ))
+        league_ids_of_contests = select(LeagueContest.league_id).join(
+            contests, contests.c.contest_id == LeagueContest.contest_id
+        ).where(or_(*changed))
+        league_filter = leagues.c.league_id.in_(league_ids_of_contests)
+        if league_ids:
+            league_filter = or_(league_filter, leagues.c.league_id.in_(league_ids))
+    else:
+        league_filter = leagues.c.league_id.in_(league_ids)
+
+    connection.execute(leagues.update().where(league_filter).values(
+        content_version=leagues.c.content_version + 1,
+        content_updated_at=now
+    ))
+
+
+def register_content_version_events() -> None:
+    """Bump content versions whenever contests, leagues or their rows change."""
+    global _events_registered
+    if _events_registered:
+        return
+    event.listen(Session, 'after_flush', _bump_content_versions)
+    _events_registered = True
+
+
+class PageValidators:
+    """ETag, Last-Modified and Cache-Control for one rendering of a page."""
+
+    def __init__(self, kind: str, key: int, version: int, updated_at: Optional[datetime],
+                 *variant, public: bool = True):
+        """Build the validators for the current viewer.
+
+        Args:
+            kind (str): 'contest' or 'league'
+            key (int): Contest or league ID
+            version (int): Current content_version
+            updated_at (datetime, optional): When the content last changed
+            *variant: Anything else the page depends on, e.g. the page name
+                and number
+            public (bool): Whether anonymous views may be cached by proxies
+        """
+        user = get_current_user()
+        if user is None:
+            viewer = ('anon',)
+        else:
+            window = current_app.config.get('HTTP_CACHE_PRIVATE_WINDOW', 1800)
+            viewer = (f'user:{user.user_id}', int(time.time() // window))
+
+        parts = (kind, key, version) + viewer + variant
+        self.etag = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:24]
+        # A date can't tell viewers apart, so only anonymous views use it
+        self.last_modified = updated_at if user is None else None
+        # Only cookie-less views are shared; anything in the session is per-visitor
+        self.public = public and user is None and not session
+        # Pages carrying flashed messages are one-off; leave them alone
+        self.enabled = not session.get('_flashes')
+
+    def is_not_modified(self) -> bool:
+        """Check if the client's copy is current.
+
+        Returns:
+            bool: True if the request's If-None-Match or If-Modified-Since
+            matches
+        """
+        return self.enabled and not is_resource_modified(
+            request.environ, etag=self.etag, last_modified=self.last_modified
+        )
+
+    def not_modified(self) -> Response:
+        """Build a 304 response.
+
+        Returns:
+            Response: Empty 304 with the validators
+        """
+        return self.apply(current_app.response_class(status=304))
+
+    def apply(self, response: Response) -> Response:
+        """Add the validators and Cache-Control to a response.
+
+        Args:
+            response (Response): Response for this page
+
+        Returns:
+            Response: The same response
+        """
+        if not self.enabled:
+            return response
+
+        response.set_etag(self.etag)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+
+        if self.public:
+            # A shared copy must not set cookies; the CSRF token the page
+            # generated is not needed by anonymous viewers
+            session.modified = False
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config.get('HTTP_CACHE_PUBLIC_MAX_AGE', 60)
+        else:
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
+
+
+def contest_validators(contest: Contest, *variant) -> PageValidators:
+    """Build the validators for a contest page.
+
+    Args:
+        contest (Contest): Contest shown
+        *variant: Page name, page number and the like
+
+    Returns:
+        PageValidators: Validators for the current viewer
+    """
+    return PageValidators('contest', contest.contest_id, contest.content_version,
+                          contest.content_updated_at or contest.updated_at, *variant)
+
+
+def league_validators(league: League, *variant) -> PageValidators:
+    """Build the validators for a league page.
+
+    Contests locking change league pages without any write, so the number of
+    locked contests is part of the ETag.
+
+    Args:
+        league (League): League shown
+        *variant: Page name and the like
+
+    Returns:
+        PageValidators: Validators for the current viewer
+    """
+    locked_contests = LeagueContest.query.join(Contest).filter(
+        LeagueContest.league_id == league.league_id,
+        Contest.lock_timestamp <= datetime.utcnow()
+    ).count()
+    return PageValidators('league', league.league_id, league.content_version,
+                          league.content_updated_at or league.updated_at, locked_contests, *variant,
+                          public=league.is_public)
@@ -1,10 +1,13 @@
 """Invitation utilities for sending email and SMS invitations."""
 import re
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 from flask import url_for, current_app
 from app import db
 from app.models import Contest, ContestInvitation, User
+from app.utils.audit_writer import buffered_audit_writes, get_active_writer
 from app.utils.email import send_email
+from app.utils.jobs import JobError, enqueue, job_handler, new_batch_id
 
 
 def validate_email(email: str) -> bool:
@@ -135,66 +138,92 @@ Over-Under Contests"""
     return message
 
 
-def send_email_invitation(contest: Contest, sender: User, recipient_email: str) -> bool:
-    """Send email invitation for contest.
+def queue_email_invitations(contest: Contest, sender: User, recipient_emails: List[str],
+                            batch_id: Optional[str] = None) -> List[ContestInvitation]:
+    """Record pending email invitations and queue them for delivery.
+    
+    The email content is rendered once here, while a request context is
+    available for building external URLs. Invitations and jobs are inserted
+    in bulk; the caller commits the session.
     
     Args:
         contest (Contest): Contest to invite to
-        sender (User): User sending the invitation
-        recipient_email (str): Email address to send to
+        sender (User): User sending the invitations
+        recipient_emails (List[str]): Email addresses to send to
+        batch_id (str, optional): Job batch the invitations belong to
         
     Returns:
-        bool: True if sent successfully, False otherwise
+        List[ContestInvitation]: The pending invitations
     """
-    try:
-        current_app.logger.info(f"Creating invitation email content for contest {contest.contest_id}")
-        email_content = create_invitation_email_content(contest, sender)
-        
-        current_app.logger.info(f"Sending invitation email to {recipient_email}")
-        current_app.logger.info(f"Email subject: {email_content['subject']}")
-        
-        success = send_email(
-            to_email=recipient_email,
-            subject=email_content['subject'],
-            body=email_content['body'],
-            email_type='invitation',
-            user_id=sender.user_id,
-            contest_id=contest.contest_id
+    email_content = create_invitation_email_content(contest, sender)
+    
+    invitations = [
+        ContestInvitation(
+            contest_id=contest.contest_id,
+            sent_by_user_id=sender.user_id,
+            recipient_email=recipient_email,
+            invitation_type='email',
+            status='pending'
         )
+        for recipient_email in recipient_emails
+    ]
+    db.session.add_all(invitations)
+    db.session.flush()
+    
+    for invitation in invitations:
+        enqueue('invitation_email', {
+            'invitation_id': invitation.invitation_id,
+            'to_email': invitation.recipient_email,
+            'subject': email_content['subject'],
+            'body': email_content['body'],
+            'user_id': sender.user_id,
+            'contest_id': contest.contest_id
+        }, batch_id=batch_id, created_by_user_id=sender.user_id, commit=False)
+    
+    return invitations
+
+
+def _mark_invitation_failed(invitation_id: int, **kwargs) -> None:
+    """Mark an invitation failed once its delivery job gives up."""
+    invitation = db.session.get(ContestInvitation, invitation_id)
+    if invitation:
+        invitation.status = 'failed'
+        db.session.commit()
+
+
+@job_handler('invitation_email', on_failure=_mark_invitation_failed)
+def deliver_email_invitation(invitation_id: int, to_email: str, subject: str, body: str,
+                             user_id: int, contest_id: int) -> None:
+    """Send a queued email invitation.
+    
+    Args:
+        invitation_id (int): Pending invitation ID
+        to_email (str): Email address to send to
+        subject (str): Email subject
+        body (str): Email body
+        user_id (int): Sending user ID
+        contest_id (int): Contest ID
         
-        current_app.logger.info(f"Email send result: {success}")
-        
-        if success:
-            # Record the invitation
-            invitation = ContestInvitation(
-                contest_id=contest.contest_id,
-                sent_by_user_id=sender.user_id,
-                recipient_email=recipient_email,
-                invitation_type='email',
-                status='sent'
-            )
-            db.session.add(invitation)
-            db.session.commit()
-            current_app.logger.info(f"Recorded successful invitation to {recipient_email}")
-            return True
-        else:
-            # Record failed invitation
-            invitation = ContestInvitation(
-                contest_id=contest.contest_id,
-                sent_by_user_id=sender.user_id,
-                recipient_email=recipient_email,
-                invitation_type='email',
-                status='failed'
-            )
-            db.session.add(invitation)
-            db.session.commit()
-            current_app.logger.info(f"Recorded failed invitation to {recipient_email}")
-            return False
-            
-    except Exception as e:
-        current_app.logger.error(f"Error sending email invitation: {str(e)}")
-        current_app.logger.error(f"Exception type: {type(e).__name__}")
-        return False
+    Raises:
+        JobError: If the email could not be sent, so the job is retried
+    """
+    success = send_email(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        email_type='invitation',
+        user_id=user_id,
+        contest_id=contest_id
+    )
+    if not success:
+        raise JobError(f"Failed to send invitation email to {to_email}")
+    
+    # Committed by the job runner together with the job's status
+    invitation = db.session.get(ContestInvitation, invitation_id)
+    if invitation:
+        invitation.status = 'sent'
+        invitation.sent_at = datetime.utcnow()
+    current_app.logger.info(f"Sent invitation {invitation_id} to {to_email}")
 
 
 def send_sms_invitation(contest: Contest, sender: User, recipient_phone: str) -> bool:
@@ -219,15 +248,19 @@ def send_sms_invitation(contest: Contest, sender: User, recipient_phone: str) ->
         current_app.logger.info(f"SMS invitation would be sent to {formatted_phone}: {sms_content}")
         
         # Record the invitation
-        invitation = ContestInvitation(
-            contest_id=contest.contest_id,
-            sent_by_user_id=sender.user_id,
-            recipient_phone=formatted_phone,
-            invitation_type='sms',
-            status='sent'  # In real implementation, this would be based on SMS service response
-        )
-        db.session.add(invitation)
-        db.session.commit()
+        values = {
+            'contest_id': contest.contest_id,
+            'sent_by_user_id': sender.user_id,
+            'recipient_phone': formatted_phone,
+            'invitation_type': 'sms',
+            'status': 'sent'  # In real implementation, this would be based on SMS service response
+        }
+        writer = get_active_writer()
+        if writer is not None:
+            writer.add_invitation(values)
+        else:
+            db.session.add(ContestInvitation(**values))
+            db.session.commit()
         
         # For demo purposes, return True
         # In real implementation, return based on SMS service response
@@ -239,7 +272,10 @@ def send_sms_invitation(contest: Contest, sender: User, recipient_phone: str) ->
 
 
 def send_bulk_invitations(contest: Contest, sender: User, emails: List[str], phones: List[str]) -> Dict[str, Any]:
-    """Send bulk invitations via email and SMS.
+    """Queue email invitations and send SMS invitations.
+    
+    Email invitations are delivered by background jobs that share a batch ID,
+    so this returns as soon as they are queued.
     
     Args:
         contest (Contest): Contest to invite to
@@ -251,11 +287,12 @@ def send_bulk_invitations(contest: Contest, sender: User, emails: List[str], pho
         Dict[str, Any]: Results summary
     """
     results = {
-        'email_sent': 0,
+        'email_queued': 0,
         'email_failed': 0,
         'sms_sent': 0,
         'sms_failed': 0,
         'total_sent': 0,
+        'batch_id': None,
         'errors': []
     }
     
@@ -267,30 +304,41 @@ def send_bulk_invitations(contest: Contest, sender: User, emails: List[str], pho
         results['errors'].append(f"Cannot send {total_invitations} invitations. Only {remaining} invitations remaining for this contest (max 100 per contest).")
         return results
     
-    # Send email invitations
+    # Queue email invitations
+    batch_id = new_batch_id()
+    valid_emails = []
     for email in emails:
         if validate_email(email):
-            if send_email_invitation(contest, sender, email):
-                results['email_sent'] += 1
-                results['total_sent'] += 1
-            else:
-                results['email_failed'] += 1
-                results['errors'].append(f"Failed to send email to {email}")
+            valid_emails.append(email)
         else:
             results['email_failed'] += 1
             results['errors'].append(f"Invalid email format: {email}")
     
-    # Send SMS invitations
-    for phone in phones:
-        if validate_phone(phone):
-            if send_sms_invitation(contest, sender, phone):
-                results['sms_sent'] += 1
-                results['total_sent'] += 1
+    if valid_emails:
+        try:
+            queue_email_invitations(contest, sender, valid_emails, batch_id)
+            db.session.commit()
+            results['email_queued'] = len(valid_emails)
+            results['total_sent'] += len(valid_emails)
+            results['batch_id'] = batch_id
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error queueing email invitations: {str(e)}")
+            results['email_failed'] += len(valid_emails)
+            results['errors'].append("Failed to queue email invitations")
+    
+    # Send SMS invitations, recording them in one bulk insert
+    with buffered_audit_writes():
+        for phone in phones:
+            if validate_phone(phone):
+                if send_sms_invitation(contest, sender, phone):
+                    results['sms_sent'] += 1
+                    results['total_sent'] += 1
+                else:
+                    results['sms_failed'] += 1
+                    results['errors'].append(f"Failed to send SMS to {phone}")
             else:
                 results['sms_failed'] += 1
-                results['errors'].append(f"Failed to send SMS to {phone}")
-        else:
-            results['sms_failed'] += 1
-            results['errors'].append(f"Invalid phone format: {phone}")
+                results['errors'].append(f"Invalid phone format: {phone}")
     
     return results
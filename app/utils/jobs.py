@@ -0,0 +1,293 @@
+"""Database-backed background job queue.
+
+Jobs are rows in the jobs table. Request handlers enqueue a job and return;
+`flask worker` processes claim jobs with a conditional UPDATE, so several
+workers can share one database without an external broker:
+
+    queued --claim--> running --success--> succeeded
+                         |
+                         +--error--> queued (run_at pushed back) ... failed
+
+Handlers are plain functions registered with @job_handler and called with the
+job payload as keyword arguments. A handler signals failure by raising; the
+job is retried with exponential backoff until max_attempts is reached.
+"""
+import importlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app import db
+from app.models import Job
+from app.utils.audit_writer import AuditWriter
+
+logger = logging.getLogger(__name__)
+
+# Modules that register handlers; imported before a worker starts
+HANDLER_MODULES = ('app.utils.finalization', 'app.utils.invitations', 'app.utils.question_bank')
+
+# How many due jobs a worker considers per claim attempt
+CLAIM_CANDIDATES = 10
+
+_handlers = {}
+
+
+class JobError(Exception):
+    """Raised by handlers when a job should be retried."""
+    pass
+
+
+def job_handler(job_type: str, on_failure: Optional[Callable] = None):
+    """Register a function as the handler for a job type.
+
+    Args:
+        job_type (str): Job type name
+        on_failure (Callable, optional): Called with the payload once the job
+            has used all of its attempts
+
+    Returns:
+        Callable: Decorator that registers the handler
+    """
+    def decorator(func):
+        _handlers[job_type] = {'func': func, 'on_failure': on_failure}
+        return func
+    return decorator
+
+
+def load_handlers() -> None:
+    """Import every module that registers job handlers."""
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def new_batch_id() -> str:
+    """Create an ID for grouping related jobs.
+
+    Returns:
+        str: Random batch ID
+    """
+    return uuid.uuid4().hex
+
+
+def enqueue(job_type: str, payload: Optional[dict] = None, run_at: Optional[datetime] = None,
+            max_attempts: Optional[int] = None, batch_id: Optional[str] = None,
+            created_by_user_id: Optional[int] = None, commit: bool = True) -> Job:
+    """Add a job to the queue.
+
+    Args:
+        job_type (str): Registered handler name
+        payload (dict, optional): JSON-serializable handler arguments
+        run_at (datetime, optional): Earliest time to run, defaults to now
+        max_attempts (int, optional): Attempts before the job fails, defaults
+            to the JOB_MAX_ATTEMPTS setting
+        batch_id (str, optional): Batch the job belongs to
+        created_by_user_id (int, optional): User who triggered the job
+        commit (bool): Commit the session; pass False to enqueue in the
+            caller's transaction (the job is inserted, and gets its ID, when
+            the session next flushes)
+
+    Returns:
+        Job: The queued job
+    """
+    job = Job(
+        job_type=job_type,
+        payload=json.dumps(payload or {}),
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        batch_id=batch_id,
+        created_by_user_id=created_by_user_id
+    )
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Get the backoff before retrying a job.
+
+    Args:
+        attempts (int): Attempts made so far
+
+    Returns:
+        float: Seconds to wait before the next attempt
+    """
+    base = current_app.config.get('JOB_BACKOFF_SECONDS', 30)
+    ceiling = current_app.config.get('JOB_BACKOFF_MAX_SECONDS', 3600)
+    return min(base * 2 ** max(attempts - 1, 0), ceiling)
+
+
+def _claimable(now: datetime):
+    """Filter for jobs that are due, or running on a worker that stopped responding."""
+    stale = now - timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', 600))
+    return or_(
+        and_(Job.status == 'queued', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_at < stale)
+    )
+
+
+def claim_next_job(worker_id: str) -> Optional[Job]:
+    """Claim the next due job for a worker.
+
+    A job is claimed by an UPDATE that only matches while the job is still
+    claimable, so two workers racing for the same row cannot both win.
+
+    Args:
+        worker_id (str): Identifier of the claiming worker
+
+    Returns:
+        Optional[Job]: The claimed job, or None if nothing is due
+    """
+    now = datetime.utcnow()
+    candidates = db.session.query(Job.job_id).filter(_claimable(now)).order_by(
+        Job.run_at, Job.job_id
+    ).limit(CLAIM_CANDIDATES).all()
+
+    for (job_id,) in candidates:
+        claimed = Job.query.filter(Job.job_id == job_id, _claimable(now)).update({
+            'status': 'running',
+            'locked_by': worker_id,
+            'locked_at': now,
+            'attempts': Job.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed == 1:
+            return db.session.get(Job, job_id)
+
+    return None
+
+
+def run_job(job: Job) -> bool:
+    """Run a claimed job and record the outcome.
+
+    Email logs written by the handler are buffered and committed together
+    with the job's outcome, so a job costs one commit after its claim.
+
+    Args:
+        job (Job): Job claimed by this worker
+
+    Returns:
+        bool: True if the job succeeded
+    """
+    job_id = job.job_id
+    payload = job.get_payload()
+    handler = _handlers.get(job.job_type)
+    writer = AuditWriter()
+
+    try:
+        if handler is None:
+            raise JobError(f"No handler registered for job type '{job.job_type}'")
+        with writer.activate():
+            result = handler['func'](**payload)
+
+        writer.write()
+        job.status = 'succeeded'
+        job.result = json.dumps(result) if result is not None else None
+        job.last_error = None
+        job.completed_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        db.session.commit()
+        writer.clear()
+        logger.info(f"Job {job_id} ({job.job_type}) succeeded")
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = str(e)
+        job.locked_by = None
+        job.locked_at = None
+
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.completed_at = datetime.utcnow()
+            logger.error(f"Job {job_id} ({job.job_type}) failed after {job.attempts} attempts: {str(e)}")
+            if handler and handler['on_failure']:
+                try:
+                    handler['on_failure'](**payload)
+                except Exception as hook_error:
+                    logger.error(f"Failure handler for job {job_id} raised: {str(hook_error)}")
+        else:
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+            logger.warning(f"Job {job_id} ({job.job_type}) attempt {job.attempts} failed, retrying at {job.run_at}: {str(e)}")
+
+        # Keep the logs of failed sends with the retry state
+        try:
+            writer.write()
+        except Exception as write_error:
+            logger.error(f"Could not write audit rows for job {job_id}: {str(write_error)}")
+        db.session.commit()
+        writer.clear()
+        return False
+
+
+def default_worker_id() -> str:
+    """Get an identifier for this worker process.
+
+    Returns:
+        str: host:pid
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def work(worker_id: Optional[str] = None, poll_interval: Optional[float] = None,
+         once: bool = False, max_jobs: Optional[int] = None) -> int:
+    """Process jobs until stopped.
+
+    Args:
+        worker_id (str, optional): Worker identifier, defaults to host:pid
+        poll_interval (float, optional): Seconds to sleep when the queue is
+            empty, defaults to the JOB_POLL_INTERVAL setting
+        once (bool): Stop when no job is due instead of polling
+        max_jobs (int, optional): Stop after this many jobs
+
+    Returns:
+        int: Number of jobs processed
+    """
+    load_handlers()
+    worker_id = worker_id or default_worker_id()
+    if poll_interval is None:
+        poll_interval = current_app.config.get('JOB_POLL_INTERVAL', 5)
+
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+    return processed
+
+
+def get_batch_status(batch_id: str) -> dict:
+    """Count the jobs in a batch by status.
+
+    Args:
+        batch_id (str): Batch ID
+
+    Returns:
+        dict: Job counts per status plus 'total'
+    """
+    rows = db.session.query(Job.status, db.func.count(Job.job_id)).filter(
+        Job.batch_id == batch_id
+    ).group_by(Job.status).all()
+
+    counts = {'queued': 0, 'running': 0, 'succeeded': 0, 'failed': 0}
+    counts.update({status: count for status, count in rows})
+    counts['total'] = sum(count for _, count in rows)
+    return counts
@@ -0,0 +1,141 @@
+"""League membership lookups.
+
+League.is_member and League.is_admin ran a query per call, and league pages
+call them for the same users many times. Roles now come from maps loaded
+once per request:
+
+    per user    league_id -> 'admin' or 'member' for the logged-in user,
+                kept on `g` (see get_current_league_roles)
+    per league  user_id -> role for the members of a league, loaded when a
+                page checks other members (e.g. admin badges)
+
+A user's roles are also kept across requests in the application cache
+under league_roles:<user_id>, tagged user:<user_id>, which every
+LeagueMembership commit invalidates (see MODEL_TAGS in app.utils.cache).
+Roles decide who may administer a league, so this is only done when the cache
+backend is shared (disk or Redis) and sees every worker's invalidations; with
+the per-process memory backend they are read from the database at the start
+of each request. Commits that insert, update or delete LeagueMembership rows
+also drop the request's maps, so a join or leave in the same request shows up
+on the next lookup.
+"""
+from typing import Dict, Optional
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import LeagueMembership
+from app.utils.cache import get_cache
+
+_events_registered = False
+
+
+def _query_user_roles(user_id: int) -> Dict[int, str]:
+    """Read a user's league roles from the database."""
+    rows = db.session.query(LeagueMembership.league_id, LeagueMembership.is_admin).filter_by(
+        user_id=user_id
+    ).all()
+    return {league_id: 'admin' if is_league_admin else 'member' for league_id, is_league_admin in rows}
+
+
+def load_user_roles(user_id: int) -> Dict[int, str]:
+    """Get a user's league roles, from the shared cache when there is one.
+
+    Args:
+        user_id (int): User ID
+
+    Returns:
+        Dict[int, str]: league_id -> 'admin' or 'member'
+    """
+    cache = get_cache()
+    if cache.backend.name == 'memory':
+        return _query_user_roles(user_id)
+    return cache.get_or_set(f'league_roles:{user_id}', lambda: _query_user_roles(user_id),
+                            tags=[f'user:{user_id}'])
+
+
+def get_league_member_roles(league_id: int) -> Dict[int, str]:
+    """Get the roles of a league's members, loaded once per request.
+
+    Args:
+        league_id (int): League ID
+
+    Returns:
+        Dict[int, str]: user_id -> 'admin' or 'member'
+    """
+    league_roles = g.setdefault('_league_member_roles', {}) if has_request_context() else {}
+    if league_id not in league_roles:
+        rows = db.session.query(LeagueMembership.user_id, LeagueMembership.is_admin).filter_by(
+            league_id=league_id
+        ).all()
+        league_roles[league_id] = {
+            user_id: 'admin' if is_league_admin else 'member' for user_id, is_league_admin in rows
+        }
+    return league_roles[league_id]
+
+
+def get_role(league_id: int, user_id: int) -> Optional[str]:
+    """Get a user's role in a league.
+
+    The logged-in user's roles come from the request's snapshot; other users
+    are looked up in the league's member map for the request. Outside a
+    request the user's roles are read from the database.
+
+    Args:
+        league_id (int): League ID
+        user_id (int): User ID
+
+    Returns:
+        Optional[str]: 'admin', 'member', or None if not a member
+    """
+    from app.utils.decorators import get_current_league_roles, get_current_user
+
+    current_user = get_current_user()
+    if current_user is not None and current_user.user_id == user_id:
+        return get_current_league_roles().get(league_id)
+    if has_request_context():
+        return get_league_member_roles(league_id).get(user_id)
+    return load_user_roles(user_id).get(league_id)
+
+
+def _collect_changes(session, flush_context, instances) -> None:
+    """Remember which users' and leagues' memberships a flush will change."""
+    changed = session.info.setdefault('membership_changes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, LeagueMembership):
+            changed.add((obj.user_id, obj.league_id))
+
+
+def _invalidate_committed(session) -> None:
+    """Drop the request's roles for memberships a committed transaction changed."""
+    changed = session.info.pop('membership_changes', None)
+    if not changed or not has_request_context():
+        return
+
+    user_ids = {user_id for user_id, _ in changed}
+    identity = g.get('_identity')
+    if identity is not None and identity.get('user_id') in user_ids:
+        identity.pop('league_roles', None)
+    league_roles = g.get('_league_member_roles')
+    if league_roles:
+        for _, league_id in changed:
+            league_roles.pop(league_id, None)
+
+
+def _discard_changes(session, previous_transaction) -> None:
+    """Forget collected changes when a transaction rolls back."""
+    session.info.pop('membership_changes', None)
+
+
+def register_membership_events() -> None:
+    """Drop the request's roles whenever membership changes commit."""
+    global _events_registered
+    if _events_registered:
+        return
+    # before_flush still sees the pending objects in new/dirty/deleted
+    event.listen(Session, 'before_flush', _collect_changes)
+    event.listen(Session, 'after_commit', _invalidate_committed)
+    event.listen(Session, 'after_soft_rollback', _discard_changes)
+    _events_registered = True
@@ -0,0 +1,317 @@
+"""NFL schedule loading and week lookups.
+
+load_season upserts a whole season in a few statements: one query reads the
+season's games, changed games are updated in one executemany, new games are
+inserted in another, and games missing from the new schedule are deleted.
+Unchanged games keep their schedule_id and timestamps, so reloading a schedule
+file is cheap and safe.
+
+ScheduleCalendar keeps each week's first and last kickoff in memory, read
+with one GROUP BY query and refreshed every NFL_CALENDAR_TTL seconds or after
+a load. It answers "which week is it" and "when does this week kick off" for
+week resolution and lock-time suggestions without touching the database.
+
+Game dates are stored as naive local times in NFL_SCHEDULE_TIMEZONE (the
+schedule is published in US Eastern time).
+"""
+import bisect
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+from flask import current_app
+
+from app import db
+from app.models import NFLSchedule
+
+logger = logging.getLogger(__name__)
+
+# A week stays current until its last game has had time to finish
+GAME_LENGTH = timedelta(hours=4)
+
+# Accepted spellings for each field in schedule files
+FIELD_ALIASES = {
+    'season_year': ('season_year', 'season'),
+    'week_number': ('week_number', 'week'),
+    'home_team': ('home_team', 'home'),
+    'away_team': ('away_team', 'away'),
+    'game_date': ('game_date', 'date'),
+    'game_time': ('game_time', 'time'),
+    'is_playoff': ('is_playoff', 'playoff')
+}
+
+COMPARED_FIELDS = ('game_date', 'game_time', 'is_playoff')
+
+
+def _field(raw: dict, name: str):
+    """Get a field from a schedule row under any of its accepted names."""
+    for alias in FIELD_ALIASES[name]:
+        value = raw.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _parse_date(value) -> Optional[datetime]:
+    """Parse a kickoff given as a datetime or an ISO 8601 string."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+def _parse_bool(value) -> bool:
+    """Parse a playoff flag from a CSV or JSON value."""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ['true', 'yes', 'y', '1']
+
+
+def normalize_game(raw: dict, season_year: int, row_number: int) -> dict:
+    """Turn one schedule row into column values.
+
+    Args:
+        raw (dict): Row from a schedule file or list
+        season_year (int): Season being loaded
+        row_number (int): Position of the row, for error messages
+
+    Returns:
+        dict: Column values for nfl_schedules
+
+    Raises:
+        ValueError: If the row is incomplete, malformed or for another season
+    """
+    try:
+        week_number = int(_field(raw, 'week_number'))
+        home_team = str(_field(raw, 'home_team')).strip()
+        away_team = str(_field(raw, 'away_team')).strip()
+        game_date = _parse_date(_field(raw, 'game_date'))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Schedule row {row_number} is invalid: {str(e)}")
+
+    if not 1 <= week_number <= 22:
+        raise ValueError(f"Schedule row {row_number} has invalid week: {week_number}")
+    if home_team in ('', 'None') or away_team in ('', 'None'):
+        raise ValueError(f"Schedule row {row_number} is missing a team")
+
+    row_season = _field(raw, 'season_year')
+    if row_season is not None and int(row_season) != season_year:
+        raise ValueError(f"Schedule row {row_number} is for season {row_season}, not {season_year}")
+
+    game_time = _field(raw, 'game_time')
+    return {
+        'season_year': season_year,
+        'week_number': week_number,
+        'home_team': home_team,
+        'away_team': away_team,
+        'game_date': game_date,
+        'game_time': str(game_time).strip()[:20] if game_time is not None else None,
+        'is_playoff': _parse_bool(_field(raw, 'is_playoff'))
+    }
+
+
+def read_schedule_file(path: str) -> List[dict]:
+    """Read schedule rows from a CSV or JSON file.
+
+    CSV files need a header row. JSON files hold a list of games, or an
+    object with the list under "games" (and optionally "season_year").
+
+    Args:
+        path (str): File path; the extension picks the format
+
+    Returns:
+        List[dict]: Raw schedule rows
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+
+    if path.lower().endswith('.json'):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            season_year = data.get('season_year')
+            games = data.get('games', [])
+            if season_year is not None:
+                games = [dict(game, season_year=game.get('season_year', season_year)) for game in games]
+            return games
+        return data
+
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def load_season(season_year: int, games: Iterable[dict], prune: bool = True) -> Dict[str, int]:
+    """Upsert a season's schedule.
+
+    Games are matched on (week_number, home_team, away_team).
+
+    Args:
+        season_year (int): NFL season year
+        games (Iterable[dict]): Schedule rows (see normalize_game)
+        prune (bool): Delete stored games that are not in `games`
+
+    Returns:
+        Dict[str, int]: Counts of inserted, updated, unchanged and deleted games
+
+    Raises:
+        ValueError: If a row is invalid or a game appears twice
+    """
+    incoming = {}
+    for row_number, raw in enumerate(games, 1):
+        game = normalize_game(raw, season_year, row_number)
+        key = (game['week_number'], game['home_team'], game['away_team'])
+        if key in incoming:
+            raise ValueError(f"Schedule row {row_number} repeats Week {key[0]}: {key[2]} @ {key[1]}")
+        incoming[key] = game
+
+    existing = {
+        (game.week_number, game.home_team, game.away_team): game
+        for game in NFLSchedule.query.filter_by(season_year=season_year).all()
+    }
+
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for key, game in incoming.items():
+        stored = existing.pop(key, None)
+        if stored is None:
+            inserts.append(dict(game, created_at=now, updated_at=now))
+        elif any(getattr(stored, field) != game[field] for field in COMPARED_FIELDS):
+            updates.append({
+                'schedule_id': stored.schedule_id,
+                'game_date': game['game_date'],
+                'game_time': game['game_time'],
+                'is_playoff': game['is_playoff'],
+                'updated_at': now
+            })
+
+    if updates:
+        db.session.bulk_update_mappings(NFLSchedule, updates)
+    if inserts:
+        db.session.execute(NFLSchedule.__table__.insert(), inserts)
+
+    deleted = 0
+    if prune and existing:
+        deleted = NFLSchedule.query.filter(
+            NFLSchedule.schedule_id.in_([game.schedule_id for game in existing.values()])
+        ).delete(synchronize_session=False)
+
+    db.session.commit()
+    get_calendar().invalidate()
+
+    counts = {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'unchanged': len(incoming) - len(inserts) - len(updates),
+        'deleted': deleted
+    }
+    logger.info(f"Loaded {season_year} NFL schedule: {counts}")
+    return counts
+
+
+class ScheduleCalendar:
+    """In-process map of NFL weeks to their kickoff times."""
+
+    def __init__(self, ttl: float = 600, timezone: str = 'US/Eastern'):
+        """Initialize the calendar.
+
+        Args:
+            ttl (float): Seconds before the weeks are read again
+            timezone (str): Timezone the schedule's game dates are in
+        """
+        self.ttl = ttl
+        self.timezone = timezone
+
+        self._weeks = []  # sorted (season_year, week_number, first_kickoff, last_kickoff)
+        self._first_kickoffs = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Read the weeks again on next use, e.g. after a schedule load."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _load(self) -> None:
+        """Read every week's first and last kickoff (lock held)."""
+        rows = db.session.query(
+            NFLSchedule.season_year,
+            NFLSchedule.week_number,
+            db.func.min(NFLSchedule.game_date),
+            db.func.max(NFLSchedule.game_date)
+        ).filter(
+            NFLSchedule.game_date.isnot(None)
+        ).group_by(
+            NFLSchedule.season_year, NFLSchedule.week_number
+        ).all()
+
+        self._weeks = sorted(tuple(row) for row in rows)
+        self._first_kickoffs = {(season, week): first for season, week, first, _ in self._weeks}
+        self._loaded_at = time.monotonic()
+
+    def weeks(self) -> List[Tuple[int, int, datetime, datetime]]:
+        """Get every scheduled week.
+
+        Returns:
+            List[Tuple[int, int, datetime, datetime]]: (season_year,
+            week_number, first_kickoff, last_kickoff) in schedule order
+        """
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._load()
+            return self._weeks
+
+    def local_now(self) -> datetime:
+        """Get the current time as a naive datetime in the schedule's timezone."""
+        return datetime.now(pytz.timezone(self.timezone)).replace(tzinfo=None)
+
+    def current_week(self, now: Optional[datetime] = None) -> Optional[Tuple[int, int]]:
+        """Get the week being played, or the next one between weeks.
+
+        Args:
+            now (datetime, optional): Current time in the schedule's timezone
+
+        Returns:
+            Optional[Tuple[int, int]]: (season_year, week_number), or None if
+            no scheduled week is still to be played
+        """
+        weeks = self.weeks()
+        now = now or self.local_now()
+
+        # Weeks are in kickoff order, so the last kickoffs are sorted too
+        index = bisect.bisect_right([last for _, _, _, last in weeks], now - GAME_LENGTH)
+        if index == len(weeks):
+            return None
+        season_year, week_number, _, _ = weeks[index]
+        return season_year, week_number
+
+    def first_kickoff(self, season_year: int, week_number: int) -> Optional[datetime]:
+        """Get the kickoff of a week's first game.
+
+        Args:
+            season_year (int): NFL season year
+            week_number (int): Week number
+
+        Returns:
+            Optional[datetime]: Kickoff in the schedule's timezone, or None if
+            the week is not scheduled
+        """
+        self.weeks()
+        return self._first_kickoffs.get((season_year, week_number))
+
+
+def get_calendar() -> ScheduleCalendar:
+    """Get the schedule calendar for the current app, creating it on first use.
+
+    Returns:
+        ScheduleCalendar: The app's calendar
+    """
+    calendar = current_app.extensions.get('nfl_calendar')
+    if calendar is None:
+        calendar = current_app.extensions['nfl_calendar'] = ScheduleCalendar(
+            ttl=current_app.config.get('NFL_CALENDAR_TTL', 600),
+            timezone=current_app.config.get('NFL_SCHEDULE_TIMEZONE', 'US/Eastern')
+        )
+    return calendar
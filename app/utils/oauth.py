@@ -1,10 +1,42 @@
 """OAuth utility functions for Google authentication."""
 import json
-import requests
 from authlib.integrations.flask_client import OAuth
+from authlib.integrations.flask_client.apps import FlaskOAuth2App
 from flask import current_app, url_for
 from app import db
 from app.models import User
+from app.utils.provider_metadata import ProviderMetadataCache, create_metadata_cache
+
+
+def get_metadata_cache() -> ProviderMetadataCache:
+    """Get the app's provider metadata cache, creating it on first use.
+    
+    Returns:
+        ProviderMetadataCache: Cache for discovery documents and signing keys
+    """
+    cache = current_app.extensions.get('oidc_metadata')
+    if cache is None:
+        cache = current_app.extensions['oidc_metadata'] = create_metadata_cache(current_app)
+    return cache
+
+
+class CachedMetadataOAuth2App(FlaskOAuth2App):
+    """Authlib client that reads provider metadata and keys from the metadata cache.
+    
+    Authlib otherwise fetches the discovery document once per process and
+    keeps it forever, and fetches the signing keys on the first login.
+    """
+    
+    def load_server_metadata(self):
+        """Get the discovery document from the cache."""
+        if self._server_metadata_url:
+            self.server_metadata.update(get_metadata_cache().get(self._server_metadata_url))
+        return self.server_metadata
+    
+    def fetch_jwk_set(self, force=False):
+        """Get the signing keys from the cache; force refetches after a key rotation."""
+        metadata = self.load_server_metadata()
+        return get_metadata_cache().get(metadata['jwks_uri'], force=force)
 
 
 def init_oauth(app):
@@ -23,11 +55,16 @@ def init_oauth(app):
         client_id=app.config['GOOGLE_CLIENT_ID'],
         client_secret=app.config['GOOGLE_CLIENT_SECRET'],
         server_metadata_url=app.config['GOOGLE_DISCOVERY_URL'],
+        client_cls=CachedMetadataOAuth2App,
         client_kwargs={
             'scope': 'openid email profile'
         }
     )
     
+    # Warm the discovery document and keys so the first login doesn't wait on them
+    cache = app.extensions['oidc_metadata'] = create_metadata_cache(app)
+    cache.prefetch(app.config['GOOGLE_DISCOVERY_URL'])
+    
     return oauth, google
 
 
@@ -37,7 +74,19 @@ def get_google_provider_cfg():
     Returns:
         dict: Google's OpenID Connect configuration
     """
-    return requests.get(current_app.config['GOOGLE_DISCOVERY_URL']).json()
+    return get_metadata_cache().get(current_app.config['GOOGLE_DISCOVERY_URL'])
+
+
+def get_google_jwks(force: bool = False):
+    """Get Google's ID token signing keys.
+    
+    Args:
+        force (bool): Fetch the keys now instead of using the cached copy
+        
+    Returns:
+        dict: JSON Web Key Set
+    """
+    return get_metadata_cache().get_jwks(current_app.config['GOOGLE_DISCOVERY_URL'], force=force)
 
 
 def create_or_update_google_user(google_user_info):
@@ -0,0 +1,220 @@
+"""Transactional outbox for outgoing email.
+
+Request handlers add an OutboxEmail row in the same transaction as the
+change that triggers it (a login token, a finalized contest), so the email
+exists exactly when the change commits and a web worker dying mid-request
+loses nothing.
+
+The relay, a process of its own (`flask relay-outbox`) so long jobs never
+hold up email, claims due rows in batches with a conditional UPDATE,
+sends them through the email dispatcher and records the outcome:
+
+    pending --claim--> sending --sent--> sent
+                          |
+                          +--error--> pending (backoff) ... failed
+
+Login links are delivered the same way, so the relay's poll interval
+(OUTBOX_POLL_INTERVAL) bounds how long they wait.
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app import db
+from app.models import OutboxEmail
+from app.utils.jobs import retry_delay
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(to_email: str, subject: str, body: str, html_body: Optional[str] = None,
+                email_type: str = 'generic', user_id: int = None, contest_id: int = None,
+                commit: bool = False) -> OutboxEmail:
+    """Add an email to the outbox.
+
+    Args:
+        to_email (str): Recipient email address
+        subject (str): Email subject
+        body (str): Email body (plain text)
+        html_body (str, optional): HTML email body
+        email_type (str): Type of email for logging
+        user_id (int, optional): Associated user ID
+        contest_id (int, optional): Associated contest ID
+        commit (bool): Commit the session; by default the email is committed
+            with the caller's transaction
+
+    Returns:
+        OutboxEmail: The pending outbox row
+    """
+    email = OutboxEmail(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        email_type=email_type,
+        user_id=user_id,
+        contest_id=contest_id
+    )
+    db.session.add(email)
+    if commit:
+        db.session.commit()
+    return email
+
+
+def queue_emails(messages: List[dict], commit: bool = False) -> int:
+    """Add many emails to the outbox with one bulk insert.
+
+    Args:
+        messages (List[dict]): queue_email keyword arguments, one dict per email
+        commit (bool): Commit the session
+
+    Returns:
+        int: Number of emails queued
+    """
+    if messages:
+        now = datetime.utcnow()
+        db.session.execute(OutboxEmail.__table__.insert(), [
+            dict(message, status='pending', attempts=0, next_attempt_at=now, created_at=now)
+            for message in messages
+        ])
+    if commit:
+        db.session.commit()
+    return len(messages)
+
+
+def _claimable(now: datetime):
+    """Filter for rows that are due, or held by a relay that stopped responding."""
+    stale = now - timedelta(seconds=current_app.config.get('OUTBOX_CLAIM_TIMEOUT', 300))
+    return or_(
+        and_(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now),
+        and_(OutboxEmail.status == 'sending', OutboxEmail.claimed_at < stale)
+    )
+
+
+def claim_batch(batch_size: Optional[int] = None) -> List[OutboxEmail]:
+    """Claim a batch of due outbox rows.
+
+    Args:
+        batch_size (int, optional): Rows to claim, defaults to OUTBOX_BATCH_SIZE
+
+    Returns:
+        List[OutboxEmail]: Rows now held by this relay
+    """
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 100)
+    now = datetime.utcnow()
+
+    candidate_ids = [outbox_id for (outbox_id,) in db.session.query(OutboxEmail.outbox_id).filter(
+        _claimable(now)
+    ).order_by(OutboxEmail.next_attempt_at, OutboxEmail.outbox_id).limit(batch_size).all()]
+    if not candidate_ids:
+        return []
+
+    return _claim(candidate_ids, now)
+
+
+def _claim(outbox_ids: List[int], now: datetime) -> List[OutboxEmail]:
+    """Claim the given rows that are still claimable."""
+    claim_token = uuid.uuid4().hex
+    OutboxEmail.query.filter(
+        OutboxEmail.outbox_id.in_(outbox_ids), _claimable(now)
+    ).update({
+        'status': 'sending',
+        'claim_token': claim_token,
+        'claimed_at': now,
+        'attempts': OutboxEmail.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+
+    return OutboxEmail.query.filter_by(claim_token=claim_token, status='sending').order_by(
+        OutboxEmail.outbox_id
+    ).all()
+
+
+def _record_results(rows: List[OutboxEmail], results: List[bool]) -> dict:
+    """Mark claimed rows sent, due for a retry or failed.
+
+    Args:
+        rows (List[OutboxEmail]): Claimed rows
+        results (List[bool]): Whether each row was sent
+
+    Returns:
+        dict: Counts of 'sent', 'retrying' and 'failed' emails
+    """
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    now = datetime.utcnow()
+    max_attempts = current_app.config.get('JOB_MAX_ATTEMPTS', 5)
+    updates = []
+    for row, sent in zip(rows, results):
+        update = {'outbox_id': row.outbox_id, 'claim_token': None, 'claimed_at': None}
+        if sent:
+            update.update(status='sent', sent_at=now, last_error=None)
+            counts['sent'] += 1
+        elif row.attempts >= max_attempts:
+            update.update(status='failed', last_error='Delivery failed; see email_logs')
+            counts['failed'] += 1
+        else:
+            update.update(status='pending', last_error='Delivery failed; see email_logs',
+                          next_attempt_at=now + timedelta(seconds=retry_delay(row.attempts)))
+            counts['retrying'] += 1
+        updates.append(update)
+
+    db.session.bulk_update_mappings(OutboxEmail, updates)
+    db.session.commit()
+    return counts
+
+
+def relay_batch(batch_size: Optional[int] = None, dispatcher=None) -> dict:
+    """Deliver one batch of outbox emails.
+
+    Args:
+        batch_size (int, optional): Rows per batch, defaults to OUTBOX_BATCH_SIZE
+        dispatcher (EmailDispatcher, optional): Dispatcher to send with,
+            defaults to the process-wide dispatcher
+
+    Returns:
+        dict: Counts of 'sent', 'retrying' and 'failed' emails
+    """
+    rows = claim_batch(batch_size)
+    if not rows:
+        return {'sent': 0, 'retrying': 0, 'failed': 0}
+
+    if dispatcher is None:
+        from app.utils.email_dispatcher import get_dispatcher
+        dispatcher = get_dispatcher()
+
+    counts = _record_results(rows, dispatcher.send_batch([row.to_message() for row in rows]))
+
+    logger.info(f"Outbox relay: {counts['sent']} sent, {counts['retrying']} retrying, {counts['failed']} failed")
+    return counts
+
+
+def relay(poll_interval: Optional[float] = None, once: bool = False) -> int:
+    """Deliver outbox emails until stopped.
+
+    Args:
+        poll_interval (float, optional): Seconds to sleep when the outbox is
+            empty, defaults to OUTBOX_POLL_INTERVAL
+        once (bool): Stop when nothing is due instead of polling
+
+    Returns:
+        int: Number of emails processed
+    """
+    if poll_interval is None:
+        poll_interval = current_app.config.get('OUTBOX_POLL_INTERVAL', 1)
+
+    processed = 0
+    while True:
+        counts = relay_batch()
+        batch_total = sum(counts.values())
+        processed += batch_total
+        if batch_total == 0:
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    return processed
@@ -0,0 +1,249 @@
+"""Cache for OpenID Connect provider metadata.
+
+Google's discovery document and signing keys (JWKS) change rarely, but were
+fetched over HTTPS on the login path. ProviderMetadataCache keeps them:
+
+    in process   until the expiry given by the response's Cache-Control
+    on disk      in a small JSON file per URL, shared by every worker on the
+                 machine so a new worker starts warm; only in a directory
+                 private to the app's user, since a planted JWKS would let
+                 anyone forge ID tokens
+    refresh      in a background thread once a document is within
+                 `refresh_ahead` seconds of expiring
+    fallback     the last good copy (memory, then disk) if a fetch fails, or
+                 straight away while the provider's circuit breaker is open
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional, Tuple
+
+import requests
+
+from app.utils.cache_backends import default_cache_dir, ensure_private_dir
+from app.utils.circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+def parse_max_age(headers) -> Optional[int]:
+    """Get the freshness lifetime from HTTP response headers.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Optional[int]: Seconds the response stays fresh, or None if the
+        headers don't say
+    """
+    cache_control = headers.get('Cache-Control', '')
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+
+    match = MAX_AGE_PATTERN.search(cache_control)
+    if not match:
+        return None
+
+    max_age = int(match.group(1))
+    try:
+        max_age -= int(headers.get('Age', 0))
+    except ValueError:
+        pass
+    return max(max_age, 0)
+
+
+class ProviderMetadataCache:
+    """In-process and on-disk cache of provider JSON documents keyed by URL."""
+
+    def __init__(self, cache_dir: Optional[str] = None, default_ttl: int = 3600, min_ttl: int = 60,
+                 refresh_ahead: int = 300, timeout: float = 5, breaker=None):
+        """Initialize the cache.
+
+        Args:
+            cache_dir (str, optional): Directory for the shared on-disk copies,
+                defaults to a per-user directory under the temp dir
+            default_ttl (int): Lifetime when the response has no max-age
+            min_ttl (int): Shortest lifetime, so no-cache responses are not
+                refetched on every login
+            refresh_ahead (int): Refresh in the background this many seconds
+                before expiry
+            timeout (float): HTTP timeout in seconds
+            breaker (CircuitBreaker, optional): Breaker guarding fetches
+        """
+        self.cache_dir = cache_dir or default_cache_dir('overunders-oidc')
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self.breaker = breaker
+
+        self._disk_checked = False
+        self._entries = {}  # url -> (document, expires_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def _path(self, url: str) -> str:
+        """Get the on-disk cache file for a URL."""
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _disk_enabled(self) -> bool:
+        """Check, once, that the cache directory is private; disable disk copies if not."""
+        if not self._disk_checked:
+            try:
+                ensure_private_dir(self.cache_dir)
+            except OSError as e:
+                logger.warning(f"Not caching provider metadata on disk: {str(e)}")
+                self.cache_dir = None
+            self._disk_checked = True
+        return self.cache_dir is not None
+
+    def _read_disk(self, url: str) -> Optional[Tuple[dict, float]]:
+        """Read a URL's on-disk copy, if any."""
+        if not self._disk_enabled():
+            return None
+        try:
+            with open(self._path(url)) as f:
+                data = json.load(f)
+            return data['document'], data['expires_at']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, url: str, document: dict, expires_at: float) -> None:
+        """Atomically replace a URL's on-disk copy."""
+        if not self._disk_enabled():
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'url': url, 'document': document, 'expires_at': expires_at}, f)
+            os.replace(tmp_path, self._path(url))
+        except OSError as e:
+            logger.warning(f"Could not write provider metadata cache for {url}: {str(e)}")
+
+    def _fetch(self, url: str) -> Tuple[dict, float]:
+        """Fetch a document and store it in memory and on disk."""
+        with self.breaker.guard() if self.breaker is not None else nullcontext():
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        document = response.json()
+
+        ttl = parse_max_age(response.headers)
+        ttl = max(self.default_ttl if ttl is None else ttl, self.min_ttl)
+        expires_at = time.time() + ttl
+
+        with self._lock:
+            self._entries[url] = (document, expires_at)
+        self._write_disk(url, document, expires_at)
+        return document, expires_at
+
+    def _refresh_in_background(self, url: str) -> None:
+        """Start a background refresh of a URL unless one is running."""
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def refresh():
+            try:
+                self._fetch(url)
+            except Exception as e:
+                logger.warning(f"Background refresh of {url} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def get(self, url: str, force: bool = False) -> dict:
+        """Get a provider document.
+
+        Args:
+            url (str): Document URL
+            force (bool): Fetch now, e.g. after an unknown signing key
+
+        Returns:
+            dict: The document
+
+        Raises:
+            requests.RequestException: If the document was never fetched
+            successfully and the fetch fails
+        """
+        now = time.time()
+
+        if not force:
+            with self._lock:
+                entry = self._entries.get(url)
+            if entry is None:
+                entry = self._read_disk(url)
+                if entry is not None:
+                    with self._lock:
+                        self._entries[url] = entry
+
+            if entry is not None and now < entry[1]:
+                if now >= entry[1] - self.refresh_ahead:
+                    self._refresh_in_background(url)
+                return entry[0]
+
+        try:
+            return self._fetch(url)[0]
+        except Exception as e:
+            with self._lock:
+                stale = self._entries.get(url)
+            stale = stale or self._read_disk(url)
+            if stale is None:
+                raise
+            logger.warning(f"Fetching {url} failed, using last good copy: {str(e)}")
+            return stale[0]
+
+    def get_jwks(self, discovery_url: str, force: bool = False) -> dict:
+        """Get a provider's signing keys.
+
+        Args:
+            discovery_url (str): Discovery document URL
+            force (bool): Fetch the keys now
+
+        Returns:
+            dict: JSON Web Key Set
+        """
+        return self.get(self.get(discovery_url)['jwks_uri'], force=force)
+
+    def prefetch(self, discovery_url: str) -> None:
+        """Warm the discovery document and signing keys in the background.
+
+        Args:
+            discovery_url (str): Discovery document URL
+        """
+        def warm():
+            try:
+                self.get_jwks(discovery_url)
+            except Exception as e:
+                logger.warning(f"Could not prefetch provider metadata from {discovery_url}: {str(e)}")
+
+        threading.Thread(target=warm, daemon=True).start()
+
+
+def create_metadata_cache(app) -> ProviderMetadataCache:
+    """Create the provider metadata cache for an app.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        ProviderMetadataCache: Cache configured from app settings
+    """
+    return ProviderMetadataCache(
+        cache_dir=app.config.get('OIDC_CACHE_DIR'),
+        default_ttl=app.config.get('OIDC_CACHE_DEFAULT_TTL', 3600),
+        refresh_ahead=app.config.get('OIDC_CACHE_REFRESH_AHEAD', 300),
+        timeout=app.config.get('OIDC_FETCH_TIMEOUT', 5),
+        breaker=get_breaker('google_oidc', app)
+    )
@@ -0,0 +1,291 @@
+"""Pre-generated NFL question bank.
+
+Every NFL preview used to send the same week's schedule to the model. Once
+the schedule is loaded, `flask generate-question-bank` (or the question_bank
+job queued by the schedule loader) asks the model for a pool of questions per
+matchup for each upcoming week, keeps the ones that pass validation and
+content moderation, and stores them in the question_bank table.
+
+generate_nfl_contest and the preview routes then sample a contest from the
+bank, one question per matchup in turn with spreads and totals mixed, and
+only call the model live when a week has no bank or too small a bank.
+"""
+import json
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from app.models import NFLSchedule, QuestionBankEntry
+from app.utils.ai_generation import ContestGenerationError, validate_nfl_question
+from app.utils.content_moderation import moderate_text
+from app.utils.generation_service import GenerationRequest, get_generation_service
+from app.utils.jobs import job_handler
+
+logger = logging.getLogger(__name__)
+
+
+def build_matchup_messages(game: NFLSchedule, question_count: int) -> List[Dict]:
+    """Build the chat messages asking for a pool of questions about one game.
+
+    Args:
+        game (NFLSchedule): Scheduled game
+        question_count (int): Number of questions to generate
+
+    Returns:
+        List[Dict]: Chat completion messages
+    """
+    matchup = game.get_matchup()
+    kickoff = f" on {game.game_date.strftime('%A, %B %d')}" if game.game_date else ""
+    prompt = f"""You are a sports data assistant creating realistic NFL betting questions for {matchup}{kickoff}, Week {game.week_number} of the {game.season_year} season.
+
+Generate exactly {question_count} different yes/no questions about this game only, with the following JSON format:
+
+[
+  {{
+    "game": "{matchup}",
+    "question": "Will [specific betting question]?",
+    "line_type": "spread" or "over_under",
+    "line_value": numeric_value,
+    "team_favored": "Team Name" (only for spreads),
+    "direction": "over", "under", or "cover"
+  }}
+]
+
+Requirements:
+- Use "{matchup}" as the game for every question
+- Mix of spread and over/under questions (roughly 50/50 split) at a range of realistic lines
+- Point spreads typically range from 1-14 points, over/under totals from 38-55 points
+- Betting lines should reflect realistic team strengths
+- Questions must be clear and unambiguous
+- Return ONLY the JSON array, no additional text"""
+
+    return [
+        {"role": "system", "content": "You are a helpful assistant that generates sports betting questions in JSON format."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def filter_questions(game: NFLSchedule, questions: List[dict]) -> List[dict]:
+    """Keep the generated questions that are about the game, unique and pass moderation.
+
+    Args:
+        game (NFLSchedule): Game the questions were generated for
+        questions (List[dict]): Validated questions from the model
+
+    Returns:
+        List[dict]: Questions fit for the bank
+    """
+    kept = []
+    seen = set()
+    for question in questions:
+        teams = {team.strip() for team in question['game'].split(' vs ')}
+        if teams != {game.home_team, game.away_team}:
+            logger.warning(f"Dropping question about {question['game']} from the {game.get_matchup()} pool")
+            continue
+
+        text = question['question'].strip()
+        if text.lower() in seen:
+            continue
+
+        moderation = moderate_text(text, 'question')
+        if not moderation.is_safe:
+            logger.warning(f"Dropping question that failed moderation ({moderation.reason}): {text}")
+            continue
+
+        seen.add(text.lower())
+        kept.append(question)
+    return kept
+
+
+def get_upcoming_weeks(weeks_ahead: int, now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """Get the next weeks that still have games to play.
+
+    Args:
+        weeks_ahead (int): Number of weeks
+        now (datetime, optional): Current time, defaults to now
+
+    Returns:
+        List[Tuple[int, int]]: (season_year, week_number) pairs in order
+    """
+    now = now or datetime.utcnow()
+    return [tuple(row) for row in db.session.query(NFLSchedule.season_year, NFLSchedule.week_number).filter(
+        NFLSchedule.game_date >= now
+    ).group_by(
+        NFLSchedule.season_year, NFLSchedule.week_number
+    ).order_by(
+        NFLSchedule.season_year, NFLSchedule.week_number
+    ).limit(weeks_ahead).all()]
+
+
+def fill_week(season_year: int, week_number: int, per_matchup: Optional[int] = None,
+              replace: bool = False) -> Dict[str, Any]:
+    """Generate and store the question pools for one week.
+
+    Matchups are generated concurrently through the generation service, at
+    most AI_GENERATION_WORKERS at a time so none waits in the service's pool
+    while its deadline runs. A matchup whose generation fails, or whose
+    questions all fail the filters, is logged, reported in 'failed' and
+    keeps its old pool, so one bad response doesn't cost the rest of the week.
+
+    Args:
+        season_year (int): NFL season year
+        week_number (int): Week number
+        per_matchup (int, optional): Questions to ask for per matchup,
+            defaults to QUESTION_BANK_PER_MATCHUP
+        replace (bool): Regenerate matchups that already have questions
+
+    Returns:
+        Dict[str, Any]: Number of questions 'stored' and the matchups that
+        'failed'
+    """
+    per_matchup = per_matchup or current_app.config.get('QUESTION_BANK_PER_MATCHUP', 12)
+    games = NFLSchedule.get_games_for_week(season_year, week_number)
+
+    if not replace:
+        banked = dict(db.session.query(
+            QuestionBankEntry.game, db.func.count(QuestionBankEntry.entry_id)
+        ).filter_by(season_year=season_year, week_number=week_number).group_by(QuestionBankEntry.game).all())
+        games = [game for game in games if banked.get(game.get_matchup(), 0) < per_matchup]
+
+    if not games:
+        return {'stored': 0, 'failed': []}
+
+    requests = [GenerationRequest(
+        messages=build_matchup_messages(game, per_matchup),
+        question_count=per_matchup,
+        validate=validate_nfl_question,
+        sport='NFL',
+        season_year=season_year,
+        week_number=week_number,
+        matchup=game.get_matchup()
+    ) for game in games]
+
+    service = get_generation_service()
+
+    def generate(request):
+        try:
+            return service.generate(request, fresh=True)
+        except ContestGenerationError as e:
+            logger.error(f"Question bank generation for {request.matchup} failed: {str(e)}")
+            return []
+
+    # No more matchups at once than the service has pool threads
+    workers = min(len(requests), current_app.config.get('AI_GENERATION_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='question-bank') as pool:
+        results = list(pool.map(generate, requests))
+
+    stored = 0
+    failed = []
+    for game, questions in zip(games, results):
+        rows = [{
+            'season_year': season_year,
+            'week_number': week_number,
+            'home_team': game.home_team,
+            'away_team': game.away_team,
+            'game': game.get_matchup(),
+            'line_type': question['line_type'],
+            'question_text': question['question'][:500],
+            'question_data': json.dumps(question),
+            'created_at': datetime.utcnow()
+        } for question in filter_questions(game, questions)]
+
+        if not rows:
+            if questions:
+                logger.warning(f"No question for {game.get_matchup()} passed the bank filters")
+            failed.append(game.get_matchup())
+            continue
+
+        # The new pool replaces the matchup's old one; a failed matchup keeps its old pool
+        QuestionBankEntry.query.filter_by(
+            season_year=season_year, week_number=week_number, game=game.get_matchup()
+        ).delete()
+        db.session.execute(QuestionBankEntry.__table__.insert(), rows)
+        stored += len(rows)
+
+    db.session.commit()
+    logger.info(f"Stored {stored} bank questions for {len(games) - len(failed)} of {len(games)} matchups "
+                f"in {season_year} Week {week_number}")
+    if failed:
+        logger.warning(f"Question bank for {season_year} Week {week_number} has no new questions for: "
+                       f"{', '.join(failed)}")
+    return {'stored': stored, 'failed': failed}
+
+
+@job_handler('question_bank')
+def fill_question_bank(weeks_ahead: Optional[int] = None, per_matchup: Optional[int] = None,
+                       season_year: Optional[int] = None, week_number: Optional[int] = None,
+                       replace: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Fill the question bank for upcoming weeks, or for one given week.
+
+    Args:
+        weeks_ahead (int, optional): Upcoming weeks to fill, defaults to
+            QUESTION_BANK_WEEKS_AHEAD
+        per_matchup (int, optional): Questions to ask for per matchup
+        season_year (int, optional): Fill only this season's `week_number`
+        week_number (int, optional): Week to fill with `season_year`
+        replace (bool): Regenerate matchups that already have questions
+
+    Returns:
+        Dict[str, Dict[str, Any]]: fill_week result per "season-week"
+    """
+    if season_year and week_number:
+        weeks = [(season_year, week_number)]
+    else:
+        weeks = get_upcoming_weeks(weeks_ahead or current_app.config.get('QUESTION_BANK_WEEKS_AHEAD', 2))
+
+    return {
+        f"{season}-{week}": fill_week(season, week, per_matchup=per_matchup, replace=replace)
+        for season, week in weeks
+    }
+
+
+def sample_questions(season_year: int, week_number: int, question_count: int,
+                     rng: Optional[random.Random] = None) -> Optional[List[dict]]:
+    """Draw a contest's questions from the bank.
+
+    Questions are taken one matchup at a time in random order, alternating
+    spreads and totals where the matchup has both, so a contest covers as
+    many games as it has questions.
+
+    Args:
+        season_year (int): NFL season year
+        week_number (int): Week number
+        question_count (int): Number of questions
+        rng (random.Random, optional): Random source
+
+    Returns:
+        Optional[List[dict]]: Questions, or None if the bank for the week
+        has fewer than `question_count`
+    """
+    rng = rng or random
+    entries = QuestionBankEntry.query.filter_by(season_year=season_year, week_number=week_number).all()
+    if len(entries) < question_count:
+        return None
+
+    pools = {}
+    for entry in entries:
+        pools.setdefault(entry.game, []).append(entry)
+    for pool in pools.values():
+        rng.shuffle(pool)
+    order = list(pools)
+    rng.shuffle(order)
+
+    line_counts = {'spread': 0, 'over_under': 0}
+    questions = []
+    while len(questions) < question_count:
+        for game in order:
+            pool = pools[game]
+            if not pool or len(questions) >= question_count:
+                continue
+            wanted = 'spread' if line_counts['spread'] <= line_counts['over_under'] else 'over_under'
+            entry = next((candidate for candidate in pool if candidate.line_type == wanted), pool[0])
+            pool.remove(entry)
+            line_counts[entry.line_type] = line_counts.get(entry.line_type, 0) + 1
+            questions.append(entry.get_question())
+
+    return questions
@@ -0,0 +1,141 @@
+"""Leaderboard ranking utilities.
+
+Ranks are computed inside the database with RANK()/DENSE_RANK() window
+functions, so a leaderboard page or a single user's position can be fetched
+without loading every entry into Python.
+
+A ranking is described by score columns (ranked high to low) and optional
+tie-breaker columns. Tie-breakers are column names, ascending by default or
+descending with a leading '-'. Rows tied on every ranking column share a
+rank; their display order is settled by the stable columns.
+"""
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+
+from app import db
+
+
+RANK_METHODS = {
+    'rank': func.rank,              # 1, 2, 2, 4
+    'dense_rank': func.dense_rank   # 1, 2, 2, 3
+}
+
+
+def _order_by(columns, names: Sequence[str], descending: bool = False) -> list:
+    """Build ORDER BY clauses for named subquery columns.
+
+    Args:
+        columns: Subquery column collection
+        names (Sequence[str]): Column names, '-' prefix flips the direction
+        descending (bool): Default direction
+
+    Returns:
+        list: Ordering clauses
+
+    Raises:
+        ValueError: If a name is not a column of the subquery
+    """
+    clauses = []
+    for name in names:
+        flip = name.startswith('-')
+        column_name = name.lstrip('-')
+        if column_name not in columns:
+            raise ValueError(f"Unknown ranking column: {column_name}")
+        column = columns[column_name]
+        clauses.append(column.desc() if descending != flip else column.asc())
+    return clauses
+
+
+def ranked_subquery(scores, score_columns: Sequence[str], tie_breakers: Sequence[str] = (),
+                    stable_columns: Sequence[str] = (), method: str = 'rank', name: str = 'ranked'):
+    """Wrap a scores subquery with rank and position columns.
+
+    Args:
+        scores: Subquery with one row per ranked participant
+        score_columns (Sequence[str]): Columns ranked high to low
+        tie_breakers (Sequence[str]): Columns that split tied scores
+        stable_columns (Sequence[str]): Columns that only order rows sharing a rank
+        method (str): 'rank' or 'dense_rank'
+        name (str): Name of the returned subquery
+
+    Returns:
+        Subquery: scores columns plus 'rank' and 'position' (1-based row order)
+
+    Raises:
+        ValueError: If the method or a column name is unknown
+    """
+    if method not in RANK_METHODS:
+        raise ValueError(f"Unknown rank method: {method}")
+
+    rank_order = (_order_by(scores.c, score_columns, descending=True) +
+                  _order_by(scores.c, tie_breakers))
+    position_order = rank_order + _order_by(scores.c, stable_columns)
+
+    return select(
+        scores,
+        RANK_METHODS[method]().over(order_by=rank_order).label('rank'),
+        func.row_number().over(order_by=position_order).label('position')
+    ).subquery(name)
+
+
+def fetch_page(ranked, page: int = 1, per_page: int = 25) -> list:
+    """Fetch one page of a ranked subquery.
+
+    Args:
+        ranked: Subquery from ranked_subquery
+        page (int): 1-based page number
+        per_page (int): Rows per page
+
+    Returns:
+        list: Result rows ordered by position
+    """
+    page = max(page, 1)
+    return db.session.execute(
+        select(ranked).order_by(ranked.c.position).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+
+
+def fetch_user_row(ranked, user_id: int):
+    """Fetch a single user's row from a ranked subquery.
+
+    Ranks are computed over the whole field before the filter is applied.
+
+    Args:
+        ranked: Subquery from ranked_subquery with a user_id column
+        user_id (int): User ID
+
+    Returns:
+        Row or None: The user's best-placed row, if any
+    """
+    return db.session.execute(
+        select(ranked).where(ranked.c.user_id == user_id).order_by(ranked.c.position).limit(1)
+    ).first()
+
+
+def assign_ranks(rows: List[dict], key: Callable[[dict], tuple], method: str = 'rank') -> List[dict]:
+    """Set 'rank' on rows that are already sorted best first.
+
+    Used by leaderboards that are built in memory, so tied rows share a rank
+    the same way the SQL ranking does.
+
+    Args:
+        rows (List[dict]): Sorted leaderboard rows
+        key (Callable): Returns the ranking values for a row
+        method (str): 'rank' or 'dense_rank'
+
+    Returns:
+        List[dict]: The same rows, updated in place
+    """
+    if method not in RANK_METHODS:
+        raise ValueError(f"Unknown rank method: {method}")
+
+    previous: Optional[tuple] = None
+    rank = 0
+    for position, row in enumerate(rows, 1):
+        value = key(row)
+        if value != previous:
+            rank = position if method == 'rank' else rank + 1
+            previous = value
+        row['rank'] = rank
+    return rows
@@ -1,9 +1,22 @@
 """Reputation and trust system utilities."""
+import logging
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, func
 from app import db
 from app.models import User, Contest, League, ContestEntry, LeagueMembership
-from app.models import UserReputation, UserVerification
+from app.models import ReputationHistory, UserReputation, UserVerification, UserWarning
+
+logger = logging.getLogger(__name__)
+
+# Columns the bulk recompute derives from other tables
+RECOMPUTED_FIELDS = (
+    'contests_created', 'contests_participated', 'leagues_created', 'leagues_joined',
+    'contest_wins', 'top_3_finishes', 'total_contest_points', 'average_accuracy',
+    'warnings_received', 'is_verified', 'verification_level', 'verified_at',
+    'reputation_score', 'trust_level'
+)
 
 
 class ReputationCalculator:
@@ -70,3 +83,145 @@ class ReputationCalculator:
         reputation = UserReputation.get_or_create(user_id)
         reputation.refresh_metrics()
         return reputation
+    
+    @classmethod
+    def _count_by_user(cls, user_column, *criteria) -> Dict[int, int]:
+        """Count rows per user with one GROUP BY query.
+        
+        Args:
+            user_column: Column holding the user ID
+            *criteria: Extra filter conditions
+            
+        Returns:
+            Dict[int, int]: Row count by user ID
+        """
+        return dict(db.session.query(user_column, func.count()).filter(*criteria).group_by(user_column).all())
+    
+    @classmethod
+    def _gather_metrics(cls, now: datetime) -> Tuple[dict, dict, dict]:
+        """Read every user's activity, performance and verification in a few queries.
+        
+        Args:
+            now (datetime): Time verifications are checked against
+            
+        Returns:
+            Tuple[dict, dict, dict]: Activity counts by field, performance
+            rows by user ID, and the latest approved verification by user ID
+        """
+        activity = {
+            'contests_created': cls._count_by_user(Contest.created_by_user),
+            'contests_participated': cls._count_by_user(ContestEntry.user_id),
+            'leagues_created': cls._count_by_user(League.created_by_user),
+            'leagues_joined': cls._count_by_user(LeagueMembership.user_id),
+            'warnings_received': cls._count_by_user(UserWarning.user_id, UserWarning.is_active.is_(True))
+        }
+        
+        performance = {row.user_id: row for row in db.session.query(
+            ContestEntry.user_id,
+            func.sum(case((ContestEntry.final_rank == 1, 1), else_=0)).label('wins'),
+            func.sum(case((ContestEntry.final_rank <= 3, 1), else_=0)).label('top_3'),
+            func.coalesce(func.sum(ContestEntry.final_score), 0).label('points'),
+            func.avg(ContestEntry.final_accuracy).label('accuracy')
+        ).filter(
+            ContestEntry.final_rank.isnot(None)
+        ).group_by(ContestEntry.user_id).all()}
+        
+        # Like update_verification_status, only the latest approval counts
+        latest_verifications = {}
+        for verification in db.session.query(
+            UserVerification.user_id,
+            UserVerification.verification_level,
+            UserVerification.approved_at,
+            UserVerification.expires_at
+        ).filter(UserVerification.status == 'approved').all():
+            latest = latest_verifications.get(verification.user_id)
+            if latest is None or (verification.approved_at or datetime.min) >= (latest.approved_at or datetime.min):
+                latest_verifications[verification.user_id] = verification
+        
+        return activity, performance, latest_verifications
+    
+    @classmethod
+    def recompute_all(cls, reason: str = 'recompute', batch_size: int = 1000) -> Dict[str, int]:
+        """Recompute every user's reputation in bulk.
+        
+        Metrics are gathered with one GROUP BY query per source table instead
+        of refresh_metrics' queries and commit per user. Scores and trust
+        levels are computed in memory with the model's own rules, and only
+        records that changed are written back, in batched bulk UPDATEs.
+        ReputationHistory rows are added for users whose score changed.
+        Users without a reputation record get a default one first, so every
+        user is recomputed.
+        
+        Args:
+            reason (str): Change reason recorded in reputation history
+            batch_size (int): Records per UPDATE batch
+            
+        Returns:
+            Dict[str, int]: Counts of records created, checked, updated and
+            with a changed score
+        """
+        now = datetime.utcnow()
+        activity, performance, latest_verifications = cls._gather_metrics(now)
+        
+        missing = [{'user_id': user_id, 'created_at': now, 'updated_at': now} for user_id in db.session.scalars(
+            db.select(User.user_id).where(~db.exists().where(UserReputation.user_id == User.user_id))
+        )]
+        for start in range(0, len(missing), batch_size):
+            db.session.execute(UserReputation.__table__.insert(), missing[start:start + batch_size])
+        
+        updates = []
+        history = []
+        checked = 0
+        for row in db.session.execute(db.select(UserReputation.__table__)).mappings():
+            checked += 1
+            user_id = row['user_id']
+            reputation = SimpleNamespace(**row)
+            
+            for field, counts in activity.items():
+                setattr(reputation, field, counts.get(user_id, 0))
+            
+            stats = performance.get(user_id)
+            reputation.contest_wins = stats.wins if stats else 0
+            reputation.top_3_finishes = stats.top_3 if stats else 0
+            reputation.total_contest_points = stats.points if stats else 0
+            reputation.average_accuracy = round(stats.accuracy or 0.0, 1) if stats else 0.0
+            
+            verification = latest_verifications.get(user_id)
+            if verification and not (verification.expires_at and now > verification.expires_at):
+                reputation.is_verified = True
+                reputation.verification_level = verification.verification_level
+                reputation.verified_at = verification.approved_at
+            else:
+                reputation.is_verified = False
+                reputation.verification_level = None
+                reputation.verified_at = None
+            
+            reputation.reputation_score = UserReputation.calculate_reputation_score(reputation)
+            UserReputation.update_trust_level(reputation)
+            
+            values = {field: getattr(reputation, field) for field in RECOMPUTED_FIELDS}
+            if all(values[field] == row[field] for field in RECOMPUTED_FIELDS):
+                continue
+            
+            # Every changed row sets the same columns, so each batch is one executemany
+            updates.append(dict(values, reputation_id=row['reputation_id'], updated_at=now))
+            if values['reputation_score'] != row['reputation_score']:
+                history.append({
+                    'user_id': user_id,
+                    'old_score': row['reputation_score'],
+                    'new_score': reputation.reputation_score,
+                    'change_reason': reason,
+                    'change_details': None,
+                    'created_at': now
+                })
+        
+        for start in range(0, len(updates), batch_size):
+            db.session.bulk_update_mappings(UserReputation, updates[start:start + batch_size])
+        for start in range(0, len(history), batch_size):
+            db.session.execute(ReputationHistory.__table__.insert(), history[start:start + batch_size])
+        db.session.commit()
+        
+        result = {'created': len(missing), 'checked': checked, 'updated': len(updates),
+                  'score_changed': len(history)}
+        logger.info(f"Recomputed reputations: {result}")
+        return result
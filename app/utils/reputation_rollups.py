@@ -0,0 +1,220 @@
+"""Retention and rollups for reputation history.
+
+ReputationHistory gets a row for every score change and was never compacted,
+so a reputation chart meant scanning all of a user's history. The rollup job
+(`flask rollup-reputation-history`) keeps raw rows for
+REPUTATION_HISTORY_RETENTION_DAYS days and folds anything older into
+per-user daily and weekly rows holding the period's min, max and closing
+score.
+
+The job works oldest-first in batches of REPUTATION_ROLLUP_BATCH_SIZE rows.
+Each batch is merged into the rollups, deleted and committed on its own, so
+the history table is never locked for long and an interrupted run loses
+nothing. Because batches go in time order, a batch's last score is always
+the latest close for its periods.
+
+get_score_series serves charts from the rollups plus the recent raw rows.
+"""
+import logging
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from app.models import ReputationHistory, ReputationRollup
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week')
+
+
+def period_start(period: str, at: datetime) -> datetime:
+    """Get the start of the day or week containing a time.
+
+    Args:
+        period (str): 'day' or 'week'
+        at (datetime): Time in UTC
+
+    Returns:
+        datetime: Midnight of the day, or of the week's Monday
+    """
+    start = datetime.combine(at.date(), time.min)
+    if period == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _fold(aggregates: Dict[tuple, dict], key: tuple, score: int, count: int = 1,
+          low: Optional[int] = None, high: Optional[int] = None) -> None:
+    """Fold a score (or an older aggregate) into the aggregate for a period."""
+    low = score if low is None else low
+    high = score if high is None else high
+    aggregate = aggregates.get(key)
+    if aggregate is None:
+        aggregates[key] = {'min': low, 'max': high, 'close': score, 'count': count}
+    else:
+        aggregate['min'] = min(aggregate['min'], low)
+        aggregate['max'] = max(aggregate['max'], high)
+        aggregate['close'] = score
+        aggregate['count'] += count
+
+
+def _merge_batch(rows: List[tuple]) -> int:
+    """Merge a batch of history rows into the rollups, without committing.
+
+    Args:
+        rows (List[tuple]): (history_id, user_id, new_score, created_at) in
+            time order
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    folded = {}
+    for _, user_id, score, created_at in rows:
+        for period in PERIODS:
+            _fold(folded, (user_id, period, period_start(period, created_at)), score)
+
+    user_ids = {key[0] for key in folded}
+    earliest = min(key[2] for key in folded)
+    existing = {
+        (rollup.user_id, rollup.period, rollup.period_start): rollup
+        for rollup in ReputationRollup.query.filter(
+            ReputationRollup.user_id.in_(user_ids),
+            ReputationRollup.period_start >= earliest
+        ).all()
+    }
+
+    updates, inserts = [], []
+    for key, aggregate in folded.items():
+        user_id, period, start = key
+        rollup = existing.get(key)
+        if rollup is None:
+            inserts.append({
+                'user_id': user_id,
+                'period': period,
+                'period_start': start,
+                'min_score': aggregate['min'],
+                'max_score': aggregate['max'],
+                'close_score': aggregate['close'],
+                'change_count': aggregate['count']
+            })
+        else:
+            # The stored rollup is older than anything in this batch
+            merged = {}
+            _fold(merged, key, rollup.close_score, rollup.change_count, rollup.min_score, rollup.max_score)
+            _fold(merged, key, aggregate['close'], aggregate['count'], aggregate['min'], aggregate['max'])
+            updates.append({
+                'rollup_id': rollup.rollup_id,
+                'min_score': merged[key]['min'],
+                'max_score': merged[key]['max'],
+                'close_score': merged[key]['close'],
+                'change_count': merged[key]['count']
+            })
+
+    if updates:
+        db.session.bulk_update_mappings(ReputationRollup, updates)
+    if inserts:
+        db.session.execute(ReputationRollup.__table__.insert(), inserts)
+    return len(updates) + len(inserts)
+
+
+def rollup_history(retention_days: Optional[int] = None, batch_size: Optional[int] = None,
+                   max_batches: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Fold history older than the retention period into rollups and delete it.
+
+    Args:
+        retention_days (int, optional): Days of raw history to keep,
+            defaults to REPUTATION_HISTORY_RETENTION_DAYS
+        batch_size (int, optional): History rows per transaction, defaults
+            to REPUTATION_ROLLUP_BATCH_SIZE
+        max_batches (int, optional): Stop after this many batches
+        now (datetime, optional): Current time, defaults to now
+
+    Returns:
+        Dict[str, int]: Counts of history rows folded, rollup rows written
+        and batches run
+    """
+    retention_days = retention_days or current_app.config.get('REPUTATION_HISTORY_RETENTION_DAYS', 90)
+    batch_size = batch_size or current_app.config.get('REPUTATION_ROLLUP_BATCH_SIZE', 5000)
+    # Cut at midnight so a day is never split between raw rows and its rollup
+    cutoff = period_start('day', (now or datetime.utcnow()) - timedelta(days=retention_days))
+
+    result = {'folded': 0, 'rollups_written': 0, 'batches': 0}
+    while max_batches is None or result['batches'] < max_batches:
+        rows = db.session.query(
+            ReputationHistory.history_id,
+            ReputationHistory.user_id,
+            ReputationHistory.new_score,
+            ReputationHistory.created_at
+        ).filter(
+            ReputationHistory.created_at < cutoff
+        ).order_by(
+            ReputationHistory.created_at, ReputationHistory.history_id
+        ).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        try:
+            result['rollups_written'] += _merge_batch(rows)
+            ReputationHistory.query.filter(
+                ReputationHistory.history_id.in_([row[0] for row in rows])
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        result['folded'] += len(rows)
+        result['batches'] += 1
+
+    logger.info(f"Rolled up reputation history older than {cutoff:%Y-%m-%d}: {result}")
+    return result
+
+
+def get_score_series(user_id: int, period: str = 'day', since: Optional[datetime] = None) -> List[dict]:
+    """Get a user's reputation score per day or week for a chart.
+
+    Older periods come from the rollups and recent ones from the raw history,
+    summarized the same way.
+
+    Args:
+        user_id (int): User ID
+        period (str): 'day' or 'week'
+        since (datetime, optional): Earliest time to include
+
+    Returns:
+        List[dict]: Points with 'period_start', 'min', 'max', 'close' and
+        'changes', oldest first
+
+    Raises:
+        ValueError: If the period is not 'day' or 'week'
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+
+    points: Dict[Tuple, dict] = {}
+
+    rollups = ReputationRollup.query.filter_by(user_id=user_id, period=period)
+    if since is not None:
+        rollups = rollups.filter(ReputationRollup.period_start >= period_start(period, since))
+    for rollup in rollups.order_by(ReputationRollup.period_start).all():
+        _fold(points, (user_id, period, rollup.period_start), rollup.close_score,
+              rollup.change_count, rollup.min_score, rollup.max_score)
+
+    history = db.session.query(ReputationHistory.new_score, ReputationHistory.created_at).filter(
+        ReputationHistory.user_id == user_id
+    )
+    if since is not None:
+        history = history.filter(ReputationHistory.created_at >= since)
+    for score, created_at in history.order_by(ReputationHistory.created_at, ReputationHistory.history_id).all():
+        _fold(points, (user_id, period, period_start(period, created_at)), score)
+
+    return [{
+        'period_start': key[2].isoformat(),
+        'min': point['min'],
+        'max': point['max'],
+        'close': point['close'],
+        'changes': point['count']
+    } for key, point in sorted(points.items(), key=lambda item: item[0][2])]
@@ -0,0 +1,193 @@
+"""Vectorized scoring for contests with very large numbers of entries.
+
+A contest's answers are loaded into an entries x questions matrix where each
+cell is 1 (Yes), 0 (No) or -1 (not answered). The answer key is a vector in
+the same encoding, so correct counts, percentages and ranks for every entry
+fall out of a handful of array operations.
+
+NumPy is used when installed; otherwise the same results are produced with
+plain Python lists.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MISSING = -1
+
+# (entry_id, question_id, user_answer) as returned by an outer join of
+# contest_entries to entry_answers; question_id/user_answer are None for
+# entries without any saved answers
+AnswerRow = Tuple[int, Optional[int], Optional[bool]]
+
+
+def _encode(answer: Optional[bool]) -> int:
+    """Encode an answer as 1 (Yes), 0 (No) or -1 (missing)."""
+    if answer is None:
+        return MISSING
+    return 1 if answer else 0
+
+
+def answer_key_vector(question_ids: Sequence[int], correct_answers: Dict[int, Optional[bool]]) -> List[int]:
+    """Build the answer key vector for a contest.
+
+    Args:
+        question_ids (Sequence[int]): Question IDs in contest question order
+        correct_answers (Dict[int, Optional[bool]]): question_id -> correct answer
+
+    Returns:
+        List[int]: Encoded answer key, -1 for questions without an answer
+    """
+    return [_encode(correct_answers.get(question_id)) for question_id in question_ids]
+
+
+class AnswerMatrix:
+    """Entries x questions matrix of encoded answers."""
+
+    def __init__(self, entry_ids, values, use_numpy: bool):
+        """Initialize the matrix.
+
+        Args:
+            entry_ids: Entry IDs, one per row, in ascending order
+            values: int8 ndarray or list of row lists
+            use_numpy (bool): Whether values is a NumPy array
+        """
+        self.entry_ids = entry_ids
+        self.values = values
+        self.use_numpy = use_numpy
+
+    def __len__(self) -> int:
+        return len(self.entry_ids)
+
+
+def build_answer_matrix(rows: Iterable[AnswerRow], question_ids: Sequence[int],
+                        use_numpy: Optional[bool] = None) -> AnswerMatrix:
+    """Build an answer matrix from (entry_id, question_id, user_answer) rows.
+
+    Args:
+        rows (Iterable[AnswerRow]): Answer rows for a single contest
+        question_ids (Sequence[int]): Question IDs in contest question order
+        use_numpy (bool, optional): Force NumPy on/off, defaults to NUMPY_AVAILABLE
+
+    Returns:
+        AnswerMatrix: Matrix with one row per entry, ordered by entry_id
+    """
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    column_for = {question_id: i for i, question_id in enumerate(question_ids)}
+    rows = list(rows)
+
+    if use_numpy:
+        count = len(rows)
+        entries = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        columns = np.fromiter((column_for.get(row[1], MISSING) for row in rows), dtype=np.int64, count=count)
+        answers = np.fromiter((_encode(row[2]) for row in rows), dtype=np.int8, count=count)
+
+        entry_ids, row_index = np.unique(entries, return_inverse=True)
+        values = np.full((len(entry_ids), len(question_ids)), MISSING, dtype=np.int8)
+        known = columns >= 0
+        values[row_index[known], columns[known]] = answers[known]
+        return AnswerMatrix(entry_ids, values, use_numpy=True)
+
+    by_entry = {}
+    for entry_id, question_id, user_answer in rows:
+        row = by_entry.get(entry_id)
+        if row is None:
+            row = by_entry[entry_id] = [MISSING] * len(question_ids)
+        column = column_for.get(question_id)
+        if column is not None:
+            row[column] = _encode(user_answer)
+
+    entry_ids = sorted(by_entry)
+    return AnswerMatrix(entry_ids, [by_entry[entry_id] for entry_id in entry_ids], use_numpy=False)
+
+
+def score_answer_matrix(matrix: AnswerMatrix, answer_key: Sequence[int]) -> List[dict]:
+    """Score every entry in the matrix against the answer key.
+
+    Ranks use competition ranking (1, 2, 2, 4) on correct answers, and
+    results are ordered by rank then entry_id.
+
+    Args:
+        matrix (AnswerMatrix): Contest answer matrix
+        answer_key (Sequence[int]): Encoded answer key vector
+
+    Returns:
+        List[dict]: entry_id, correct_answers, total_questions,
+        answered_questions, percentage and rank for each entry
+    """
+    total_questions = len(answer_key)
+    answered_questions = sum(1 for value in answer_key if value != MISSING)
+
+    if matrix.use_numpy:
+        key = np.asarray(answer_key, dtype=np.int8)
+        if len(matrix):
+            correct = ((matrix.values == key) & (key != MISSING)).sum(axis=1)
+        else:
+            correct = np.zeros(0, dtype=np.int64)
+
+        # Rank = 1 + number of entries with strictly more correct answers
+        ranks = np.searchsorted(np.sort(-correct), -correct, side='left') + 1
+        order = np.lexsort((matrix.entry_ids, -correct))
+        if answered_questions:
+            percentages = np.round(correct * 100.0 / answered_questions, 1)
+        else:
+            percentages = np.zeros(len(correct))
+
+        entry_ids = matrix.entry_ids[order].tolist()
+        correct_list = correct[order].tolist()
+        rank_list = ranks[order].tolist()
+        percentage_list = percentages[order].tolist()
+    else:
+        key_columns = [(i, value) for i, value in enumerate(answer_key) if value != MISSING]
+        scored = sorted(
+            ((sum(1 for i, value in key_columns if row[i] == value), entry_id)
+             for entry_id, row in zip(matrix.entry_ids, matrix.values)),
+            key=lambda item: (-item[0], item[1])
+        )
+
+        entry_ids, correct_list, rank_list, percentage_list = [], [], [], []
+        previous = None
+        for position, (correct, entry_id) in enumerate(scored, start=1):
+            if correct != previous:
+                rank = position
+                previous = correct
+            entry_ids.append(entry_id)
+            correct_list.append(correct)
+            rank_list.append(rank)
+            percentage_list.append(round(correct / answered_questions * 100, 1) if answered_questions else 0)
+
+    return [
+        {
+            'entry_id': int(entry_id),
+            'correct_answers': int(correct),
+            'total_questions': total_questions,
+            'answered_questions': answered_questions,
+            'percentage': percentage,
+            'rank': int(rank)
+        }
+        for entry_id, correct, rank, percentage
+        in zip(entry_ids, correct_list, rank_list, percentage_list)
+    ]
+
+
+def score_contest_rows(rows: Iterable[AnswerRow], question_ids: Sequence[int],
+                       correct_answers: Dict[int, Optional[bool]],
+                       use_numpy: Optional[bool] = None) -> List[dict]:
+    """Build the answer matrix for a contest and score it.
+
+    Args:
+        rows (Iterable[AnswerRow]): Answer rows for a single contest
+        question_ids (Sequence[int]): Question IDs in contest question order
+        correct_answers (Dict[int, Optional[bool]]): question_id -> correct answer
+        use_numpy (bool, optional): Force NumPy on/off, defaults to NUMPY_AVAILABLE
+
+    Returns:
+        List[dict]: Scored entries ordered by rank (see score_answer_matrix)
+    """
+    matrix = build_answer_matrix(rows, question_ids, use_numpy=use_numpy)
+    return score_answer_matrix(matrix, answer_key_vector(question_ids, correct_answers))
@@ -0,0 +1,142 @@
+"""Cache of each user's effective verification level.
+
+VerificationChecker used to load a user's approved verifications and check
+them in Python on every entry page and submit. VerificationCache keeps the
+result per user:
+
+    level     the highest level among the user's active approved
+              verifications, or None
+    expiry    an entry is dropped at the earliest expires_at among those
+              verifications (the level may drop then), and after `ttl`
+              seconds at most, which bounds how stale another worker's
+              copy can be
+    changes   UserVerification.approve, reject and revoke invalidate the
+              user's entry in this process
+
+Lookups for many users load every missing user in one query.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from flask import current_app
+
+from app.models import UserVerification
+
+# Level hierarchy, lowest first
+LEVEL_RANKS = {'basic': 1, 'enhanced': 2, 'premium': 3}
+
+
+class VerificationCache:
+    """Per-process map of user ID to effective verification level."""
+
+    def __init__(self, ttl: float = 300, max_size: int = 10000):
+        """Initialize the cache.
+
+        Args:
+            ttl (float): Longest time in seconds an entry is kept
+            max_size (int): Entries kept before the least recently used go
+        """
+        self.ttl = timedelta(seconds=ttl)
+        self.max_size = max_size
+
+        self._entries = OrderedDict()  # user_id -> (level, valid_until)
+        self._lock = threading.Lock()
+
+    def _load(self, user_ids: Iterable[int], now: datetime) -> Dict[int, tuple]:
+        """Read the effective level of users from their verifications."""
+        user_ids = list(user_ids)
+        entries = {user_id: (None, now + self.ttl) for user_id in user_ids}
+
+        verifications = UserVerification.query.with_entities(
+            UserVerification.user_id,
+            UserVerification.verification_level,
+            UserVerification.expires_at
+        ).filter(
+            UserVerification.user_id.in_(user_ids),
+            UserVerification.status == 'approved',
+            (UserVerification.expires_at.is_(None)) | (UserVerification.expires_at > now)
+        ).all()
+
+        for user_id, level, expires_at in verifications:
+            current_level, valid_until = entries[user_id]
+            if LEVEL_RANKS.get(level, 0) > LEVEL_RANKS.get(current_level, 0):
+                current_level = level
+            if expires_at is not None:
+                valid_until = min(valid_until, expires_at)
+            entries[user_id] = (current_level, valid_until)
+
+        return entries
+
+    def get_levels(self, user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """Get the effective verification level of several users.
+
+        Args:
+            user_ids (Iterable[int]): User IDs
+
+        Returns:
+            Dict[int, Optional[str]]: Highest active level by user ID, None
+            for unverified users
+        """
+        now = datetime.utcnow()
+        levels = {}
+        missing = []
+        with self._lock:
+            for user_id in set(user_ids):
+                entry = self._entries.get(user_id)
+                if entry is not None and now < entry[1]:
+                    self._entries.move_to_end(user_id)
+                    levels[user_id] = entry[0]
+                else:
+                    missing.append(user_id)
+
+        if missing:
+            loaded = self._load(missing, now)
+            with self._lock:
+                for user_id, entry in loaded.items():
+                    self._entries[user_id] = entry
+                    self._entries.move_to_end(user_id)
+                    levels[user_id] = entry[0]
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        return levels
+
+    def get_level(self, user_id: int) -> Optional[str]:
+        """Get a user's effective verification level.
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            Optional[str]: Highest active level, or None if unverified
+        """
+        return self.get_levels([user_id])[user_id]
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget a user's level, or every user's.
+
+        Args:
+            user_id (int, optional): User whose verifications changed
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+def get_verification_cache() -> VerificationCache:
+    """Get the current app's verification cache, creating it on first use.
+
+    Returns:
+        VerificationCache: The app's cache
+    """
+    cache = current_app.extensions.get('verification_cache')
+    if cache is None:
+        cache = current_app.extensions['verification_cache'] = VerificationCache(
+            ttl=current_app.config.get('VERIFICATION_CACHE_TTL', 300),
+            max_size=current_app.config.get('VERIFICATION_CACHE_SIZE', 10000)
+        )
+    return cache
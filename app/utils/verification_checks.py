@@ -1,7 +1,10 @@
 """Verification requirement checking utilities."""
+from typing import Optional
 from flask import current_app
 from app.models import UserVerification
+from app.utils.decorators import get_current_user, get_current_verification_info
 from app.utils.reputation import ReputationCalculator
+from app.utils.verification_cache import get_verification_cache
 
 
 class VerificationChecker:
@@ -21,15 +24,14 @@ class VerificationChecker:
         if not current_app.config.get('REQUIRE_VERIFICATION_FOR_CONTESTS', False):
             return True, ""
         
-        # Get user's verification info
-        verification_info = ReputationCalculator.get_user_verification_info(user_id)
+        # Get user's verification level
+        user_level = VerificationChecker._verification_level(user_id)
         
-        if not verification_info['is_verified']:
+        if not user_level:
             return False, "Contest creation requires user verification. Please request verification from an administrator."
         
         # Check minimum verification level
         min_level = current_app.config.get('MINIMUM_VERIFICATION_LEVEL_CONTESTS', 'basic')
-        user_level = verification_info['highest_level']
         
         if not VerificationChecker._meets_minimum_level(user_level, min_level):
             return False, f"Contest creation requires {min_level} level verification or higher. Your current level is {user_level}."
@@ -50,15 +52,14 @@ class VerificationChecker:
         if not current_app.config.get('REQUIRE_VERIFICATION_FOR_LEAGUES', False):
             return True, ""
         
-        # Get user's verification info
-        verification_info = ReputationCalculator.get_user_verification_info(user_id)
+        # Get user's verification level
+        user_level = VerificationChecker._verification_level(user_id)
         
-        if not verification_info['is_verified']:
+        if not user_level:
             return False, "League creation requires user verification. Please request verification from an administrator."
         
         # Check minimum verification level
         min_level = current_app.config.get('MINIMUM_VERIFICATION_LEVEL_LEAGUES', 'basic')
-        user_level = verification_info['highest_level']
         
         if not VerificationChecker._meets_minimum_level(user_level, min_level):
             return False, f"League creation requires {min_level} level verification or higher. Your current level is {user_level}."
@@ -78,8 +79,7 @@ class VerificationChecker:
         """
         # Participation is always allowed unless explicitly disabled
         if not current_app.config.get('ALLOW_UNVERIFIED_PARTICIPATION', True):
-            verification_info = ReputationCalculator.get_user_verification_info(user_id)
-            if not verification_info['is_verified']:
+            if not VerificationChecker._verification_level(user_id):
                 return False, "Contest participation requires user verification."
         
         # Check for duplicate entry if contest_id provided
@@ -108,8 +108,7 @@ class VerificationChecker:
         """
         # Participation is always allowed unless explicitly disabled
         if not current_app.config.get('ALLOW_UNVERIFIED_PARTICIPATION', True):
-            verification_info = ReputationCalculator.get_user_verification_info(user_id)
-            if not verification_info['is_verified']:
+            if not VerificationChecker._verification_level(user_id):
                 return False, "League participation requires user verification."
         
         # Check for duplicate membership if league_id provided
@@ -125,6 +124,33 @@ class VerificationChecker:
         
         return True, ""
     
+    @staticmethod
+    def _verification_level(user_id: int) -> Optional[str]:
+        """Get a user's effective verification level from the verification cache.
+        
+        Args:
+            user_id (int): User ID
+            
+        Returns:
+            Optional[str]: Highest active level, or None if unverified
+        """
+        return get_verification_cache().get_level(user_id)
+    
+    @staticmethod
+    def _verification_info(user_id: int) -> dict:
+        """Get verification info, reusing the request's copy for the current user.
+        
+        Args:
+            user_id (int): User ID
+            
+        Returns:
+            dict: Verification information
+        """
+        current_user = get_current_user()
+        if current_user is not None and current_user.user_id == user_id:
+            return get_current_verification_info()
+        return ReputationCalculator.get_user_verification_info(user_id)
+    
     @staticmethod
     def _meets_minimum_level(user_level: str, required_level: str) -> bool:
         """Check if user's verification level meets the minimum requirement.
@@ -175,7 +201,7 @@ class VerificationChecker:
         Returns:
             dict: User's verification status and permissions
         """
-        verification_info = ReputationCalculator.get_user_verification_info(user_id)
+        verification_info = VerificationChecker._verification_info(user_id)
         requirements = VerificationChecker.get_verification_requirements_info()
         
         can_create_contest, contest_reason = VerificationChecker.can_create_contest(user_id)
@@ -37,10 +37,23 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', '10'))  # SMTP socket timeout in seconds
     
     # SendGrid API configuration
     SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
     USE_SENDGRID_API = os.environ.get('USE_SENDGRID_API', 'false').lower() in ['true', 'on', '1']
+    SENDGRID_API_URL = 'https://api.sendgrid.com/v3/mail/send'
+    SENDGRID_TIMEOUT = 10  # seconds
+    
+    # Bulk email dispatch
+    EMAIL_DISPATCH_WORKERS = int(os.environ.get('EMAIL_DISPATCH_WORKERS', '8'))  # Threads, and pooled connections, per worker
+    EMAIL_RATE_LIMIT = float(os.environ.get('EMAIL_RATE_LIMIT', '50'))  # Messages per second, 0 for no limit
+    AUDIT_FLUSH_EVERY = int(os.environ.get('AUDIT_FLUSH_EVERY', '100'))  # Buffered EmailLog/ContestInvitation rows per bulk insert
+    
+    # Email outbox relay (run with `flask relay-outbox`)
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '100'))  # Emails claimed per relay batch
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '1'))
+    OUTBOX_CLAIM_TIMEOUT = int(os.environ.get('OUTBOX_CLAIM_TIMEOUT', '300'))  # Reclaim rows from a dead relay after this
     
     # Token expiration
     LOGIN_TOKEN_EXPIRATION = timedelta(minutes=30)
@@ -48,15 +61,96 @@ class Config:
     # Pagination
     CONTESTS_PER_PAGE = 10
     ENTRIES_PER_PAGE = 20
+    LEADERBOARD_PER_PAGE = 25
+    
+    # Run contest finalization (scores, ranks, standings, results emails) as a background job
+    FINALIZATION_ASYNC = os.environ.get('FINALIZATION_ASYNC', 'true').lower() in ['true', 'on', '1']
+    FINALIZATION_LEASE_SECONDS = int(os.environ.get('FINALIZATION_LEASE_SECONDS', '600'))  # Reclaim runs left by dead processes after this
+    
+    # Background job queue (run with `flask worker`)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+    JOB_BACKOFF_SECONDS = int(os.environ.get('JOB_BACKOFF_SECONDS', '30'))  # Doubles after each failed attempt
+    JOB_BACKOFF_MAX_SECONDS = int(os.environ.get('JOB_BACKOFF_MAX_SECONDS', '3600'))
+    JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', '600'))  # Reclaim running jobs from dead workers after this
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '5'))
+    
+    # Leaderboards for contests with at least this many entries are scored with the answer matrix engine
+    MATRIX_SCORING_MIN_ENTRIES = int(os.environ.get('MATRIX_SCORING_MIN_ENTRIES', '1000'))
     
     # Google OAuth configuration
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
     GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+    OIDC_CACHE_DIR = os.environ.get('OIDC_CACHE_DIR')  # Shared by workers on one machine; private to the app's user, defaults to one under the temp dir
+    OIDC_CACHE_DEFAULT_TTL = int(os.environ.get('OIDC_CACHE_DEFAULT_TTL', '3600'))  # Used when the response has no max-age
+    OIDC_CACHE_REFRESH_AHEAD = int(os.environ.get('OIDC_CACHE_REFRESH_AHEAD', '300'))
+    OIDC_FETCH_TIMEOUT = float(os.environ.get('OIDC_FETCH_TIMEOUT', '5'))
     
     # OpenAI configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     
+    # Contest question generation (see app/utils/generation_service.py)
+    AI_GENERATION_BACKEND = os.environ.get('AI_GENERATION_BACKEND', 'openai')  # 'fake' serves canned questions for tests and load runs
+    AI_GENERATION_MODEL = os.environ.get('AI_GENERATION_MODEL', 'gpt-3.5-turbo')
+    AI_GENERATION_TIMEOUT = float(os.environ.get('AI_GENERATION_TIMEOUT', '45'))  # Keep below gunicorn's --timeout (Procfile, Dockerfile)
+    AI_GENERATION_WORKERS = int(os.environ.get('AI_GENERATION_WORKERS', '4'))
+    AI_GENERATION_CACHE_TTL = int(os.environ.get('AI_GENERATION_CACHE_TTL', '3600'))
+    AI_GENERATION_CACHE_SIZE = int(os.environ.get('AI_GENERATION_CACHE_SIZE', '256'))
+    AI_GENERATION_FAKE_DELAY = float(os.environ.get('AI_GENERATION_FAKE_DELAY', '0'))  # Seconds per question from the fake backend
+    
+    # Pre-generated NFL question bank (filled by `flask generate-question-bank`)
+    QUESTION_BANK_ENABLED = os.environ.get('QUESTION_BANK_ENABLED', 'true').lower() in ['true', 'on', '1']
+    QUESTION_BANK_PER_MATCHUP = int(os.environ.get('QUESTION_BANK_PER_MATCHUP', '12'))
+    QUESTION_BANK_WEEKS_AHEAD = int(os.environ.get('QUESTION_BANK_WEEKS_AHEAD', '2'))
+    
+    # Application cache (see app/utils/cache.py and app/utils/cache_backends.py)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # 'memory', 'disk' (shared by workers on one machine), 'redis' or 'fake'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_REDIS_TIMEOUT = float(os.environ.get('CACHE_REDIS_TIMEOUT', '0.25'))
+    CACHE_DIR = os.environ.get('CACHE_DIR')  # Disk backend; private to the app's user, defaults to one under the temp dir
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'overunders:')
+    CACHE_TAG_TTL = int(os.environ.get('CACHE_TAG_TTL', '86400'))  # Longest time a tag version is kept
+    CACHE_LOCK_TIMEOUT = float(os.environ.get('CACHE_LOCK_TIMEOUT', '10'))  # Longest time one worker recomputes a value
+    CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', '2'))  # Seconds other workers wait for it
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', '60'))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '5000'))
+    HOME_CACHE_TTL = int(os.environ.get('HOME_CACHE_TTL', '30'))  # Home page lists (see app/utils/home.py)
+    HOME_TOTALS_CACHE_TTL = int(os.environ.get('HOME_TOTALS_CACHE_TTL', '60'))
+    
+    # Conditional HTTP caching of contest and league pages (see app/utils/http_cache.py)
+    HTTP_CACHE_PUBLIC_MAX_AGE = int(os.environ.get('HTTP_CACHE_PUBLIC_MAX_AGE', '60'))  # Proxy lifetime of anonymous pages
+    HTTP_CACHE_PRIVATE_WINDOW = int(os.environ.get('HTTP_CACHE_PRIVATE_WINDOW', '1800'))  # Keeps CSRF tokens in cached pages fresh
+    
+    # Reputation history retention (see app/utils/reputation_rollups.py)
+    REPUTATION_HISTORY_RETENTION_DAYS = int(os.environ.get('REPUTATION_HISTORY_RETENTION_DAYS', '90'))  # Raw rows kept
+    REPUTATION_ROLLUP_BATCH_SIZE = int(os.environ.get('REPUTATION_ROLLUP_BATCH_SIZE', '5000'))  # History rows per transaction
+    
+    # Verification level cache (see app/utils/verification_cache.py)
+    VERIFICATION_CACHE_TTL = int(os.environ.get('VERIFICATION_CACHE_TTL', '300'))  # Longest time a level is cached
+    VERIFICATION_CACHE_SIZE = int(os.environ.get('VERIFICATION_CACHE_SIZE', '10000'))
+    
+    # Last-activity tracking (see app/utils/activity.py)
+    ACTIVITY_TRACKING_ENABLED = os.environ.get('ACTIVITY_TRACKING_ENABLED', 'true').lower() in ['true', 'on', '1']
+    ACTIVITY_FLUSH_INTERVAL = int(os.environ.get('ACTIVITY_FLUSH_INTERVAL', '60'))  # Seconds between batched writes
+    ACTIVITY_DEDUPE_WINDOW = int(os.environ.get('ACTIVITY_DEDUPE_WINDOW', '60'))  # Seconds repeat hits are ignored
+    
+    # NFL schedule calendar (see app/utils/nfl_schedule.py)
+    NFL_SCHEDULE_TIMEZONE = os.environ.get('NFL_SCHEDULE_TIMEZONE', 'US/Eastern')  # Timezone of stored game dates
+    NFL_CALENDAR_TTL = int(os.environ.get('NFL_CALENDAR_TTL', '600'))  # Seconds between calendar reloads
+    
+    # Circuit breakers for external providers (see app/utils/circuit_breaker.py)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive failures that open a circuit
+    CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_BREAKER_RESET_TIMEOUT', '30'))  # Seconds before a trial call
+    # Seconds a provider call may take; also the timeout it is called with
+    PROVIDER_LATENCY_BUDGETS = {
+        'openai_generation': AI_GENERATION_TIMEOUT,
+        'openai_moderation': float(os.environ.get('OPENAI_MODERATION_TIMEOUT', '3')),
+        'sendgrid': SENDGRID_TIMEOUT,
+        'smtp': MAIL_TIMEOUT,
+        'google_oidc': OIDC_FETCH_TIMEOUT,
+        'redis_cache': CACHE_REDIS_TIMEOUT,
+    }
+    
     # Content moderation configuration
     AI_MODERATION_ENABLED = os.environ.get('AI_MODERATION_ENABLED', 'false').lower() in ['true', 'on', '1']
     CONTENT_MODERATION_LOG_ENABLED = os.environ.get('CONTENT_MODERATION_LOG_ENABLED', 'true').lower() in ['true', 'on', '1']
@@ -105,6 +199,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    FINALIZATION_ASYNC = False
+    AI_GENERATION_BACKEND = 'fake'
+    CACHE_BACKEND = 'fake'
+    ACTIVITY_TRACKING_ENABLED = False
 
 
 config = {
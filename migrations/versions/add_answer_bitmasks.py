@@ -0,0 +1,36 @@
+"""Add packed answer bitmasks to contests and contest entries
+
+Revision ID: add_answer_bitmasks
+Revises: 20250719_214525, 4c4ff4b174d0
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_answer_bitmasks'
+down_revision = ('20250719_214525', '4c4ff4b174d0')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answer_key_set_mask', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('answer_key_yes_mask', sa.BigInteger(), nullable=True))
+
+    with op.batch_alter_table('contest_entries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answered_mask', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('yes_mask', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('contest_entries', schema=None) as batch_op:
+        batch_op.drop_column('yes_mask')
+        batch_op.drop_column('answered_mask')
+
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.drop_column('answer_key_yes_mask')
+        batch_op.drop_column('answer_key_set_mask')
@@ -0,0 +1,36 @@
+"""Add content versions to contests and leagues for HTTP caching
+
+Revision ID: add_content_versions
+Revises: add_contest_creator_index
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_versions'
+down_revision = 'add_contest_creator_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('content_updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('leagues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('content_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('leagues', schema=None) as batch_op:
+        batch_op.drop_column('content_updated_at')
+        batch_op.drop_column('content_version')
+
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.drop_column('content_updated_at')
+        batch_op.drop_column('content_version')
@@ -0,0 +1,26 @@
+"""Index contests by creator for league contest lookups
+
+Revision ID: add_contest_creator_index
+Revises: add_league_counters
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_contest_creator_index'
+down_revision = 'add_league_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.create_index('idx_contests_creator_created', ['created_by_user', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.drop_index('idx_contests_creator_created')
@@ -0,0 +1,56 @@
+"""Add contest finalization state, final entry results and league standings
+
+Revision ID: add_contest_finalization
+Revises: add_question_pick_tallies
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_contest_finalization'
+down_revision = 'add_question_pick_tallies'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('finalization_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('finalization_stage', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('finalization_started_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('finalized_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('results_notified_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('contest_entries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('final_score', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('final_rank', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('final_accuracy', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('league_memberships', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_points', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('contest_wins', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('contests_completed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('standing_rank', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('league_memberships', schema=None) as batch_op:
+        batch_op.drop_column('standing_rank')
+        batch_op.drop_column('contests_completed')
+        batch_op.drop_column('contest_wins')
+        batch_op.drop_column('total_points')
+
+    with op.batch_alter_table('contest_entries', schema=None) as batch_op:
+        batch_op.drop_column('final_accuracy')
+        batch_op.drop_column('final_rank')
+        batch_op.drop_column('final_score')
+
+    with op.batch_alter_table('contests', schema=None) as batch_op:
+        batch_op.drop_column('results_notified_at')
+        batch_op.drop_column('finalized_at')
+        batch_op.drop_column('finalization_started_at')
+        batch_op.drop_column('finalization_stage')
+        batch_op.drop_column('finalization_status')
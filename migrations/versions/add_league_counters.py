@@ -0,0 +1,40 @@
+"""Add denormalized member and contest counters to leagues
+
+Revision ID: add_league_counters
+Revises: add_reputation_rollups
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_league_counters'
+down_revision = 'add_reputation_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('leagues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('contest_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('draft_contest_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('idx_leagues_featured', ['is_active', 'is_public', 'member_count'], unique=False)
+
+    # Backfill from the current rows
+    op.execute("""
+        UPDATE leagues SET
+            member_count = (SELECT COUNT(*) FROM league_memberships WHERE league_memberships.league_id = leagues.league_id),
+            contest_count = (SELECT COUNT(*) FROM league_contests WHERE league_contests.league_id = leagues.league_id),
+            draft_contest_count = (SELECT COUNT(*) FROM league_draft_contests WHERE league_draft_contests.league_id = leagues.league_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('leagues', schema=None) as batch_op:
+        batch_op.drop_index('idx_leagues_featured')
+        batch_op.drop_column('draft_contest_count')
+        batch_op.drop_column('contest_count')
+        batch_op.drop_column('member_count')
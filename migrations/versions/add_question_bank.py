@@ -0,0 +1,41 @@
+"""Add question_bank table for pre-generated NFL questions
+
+Revision ID: add_question_bank
+Revises: add_email_outbox
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_question_bank'
+down_revision = 'add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_bank',
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('season_year', sa.Integer(), nullable=False),
+        sa.Column('week_number', sa.Integer(), nullable=False),
+        sa.Column('home_team', sa.String(length=50), nullable=False),
+        sa.Column('away_team', sa.String(length=50), nullable=False),
+        sa.Column('game', sa.String(length=120), nullable=False),
+        sa.Column('line_type', sa.String(length=20), nullable=False),
+        sa.Column('question_text', sa.String(length=500), nullable=False),
+        sa.Column('question_data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('entry_id')
+    )
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.create_index('idx_question_bank_week', ['season_year', 'week_number'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.drop_index('idx_question_bank_week')
+
+    op.drop_table('question_bank')
@@ -0,0 +1,35 @@
+"""Add question pick tallies table
+
+Revision ID: add_question_pick_tallies
+Revises: add_answer_bitmasks
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_question_pick_tallies'
+down_revision = 'add_answer_bitmasks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_pick_tallies',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('contest_id', sa.Integer(), nullable=False),
+        sa.Column('yes_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('no_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.question_id'], ),
+        sa.ForeignKeyConstraint(['contest_id'], ['contests.contest_id'], ),
+        sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_index('ix_question_pick_tallies_contest_id', 'question_pick_tallies', ['contest_id'])
+
+
+def downgrade():
+    op.drop_index('ix_question_pick_tallies_contest_id', table_name='question_pick_tallies')
+    op.drop_table('question_pick_tallies')
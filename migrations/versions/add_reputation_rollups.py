@@ -0,0 +1,52 @@
+"""Add reputation_rollups table for compacted reputation history and index history by created_at
+
+Revision ID: add_reputation_rollups
+Revises: add_question_bank
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_reputation_rollups'
+down_revision = 'add_question_bank'
+branch_labels = None
+depends_on = None
+
+
+def _history_indexes():
+    """Names of reputation_history's indexes, or None if the table doesn't exist."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('reputation_history'):
+        return None
+    return {index['name'] for index in inspector.get_indexes('reputation_history')}
+
+
+def upgrade():
+    op.create_table('reputation_rollups',
+        sa.Column('rollup_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.DateTime(), nullable=False),
+        sa.Column('min_score', sa.Integer(), nullable=False),
+        sa.Column('max_score', sa.Integer(), nullable=False),
+        sa.Column('close_score', sa.Integer(), nullable=False),
+        sa.Column('change_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+        sa.PrimaryKeyConstraint('rollup_id'),
+        sa.UniqueConstraint('user_id', 'period', 'period_start', name='uq_reputation_rollup_period')
+    )
+    # The rollup job scans history older than the retention window.
+    # reputation_history comes from `flask init-db`, which may already have
+    # created the index from the model
+    indexes = _history_indexes()
+    if indexes is not None and 'idx_reputation_history_created' not in indexes:
+        op.create_index('idx_reputation_history_created', 'reputation_history', ['created_at'])
+
+
+def downgrade():
+    if 'idx_reputation_history_created' in (_history_indexes() or ()):
+        op.drop_index('idx_reputation_history_created', table_name='reputation_history')
+    op.drop_table('reputation_rollups')
@@ -1,5 +1,6 @@
 """Main application runner for Over-Under Contests."""
 import os
+import click
 from dotenv import load_dotenv
 from app import create_app, db
 from app.models import User, Contest, Question, ContestEntry, EntryAnswer, LoginToken
@@ -168,5 +169,183 @@ def seed_data():
         print("Sample data already exists!")
 
 
+@app.cli.command()
+def pack_entry_answers():
+    """Backfill packed answer masks for all contests and entries."""
+    contests_packed = 0
+    entries_packed = 0
+    
+    for contest in Contest.query.all():
+        questions = contest.get_questions_ordered()
+        contest.refresh_answer_key_masks(questions)
+        contests_packed += 1
+    
+        for entry in contest.entries.all():
+            entry.refresh_answer_masks(questions)
+            entries_packed += 1
+    
+        db.session.commit()
+    
+    print(f"Packed answers for {contests_packed} contests and {entries_packed} entries.")
+
+
+@app.cli.command()
+def rebuild_pick_tallies():
+    """Recount per-question pick tallies from entry answers."""
+    from app.models import QuestionPickTally
+    
+    contests_rebuilt = 0
+    tallies_written = 0
+    
+    for contest in Contest.query.all():
+        tallies_written += QuestionPickTally.rebuild(contest.contest_id)
+        contests_rebuilt += 1
+        db.session.commit()
+    
+    print(f"Rebuilt {tallies_written} pick tallies across {contests_rebuilt} contests.")
+
+
+@app.cli.command()
+def finalize_contests():
+    """Finalize completed contests that have not been finalized yet."""
+    from app.utils.finalization import claimable, finalize_contest, is_ready
+    
+    # Includes runs abandoned by a process that died mid-finalization
+    pending = Contest.query.filter(claimable()).all()
+    
+    finalized = 0
+    for contest in pending:
+        if is_ready(contest) and finalize_contest(contest.contest_id):
+            finalized += 1
+    
+    print(f"Finalized {finalized} of {len(pending)} pending contests.")
+
+
+@app.cli.command()
+@click.option('--once', is_flag=True, help='Exit when no job is due instead of polling.')
+@click.option('--poll-interval', type=float, default=None, help='Seconds to wait when the queue is empty.')
+def worker(once, poll_interval):
+    """Process background jobs."""
+    from app.utils.jobs import default_worker_id, work
+    
+    worker_id = default_worker_id()
+    print(f"Worker {worker_id} started.")
+    try:
+        processed = work(worker_id, poll_interval=poll_interval, once=once)
+    except KeyboardInterrupt:
+        print(f"Worker {worker_id} stopped.")
+        return
+    
+    print(f"Worker {worker_id} processed {processed} jobs.")
+
+
+@app.cli.command()
+@click.option('--once', is_flag=True, help='Exit when the outbox is empty instead of polling.')
+@click.option('--poll-interval', type=float, default=None, help='Seconds to wait when the outbox is empty.')
+def relay_outbox(once, poll_interval):
+    """Deliver emails from the outbox."""
+    from app.utils.outbox import relay
+    
+    try:
+        processed = relay(poll_interval=poll_interval, once=once)
+    except KeyboardInterrupt:
+        print("Outbox relay stopped.")
+        return
+    
+    print(f"Outbox relay processed {processed} emails.")
+
+
+@app.cli.command()
+@click.option('--weeks-ahead', type=int, default=None, help='Upcoming weeks to fill (default QUESTION_BANK_WEEKS_AHEAD).')
+@click.option('--per-matchup', type=int, default=None, help='Questions to generate per matchup.')
+@click.option('--season', type=int, default=None, help='Fill one week of this season instead of upcoming weeks.')
+@click.option('--week', type=int, default=None, help='Week to fill with --season.')
+@click.option('--replace', is_flag=True, help='Regenerate matchups that already have questions.')
+def generate_question_bank(weeks_ahead, per_matchup, season, week, replace):
+    """Pre-generate NFL questions for upcoming weeks."""
+    from app.utils.question_bank import fill_question_bank
+    
+    results = fill_question_bank(weeks_ahead=weeks_ahead, per_matchup=per_matchup,
+                                 season_year=season, week_number=week, replace=replace)
+    if not results:
+        print("No upcoming weeks with scheduled games.")
+    for season_week, result in results.items():
+        print(f"Stored {result['stored']} questions for {season_week}.")
+        if result['failed']:
+            print(f"  No new questions for: {', '.join(result['failed'])}")
+
+
+@app.cli.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--season', type=int, required=True, help='NFL season year of the schedule.')
+@click.option('--keep-missing', is_flag=True, help='Keep stored games that are not in the file.')
+@click.option('--no-question-bank', is_flag=True, help='Do not queue question bank generation.')
+def load_nfl_schedule(path, season, keep_missing, no_question_bank):
+    """Load a season's NFL schedule from a CSV or JSON file."""
+    from app.utils.nfl_schedule import load_season, read_schedule_file
+    from app.utils.jobs import enqueue
+    
+    try:
+        counts = load_season(season, read_schedule_file(path), prune=not keep_missing)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    print(f"Loaded {season} schedule: {counts['inserted']} added, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['deleted']} removed.")
+    
+    # Only new games need questions; the job skips matchups that already have a pool,
+    # and a changed kickoff time doesn't change a matchup's questions
+    if not no_question_bank and counts['inserted']:
+        enqueue('question_bank')
+        print("Queued question bank generation for new games (run `flask worker`).")
+
+
+@app.cli.command()
+@click.option('--batch-size', type=int, default=1000, help='Reputation records per UPDATE batch.')
+def recompute_reputations(batch_size):
+    """Recompute every user's reputation score and trust level."""
+    from app.utils.reputation import ReputationCalculator
+    
+    result = ReputationCalculator.recompute_all(reason='nightly_recompute', batch_size=batch_size)
+    print(f"Checked {result['checked']} reputations ({result['created']} new): {result['updated']} updated, "
+          f"{result['score_changed']} score changes.")
+
+
+@app.cli.command()
+@click.option('--retention-days', type=int, default=None, help='Days of raw history to keep (default REPUTATION_HISTORY_RETENTION_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='History rows per transaction.')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+def rollup_reputation_history(retention_days, batch_size, max_batches):
+    """Fold old reputation history into daily and weekly rollups."""
+    from app.utils.reputation_rollups import rollup_history
+    
+    result = rollup_history(retention_days=retention_days, batch_size=batch_size, max_batches=max_batches)
+    print(f"Folded {result['folded']} history rows into {result['rollups_written']} rollup writes "
+          f"over {result['batches']} batches.")
+
+
+@app.cli.command()
+def reconcile_league_counters():
+    """Recount league members and contests, repairing drifted counters."""
+    from app.models import League
+    
+    repaired = League.reconcile_counters()
+    print(f"Repaired counters on {repaired} leagues.")
+
+
+@app.cli.command()
+@click.option('--tag', 'tags', multiple=True, help='Invalidate only values with this tag (repeatable).')
+def clear_cache(tags):
+    """Clear the application cache, or invalidate some of its tags."""
+    from app.utils.cache import get_cache
+    
+    cache = get_cache()
+    if tags:
+        print(f"Invalidated {cache.invalidate_tags(tags)} tags in the {cache.backend.name} cache.")
+    else:
+        cache.clear()
+        print(f"Cleared the {cache.backend.name} cache.")
+
+
 if __name__ == '__main__':
     app.run(debug=True)
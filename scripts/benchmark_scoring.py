@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark contest leaderboard scoring.
+
+Compares the per-entry leaderboard loop against the answer matrix engine
+(NumPy and pure Python) on an in-memory SQLite database seeded with
+synthetic entries.
+
+Usage:
+    python scripts/benchmark_scoring.py
+    python scripts/benchmark_scoring.py --sizes 1000 10000 100000 --questions 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import User, Contest, Question, ContestEntry, EntryAnswer
+from app.utils.scoring_engine import NUMPY_AVAILABLE
+
+BATCH_SIZE = 10000
+
+
+def seed_contest(entry_count, question_count, seed=42):
+    """Create a contest with synthetic entries and answers.
+
+    Args:
+        entry_count (int): Number of entries to create
+        question_count (int): Number of questions in the contest
+        seed (int): Random seed
+
+    Returns:
+        Contest: The seeded contest
+    """
+    rng = random.Random(seed)
+
+    creator = User(username='bench_creator', email='bench_creator@example.com')
+    db.session.add(creator)
+    db.session.flush()
+
+    contest = Contest(
+        contest_name=f'Benchmark {entry_count}',
+        created_by_user=creator.user_id,
+        lock_timestamp=datetime.utcnow() - timedelta(days=1)
+    )
+    db.session.add(contest)
+    db.session.flush()
+
+    questions = [
+        Question(contest_id=contest.contest_id, question_text=f'Q{i + 1}?',
+                 question_order=i + 1, correct_answer=rng.random() < 0.5)
+        for i in range(question_count)
+    ]
+    db.session.add_all(questions)
+    db.session.flush()
+
+    for start in range(0, entry_count, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, entry_count)
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'bench_user_{i}', 'email': f'bench_user_{i}@example.com'}
+            for i in range(start, stop)
+        ])
+
+    user_ids = [user_id for (user_id,) in db.session.query(User.user_id).filter(User.username.like('bench_user_%'))]
+    for start in range(0, entry_count, BATCH_SIZE):
+        db.session.execute(ContestEntry.__table__.insert(), [
+            {'contest_id': contest.contest_id, 'user_id': user_id}
+            for user_id in user_ids[start:start + BATCH_SIZE]
+        ])
+
+    entry_ids = [entry_id for (entry_id,) in db.session.query(ContestEntry.entry_id).filter_by(contest_id=contest.contest_id)]
+    answers = []
+    for entry_id in entry_ids:
+        for question in questions:
+            # Leave roughly one answer in ten blank
+            if rng.random() < 0.9:
+                answers.append({'entry_id': entry_id, 'question_id': question.question_id,
+                                'user_answer': rng.random() < 0.5})
+        if len(answers) >= BATCH_SIZE:
+            db.session.execute(EntryAnswer.__table__.insert(), answers)
+            answers = []
+    if answers:
+        db.session.execute(EntryAnswer.__table__.insert(), answers)
+
+    db.session.commit()
+    return contest
+
+
+def timed(func):
+    """Run func and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark contest leaderboard scoring')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Entry counts to benchmark')
+    parser.add_argument('--questions', type=int, default=20, help='Questions per contest')
+    parser.add_argument('--legacy-limit', type=int, default=10000,
+                        help='Skip the per-entry loop above this many entries')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    # Always take the per-entry path when calling get_leaderboard
+    app.config['MATRIX_SCORING_MIN_ENTRIES'] = float('inf')
+
+    print(f"NumPy available: {NUMPY_AVAILABLE}")
+    print(f"{'entries':>10} {'per-entry':>12} {'matrix/numpy':>14} {'matrix/python':>14}")
+
+    for size in args.sizes:
+        with app.app_context():
+            db.create_all()
+            contest = seed_contest(size, args.questions)
+            questions = contest.get_questions_ordered()
+
+            legacy = '-'
+            if size <= args.legacy_limit:
+                _, elapsed = timed(contest.get_leaderboard)
+                legacy = f'{elapsed:.3f}s'
+
+            numpy_time = '-'
+            if NUMPY_AVAILABLE:
+                _, elapsed = timed(lambda: contest.score_entries_matrix(questions, use_numpy=True))
+                numpy_time = f'{elapsed:.3f}s'
+
+            _, elapsed = timed(lambda: contest.score_entries_matrix(questions, use_numpy=False))
+            python_time = f'{elapsed:.3f}s'
+
+            print(f"{size:>10} {legacy:>12} {numpy_time:>14} {python_time:>14}")
+
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
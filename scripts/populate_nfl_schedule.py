@@ -11,8 +11,8 @@ from datetime import datetime, timedelta
 # Add the parent directory to the path so we can import the app
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import create_app, db
-from app.models import NFLSchedule
+from app import create_app
+from app.utils.nfl_schedule import load_season
 
 def populate_sample_schedule():
     """Populate the database with sample NFL schedule data."""
@@ -20,9 +20,6 @@ def populate_sample_schedule():
     app = create_app()
     
     with app.app_context():
-        # Clear existing schedule data for 2025
-        NFLSchedule.query.filter_by(season_year=2025).delete()
-        
         # Sample games for Week 1, 2025 season
         week_1_games = [
             # Thursday Night Football
@@ -48,19 +45,6 @@ def populate_sample_schedule():
             {'home': 'Falcons', 'away': 'Buccaneers', 'date': datetime(2025, 9, 8, 20, 15), 'time': '8:15 PM ET'},
         ]
         
-        # Add Week 1 games
-        for game in week_1_games:
-            schedule = NFLSchedule(
-                season_year=2025,
-                week_number=1,
-                home_team=game['home'],
-                away_team=game['away'],
-                game_date=game['date'],
-                game_time=game['time'],
-                is_playoff=False
-            )
-            db.session.add(schedule)
-        
         # Sample games for Week 2, 2025 season
         week_2_games = [
             # Thursday Night Football
@@ -86,26 +70,21 @@ def populate_sample_schedule():
             {'home': 'Buccaneers', 'away': 'Falcons', 'date': datetime(2025, 9, 15, 20, 15), 'time': '8:15 PM ET'},
         ]
         
-        # Add Week 2 games
-        for game in week_2_games:
-            schedule = NFLSchedule(
-                season_year=2025,
-                week_number=2,
-                home_team=game['home'],
-                away_team=game['away'],
-                game_date=game['date'],
-                game_time=game['time'],
-                is_playoff=False
-            )
-            db.session.add(schedule)
-        
-        # Commit all changes
-        db.session.commit()
+        # Upsert the season in one pass; unchanged games keep their rows
+        games = [dict(game, week=1) for game in week_1_games] + [dict(game, week=2) for game in week_2_games]
+        counts = load_season(2025, games)
         
         print("✅ Successfully populated NFL schedule data!")
-        print(f"   - Added {len(week_1_games)} games for Week 1, 2025")
-        print(f"   - Added {len(week_2_games)} games for Week 2, 2025")
-        print(f"   - Total: {len(week_1_games) + len(week_2_games)} games")
+        print(f"   - {len(week_1_games)} games for Week 1, 2025")
+        print(f"   - {len(week_2_games)} games for Week 2, 2025")
+        print(f"   - {counts['inserted']} added, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged, {counts['deleted']} removed")
+        
+        # Pre-generate questions for new games on the next worker run; banked matchups are kept
+        if counts['inserted']:
+            from app.utils.jobs import enqueue
+            enqueue('question_bank')
+            print("   - Queued question bank generation (run `flask worker`)")
 
 if __name__ == '__main__':
     populate_sample_schedule()
@@ -0,0 +1,45 @@
+"""Shared fixtures for the test suite."""
+import pytest
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client."""
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create and commit users by username."""
+    def make(username, **kwargs):
+        user = User(username=username, email=f'{username}@example.com', **kwargs)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def count_sql(app):
+    """Start recording the SQL statements run on the engine."""
+    def start():
+        statements = []
+        db.event.listen(db.engine, 'before_cursor_execute',
+                        lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+    return start
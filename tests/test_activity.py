@@ -0,0 +1,74 @@
+"""Tests for batched last-activity tracking (app/utils/activity.py)."""
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import UserReputation
+from app.utils.activity import ActivityTracker
+
+
+def _last_activity(user_id):
+    """Read a user's stored last activity."""
+    db.session.expire_all()
+    return UserReputation.query.filter_by(user_id=user_id).one().last_activity_at
+
+
+def test_repeat_hits_are_deduplicated(app, make_user):
+    """Test that hits within the dedupe window are kept as one pending write per user."""
+    with app.app_context():
+        known, new = make_user('known'), make_user('new')
+        tracker = ActivityTracker(app, flush_interval=3600, dedupe_window=60)
+        start = datetime.utcnow()
+        for seconds in range(0, 50, 5):
+            tracker.record(known.user_id, start + timedelta(seconds=seconds))
+        tracker.record(new.user_id, start)
+        assert len(tracker) == 2
+
+
+def test_flush_writes_one_batch(app, make_user, count_sql):
+    """Test that a flush updates existing rows in one statement and creates missing ones."""
+    with app.app_context():
+        known, new = make_user('known'), make_user('new')
+        db.session.add(UserReputation(user_id=known.user_id, last_activity_at=datetime(2020, 1, 1)))
+        db.session.commit()
+
+        tracker = ActivityTracker(app, flush_interval=3600, dedupe_window=60)
+        start = datetime.utcnow()
+        tracker.record(known.user_id, start)
+        tracker.record(known.user_id, start + timedelta(seconds=90))
+        tracker.record(new.user_id, start)
+
+        statements = count_sql()
+        assert tracker.flush() == 2
+        assert len(tracker) == 0
+        assert sum(statement.startswith('UPDATE') for statement in statements) == 1
+        assert _last_activity(known.user_id) == start + timedelta(seconds=90)
+        assert _last_activity(new.user_id) == start
+
+
+def test_older_activity_never_moves_backwards(app, make_user):
+    """Test that a late, older timestamp doesn't overwrite a newer one."""
+    with app.app_context():
+        user = make_user('known')
+        tracker = ActivityTracker(app, flush_interval=3600, dedupe_window=60)
+        start = datetime.utcnow()
+        tracker.record(user.user_id, start)
+        tracker.flush()
+
+        tracker.record(user.user_id, start - timedelta(days=1))
+        tracker.flush()
+        assert _last_activity(user.user_id) == start
+
+
+def test_exit_flush_registered_once(app, monkeypatch):
+    """Test that tracking several apps registers a single exit hook covering each tracker."""
+    from flask import Flask
+    from app.utils import activity
+
+    registered = []
+    monkeypatch.setattr(activity.atexit, 'register', registered.append)
+    monkeypatch.setattr(activity, '_exit_flush_registered', False)
+    monkeypatch.setattr(activity, '_trackers', activity.weakref.WeakSet())
+
+    trackers = [activity.init_activity_tracking(Flask(__name__)) for _ in range(2)]
+    assert registered == [activity._flush_at_exit]
+    assert set(activity._trackers) == set(trackers)
@@ -1,6 +1,15 @@
-"""Simple test script to verify the application is working."""
-import requests
+"""Tests for the application's routes.
+
+test_application checks a running server (python tests/test_app.py); the
+other tests use the Flask test client.
+"""
 import sys
+from datetime import datetime, timedelta
+
+import requests
+
+from app import db
+from app.models import Contest, ContestEntry, League, Question
 
 
 def test_application():
@@ -52,6 +61,174 @@ def test_application():
         return False
 
 
+def _login(client, user_id):
+    """Log the test client in as a user."""
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+
+def _home_league(make_user):
+    """Create a public league with an AI contest its owner entered."""
+    owner = make_user('owner')
+    league = League(league_name='Home League', created_by_user=owner.user_id, is_public=True)
+    db.session.add(league)
+    db.session.flush()
+    league.add_member(owner, is_admin=True)
+    contest = Contest(contest_name='Week 1', description='Week 1 picks', created_by_user=owner.user_id,
+                      lock_timestamp=datetime.utcnow() + timedelta(days=1), is_ai_generated=True)
+    db.session.add(contest)
+    db.session.flush()
+    db.session.add(ContestEntry(contest_id=contest.contest_id, user_id=owner.user_id))
+    db.session.commit()
+    return owner.user_id, contest.contest_id
+
+
+def test_home_page_shows_leagues_and_entries(app, client, make_user):
+    """Test that the home page lists the user's leagues, entries and AI contest total."""
+    owner_id, _ = _home_league(make_user)
+    _login(client, owner_id)
+
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'Home League' in response.data and b'Edit Entry' in response.data
+    assert b'1 total AI contests created' in response.data
+
+
+def test_home_page_sections_are_cached_until_commit(app, client, make_user, count_sql):
+    """Test that shared home page sections come from the cache and refresh on commit."""
+    from app.utils.cache import get_cache
+
+    owner_id, contest_id = _home_league(make_user)
+    _login(client, owner_id)
+    client.get('/')
+
+    statements = count_sql()
+    assert client.get('/').status_code == 200
+    # Only the user, their AI quota, league roles and entries are read live
+    assert not any('FROM leagues' in statement for statement in statements)
+    assert all('FROM contests' not in statement or 'contests.created_by_user = ?' in statement
+               for statement in statements)
+
+    db.session.add(Contest(contest_name='Week 2', description='Week 2 picks', created_by_user=owner_id,
+                           lock_timestamp=datetime.utcnow() + timedelta(days=2)))
+    db.session.commit()
+    assert get_cache().get('home:contests:1') is None
+
+    db.session.query(ContestEntry).filter_by(contest_id=contest_id).delete()
+    db.session.commit()
+    response = client.get('/')
+    assert b'Week 2' in response.data and b'Edit Entry' not in response.data
+
+
+def _finished_contest(make_user):
+    """Create a locked, answered contest in a public league."""
+    owner = make_user('owner')
+    contest = Contest(contest_name='Week 1', description='Week 1 picks', created_by_user=owner.user_id,
+                      lock_timestamp=datetime.utcnow() - timedelta(hours=1))
+    league = League(league_name='Versioned', created_by_user=owner.user_id, is_public=True)
+    db.session.add_all([contest, league])
+    db.session.flush()
+    question = Question(contest_id=contest.contest_id, question_text='Over 44.5 points?', question_order=1)
+    db.session.add(question)
+    league.add_member(owner, is_admin=True)
+    league.add_contest(contest)
+    db.session.commit()
+    question.set_answer(True)
+    db.session.commit()
+    return owner.user_id, contest.contest_id, league.league_id, question.question_id
+
+
+def test_finished_contest_page_answers_conditional_requests(app, client, make_user):
+    """Test that a finished contest page is public and 304s until its content changes."""
+    owner_id, contest_id, _, _ = _finished_contest(make_user)
+
+    response = client.get(f'/contests/{contest_id}')
+    assert response.status_code == 200
+    assert response.cache_control.public and response.cache_control.max_age == 60
+    assert 'Set-Cookie' not in response.headers
+    etag = response.headers['ETag']
+    assert client.get(f'/contests/{contest_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    db.session.add(ContestEntry(contest_id=contest_id, user_id=owner_id))
+    db.session.commit()
+    response = client.get(f'/contests/{contest_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_league_page_validators_vary_by_viewer(app, client, make_user):
+    """Test that members get private validators that change with the league's content."""
+    owner_id, _, league_id, question_id = _finished_contest(make_user)
+
+    public_etag = client.get(f'/leagues/{league_id}').headers['ETag']
+    assert client.get(f'/leagues/{league_id}', headers={'If-None-Match': public_etag}).status_code == 304
+
+    _login(client, owner_id)
+    response = client.get(f'/leagues/{league_id}', headers={'If-None-Match': public_etag})
+    assert response.status_code == 200
+    assert response.cache_control.private and response.cache_control.no_cache
+    etag = response.headers['ETag']
+    assert client.get(f'/leagues/{league_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    db.session.get(Question, question_id).set_answer(False)
+    db.session.commit()
+    assert client.get(f'/leagues/{league_id}', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_available_contests_endpoint_searches(app, client, make_user):
+    """Test that league admins can search the contests their league can add."""
+    owner, member = make_user('owner'), make_user('member')
+    league = League(league_name='Picks', created_by_user=owner.user_id)
+    db.session.add(league)
+    db.session.flush()
+    league.add_member(owner, is_admin=True)
+    league.add_member(member)
+    lock = datetime.utcnow() + timedelta(days=1)
+    db.session.add_all([Contest(contest_name='Week 2', created_by_user=owner.user_id, lock_timestamp=lock),
+                        Contest(contest_name='Member week', created_by_user=member.user_id, lock_timestamp=lock)])
+    db.session.commit()
+    _login(client, owner.user_id)
+
+    response = client.get(f'/leagues/{league.league_id}/available-contests?q=member')
+    assert response.status_code == 200
+    assert [c['contest_name'] for c in response.get_json()['contests']] == ['Member week']
+
+
+def test_generation_preview_streams_questions(app, client, make_user):
+    """Test that the preview stream sends details, each question and a done event."""
+    app.config['AI_GENERATION_BACKEND'] = 'fake'
+    _login(client, make_user('generator').user_id)
+
+    response = client.get('/contests/preview-generation/stream?week_number=4&season_year=2024&question_count=3')
+    body = response.get_data(as_text=True)
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('event: details')
+    assert body.count('event: question') == 3
+    assert 'event: done' in body
+
+
+def test_provider_health_lists_open_breakers(app, client):
+    """Test that /health/providers reports providers whose breaker is open."""
+    from app.utils.circuit_breaker import get_breaker, reset_breakers
+
+    reset_breakers()
+    moderation = get_breaker('openai_moderation')
+    for _ in range(moderation.failure_threshold):
+        moderation.record_failure(error='timeout')
+    try:
+        assert client.get('/health/providers').get_json()['degraded'] == ['openai_moderation']
+    finally:
+        reset_breakers()
+
+
+def test_cache_health_reports_backend(app, client):
+    """Test that /health/cache reports the backend and its counters."""
+    app.config['CACHE_BACKEND'] = 'fake'
+    app.extensions.pop('cache', None)
+    body = client.get('/health/cache').get_json()
+    assert body['cache']['backend'] == 'redis'
+    assert 'hit_rate' in body['cache']
+
+
 if __name__ == "__main__":
     success = test_application()
     sys.exit(0 if success else 1)
@@ -0,0 +1,27 @@
+"""Tests for buffered audit writes (app/utils/audit_writer.py)."""
+import pytest
+
+from app.models import EmailLog
+from app.utils.audit_writer import buffered_audit_writes
+
+
+def test_buffered_audit_writes_flush_every_n_rows(app):
+    """Test that email logs are buffered and inserted in bulk every N rows."""
+    with app.app_context():
+        with buffered_audit_writes(flush_every=3) as writer:
+            for i in range(4):
+                EmailLog.log_email(f'fan{i}@example.com', 'Hi', 'generic', 'smtp', 'sent')
+            # The first three were flushed together; the fourth is still buffered
+            assert EmailLog.query.count() == 3
+            assert len(writer) == 1
+        assert EmailLog.query.count() == 4
+
+
+def test_buffered_audit_writes_flush_on_error(app):
+    """Test that buffered rows are still written when the batch raises."""
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            with buffered_audit_writes():
+                EmailLog.log_email('late@example.com', 'Hi', 'generic', 'smtp', 'failed')
+                raise RuntimeError('batch failed')
+        assert EmailLog.query.filter_by(recipient_email='late@example.com').count() == 1
@@ -0,0 +1,155 @@
+"""Tests for the tagged application cache (app/utils/cache.py, app/utils/cache_backends.py)."""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Contest, ContestEntry
+from app.utils.cache import TaggedCache, create_cache, get_cache
+from app.utils.cache_backends import DiskBackend, FakeRedis, MemoryBackend, RedisBackend
+
+
+@pytest.fixture(params=['memory', 'disk', 'redis'])
+def backend(request, tmp_path):
+    """Each storage backend, with FakeRedis standing in for a server."""
+    if request.param == 'memory':
+        return MemoryBackend()
+    if request.param == 'disk':
+        return DiskBackend(str(tmp_path))
+    return RedisBackend(FakeRedis())
+
+
+def test_values_are_served_until_their_tag_changes(backend):
+    """Test that a value is served from the cache and invalidated by its tag."""
+    cache = TaggedCache(backend)
+    assert cache.get_or_set('board:1', lambda: [1, 2], tags=['contest:1']) == [1, 2]
+    assert cache.get_or_set('board:1', lambda: [3]) == [1, 2]
+
+    assert cache.invalidate_tags(['contest:1']) == 1
+    assert cache.get('board:1') is None
+    assert cache.stats()['namespaces']['board'] == {'hits': 1, 'misses': 2}
+
+
+def test_evicted_tag_invalidates_its_values(backend):
+    """Test that losing a tag's version is treated as an invalidation."""
+    cache = TaggedCache(backend)
+    cache.set('board:1', 'value', tags=['contest:1'])
+    backend.delete('t:contest:1')
+    assert cache.get('board:1') is None
+
+
+def test_concurrent_misses_compute_once(backend):
+    """Test that threads missing the same key share one computation."""
+    cache = TaggedCache(backend)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'built'
+
+    threads = [threading.Thread(target=cache.get_or_set, args=('count:1', compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.get('count:1') == 'built'
+
+
+def test_waiter_takes_the_other_workers_value(tmp_path):
+    """Test that a worker finding another's lock uses the value it stores."""
+    first = TaggedCache(DiskBackend(str(tmp_path)), lock_wait=2)
+    second = TaggedCache(DiskBackend(str(tmp_path)), lock_wait=2)
+    first.backend.add('l:count:1', 'first', 10)
+    threading.Timer(0.1, first.set, args=('count:1', 'from first')).start()
+
+    assert second.get_or_set('count:1', lambda: 'from second') == 'from first'
+    assert second.stats()['computes'] == 0
+
+
+def test_waiter_computes_after_lock_wait(tmp_path):
+    """Test that a worker stops waiting for a lock holder that never stores a value."""
+    first = TaggedCache(DiskBackend(str(tmp_path)))
+    second = TaggedCache(DiskBackend(str(tmp_path)), lock_wait=0.1)
+    first.backend.add('l:count:1', 'first', 10)
+
+    started = time.monotonic()
+    assert second.get_or_set('count:1', lambda: 'from second') == 'from second'
+    assert 0.1 <= time.monotonic() - started < 1
+    # The other worker's lock is left alone
+    assert first.backend.get_many(['l:count:1']) == {'l:count:1': 'first'}
+
+
+def test_backend_errors_are_misses():
+    """Test that a failing backend makes the cache compute rather than raise or wait."""
+    class BrokenBackend(MemoryBackend):
+        def get_many(self, keys):
+            raise ConnectionError('down')
+
+        def add(self, key, value, ttl=None):
+            raise ConnectionError('down')
+
+    cache = TaggedCache(BrokenBackend(), lock_wait=5)
+    started = time.monotonic()
+    assert cache.get_or_set('board:1', lambda: 'built', tags=['contest:1']) == 'built'
+    assert time.monotonic() - started < 1
+    assert cache.stats()['errors'] > 0
+
+
+def test_disk_workers_share_values_and_invalidations(tmp_path):
+    """Test that two workers on the same file see each other's values and invalidations."""
+    first, second = TaggedCache(DiskBackend(str(tmp_path))), TaggedCache(DiskBackend(str(tmp_path)))
+    first.set('shared', 'value', tags=['leagues'])
+    assert second.get('shared') == 'value'
+    second.invalidate_tags(['leagues'])
+    assert first.get('shared') is None
+
+
+def test_redis_without_url_falls_back_to_memory(app):
+    """Test that a Redis cache with no URL configured uses the in-process backend."""
+    app.config['CACHE_BACKEND'] = 'redis'
+    app.config['CACHE_REDIS_URL'] = None
+    assert create_cache(app).backend.name == 'memory'
+
+
+def test_commits_invalidate_and_rollbacks_do_not(app, make_user):
+    """Test that only committed changes invalidate the tags of the rows they touched."""
+    with app.app_context():
+        owner = make_user('owner')
+        contest = Contest(contest_name='Cached', created_by_user=owner.user_id,
+                          lock_timestamp=datetime.utcnow() + timedelta(days=1))
+        db.session.add(contest)
+        db.session.commit()
+        contest_id = contest.contest_id
+
+        cache = get_cache()
+        key = f'entries:{contest_id}'
+        count = lambda: ContestEntry.query.filter_by(contest_id=contest_id).count()
+        assert cache.get_or_set(key, count, tags=[f'contest:{contest_id}']) == 0
+
+        db.session.add(ContestEntry(contest_id=contest_id, user_id=owner.user_id))
+        db.session.flush()
+        db.session.rollback()
+        assert cache.get(key) == 0
+
+        db.session.add(ContestEntry(contest_id=contest_id, user_id=owner.user_id))
+        db.session.commit()
+        assert cache.get(key) is None
+        assert cache.get_or_set(key, count, tags=[f'contest:{contest_id}']) == 1
+
+
+def test_disk_cache_dir_is_private(tmp_path):
+    """Test that the disk cache tightens its own directory and refuses one it can't trust."""
+    loose = tmp_path / 'loose'
+    loose.mkdir(mode=0o777)
+    loose.chmod(0o777)
+    DiskBackend(str(loose))
+    assert loose.stat().st_mode & 0o777 == 0o700
+
+    planted = tmp_path / 'planted'
+    planted.symlink_to(loose)
+    with pytest.raises(PermissionError):
+        DiskBackend(str(planted))
@@ -0,0 +1,119 @@
+"""Tests for provider circuit breakers (app/utils/circuit_breaker.py)."""
+import time
+
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker, reset_breakers
+
+
+@pytest.fixture
+def breaker():
+    """Breaker that opens after two failures and half-opens after 50 ms."""
+    return CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05, latency_budget=1)
+
+
+@pytest.fixture
+def clean_breakers():
+    """Start and end with no process-wide breakers."""
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+def test_consecutive_failures_open_the_circuit(breaker):
+    """Test that the threshold of consecutive failures opens the circuit."""
+    breaker.record_failure(0.1, 'boom')
+    assert breaker.state == 'closed'
+    breaker.record_failure(0.1, 'boom')
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.get_metrics()['rejected'] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    """Test that only consecutive failures count."""
+    breaker.record_failure(0.1, 'boom')
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1, 'boom')
+    assert breaker.state == 'closed'
+
+
+def test_slow_calls_count_as_failures(breaker):
+    """Test that a call over the latency budget counts against the circuit."""
+    breaker.record_failure(0.1, 'boom')
+    breaker.record_success(2.5)
+    assert breaker.state == 'open'
+    assert breaker.get_metrics()['slow_calls'] == 1
+
+
+def test_half_open_allows_one_trial_and_closes_on_success(breaker):
+    """Test that one trial call is let through after the reset timeout."""
+    breaker.record_failure(error='boom')
+    breaker.record_failure(error='boom')
+    time.sleep(0.06)
+
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.2)
+    assert breaker.state == 'closed'
+
+
+def test_failed_trial_reopens_the_circuit(breaker):
+    """Test that a failing trial call opens the circuit again at once."""
+    breaker.record_failure(error='boom')
+    breaker.record_failure(error='boom')
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_failure(0.1, 'still down')
+    assert breaker.state == 'open'
+    assert breaker.get_metrics()['times_opened'] == 2
+
+
+def test_released_trial_lets_another_through(breaker):
+    """Test that a trial call given back without an outcome frees the slot."""
+    breaker.record_failure(error='boom')
+    breaker.record_failure(error='boom')
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_guard_raises_while_open(breaker):
+    """Test that guarded calls fail fast while the circuit is open."""
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            with breaker.guard():
+                raise ValueError('provider error')
+
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+
+
+def test_guard_ignores_client_errors(breaker):
+    """Test that errors is_failure rejects don't count against the provider."""
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            with breaker.guard(is_failure=lambda e: False):
+                raise ValueError('bad request')
+    assert breaker.state == 'closed'
+
+
+def test_moderation_degrades_while_openai_is_failing(app, clean_breakers):
+    """Test that moderation passes content through while its circuit is open."""
+    from app.utils.content_moderation import ContentFilter
+
+    app.config['AI_MODERATION_ENABLED'] = True
+    app.config['OPENAI_API_KEY'] = 'test-key'
+    with app.app_context():
+        moderation = get_breaker('openai_moderation')
+        for _ in range(moderation.failure_threshold):
+            moderation.record_failure(error='timeout')
+
+        result = ContentFilter().check_ai_moderation('Will the Chiefs cover?')
+        assert result.is_safe
+        assert result.reason == 'AI moderation unavailable'
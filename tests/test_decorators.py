@@ -0,0 +1,47 @@
+"""Tests for the request identity helpers (app/utils/decorators.py)."""
+from flask import session
+
+from app import db
+from app.models import League, LeagueMembership
+from app.utils.decorators import get_current_league_roles, get_current_user
+
+
+def _league_admin(make_user):
+    """Create a user who administers a league."""
+    user = make_user('member')
+    league = League(league_name='Identity League', created_by_user=user.user_id)
+    db.session.add(league)
+    db.session.commit()
+    db.session.add(LeagueMembership(league_id=league.league_id, user_id=user.user_id, is_admin=True))
+    db.session.commit()
+    user_id, league_id = user.user_id, league.league_id
+    db.session.expunge_all()
+    return user_id, league_id
+
+
+def test_current_user_loaded_once_per_request(app, make_user, count_sql):
+    """Test that the request identity cache reuses the user and league roles."""
+    with app.app_context():
+        user_id, league_id = _league_admin(make_user)
+
+        statements = count_sql()
+        with app.test_request_context('/'):
+            session['user_id'] = user_id
+            first = get_current_user()
+            assert first.user_id == user_id
+            assert get_current_user() is first
+            assert get_current_league_roles() == {league_id: 'admin'}
+            assert get_current_league_roles() == {league_id: 'admin'}
+
+        # One user lookup and one membership lookup
+        assert len(statements) == 2
+
+
+def test_anonymous_request_has_no_user(app, count_sql):
+    """Test that a request without a session user runs no queries."""
+    with app.app_context():
+        statements = count_sql()
+        with app.test_request_context('/'):
+            assert get_current_user() is None
+            assert get_current_league_roles() == {}
+        assert statements == []
@@ -0,0 +1,123 @@
+"""Tests for the concurrent email dispatcher (app/utils/email_dispatcher.py)."""
+import pytest
+
+from app import mail
+from app.models import EmailLog
+from app.utils.email_dispatcher import EmailDispatcher, RateLimiter
+
+
+@pytest.fixture
+def smtp_only(app):
+    """Send through a suppressed SMTP connection only."""
+    app.extensions['mail'].suppress = True
+    app.extensions['mail'].default_sender = 'noreply@example.com'
+    app.config['USE_SENDGRID_API'] = False
+
+
+def _messages(count):
+    """Build notification messages for `count` recipients."""
+    return [
+        {'to_email': f'fan{i}@example.com', 'subject': 'Results', 'body': 'You won!', 'email_type': 'notification'}
+        for i in range(count)
+    ]
+
+
+def test_email_dispatcher_sends_batch_over_pool(app, smtp_only):
+    """Test that the dispatcher sends and logs every message in a batch."""
+    with app.app_context():
+        messages = _messages(6)
+
+        dispatcher = EmailDispatcher(app, max_workers=3, rate_limit=0)
+        with mail.record_messages() as outbox:
+            results = dispatcher.send_batch(messages)
+        dispatcher.close()
+
+        assert results == [True] * 6
+        assert sorted(msg.recipients[0] for msg in outbox) == sorted(m['to_email'] for m in messages)
+        assert EmailLog.query.filter_by(status='sent').count() == 6
+
+
+def test_email_dispatcher_closes_connections_after_batch(app, smtp_only):
+    """Test that pooled SMTP connections don't outlive a batch."""
+    with app.app_context():
+        dispatcher = EmailDispatcher(app, max_workers=2, rate_limit=0)
+        dispatcher.send_batch(_messages(4))
+        assert dispatcher._smtp_connections == {}
+        dispatcher.close()
+
+
+@pytest.fixture
+def sendgrid_up(app, monkeypatch):
+    """Deliver every message through a working SendGrid and count SMTP connects."""
+    from app.utils import email, email_dispatcher
+
+    connects = []
+    connect = email_dispatcher.smtp_connection
+    app.extensions['mail'].suppress = True
+    app.extensions['mail'].default_sender = 'noreply@example.com'
+    app.config.update(USE_SENDGRID_API=True, SENDGRID_API_KEY='test-key')
+    monkeypatch.setattr(email, 'SENDGRID_AVAILABLE', True)
+    monkeypatch.setattr(email, 'send_email_via_sendgrid', lambda *args, **kwargs: True)
+    monkeypatch.setattr(email_dispatcher, 'smtp_connection', lambda: connects.append(1) or connect())
+    return connects
+
+
+def test_sendgrid_batches_never_connect_to_smtp(app, sendgrid_up):
+    """Test that no SMTP connection is opened while SendGrid is delivering."""
+    with app.app_context():
+        dispatcher = EmailDispatcher(app, max_workers=2, rate_limit=0)
+        assert dispatcher.send_batch(_messages(4)) == [True] * 4
+        assert sendgrid_up == []
+        dispatcher.close()
+
+
+def test_smtp_fallback_connects_once_per_thread(app, sendgrid_up, monkeypatch):
+    """Test that messages SendGrid fails to send share their thread's SMTP connection."""
+    from app.utils import email
+
+    monkeypatch.setattr(email, 'send_email_via_sendgrid', lambda *args, **kwargs: False)
+    with app.app_context():
+        dispatcher = EmailDispatcher(app, max_workers=1, rate_limit=0)
+        with mail.record_messages() as outbox:
+            assert dispatcher.send_batch(_messages(3)) == [True] * 3
+        assert len(outbox) == 3
+        assert len(sendgrid_up) == 1
+        dispatcher.close()
+
+
+def test_rate_limiter_spaces_calls():
+    """Test that the limiter hands out evenly spaced slots."""
+    import time
+
+    limiter = RateLimiter(rate=100)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.04
+
+    unlimited = RateLimiter(rate=0)
+    assert unlimited.interval == 0
+
+
+def test_smtp_sends_with_timeout_under_breaker(app, smtp_only, monkeypatch):
+    """Test that SMTP connects with the 'smtp' budget as timeout and an open circuit skips it."""
+    from app.utils import email
+    from app.utils.circuit_breaker import get_breaker, reset_breakers
+
+    reset_breakers()
+    opened = []
+    monkeypatch.setattr(email.smtplib, 'SMTP', lambda *args, **kwargs: opened.append(kwargs['timeout']))
+    app.extensions['mail'].suppress = False
+    app.config['PROVIDER_LATENCY_BUDGETS'] = dict(app.config['PROVIDER_LATENCY_BUDGETS'], smtp=2)
+
+    with app.app_context():
+        assert email.send_email_via_smtp('fan@example.com', 'Hi', 'Body') is False
+        assert opened == [2]
+
+        breaker = get_breaker('smtp')
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(error='hung')
+        assert email.send_email_via_smtp('fan@example.com', 'Hi', 'Body') is False
+        assert opened == [2]
+        assert EmailLog.query.filter_by(status='failed').count() == 2
+    reset_breakers()
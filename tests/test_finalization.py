@@ -0,0 +1,238 @@
+"""Tests for contest finalization (app/utils/finalization.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Contest, ContestEntry, EntryAnswer, Question, User
+
+
+@pytest.fixture
+def sent(app, monkeypatch):
+    """Record notification recipients instead of queueing emails."""
+    from app.utils import finalization
+
+    recipients_sent = []
+    monkeypatch.setattr(finalization, 'send_contest_notifications',
+                        lambda recipients, *args, **kwargs: recipients_sent.extend(email for email, _ in recipients))
+    app.config['FINALIZATION_ASYNC'] = False
+    return recipients_sent
+
+
+def _locked_contest():
+    """Create a locked two-question contest in a league with two entries."""
+    from app.models import League, LeagueMembership
+
+    creator = User(username='creator', email='creator@example.com')
+    db.session.add(creator)
+    db.session.commit()
+
+    contest = Contest(contest_name='Finalization Test', created_by_user=creator.user_id,
+                      lock_timestamp=datetime.utcnow() - timedelta(hours=1))
+    db.session.add(contest)
+    league = League(league_name='Finalization League', created_by_user=creator.user_id)
+    db.session.add(league)
+    db.session.commit()
+    league.add_contest(contest)
+
+    questions = [
+        Question(contest_id=contest.contest_id, question_text=f'Q{i + 1}?', question_order=i + 1)
+        for i in range(2)
+    ]
+    db.session.add_all(questions)
+    db.session.commit()
+
+    entries = []
+    for i, user_answers in enumerate([[True, True], [True, False]]):
+        user = User(username=f'player{i}', email=f'player{i}@example.com')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(LeagueMembership(league_id=league.league_id, user_id=user.user_id))
+        entry = ContestEntry(contest_id=contest.contest_id, user_id=user.user_id)
+        db.session.add(entry)
+        db.session.flush()
+        for question, user_answer in zip(questions, user_answers):
+            db.session.add(EntryAnswer(entry_id=entry.entry_id, question_id=question.question_id,
+                                       user_answer=user_answer))
+        entries.append(entry)
+    db.session.commit()
+    return contest, league, questions, entries
+
+
+def test_finalization_waits_for_complete_answer_key(app, sent):
+    """Test that nothing is finalized while a question has no answer."""
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, _, questions, _ = _locked_contest()
+        questions[0].set_answer(True)
+        db.session.commit()
+
+        assert finalization.on_answers_changed(contest) is None
+        assert contest.finalization_status != 'complete'
+        assert sent == []
+
+
+def test_finalization_stores_results_standings_and_reputation(app, sent):
+    """Test that finalization stores ranks, league standings and reputation and notifies entrants."""
+    from app.models import LeagueMembership, UserReputation
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, league, questions, entries = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+
+        assert finalization.on_answers_changed(contest) is True
+        assert contest.finalization_status == 'complete'
+        assert [(entry.final_score, entry.final_rank) for entry in entries] == [(2, 1), (1, 2)]
+        winner = LeagueMembership.query.filter_by(user_id=entries[0].user_id).first()
+        assert (winner.total_points, winner.contest_wins, winner.standing_rank) == (2 + league.win_bonus_points, 1, 1)
+        assert UserReputation.query.filter_by(user_id=entries[0].user_id).first().contest_wins == 1
+        assert sorted(sent) == ['player0@example.com', 'player1@example.com']
+
+
+def test_corrected_answer_key_refinalizes_without_emailing(app, sent):
+    """Test that correcting the key re-ranks entries but doesn't notify again."""
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, _, questions, entries = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+        finalization.on_answers_changed(contest)
+
+        questions[1].set_answer(False)
+        db.session.commit()
+        assert finalization.on_answers_changed(contest) is True
+        assert [entry.final_rank for entry in entries] == [2, 1]
+        assert len(sent) == 2
+
+
+def _change_answer_during(monkeypatch, stage, change):
+    """Run `change` and report it with on_answers_changed while `stage` runs, the first time only."""
+    from app.utils import finalization
+
+    handler = finalization.STAGE_HANDLERS[stage]
+    calls = []
+
+    def changing_stage(contest):
+        handler(contest)
+        if not calls:
+            calls.append(stage)
+            change()
+            assert finalization.on_answers_changed(contest) is None
+            assert contest.finalization_status == 'rerun'
+
+    monkeypatch.setitem(finalization.STAGE_HANDLERS, stage, changing_stage)
+    return calls
+
+
+def test_answers_changed_mid_run_are_finalized(app, sent, monkeypatch):
+    """Test that a key corrected while finalization runs is used before it completes."""
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, _, questions, entries = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+
+        def correct_key():
+            questions[1].set_answer(False)
+            db.session.commit()
+
+        calls = _change_answer_during(monkeypatch, 'rank', correct_key)
+        assert finalization.on_answers_changed(contest) is True
+        assert calls == ['rank']
+        assert contest.finalization_status == 'complete'
+        assert [entry.final_rank for entry in entries] == [2, 1]
+        assert len(sent) == 2
+
+
+def test_key_cleared_mid_run_stops_finalization(app, sent, monkeypatch):
+    """Test that a run whose answer key stops being complete is not marked complete."""
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, _, questions, _ = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+
+        def clear_answer():
+            questions[0].correct_answer = None
+            db.session.commit()
+
+        _change_answer_during(monkeypatch, 'score', clear_answer)
+        assert finalization.on_answers_changed(contest) is False
+        assert contest.finalization_status is None and contest.finalization_stage is None
+
+
+def _abandon(contest, started_at):
+    """Leave a contest as a run that stopped before any stage, with its lease taken at `started_at`."""
+    contest.finalization_status = 'running'
+    contest.finalization_started_at = started_at
+    db.session.commit()
+
+
+def test_abandoned_run_is_reclaimed_after_its_lease(app, sent):
+    """Test that a run left at 'running' by a dead process is finalized once its lease is stale."""
+    from app.utils import finalization
+
+    with app.app_context():
+        contest, _, questions, entries = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+
+        _abandon(contest, datetime.utcnow())
+        assert finalization.finalize_contest(contest.contest_id) is False
+        assert Contest.query.filter(finalization.claimable()).count() == 0
+
+        lease = app.config.get('FINALIZATION_LEASE_SECONDS', 600)
+        _abandon(contest, datetime.utcnow() - timedelta(seconds=lease + 1))
+        assert Contest.query.filter(finalization.claimable()).all() == [contest]
+        assert finalization.finalize_contest(contest.contest_id) is True
+        assert contest.finalization_status == 'complete'
+        assert [entry.final_rank for entry in entries] == [1, 2]
+
+
+def test_answer_change_queues_job_for_abandoned_run(app, sent):
+    """Test that an answer change restarts an abandoned run instead of flagging it for a rerun."""
+    from app.models import Job
+    from app.utils import finalization, jobs
+
+    with app.app_context():
+        contest, _, questions, _ = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+        _abandon(contest, None)
+
+        app.config['FINALIZATION_ASYNC'] = True
+        assert finalization.on_answers_changed(contest) is None
+        assert contest.finalization_status == 'running'
+        job = Job.query.filter_by(job_type='finalize_contest').one()
+
+        assert jobs.work('worker-a', once=True) == 1
+        assert db.session.get(Job, job.job_id).status == 'succeeded'
+        assert contest.finalization_status == 'complete'
+        assert len(sent) == 2
+
+
+def test_finalize_job_retries_while_a_run_holds_the_lease(app, sent):
+    """Test that the finalize job is retried rather than dropped while another run is live."""
+    from app.utils import finalization, jobs
+
+    with app.app_context():
+        contest, _, questions, _ = _locked_contest()
+        for question in questions:
+            question.set_answer(True)
+        db.session.commit()
+        _abandon(contest, datetime.utcnow())
+
+        with pytest.raises(jobs.JobError):
+            finalization.finalize_contest_job(contest.contest_id)
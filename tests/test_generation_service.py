@@ -0,0 +1,66 @@
+"""Tests for the contest generation service (app/utils/generation_service.py)."""
+import pytest
+
+from app.utils.ai_generation import generate_nfl_contest, prepare_nfl_generation
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.generation_service import FakeBackend, GenerationService, GenerationTimeout, get_generation_service
+
+
+@pytest.fixture
+def fake_generation(app):
+    """Generate with the canned-question backend."""
+    app.config['AI_GENERATION_BACKEND'] = 'fake'
+
+
+def test_repeat_previews_hit_the_cache(app, fake_generation):
+    """Test that the same generation request is only sent to the model once."""
+    with app.app_context():
+        questions = generate_nfl_contest(week_number=3, season_year=2024, question_count=4)
+        assert len(questions) == 4
+        assert questions[0]['line_type'] == 'spread'
+        assert generate_nfl_contest(week_number=3, season_year=2024, question_count=4) == questions
+        assert get_generation_service().backend.calls == 1
+
+
+def test_fresh_generation_skips_the_cache(app, fake_generation):
+    """Test that fresh=True always calls the model."""
+    with app.app_context():
+        generate_nfl_contest(week_number=3, season_year=2024, question_count=4)
+        generate_nfl_contest(week_number=3, season_year=2024, question_count=4, fresh=True)
+        assert get_generation_service().backend.calls == 2
+
+
+def test_slow_model_misses_the_deadline(app):
+    """Test that a slow model raises GenerationTimeout instead of holding the request."""
+    with app.app_context():
+        slow = GenerationService(FakeBackend(delay=0.5), timeout=0.1)
+        with pytest.raises(GenerationTimeout):
+            slow.generate(prepare_nfl_generation(5, 2024, 2))
+
+
+def test_queued_timeouts_are_not_provider_failures(app):
+    """Test that only calls that reached the provider are reported to the breaker."""
+    breaker = CircuitBreaker('test_generation', failure_threshold=5, latency_budget=0.05)
+    service = GenerationService(FakeBackend(delay=0.3), max_workers=1, timeout=0.1, breaker=breaker)
+    with app.app_context():
+        request = prepare_nfl_generation(5, 2024, 2)
+        with pytest.raises(GenerationTimeout):
+            service.generate(request)
+        assert breaker.get_metrics()['failures'] == 1
+
+        # Waits behind the first call's pool thread the whole time
+        with pytest.raises(GenerationTimeout):
+            service.generate(request, fresh=True)
+        assert breaker.get_metrics()['failures'] == 1
+        assert service.backend.calls == 1
+
+
+def test_timeout_within_the_latency_budget_is_released(app):
+    """Test that a deadline the provider had less than its budget of is not held against it."""
+    breaker = CircuitBreaker('test_generation', failure_threshold=1, latency_budget=10)
+    service = GenerationService(FakeBackend(delay=0.3), timeout=0.1, breaker=breaker)
+    with app.app_context():
+        with pytest.raises(GenerationTimeout):
+            service.generate(prepare_nfl_generation(5, 2024, 2))
+        assert breaker.state == 'closed'
+        assert breaker.get_metrics()['failures'] == 0
@@ -0,0 +1,57 @@
+"""Tests for contest and league content versions (app/utils/http_cache.py)."""
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Contest, ContestEntry, League, Question
+
+
+def _finished_league_contest(make_user):
+    """Create a locked, answered contest in a league."""
+    owner = make_user('owner')
+    contest = Contest(contest_name='Week 1', created_by_user=owner.user_id,
+                      lock_timestamp=datetime.utcnow() - timedelta(hours=1))
+    league = League(league_name='Versioned', created_by_user=owner.user_id, is_public=True)
+    db.session.add_all([contest, league])
+    db.session.flush()
+    question = Question(contest_id=contest.contest_id, question_text='Over 44.5 points?', question_order=1)
+    db.session.add(question)
+    league.add_member(owner, is_admin=True)
+    league.add_contest(contest)
+    db.session.commit()
+    question.set_answer(True)
+    db.session.commit()
+    return owner, contest, league, question
+
+
+def test_entries_bump_contest_and_league_versions(app, make_user):
+    """Test that a new entry changes the versions of its contest and the contest's leagues."""
+    with app.app_context():
+        owner, contest, league, _ = _finished_league_contest(make_user)
+        versions = (contest.content_version, league.content_version)
+
+        db.session.add(ContestEntry(contest_id=contest.contest_id, user_id=owner.user_id))
+        db.session.commit()
+        assert contest.content_version > versions[0] and league.content_version > versions[1]
+
+
+def test_corrected_answer_bumps_versions(app, make_user):
+    """Test that changing an answer changes the versions of pages showing it."""
+    with app.app_context():
+        _, contest, league, question = _finished_league_contest(make_user)
+        versions = (contest.content_version, league.content_version)
+
+        question.set_answer(False)
+        db.session.commit()
+        assert contest.content_version > versions[0] and league.content_version > versions[1]
+
+
+def test_rolled_back_changes_keep_versions(app, make_user):
+    """Test that a rolled-back change leaves the versions as they were."""
+    with app.app_context():
+        owner, contest, league, _ = _finished_league_contest(make_user)
+        versions = (contest.content_version, league.content_version)
+
+        db.session.add(ContestEntry(contest_id=contest.contest_id, user_id=owner.user_id))
+        db.session.flush()
+        db.session.rollback()
+        assert (contest.content_version, league.content_version) == versions
@@ -0,0 +1,85 @@
+"""Tests for the background job queue (app/utils/jobs.py)."""
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Job
+from app.utils import jobs
+
+
+def _flaky_handler(job_type, failures):
+    """Register a handler that fails its first `failures` calls."""
+    calls = []
+
+    @jobs.job_handler(job_type, on_failure=lambda value: calls.append(('gave up', value)))
+    def flaky(value):
+        calls.append(value)
+        if len(calls) <= failures:
+            raise jobs.JobError('temporary failure')
+        return {'value': value}
+
+    return calls
+
+
+def test_claimed_job_is_held_by_one_worker(app):
+    """Test that a claimed job is running and can't be claimed again."""
+    _flaky_handler('test_claim', failures=0)
+
+    with app.app_context():
+        job = jobs.enqueue('test_claim', {'value': 1})
+
+        claimed = jobs.claim_next_job('worker-a')
+        assert claimed.job_id == job.job_id
+        assert claimed.status == 'running' and claimed.attempts == 1
+        assert jobs.claim_next_job('worker-b') is None
+
+
+def test_failed_job_backs_off_then_succeeds(app):
+    """Test that a failing job is requeued with backoff and succeeds on retry."""
+    calls = _flaky_handler('test_flaky', failures=1)
+
+    with app.app_context():
+        job = jobs.enqueue('test_flaky', {'value': 7}, max_attempts=2, batch_id='batch1')
+
+        assert jobs.run_job(jobs.claim_next_job('worker-a')) is False
+        job = db.session.get(Job, job.job_id)
+        assert job.status == 'queued' and job.run_at > datetime.utcnow()
+        assert jobs.claim_next_job('worker-a') is None
+
+        # Make the retry due
+        job.run_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        assert jobs.work('worker-a', once=True) == 1
+        job = db.session.get(Job, job.job_id)
+        assert job.status == 'succeeded'
+        assert job.to_dict()['result'] == {'value': 7}
+        assert calls == [7, 7]
+        assert jobs.get_batch_status('batch1')['succeeded'] == 1
+
+
+def test_job_fails_after_max_attempts(app):
+    """Test that a job that keeps failing is marked failed and its failure hook runs."""
+    calls = _flaky_handler('test_doomed', failures=5)
+
+    with app.app_context():
+        job = jobs.enqueue('test_doomed', {'value': 3}, max_attempts=1)
+
+        assert jobs.run_job(jobs.claim_next_job('worker-a')) is False
+        job = db.session.get(Job, job.job_id)
+        assert job.status == 'failed' and job.last_error == 'temporary failure'
+        assert calls == [3, ('gave up', 3)]
+
+
+def test_stale_running_job_is_reclaimed(app):
+    """Test that a job held by a worker that stopped responding can be claimed."""
+    _flaky_handler('test_stale', failures=0)
+
+    with app.app_context():
+        jobs.enqueue('test_stale', {'value': 1})
+        job = jobs.claim_next_job('worker-a')
+        job.locked_at = datetime.utcnow() - timedelta(seconds=app.config.get('JOB_LOCK_TIMEOUT', 600) + 1)
+        db.session.commit()
+
+        reclaimed = jobs.claim_next_job('worker-b')
+        assert reclaimed.job_id == job.job_id
+        assert reclaimed.locked_by == 'worker-b' and reclaimed.attempts == 2
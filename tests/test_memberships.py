@@ -0,0 +1,132 @@
+"""Tests for league membership lookups (app/utils/memberships.py)."""
+import pytest
+from flask import session
+from sqlalchemy import update
+
+from app import db
+from app.models import League, LeagueMembership
+from app.utils.memberships import get_role
+
+
+@pytest.fixture
+def league(app, make_user):
+    """Create a public league whose owner is its admin, plus a user who hasn't joined."""
+    owner = make_user('owner')
+    make_user('joiner')
+    league = League(league_name='Cached', created_by_user=owner.user_id, is_public=True)
+    db.session.add(league)
+    db.session.flush()
+    league.add_member(owner, is_admin=True)
+    db.session.commit()
+    return league
+
+
+def _users():
+    """Get the owner and the joiner."""
+    from app.models import User
+    return User.query.filter_by(username='owner').one(), User.query.filter_by(username='joiner').one()
+
+
+def test_request_loads_roles_once(app, league, count_sql):
+    """Test that the logged-in user's roles are read once per request."""
+    owner, _ = _users()
+    with app.test_request_context('/'):
+        session['user_id'] = owner.user_id
+        assert league.is_admin(owner)
+
+        statements = count_sql()
+        assert league.is_admin(owner) and league.is_member(owner)
+        assert statements == []
+
+
+def _roles_next_request(app, league_id, user_id):
+    """Get a user's role in a new request, which gets its own app context and `g`."""
+    with app.app_context(), app.test_request_context('/'):
+        session['user_id'] = user_id
+        return get_role(league_id, user_id)
+
+
+def _use_cache_backend(app, backend):
+    """Switch the app's cache to another backend."""
+    app.config['CACHE_BACKEND'] = backend
+    app.extensions.pop('cache', None)
+
+
+def test_roles_changed_elsewhere_show_up_next_request(app, league):
+    """Test that with a per-process cache, a change committed elsewhere is seen by the next request."""
+    _use_cache_backend(app, 'memory')
+    league_id, owner_id = league.league_id, _users()[0].user_id
+    assert _roles_next_request(app, league_id, owner_id) == 'admin'
+
+    # Another worker's commit, which this process sees no events for
+    db.session.execute(
+        update(LeagueMembership).where(LeagueMembership.user_id == owner_id).values(is_admin=False)
+    )
+    db.session.commit()
+    assert _roles_next_request(app, league_id, owner_id) == 'member'
+
+
+def test_shared_cache_keeps_roles_across_requests(app, league, count_sql):
+    """Test that a shared cache serves roles to later requests until a membership commit."""
+    _use_cache_backend(app, 'fake')
+    league_id, owner_id = league.league_id, _users()[0].user_id
+    assert _roles_next_request(app, league_id, owner_id) == 'admin'
+
+    statements = count_sql()
+    assert _roles_next_request(app, league_id, owner_id) == 'admin'
+    assert not [statement for statement in statements if 'league_memberships' in statement]
+
+    membership = LeagueMembership.query.filter_by(user_id=owner_id).one()
+    membership.is_admin = False
+    db.session.commit()
+    assert _roles_next_request(app, league_id, owner_id) == 'member'
+
+
+def test_joins_and_promotions_show_up_after_commit(app, league):
+    """Test that committed membership changes invalidate cached roles."""
+    _, joiner = _users()
+    assert not league.is_member(joiner)
+
+    membership = league.add_member(joiner)
+    db.session.commit()
+    assert league.is_member(joiner) and not league.is_admin(joiner)
+
+    membership.is_admin = True
+    db.session.commit()
+    assert league.is_admin(joiner)
+
+
+def test_request_sees_one_snapshot_until_commit(app, league, count_sql):
+    """Test that the logged-in user's roles are loaded once per request and dropped on leaving."""
+    owner, joiner = _users()
+    membership = league.add_member(joiner, is_admin=True)
+    db.session.commit()
+
+    with app.test_request_context('/'):
+        session['user_id'] = joiner.user_id
+        assert league.is_admin(joiner) and league.is_member(owner)
+        statements = count_sql()
+        assert league.is_admin(joiner) and league.is_member(owner)
+        assert statements == []
+
+        league.remove_member(membership)
+        db.session.commit()
+        assert not league.is_member(joiner)
+
+
+def test_joining_twice_is_not_an_error(app, client, league, monkeypatch):
+    """Test that a second join racing the first is told it's a member instead of failing."""
+    app.config['WTF_CSRF_ENABLED'] = False
+    _, joiner = _users()
+    with client.session_transaction() as sess:
+        sess['user_id'] = joiner.user_id
+    assert client.post(f'/leagues/{league.league_id}/join').status_code == 302
+
+    # Both submits passed the membership check before either committed
+    monkeypatch.setattr(League, 'is_member', lambda self, user: False)
+    response = client.post(f'/leagues/{league.league_id}/join', follow_redirects=True)
+    assert response.status_code == 200
+    assert b'already a member' in response.data
+    assert LeagueMembership.query.filter_by(league_id=league.league_id).count() == 2
+    db.session.refresh(league)
+    assert league.get_member_count() == 2
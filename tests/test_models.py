@@ -1,29 +1,10 @@
 """Test cases for database models."""
 import pytest
 from datetime import datetime, timedelta
-from app import create_app, db
+from app import db
 from app.models import User, Contest, Question, ContestEntry, EntryAnswer, LoginToken
 
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    """Create test client."""
-    return app.test_client()
-
-
 def test_user_creation(app):
     """Test user model creation."""
     with app.app_context():
@@ -180,5 +161,435 @@ def test_contest_scoring(app):
         assert score_data['percentage'] == 50.0
 
 
+def test_packed_scoring_matches_answer_rows(app):
+    """Test that bitmask scoring agrees with entry_answers scoring."""
+    with app.app_context():
+        creator = User(username='creator', email='creator@example.com')
+        participant = User(username='participant', email='participant@example.com')
+        db.session.add_all([creator, participant])
+        db.session.commit()
+
+        contest = Contest(
+            contest_name='Packed Scoring Test',
+            created_by_user=creator.user_id,
+            lock_timestamp=datetime.utcnow() + timedelta(days=1)
+        )
+        db.session.add(contest)
+        db.session.commit()
+
+        # Q3 has no answer set yet, Q4 is left blank by the participant
+        answers_key = [True, False, None, True]
+        user_answers = [True, True, False, None]
+        questions = []
+        for i, correct_answer in enumerate(answers_key):
+            questions.append(Question(contest_id=contest.contest_id, question_text=f'Q{i + 1}?',
+                                      question_order=i + 1, correct_answer=correct_answer))
+        db.session.add_all(questions)
+        db.session.commit()
+
+        entry = ContestEntry(contest_id=contest.contest_id, user_id=participant.user_id)
+        db.session.add(entry)
+        db.session.commit()
+
+        for question, user_answer in zip(questions, user_answers):
+            if user_answer is not None:
+                db.session.add(EntryAnswer(entry_id=entry.entry_id, question_id=question.question_id,
+                                           user_answer=user_answer))
+        db.session.commit()
+
+        row_score = entry.calculate_score()
+        assert not entry.has_answer_masks()
+
+        entry.refresh_answer_masks()
+        contest.refresh_answer_key_masks()
+        db.session.commit()
+
+        assert entry.has_answer_masks()
+        assert entry.calculate_score() == row_score
+        assert row_score['correct_answers'] == 1
+
+        # Changing the answer key is picked up once the key masks are refreshed
+        questions[1].set_answer(True)
+        contest.refresh_answer_key_masks()
+        db.session.commit()
+        assert entry.calculate_score()['correct_answers'] == 2
+
+
+def test_matrix_scoring_matches_per_entry_scoring(app):
+    """Test that the answer matrix engine agrees with per-entry scoring."""
+    from app.utils.scoring_engine import NUMPY_AVAILABLE
+
+    with app.app_context():
+        creator = User(username='creator', email='creator@example.com')
+        db.session.add(creator)
+        db.session.commit()
+
+        contest = Contest(
+            contest_name='Matrix Scoring Test',
+            created_by_user=creator.user_id,
+            lock_timestamp=datetime.utcnow() + timedelta(days=1)
+        )
+        db.session.add(contest)
+        db.session.commit()
+
+        questions = [
+            Question(contest_id=contest.contest_id, question_text=f'Q{i + 1}?',
+                     question_order=i + 1, correct_answer=correct_answer)
+            for i, correct_answer in enumerate([True, False, True, None])
+        ]
+        db.session.add_all(questions)
+        db.session.commit()
+
+        # The last participant never saves any answers
+        picks = [
+            [True, False, True, True],
+            [True, True, True, False],
+            [False, False, True, None],
+            []
+        ]
+        entries = []
+        for i, user_answers in enumerate(picks):
+            user = User(username=f'player{i}', email=f'player{i}@example.com')
+            db.session.add(user)
+            db.session.flush()
+            entry = ContestEntry(contest_id=contest.contest_id, user_id=user.user_id)
+            db.session.add(entry)
+            db.session.flush()
+            for question, user_answer in zip(questions, user_answers):
+                if user_answer is not None:
+                    db.session.add(EntryAnswer(entry_id=entry.entry_id, question_id=question.question_id,
+                                               user_answer=user_answer))
+            entries.append(entry)
+        db.session.commit()
+
+        expected = {entry.entry_id: entry.calculate_score() for entry in entries}
+        for use_numpy in ([False, True] if NUMPY_AVAILABLE else [False]):
+            scores = contest.score_entries_matrix(use_numpy=use_numpy)
+            assert [score['rank'] for score in scores] == [1, 2, 2, 4]
+            for score in scores:
+                score_data = expected[score['entry_id']]
+                assert score['correct_answers'] == score_data['correct_answers']
+                assert score['percentage'] == score_data['percentage']
+
+        app.config['MATRIX_SCORING_MIN_ENTRIES'] = 1
+        leaderboard = contest.get_leaderboard()
+        assert [row['entry'].entry_id for row in leaderboard][0] == entries[0].entry_id
+        assert leaderboard[-1]['correct_answers'] == 0
+
+
+def test_tied_entries_share_rank(app):
+    """Test that tied entries share a rank and all tied winners get the league bonus."""
+    from app.models import League, LeagueMembership
+
+    with app.app_context():
+        creator = User(username='creator', email='creator@example.com')
+        db.session.add(creator)
+        db.session.commit()
+
+        contest = Contest(
+            contest_name='Tie Test',
+            created_by_user=creator.user_id,
+            lock_timestamp=datetime.utcnow() - timedelta(hours=1)
+        )
+        db.session.add(contest)
+        db.session.commit()
+
+        questions = [
+            Question(contest_id=contest.contest_id, question_text=f'Q{i + 1}?',
+                     question_order=i + 1, correct_answer=True)
+            for i in range(3)
+        ]
+        db.session.add_all(questions)
+
+        league = League(league_name='Tie League', created_by_user=creator.user_id, win_bonus_points=5)
+        db.session.add(league)
+        db.session.commit()
+        league.add_contest(contest)
+
+        # Two players tie for first with 2 correct, one trails with 1
+        users = []
+        for i, correct_count in enumerate([2, 2, 1]):
+            user = User(username=f'player{i}', email=f'player{i}@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(LeagueMembership(league_id=league.league_id, user_id=user.user_id))
+            entry = ContestEntry(contest_id=contest.contest_id, user_id=user.user_id)
+            db.session.add(entry)
+            db.session.flush()
+            for j, question in enumerate(questions):
+                db.session.add(EntryAnswer(entry_id=entry.entry_id, question_id=question.question_id,
+                                           user_answer=j < correct_count))
+            users.append(user)
+        db.session.commit()
+
+        assert [row['rank'] for row in contest.get_leaderboard()] == [1, 1, 3]
+
+        ranked = contest.get_ranked_leaderboard(per_page=2)
+        assert [row['rank'] for row in ranked] == [1, 1]
+        assert [row['position'] for row in ranked] == [1, 2]
+        assert contest.get_ranked_leaderboard(page=2, per_page=2)[0]['user_id'] == users[2].user_id
+        assert contest.get_ranked_leaderboard(method='dense_rank')[2]['rank'] == 2
+        assert contest.get_user_rank(users[2].user_id)['rank'] == 3
+        assert contest.get_user_rank(creator.user_id) is None
+
+        league_leaderboard = league.get_leaderboard()
+        assert [row['contest_wins'] for row in league_leaderboard] == [1, 1, 0]
+        assert [row['rank'] for row in league_leaderboard] == [1, 1, 3]
+
+        ranked_league = league.get_ranked_leaderboard()
+        assert [(row['user_id'], row['total_points'], row['rank']) for row in ranked_league] == [
+            (row['user'].user_id, row['total_points'], row['rank']) for row in league_leaderboard
+        ]
+        assert league.get_user_rank(users[1].user_id)['total_points'] == 7
+
+
+def _tally_contest(picks):
+    """Create a contest with one question and an entry per pick, tallying as entries are saved."""
+    from app.models import QuestionPickTally
+
+    creator = User(username='creator', email='creator@example.com')
+    db.session.add(creator)
+    db.session.commit()
+    contest = Contest(contest_name='Tally Test', created_by_user=creator.user_id,
+                      lock_timestamp=datetime.utcnow() + timedelta(days=1))
+    db.session.add(contest)
+    db.session.commit()
+    question = Question(contest_id=contest.contest_id, question_text='Q1?', question_order=1)
+    db.session.add(question)
+    db.session.commit()
+
+    entries = []
+    for i, user_answer in enumerate(picks):
+        user = User(username=f'player{i}', email=f'player{i}@example.com')
+        db.session.add(user)
+        db.session.flush()
+        entry = ContestEntry(contest_id=contest.contest_id, user_id=user.user_id)
+        db.session.add(entry)
+        db.session.flush()
+        if user_answer is not None:
+            db.session.add(EntryAnswer(entry_id=entry.entry_id, question_id=question.question_id,
+                                       user_answer=user_answer))
+            QuestionPickTally.apply_changes(contest.contest_id, [(question.question_id, None, user_answer)])
+        entries.append(entry)
+    db.session.commit()
+    return contest, question, entries
+
+
+def test_pick_tallies_count_picks_and_blanks(app):
+    """Test that the pick distribution counts yes, no and blank entries."""
+    with app.app_context():
+        contest, question, entries = _tally_contest([True, True, False, None])
+
+        picks = contest.get_pick_distribution()[question.question_id]
+        assert (picks['yes'], picks['no'], picks['blank']) == (2, 1, 1)
+
+
+def test_consensus_leaves_out_the_entrys_own_pick(app):
+    """Test that an entry's picks are compared with the other entries' picks only."""
+    with app.app_context():
+        _, _, entries = _tally_contest([True, True, False, None])
+
+        # One other Yes against one No is an even split
+        assert entries[0].get_consensus_stats()['split'] == 1
+        assert entries[2].get_consensus_stats()['contrarian'] == 1
+        assert entries[2].get_consensus_stats()['consensus_pct'] == 0
+
+
+def test_lone_pick_has_no_consensus(app):
+    """Test that the only pick on a question is neither consensus nor contrarian."""
+    with app.app_context():
+        _, _, entries = _tally_contest([True, None])
+        assert entries[0].get_consensus_stats() == {'consensus': 0, 'contrarian': 0, 'split': 1, 'consensus_pct': 0}
+
+
+def test_pick_tallies_follow_changed_picks(app):
+    """Test that incremental tally changes match a full recount."""
+    from app.models import QuestionPickTally
+
+    with app.app_context():
+        contest, question, entries = _tally_contest([True, True, False, None])
+
+        answer = EntryAnswer.query.filter_by(entry_id=entries[1].entry_id).first()
+        answer.user_answer = False
+        QuestionPickTally.apply_changes(contest.contest_id, [(question.question_id, True, False)])
+        db.session.commit()
+
+        picks = contest.get_pick_distribution()[question.question_id]
+        assert (picks['yes'], picks['no']) == (1, 2)
+        assert picks['yes_pct'] == 33.3
+
+        QuestionPickTally.rebuild(contest.contest_id)
+        db.session.commit()
+        picks = contest.get_pick_distribution()[question.question_id]
+        assert (picks['yes'], picks['no']) == (1, 2)
+
+
+def test_racing_first_picks_add_to_the_winners_tally(app):
+    """Test that a first pick losing the race to create the tally row is added to it."""
+    from app.models import QuestionPickTally
+
+    with app.app_context():
+        contest, question, entries = _tally_contest([None, None])
+        db.session.add(EntryAnswer(entry_id=entries[1].entry_id, question_id=question.question_id,
+                                   user_answer=False))
+        db.session.commit()
+
+        # Another writer creates the row between our UPDATE missing it and our INSERT
+        def other_writer(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO question_pick_tallies') and not raced:
+                raced.append(True)
+                conn.exec_driver_sql(
+                    'INSERT INTO question_pick_tallies (question_id, contest_id, yes_count, no_count, updated_at) '
+                    'VALUES (?, ?, 0, 1, ?)', (question.question_id, contest.contest_id, datetime.utcnow())
+                )
+
+        raced = []
+        db.event.listen(db.engine, 'before_cursor_execute', other_writer)
+        try:
+            db.session.add(EntryAnswer(entry_id=entries[0].entry_id, question_id=question.question_id,
+                                       user_answer=True))
+            QuestionPickTally.apply_changes(contest.contest_id, [(question.question_id, None, True)])
+            db.session.commit()
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', other_writer)
+
+        assert raced
+        picks = contest.get_pick_distribution()[question.question_id]
+        assert (picks['yes'], picks['no']) == (1, 1)
+
+
+def test_first_pick_on_untallied_question_counts_earlier_answers(app):
+    """Test that a question answered before tallies existed gets a full count."""
+    from app.models import QuestionPickTally
+
+    with app.app_context():
+        contest, question, entries = _tally_contest([None, None])
+        db.session.add(EntryAnswer(entry_id=entries[1].entry_id, question_id=question.question_id,
+                                   user_answer=False))
+        db.session.add(EntryAnswer(entry_id=entries[0].entry_id, question_id=question.question_id,
+                                   user_answer=True))
+        QuestionPickTally.apply_changes(contest.contest_id, [(question.question_id, None, True)])
+        db.session.commit()
+
+        picks = contest.get_pick_distribution()[question.question_id]
+        assert (picks['yes'], picks['no']) == (1, 1)
+
+
+def _counted_league():
+    """Create a league with an admin, a member and one contest."""
+    from app.models import League
+
+    owner = User(username='owner', email='owner@example.com')
+    joiner = User(username='joiner', email='joiner@example.com')
+    db.session.add_all([owner, joiner])
+    db.session.commit()
+
+    league = League(league_name='Counted', created_by_user=owner.user_id, is_public=True)
+    db.session.add(league)
+    db.session.flush()
+    league.add_member(owner, is_admin=True)
+    league.add_member(joiner)
+    contest = Contest(contest_name='Week 1', description='Week 1 picks', created_by_user=owner.user_id,
+                      lock_timestamp=datetime.utcnow() + timedelta(days=1))
+    db.session.add(contest)
+    db.session.flush()
+    league.add_contest(contest)
+    db.session.commit()
+    return league, joiner, contest
+
+
+def test_league_counters_follow_changes(app):
+    """Test that league counters track added and removed members and contests."""
+    with app.app_context():
+        league, joiner, contest = _counted_league()
+        assert (league.get_member_count(), league.get_contest_count(), league.get_draft_contest_count()) == (2, 1, 0)
+
+        league.remove_member(league.memberships.filter_by(user_id=joiner.user_id).one())
+        assert league.remove_contest(contest)
+        db.session.commit()
+        assert (league.get_member_count(), league.get_contest_count()) == (1, 0)
+
+
+def test_league_counters_reconcile_drift(app):
+    """Test that reconciliation repairs rows added behind the model's back."""
+    from app.models import League, LeagueMembership
+
+    with app.app_context():
+        league, joiner, _ = _counted_league()
+        league.remove_member(league.memberships.filter_by(user_id=joiner.user_id).one())
+        db.session.commit()
+
+        db.session.add(LeagueMembership(league_id=league.league_id, user_id=joiner.user_id))
+        db.session.commit()
+        assert League.reconcile_counters() == 1
+        db.session.refresh(league)
+        assert league.get_member_count() == 2
+        assert League.reconcile_counters() == 0
+
+
+def _league_with_contests():
+    """Create a league and contests by its members, an outsider and a retired one."""
+    from app.models import League
+
+    owner = User(username='owner', email='owner@example.com')
+    member = User(username='member', email='member@example.com')
+    outsider = User(username='outsider', email='outsider@example.com')
+    db.session.add_all([owner, member, outsider])
+    db.session.commit()
+
+    league = League(league_name='Picks', created_by_user=owner.user_id)
+    db.session.add(league)
+    db.session.flush()
+    league.add_member(owner, is_admin=True)
+    league.add_member(member)
+
+    lock = datetime.utcnow() + timedelta(days=1)
+    contests = {}
+    for name, creator, active in [('Week 1', owner, True), ('Week 2', owner, True), ('Member week', member, True),
+                                  ('Outside week', outsider, True), ('Retired week', owner, False)]:
+        contests[name] = Contest(contest_name=name, created_by_user=creator.user_id, lock_timestamp=lock,
+                                 is_active=active, created_at=datetime.utcnow() + timedelta(minutes=len(contests)))
+    db.session.add_all(contests.values())
+    db.session.flush()
+    league.add_contest(contests['Week 1'])
+    db.session.commit()
+    return league, contests
+
+
+def test_available_league_contests_use_one_query(app, count_sql):
+    """Test that contests a league can add are found, newest first, in one query."""
+    with app.app_context():
+        league, _ = _league_with_contests()
+        league.league_id  # Load the league expired by the commit before counting
+
+        statements = count_sql()
+        result = league.search_available_contests()
+        assert len(statements) == 1
+        assert [c['contest_name'] for c in result['contests']] == ['Member week', 'Week 2']
+        assert result['contests'][0]['creator'] == 'member' and not result['has_more']
+
+
+def test_available_league_contests_page_and_search(app):
+    """Test paging and searching by contest name or creator."""
+    with app.app_context():
+        league, _ = _league_with_contests()
+
+        page = league.search_available_contests(per_page=1)
+        assert page['has_more']
+        assert league.search_available_contests(page=2, per_page=1)['contests'][0]['contest_name'] == 'Week 2'
+        assert [c['contest_name'] for c in league.search_available_contests(search='OWNER')['contests']] == ['Week 2']
+
+
+def test_can_add_contest_only_for_members_active_contests(app):
+    """Test that only active, not yet added contests by members can be added."""
+    with app.app_context():
+        league, contests = _league_with_contests()
+
+        assert league.can_add_contest(contests['Week 2'].contest_id)
+        assert not league.can_add_contest(contests['Week 1'].contest_id)
+        assert not league.can_add_contest(contests['Outside week'].contest_id)
+        assert not league.can_add_contest(contests['Retired week'].contest_id)
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
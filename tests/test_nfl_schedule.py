@@ -0,0 +1,50 @@
+"""Tests for NFL schedule loading and the week calendar (app/utils/nfl_schedule.py)."""
+from datetime import datetime
+
+import pytest
+
+from app.models import NFLSchedule
+from app.utils.nfl_schedule import get_calendar, load_season
+
+
+@pytest.fixture
+def games():
+    """Two week 1 games and one week 2 game of the 2030 season."""
+    return [
+        {'week': 1, 'home': 'Chiefs', 'away': 'Ravens', 'date': '2030-09-05T20:15', 'time': '8:15 PM ET'},
+        {'week': 1, 'home': 'Bills', 'away': 'Jets', 'date': '2030-09-08T13:00', 'time': '1:00 PM ET'},
+        {'week': 2, 'home': 'Eagles', 'away': 'Giants', 'date': '2030-09-12T20:15', 'time': '8:15 PM ET'},
+    ]
+
+
+def test_calendar_finds_the_current_week(app, games):
+    """Test that the calendar maps dates to the week being played."""
+    with app.app_context():
+        assert load_season(2030, games) == {'inserted': 3, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+
+        calendar = get_calendar()
+        assert calendar.current_week(datetime(2030, 9, 1)) == (2030, 1)
+        assert calendar.current_week(datetime(2030, 9, 9)) == (2030, 2)
+        assert calendar.current_week(datetime(2030, 10, 1)) is None
+
+
+def test_reloading_a_season_upserts_in_place(app, games):
+    """Test that a reload updates moved games, keeps their IDs and deletes dropped games."""
+    with app.app_context():
+        load_season(2030, games)
+        first_id = NFLSchedule.query.filter_by(home_team='Chiefs').one().schedule_id
+
+        games[1]['date'] = '2030-09-08T16:25'
+        assert load_season(2030, games[:2]) == {'inserted': 0, 'updated': 1, 'unchanged': 1, 'deleted': 1}
+        assert NFLSchedule.query.filter_by(home_team='Chiefs').one().schedule_id == first_id
+        assert get_calendar().first_kickoff(2030, 2) is None
+
+
+def test_suggested_lock_time_is_first_kickoff(app, games):
+    """Test that contests lock at the week's first kickoff, converted to UTC."""
+    from app.utils.ai_generation import get_suggested_lock_time
+
+    with app.app_context():
+        load_season(2030, games)
+        # 8:15 PM EDT = 00:15 UTC
+        assert get_suggested_lock_time('NFL', 1, 2030) == datetime(2030, 9, 6, 0, 15)
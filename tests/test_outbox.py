@@ -0,0 +1,66 @@
+"""Tests for the email outbox (app/utils/outbox.py)."""
+from datetime import datetime
+
+from app import db
+from app.models import OutboxEmail
+from app.utils import email
+from app.utils.email import send_contest_notifications, send_login_email
+from app.utils.outbox import relay_batch
+
+RECIPIENTS = [('fan1@example.com', None), ('fan2@example.com', None), ('bounce@example.com', None)]
+
+
+class FlakyDispatcher:
+    """Dispatcher that fails every address starting with 'bounce'."""
+
+    def send_batch(self, messages):
+        return [not m['to_email'].startswith('bounce') for m in messages]
+
+
+def test_outbox_emails_commit_with_the_caller(app):
+    """Test that queued emails are rolled back with the caller's transaction."""
+    with app.app_context():
+        send_contest_notifications(RECIPIENTS, 'Big Game', 'results', commit=False)
+        db.session.rollback()
+        assert OutboxEmail.query.count() == 0
+
+        assert send_contest_notifications(RECIPIENTS, 'Big Game', 'results') == 3
+        assert OutboxEmail.query.filter_by(status='pending').count() == 3
+
+
+def test_outbox_relay_delivers_in_batches(app):
+    """Test that the relay claims and sends at most one batch at a time."""
+    with app.app_context():
+        send_contest_notifications(RECIPIENTS, 'Big Game', 'results')
+
+        assert relay_batch(batch_size=2, dispatcher=FlakyDispatcher()) == {'sent': 2, 'retrying': 0, 'failed': 0}
+        assert OutboxEmail.query.filter_by(status='sent').count() == 2
+
+
+def test_outbox_failed_email_backs_off(app):
+    """Test that a failed email is retried only after its backoff."""
+    with app.app_context():
+        send_contest_notifications(RECIPIENTS, 'Big Game', 'results')
+        relay_batch(batch_size=2, dispatcher=FlakyDispatcher())
+
+        assert relay_batch(dispatcher=FlakyDispatcher()) == {'sent': 0, 'retrying': 1, 'failed': 0}
+        bounced = OutboxEmail.query.filter_by(to_email='bounce@example.com').one()
+        assert bounced.status == 'pending' and bounced.attempts == 1
+        assert bounced.next_attempt_at > datetime.utcnow()
+
+        # Nothing is due until the backoff expires
+        assert relay_batch(dispatcher=FlakyDispatcher()) == {'sent': 0, 'retrying': 0, 'failed': 0}
+
+
+def test_login_email_is_queued_for_the_relay(app, monkeypatch):
+    """Test that a login link is queued in the request and sent by the relay."""
+    sent = []
+    monkeypatch.setattr(email, 'send_email', lambda to_email, **kwargs: sent.append(to_email) or True)
+
+    with app.test_request_context('/'):
+        assert send_login_email('player@example.com', 'token') is True
+        assert sent == []
+        assert OutboxEmail.query.one().status == 'pending'
+
+        assert relay_batch(dispatcher=FlakyDispatcher()) == {'sent': 1, 'retrying': 0, 'failed': 0}
+        assert OutboxEmail.query.one().status == 'sent'
@@ -0,0 +1,84 @@
+"""Tests for the OIDC provider metadata cache (app/utils/provider_metadata.py)."""
+import pytest
+
+from app.utils.provider_metadata import ProviderMetadataCache, parse_max_age
+
+URL = 'https://accounts.example.com/.well-known/openid-configuration'
+
+
+class FakeResponse:
+    def __init__(self, document, headers):
+        self.document = document
+        self.headers = headers
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.document
+
+
+class FakeSession:
+    """Serves a new document version per call, or fails."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise OSError('network down')
+        return FakeResponse({'issuer': 'https://accounts.example.com', 'version': self.calls},
+                            {'Cache-Control': 'public, max-age=3600', 'Age': '600'})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Metadata cache on a temp dir with a fake HTTP session."""
+    cache = ProviderMetadataCache(cache_dir=str(tmp_path), refresh_ahead=0)
+    cache._session = FakeSession()
+    return cache
+
+
+def test_parse_max_age_subtracts_age():
+    """Test that max-age is read from Cache-Control, less the response's Age."""
+    assert parse_max_age({'Cache-Control': 'public, max-age=3600', 'Age': '600'}) == 3000
+    assert parse_max_age({'Cache-Control': 'no-cache'}) == 0
+    assert parse_max_age({}) is None
+
+
+def test_metadata_is_cached_for_max_age(cache):
+    """Test that repeat lookups are served from memory."""
+    assert cache.get(URL)['version'] == 1
+    assert cache.get(URL)['version'] == 1
+    assert cache._session.calls == 1
+
+
+def test_metadata_is_shared_on_disk(cache, tmp_path):
+    """Test that another worker starts warm from the on-disk copy."""
+    cache.get(URL)
+
+    other = ProviderMetadataCache(cache_dir=str(tmp_path), refresh_ahead=0)
+    other._session = FakeSession()
+    assert other.get(URL)['version'] == 1
+    assert other._session.calls == 0
+
+
+def test_disk_copy_is_ignored_outside_a_private_dir(cache, tmp_path):
+    """Test that a copy planted behind a symlinked cache dir is never read."""
+    cache.get(URL)
+
+    planted = tmp_path.parent / f'{tmp_path.name}-planted'
+    planted.symlink_to(tmp_path)
+    other = ProviderMetadataCache(cache_dir=str(planted), refresh_ahead=0)
+    other._session = FakeSession()
+    assert other.get(URL)['version'] == 1
+    assert other._session.calls == 1
+
+
+def test_failed_refresh_keeps_last_good_copy(cache):
+    """Test that a failed forced refresh falls back to the last good copy."""
+    cache.get(URL)
+    cache._session.fail = True
+    assert cache.get(URL, force=True)['version'] == 1
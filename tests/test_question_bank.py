@@ -0,0 +1,110 @@
+"""Tests for the weekly NFL question bank (app/utils/question_bank.py)."""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import NFLSchedule, QuestionBankEntry
+from app.utils.ai_generation import ContestGenerationError, generate_nfl_contest
+from app.utils.generation_service import get_generation_service
+from app.utils.question_bank import fill_question_bank
+
+
+@pytest.fixture
+def week_seven(app):
+    """Schedule three week 7 games and generate with the canned backend."""
+    app.config['AI_GENERATION_BACKEND'] = 'fake'
+    kickoff = datetime.utcnow() + timedelta(days=3)
+    for home, away in [('Chiefs', 'Ravens'), ('Bills', 'Dolphins'), ('Eagles', 'Cowboys')]:
+        db.session.add(NFLSchedule(season_year=2025, week_number=7, home_team=home,
+                                   away_team=away, game_date=kickoff))
+    db.session.commit()
+
+
+def test_fill_generates_each_matchup_once(app, week_seven):
+    """Test that filling the bank calls the model once per matchup and skips full ones next time."""
+    assert fill_question_bank(per_matchup=4) == {'2025-7': {'stored': 12, 'failed': []}}
+    assert get_generation_service().backend.calls == 3
+    assert QuestionBankEntry.query.filter_by(game='Ravens vs Chiefs').count() == 4
+
+    assert fill_question_bank(per_matchup=4) == {'2025-7': {'stored': 0, 'failed': []}}
+    assert get_generation_service().backend.calls == 3
+
+
+def test_contests_are_sampled_from_the_bank(app, week_seven):
+    """Test that a banked week is served without the model, spread over games and line types."""
+    fill_question_bank(per_matchup=4)
+    backend = get_generation_service().backend
+
+    questions = generate_nfl_contest(week_number=7, season_year=2025, question_count=6)
+    assert len(questions) == 6
+    assert backend.calls == 3
+    assert len({question['game'] for question in questions}) == 3
+    assert sum(question['line_type'] == 'spread' for question in questions) == 3
+
+
+def test_weeks_without_a_bank_use_the_model(app, week_seven):
+    """Test that an unbanked week still goes to the model."""
+    fill_question_bank(per_matchup=4)
+    backend = get_generation_service().backend
+
+    generate_nfl_contest(week_number=8, season_year=2025, question_count=2)
+    assert backend.calls == 4
+
+
+def test_fill_runs_no_more_matchups_than_pool_threads(app, week_seven, monkeypatch):
+    """Test that matchups are handed to the service no faster than its pool can start them."""
+    app.config['AI_GENERATION_WORKERS'] = 2
+    service = get_generation_service()
+    generate = service.generate
+    running, most = [0], [0]
+    lock = threading.Lock()
+
+    def counted(request, fresh=False):
+        with lock:
+            running[0] += 1
+            most[0] = max(most[0], running[0])
+        try:
+            time.sleep(0.05)
+            return generate(request, fresh=fresh)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(service, 'generate', counted)
+    assert fill_question_bank(per_matchup=4)['2025-7']['stored'] == 12
+    assert most[0] == 2
+
+
+def test_failed_matchups_are_reported_and_keep_their_pool(app, week_seven, monkeypatch):
+    """Test that a matchup whose generation fails is reported and its old questions kept."""
+    fill_question_bank(per_matchup=4)
+    service = get_generation_service()
+    generate = service.generate
+
+    def flaky(request, fresh=False):
+        if request.matchup == 'Dolphins vs Bills':
+            raise ContestGenerationError('AI service error')
+        return generate(request, fresh=fresh)
+
+    monkeypatch.setattr(service, 'generate', flaky)
+    assert fill_question_bank(per_matchup=4, replace=True) == {
+        '2025-7': {'stored': 8, 'failed': ['Dolphins vs Bills']}
+    }
+    assert QuestionBankEntry.query.filter_by(game='Dolphins vs Bills').count() == 4
+
+
+def test_schedule_reload_only_generates_new_games(app, week_seven):
+    """Test that the fill queued after a schedule load skips matchups whose kickoff merely moved."""
+    from app.utils.nfl_schedule import load_season
+
+    fill_question_bank(per_matchup=4)
+    kickoff = datetime.utcnow() + timedelta(days=4)
+    matchups = [('Chiefs', 'Ravens'), ('Bills', 'Dolphins'), ('Eagles', 'Cowboys'), ('Jets', 'Patriots')]
+    games = [{'week': 7, 'home': home, 'away': away, 'date': kickoff} for home, away in matchups]
+    assert load_season(2025, games)['inserted'] == 1
+
+    assert fill_question_bank(per_matchup=4) == {'2025-7': {'stored': 4, 'failed': []}}
+    assert get_generation_service().backend.calls == 4
@@ -0,0 +1,77 @@
+"""Tests for bulk reputation recomputes (app/utils/reputation.py)."""
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import (Contest, ContestEntry, League, LeagueMembership, ReputationHistory, User,
+                        UserReputation, UserVerification)
+from app.utils.reputation import ReputationCalculator
+
+
+def _reputations(with_records=True):
+    """Create a verified creator, an active player and an idle user, with reputation rows by default."""
+    creator = User(username='creator', email='creator@example.com')
+    player = User(username='player', email='player@example.com')
+    idle = User(username='idle', email='idle@example.com')
+    db.session.add_all([creator, player, idle])
+    db.session.commit()
+
+    for i in range(3):
+        contest = Contest(contest_name=f'Contest {i}', created_by_user=creator.user_id,
+                          lock_timestamp=datetime.utcnow() + timedelta(days=1))
+        db.session.add(contest)
+        db.session.flush()
+        db.session.add(ContestEntry(contest_id=contest.contest_id, user_id=player.user_id,
+                                    final_rank=1 if i == 0 else 4, final_score=3, final_accuracy=60.0))
+    league = League(league_name='League', created_by_user=creator.user_id)
+    db.session.add(league)
+    db.session.flush()
+    db.session.add(LeagueMembership(league_id=league.league_id, user_id=player.user_id))
+    db.session.add(UserVerification(user_id=creator.user_id, verification_type='identity',
+                                    verification_level='enhanced', status='approved',
+                                    approved_at=datetime.utcnow()))
+    if with_records:
+        for user in (creator, player, idle):
+            db.session.add(UserReputation(user_id=user.user_id))
+    db.session.commit()
+
+
+def _snapshot(rep):
+    """Get the fields a recompute sets."""
+    return (rep.reputation_score, rep.trust_level, rep.contests_participated, rep.contest_wins,
+            rep.verification_level)
+
+
+def test_bulk_recompute_matches_refresh(app):
+    """Test that the bulk recompute gives refresh_metrics' results."""
+    with app.app_context():
+        _reputations()
+
+        assert ReputationCalculator.recompute_all() == {'created': 0, 'checked': 3, 'updated': 2, 'score_changed': 2}
+        bulk = {rep.user_id: _snapshot(rep) for rep in UserReputation.query.all()}
+
+        for rep in UserReputation.query.all():
+            rep.refresh_metrics()
+            assert bulk[rep.user_id] == _snapshot(rep)
+
+
+def test_bulk_recompute_logs_only_score_changes(app):
+    """Test that history rows are written for changed scores only and a rerun writes nothing."""
+    with app.app_context():
+        _reputations()
+
+        ReputationCalculator.recompute_all()
+        assert ReputationHistory.query.count() == 2
+
+        assert ReputationCalculator.recompute_all() == {'created': 0, 'checked': 3, 'updated': 0, 'score_changed': 0}
+        assert ReputationHistory.query.count() == 2
+
+
+def test_bulk_recompute_creates_missing_records(app):
+    """Test that users without a reputation record get one with recomputed metrics."""
+    with app.app_context():
+        _reputations(with_records=False)
+
+        assert ReputationCalculator.recompute_all() == {'created': 3, 'checked': 3, 'updated': 2, 'score_changed': 2}
+        player = UserReputation.query.join(User).filter(User.username == 'player').one()
+        assert (player.contests_participated, player.contest_wins) == (3, 1)
+        assert UserReputation.query.join(User).filter(User.username == 'idle').one().reputation_score == 100
@@ -0,0 +1,48 @@
+"""Tests for reputation history rollups (app/utils/reputation_rollups.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import ReputationHistory, ReputationRollup
+from app.utils.reputation_rollups import get_score_series, rollup_history
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture
+def history(app, make_user):
+    """Write three changes 100 days ago, one 99 days ago and one 5 days ago."""
+    user = make_user('charted')
+    scores = [(NOW - timedelta(days=100, hours=2), 110), (NOW - timedelta(days=100, hours=1), 90),
+              (NOW - timedelta(days=100), 120), (NOW - timedelta(days=99), 105),
+              (NOW - timedelta(days=5), 130)]
+    previous = 100
+    for created_at, score in scores:
+        db.session.add(ReputationHistory(user_id=user.user_id, old_score=previous, new_score=score,
+                                         change_reason='test', created_at=created_at))
+        previous = score
+    db.session.commit()
+    return user.user_id
+
+
+def test_rollup_folds_old_history_in_batches(app, history):
+    """Test that rows past retention are folded into daily rollups in batches."""
+    result = rollup_history(retention_days=90, batch_size=2, now=NOW)
+    assert result['folded'] == 4 and result['batches'] == 2
+    assert ReputationHistory.query.count() == 1
+    assert ReputationRollup.query.filter_by(period='day').count() == 2
+
+    first_day = ReputationRollup.query.filter_by(period='day').order_by(ReputationRollup.period_start).first()
+    assert (first_day.min_score, first_day.max_score, first_day.close_score, first_day.change_count) == (90, 120, 120, 3)
+    assert rollup_history(retention_days=90, now=NOW)['folded'] == 0
+
+
+def test_rollup_keeps_chart_series(app, history):
+    """Test that daily and weekly score series are the same before and after a rollup."""
+    daily = get_score_series(history, 'day')
+    weekly = get_score_series(history, 'week')
+
+    rollup_history(retention_days=90, batch_size=2, now=NOW)
+    assert get_score_series(history, 'day') == daily
+    assert get_score_series(history, 'week') == weekly
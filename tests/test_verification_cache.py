@@ -0,0 +1,63 @@
+"""Tests for the verification level cache (app/utils/verification_cache.py)."""
+import pytest
+
+from app import db
+from app.models import UserVerification
+from app.utils.verification_cache import get_verification_cache
+from app.utils.verification_checks import VerificationChecker
+
+
+@pytest.fixture
+def enhanced_required(app):
+    """Require enhanced verification to create contests and cache levels for a week."""
+    app.config['REQUIRE_VERIFICATION_FOR_CONTESTS'] = True
+    app.config['MINIMUM_VERIFICATION_LEVEL_CONTESTS'] = 'enhanced'
+    app.config['VERIFICATION_CACHE_TTL'] = 7 * 24 * 3600
+
+
+def _verified(make_user):
+    """Create a user with approved basic and day-long enhanced verifications."""
+    admin = make_user('admin', is_admin=True)
+    user = make_user('member')
+    assert VerificationChecker.can_create_contest(user.user_id)[0] is False
+
+    basic = UserVerification(user_id=user.user_id, verification_type='email', verification_level='basic')
+    enhanced = UserVerification(user_id=user.user_id, verification_type='identity', verification_level='enhanced')
+    db.session.add_all([basic, enhanced])
+    db.session.commit()
+    basic.approve(admin.user_id)
+    enhanced.approve(admin.user_id, expires_in_days=1)
+    return admin, user, enhanced
+
+
+def test_approval_updates_cached_level(app, make_user, enhanced_required, count_sql):
+    """Test that approvals invalidate the cached level and later checks don't query."""
+    with app.app_context():
+        _, user, _ = _verified(make_user)
+        assert VerificationChecker.can_create_contest(user.user_id)[0] is True
+
+        statements = count_sql()
+        VerificationChecker.can_create_contest(user.user_id)
+        VerificationChecker.can_participate_in_contest(user.user_id)
+        assert statements == []
+
+
+def test_cached_level_lapses_with_expiry(app, make_user, enhanced_required):
+    """Test that the cached entry is only valid until the verification expires."""
+    with app.app_context():
+        _, user, enhanced = _verified(make_user)
+        VerificationChecker.can_create_contest(user.user_id)
+
+        level, valid_until = get_verification_cache()._entries[user.user_id]
+        assert level == 'enhanced' and valid_until == enhanced.expires_at
+
+
+def test_revocation_drops_cached_level(app, make_user, enhanced_required):
+    """Test that revoking a verification lowers the cached level at once."""
+    with app.app_context():
+        admin, user, enhanced = _verified(make_user)
+        VerificationChecker.can_create_contest(user.user_id)
+
+        enhanced.revoke(admin.user_id, 'Documents withdrawn')
+        assert get_verification_cache().get_level(user.user_id) == 'basic'
+        assert VerificationChecker.can_create_contest(user.user_id)[0] is False